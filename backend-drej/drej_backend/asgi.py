@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Las vistas de usuarios/views_async.py (RENIEC, estado de recomendaciones y
+polling de resultados) solo liberan el worker mientras esperan IO cuando
+el proyecto se sirve con un servidor ASGI, por ejemplo:
+
+    uvicorn drej_backend.asgi:application --workers 2 --port 8000
 """
 
 import os
@@ -3,7 +3,7 @@
 
 import os
 from celery import Celery
-from celery.schedules import crontab
+from celery.signals import beat_init
 
 # Establecer el módulo de configuración de Django por defecto
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drej_backend.settings')
@@ -18,18 +18,46 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Buscará archivos tasks.py en cada app
 app.autodiscover_tasks()
 
+# ============================================
+# PERFILES DE WORKER (uno por cola, ver CELERY_TASK_QUEUES en settings)
+# ============================================
+# Cada cola se consume con su propio worker para que SMTP lento y Groq
+# lento no se bloqueen entre sí. Concurrencia y prefetch son por worker:
+#
+# email: I/O de SMTP, tareas cortas y muchas en ráfaga (recuperación de
+# contraseña). Hilos baratos y algo de prefetch para vaciar picos:
+#   celery -A drej_backend worker -Q email -n email@%h \
+#       --pool=threads --concurrency=20 --prefetch-multiplier=4
+#
+# scoring: motor de recomendaciones, ~1 s de espera a Groq por tarea.
+# Prefetch 1 para que una tarea lenta no retenga otras ya reservadas; la
+# concurrencia la limita el rate limit de Groq, no la CPU:
+#   celery -A drej_backend worker -Q scoring -n scoring@%h \
+#       --pool=threads --concurrency=8 --prefetch-multiplier=1
+#
+# mantenimiento (y la cola por defecto 'celery'): limpiezas periódicas,
+# de a una para no competir con la BD en horario de examen:
+#   celery -A drej_backend worker -Q mantenimiento,celery -n mantenimiento@%h \
+#       --concurrency=1 --prefetch-multiplier=1
+#
+# En desarrollo un único worker puede consumir todas las colas:
+#   celery -A drej_backend worker -Q celery,email,scoring,mantenimiento
+#
+# Las colas email y scoring tienen prioridad (x-max-priority=10): con
+# prefetch bajo, una tarea con priority=8 adelanta a las de priority=3.
+
 # Tarea de prueba para verificar que Celery funciona
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
 
-# Configuración de tareas periódicas (opcional)
-# Descomentar si quieres tareas programadas
-"""
-app.conf.beat_schedule = {
-    'limpiar-tokens-expirados': {
-        'task': 'usuarios.tasks.limpiar_tokens_expirados',
-        'schedule': crontab(hour=2, minute=0),  # Todos los días a las 2 AM
-    },
-}
-"""
\ No newline at end of file
+# Tareas periódicas: CELERY_BEAT_SCHEDULE en settings (purgas de
+# mantenimiento por lotes, ver usuarios/mantenimiento.py). Un único beat:
+#   celery -A drej_backend beat -l info
+
+
+@beat_init.connect
+def reconstruir_filtro_al_arrancar(sender, **kwargs):
+    # El intervalo de beat empieza a contar al arrancar: sin esto el filtro
+    # de unicidad no existiría hasta UNICIDAD_FILTRO_TTL segundos después
+    sender.app.send_task('reconstruir_filtro_unicidad')
@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from celery.schedules import crontab
+from kombu import Queue
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,12 +49,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'usuarios.middleware.MetricasMiddleware',  # primero: mide la petición completa
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'usuarios.middleware.FijacionPrimariaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,19 +84,100 @@ WSGI_APPLICATION = 'drej_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'mssql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST'),
-        'PORT': '',
+# Conexiones persistentes: cada proceso/hilo reutiliza su conexión durante
+# DB_CONN_MAX_AGE segundos en lugar de abrir una (login + TLS contra SQL
+# Server) por petición. CONN_HEALTH_CHECKS verifica la conexión reutilizada
+# al empezar cada petición, así un failover o un reinicio de SQL Server no
+# deja errores en la primera consulta.
+#
+# Ajuste por entorno (variables de entorno):
+# - desarrollo / runserver: DB_CONN_MAX_AGE=0 (una conexión por petición)
+# - gunicorn con workers sync o gthread: 60-300; conexiones abiertas =
+#   workers x hilos, debe caber en el máximo del servidor
+# - workers de Celery: igual que el web; el fixup de Django cierra las
+#   vencidas antes y después de cada tarea
+# - ASGI (uvicorn): las vistas sync corren en un solo hilo, una conexión
+#   persistente por proceso
+#
+# Pooling ODBC: pyodbc deja activado el pooling del driver manager, pero
+# unixODBC solo lo aplica con `Pooling = Yes` en [ODBC] y `CPTimeout` en la
+# sección del driver de /etc/odbcinst.ini. Cubre las conexiones que Django
+# cierra (DB_CONN_MAX_AGE=0, hilos que terminan). Medición:
+# `python manage.py benchmark_conexiones`.
+CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# DB_ENGINE=sqlite solo para benchmarks/pruebas de carga locales
+# (ver usuarios/rendimiento/); las tablas se crean con
+# `manage.py sembrar_datos_prueba --crear-tablas`
+if config('DB_ENGINE', default='mssql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': CONN_HEALTH_CHECKS,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'mssql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST'),
+            'PORT': '',
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                'driver': config('DB_ODBC_DRIVER', default='ODBC Driver 17 for SQL Server'),
+                # Segundos para abrir la conexión y reintentos si falla
+                # (p. ej. durante un failover)
+                'connection_timeout': config('DB_CONNECTION_TIMEOUT', default=15, cast=int),
+                'connection_retries': config('DB_CONNECTION_RETRIES', default=3, cast=int),
+                'connection_retry_backoff_time': 2,
+                # 0 = sin límite; en producción acota las consultas colgadas
+                'query_timeout': config('DB_QUERY_TIMEOUT', default=0, cast=int),
+                # Parámetros ODBC extra (p. ej. "Encrypt=yes;TrustServerCertificate=no")
+                'extra_params': config('DB_EXTRA_PARAMS', default=''),
+            },
+        }
+    }
+
+# Réplica de solo lectura para dashboards, listados y resultados (ver
+# usuarios/replicas.py). En SQL Server, una secundaria legible del grupo de
+# disponibilidad (ApplicationIntent=ReadOnly la acepta también el listener).
+# Sin DB_REPLICA_HOST (o DB_REPLICA_NAME con SQLite) todo lee de la primaria.
+if config('DB_ENGINE', default='mssql') == 'sqlite':
+    if config('DB_REPLICA_NAME', default=''):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': config('DB_REPLICA_NAME'),
+            'TEST': {'MIRROR': 'default'},
+        }
+elif config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': config('DB_REPLICA_HOST'),
         'OPTIONS': {
-            'driver': 'ODBC Driver 17 for SQL Server',
+            **DATABASES['default']['OPTIONS'],
+            'extra_params': ';'.join(filter(None, [
+                'ApplicationIntent=ReadOnly', config('DB_EXTRA_PARAMS', default='')
+            ])),
         },
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_ROUTERS = ['usuarios.replicas.ReplicaRouter']
+
+# Las pruebas (usuarios/tests) necesitan las tablas managed=False: el runner
+# las crea en la BD de prueba cuando no es SQL Server
+TEST_RUNNER = 'usuarios.tests.runner.RunnerTablasNoGestionadas'
+
+# Segundos que un usuario lee de la primaria tras escribir; debe superar el
+# retraso habitual de la réplica
+REPLICA_FIJACION_SEGUNDOS = config('REPLICA_FIJACION_SEGUNDOS', default=30, cast=int)
 
 
 # Password validation
@@ -145,9 +231,66 @@ CORS_ALLOW_CREDENTIALS = True
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        # check-dni / check-email (por IP; un colegio suele salir por una sola IP)
+        "unicidad": config('THROTTLE_UNICIDAD', default='120/min'),
+    },
 }
 
+# Cache compartida (throttling, unicidad, etc.)
+#
+# REQUISITO en producción (varios workers de gunicorn y de Celery): un
+# backend compartido entre procesos, p. ej.:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+#
+# Con LocMemCache cada proceso tiene su propia cache y dejan de funcionar:
+# la fijación a la primaria tras escribir (réplica), la invalidación del
+# payload de cuestionarios y de las cohortes, los bloqueos de purgas,
+# archivo y filtros, y las métricas de Celery. Con la réplica configurada
+# se rechaza el arranque; en el resto, `manage.py check` da error con
+# DEBUG=False (usuarios/checks.py).
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='vocared'),
+    }
+}
+
+# Backends cuyo contenido vive en un solo proceso
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# La réplica en SQLite (DB_REPLICA_NAME) es para verificar_replica en un
+# solo proceso; un despliegue con réplica real necesita la cache compartida
+if 'replica' in DATABASES and DATABASES['replica']['ENGINE'] != 'django.db.backends.sqlite3' \
+        and CACHE_BACKEND in CACHES_POR_PROCESO:
+    raise ImproperlyConfigured(
+        'DB_REPLICA_HOST requiere una cache compartida entre procesos (CACHE_BACKEND=Redis/Memcached): '
+        'la fijación a la primaria tras una escritura se guarda en la cache'
+    )
+
+# Verificación de unicidad de DNI/email (usuarios/unicidad.py)
+UNICIDAD_CACHE_TTL = 30  # segundos que se cachea cada respuesta
+UNICIDAD_FILTRO_TTL = 300  # segundos entre reconstrucciones del filtro de Bloom (tarea periódica)
+UNICIDAD_FILTRO_TASA_ERROR = 0.01
+
+# Payload de preguntas y opciones por cuestionario (usuarios/cuestionarios.py)
+CUESTIONARIO_CACHE_TTL = 600
+
+# Importación masiva de estudiantes (usuarios/importacion.py)
+IMPORTACION_LOTE = 200  # filas por bulk_create
+IMPORTACION_MAX_FILAS = 5000
+IMPORTACION_PROCESOS_HASH = config('IMPORTACION_PROCESOS_HASH', default=0, cast=int)  # 0 = un proceso por CPU
+
+# Exportación de resultados por institución (usuarios/exportacion.py)
+EXPORTACION_LOTE = 500  # intentos por lote (uno por parámetro del IN)
+EXPORTACION_FILAS_POR_BLOQUE = 200  # filas CSV por escritura al socket
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -155,13 +298,61 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# EmailOrDNIBackend responde por todo DNI o email (PermissionDenied si no
+# autentica); ModelBackend solo ve usernames de administración ('admin')
 AUTHENTICATION_BACKENDS = [
     'usuarios.backends.EmailOrDNIBackend',  # Backend personalizado
     'django.contrib.auth.backends.ModelBackend',  # Backend por defecto de Django
 ]
 
+# Segundos que se recuerda un DNI/email inexistente en el login
+LOGIN_CACHE_NEGATIVO_TTL = 60
+
+# Hashing de contraseñas (usuarios/hashers.py)
+# El primer hasher se usa para hashes nuevos; los demás solo verifican hashes
+# antiguos, que se rehashean con el preferido en el siguiente login correcto.
+PASSWORD_HASH_ALGORITMO = config('PASSWORD_HASH_ALGORITMO', default='argon2')  # argon2 | scrypt | pbkdf2
+PASSWORD_HASH_ARGON2_TIME_COST = config('PASSWORD_HASH_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_HASH_ARGON2_MEMORY_COST = config('PASSWORD_HASH_ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+PASSWORD_HASH_ARGON2_PARALLELISM = config('PASSWORD_HASH_ARGON2_PARALLELISM', default=1, cast=int)
+PASSWORD_HASH_SCRYPT_WORK_FACTOR = config('PASSWORD_HASH_SCRYPT_WORK_FACTOR', default=2**14, cast=int)
+PASSWORD_HASH_SCRYPT_BLOCK_SIZE = config('PASSWORD_HASH_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_HASH_SCRYPT_PARALLELISM = config('PASSWORD_HASH_SCRYPT_PARALLELISM', default=1, cast=int)
+PASSWORD_HASH_PBKDF2_ITERACIONES = config('PASSWORD_HASH_PBKDF2_ITERACIONES', default=1_000_000, cast=int)
+PASSWORD_HASH_POOL_SIZE = config('PASSWORD_HASH_POOL_SIZE', default=0, cast=int)  # 0 = hashear en el hilo de la petición
+
+_HASHERS_CONFIGURABLES = {
+    'argon2': 'usuarios.hashers.Argon2HasherConfigurable',
+    'scrypt': 'usuarios.hashers.ScryptHasherConfigurable',
+    'pbkdf2': 'usuarios.hashers.PBKDF2HasherConfigurable',
+}
+if PASSWORD_HASH_ALGORITMO not in _HASHERS_CONFIGURABLES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASH_ALGORITMO debe ser uno de: {', '.join(_HASHERS_CONFIGURABLES)}"
+    )
+PASSWORD_HASHERS = [_HASHERS_CONFIGURABLES[PASSWORD_HASH_ALGORITMO]] + [
+    ruta for algoritmo, ruta in _HASHERS_CONFIGURABLES.items() if algoritmo != PASSWORD_HASH_ALGORITMO
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Métricas por petición (usuarios/middleware.py, usuarios/metricas.py)
+METRICAS_SERVER_TIMING = config('METRICAS_SERVER_TIMING', default=True, cast=bool)
+METRICAS_UMBRAL_LENTO_MS = config('METRICAS_UMBRAL_LENTO_MS', default=1000, cast=int)
+METRICAS_MAX_SQL = 100  # sentencias capturadas por petición para el log de lentas
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')  # /metrics exige Bearer; sin token solo con DEBUG
+METRICAS_CELERY_TTL_COLAS = 15  # segundos entre sondeos de la profundidad de colas en el broker
+METRICAS_CELERY_TIMEOUT_BROKER = 2  # segundos para conectar al broker al leer las colas
+
 FACTILIZA_API_TOKEN = config('FACTILIZA_API_TOKEN', default='')
 
+# Cliente HTTP async compartido (usuarios/http_cliente.py)
+HTTP_CLIENTE_MAX_CONEXIONES = config('HTTP_CLIENTE_MAX_CONEXIONES', default=200, cast=int)
+HTTP_CLIENTE_MAX_KEEPALIVE = config('HTTP_CLIENTE_MAX_KEEPALIVE', default=50, cast=int)
+HTTP_CLIENTE_KEEPALIVE_SEGUNDOS = 30
+HTTP_CLIENTE_TIMEOUT = 10
+HTTP_CLIENTE_TIMEOUT_CONEXION = 5
+
 # ============================================
 # CELERY CONFIGURATION
 # ============================================
@@ -176,7 +367,105 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos máximo por tarea
 
 # Configuración de reintentos
 CELERY_TASK_ACKS_LATE = True  # Confirmar tarea solo después de completarse
-CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Procesar una tarea a la vez
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Procesar una tarea a la vez (cada perfil de worker lo ajusta)
+
+# Colas por tipo de trabajo, para que un pico de emails (SMTP lento) no
+# retrase el cálculo de recomendaciones (Groq lento) ni al revés. Cada cola
+# la consume su propio worker: ver los perfiles en drej_backend/celery.py.
+# 'celery' queda como cola por defecto sin prioridad: RabbitMQ no permite
+# cambiar x-max-priority de una cola ya declarada.
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_QUEUES = (
+    Queue('celery', routing_key='celery'),
+    Queue('email', routing_key='email', queue_arguments={'x-max-priority': 10}),
+    Queue('scoring', routing_key='scoring', queue_arguments={'x-max-priority': 10}),
+    Queue('mantenimiento', routing_key='mantenimiento'),
+)
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = {
+    # El estudiante espera el link de recuperación: pasa delante de las confirmaciones
+    'enviar_email_recuperacion_password': {'queue': 'email', 'priority': 8},
+    'enviar_confirmacion_cambio_password': {'queue': 'email', 'priority': 3},
+    'procesar_recomendaciones_intento': {'queue': 'scoring'},
+    'limpiar_tokens_expirados': {'queue': 'mantenimiento'},
+    'drenar_emails': {'queue': 'email', 'priority': 3},
+    'purgar_datos_vencidos': {'queue': 'mantenimiento'},
+    'archivar_periodos_cerrados': {'queue': 'mantenimiento'},
+    'actualizar_filtros': {'queue': 'scoring'},
+    'reconstruir_filtros': {'queue': 'mantenimiento'},
+    'clasificar_riesgo_intento': {'queue': 'scoring'},
+    'clasificar_riesgo': {'queue': 'mantenimiento'},
+    'reconstruir_filtro_unicidad': {'queue': 'mantenimiento'},
+}
+
+# Tareas periódicas: `celery -A drej_backend beat` (un solo proceso beat)
+CELERY_BEAT_SCHEDULE = {
+    # De madrugada, fuera del horario de examen
+    'purgar-datos-vencidos': {
+        'task': 'purgar_datos_vencidos',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Mensual: mueve lo que cerró al empezar el periodo; si un mes no hay
+    # nada que archivar termina con un SELECT por tabla
+    'archivar-periodos-cerrados': {
+        'task': 'archivar_periodos_cerrados',
+        'schedule': crontab(hour=3, minute=30, day_of_month=1),
+    },
+    # Los abandonos aparecen con el tiempo, sin ninguna escritura que los dispare
+    'clasificar-riesgo': {
+        'task': 'clasificar_riesgo',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    # Después del archivo y del riesgo: los filtros por edad o nivel de
+    # riesgo cambian cada día
+    'reconstruir-filtros': {
+        'task': 'reconstruir_filtros',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    # El filtro de check-dni/check-email vive en la cache; si la cola se
+    # atrasa no se acumulan reconstrucciones viejas
+    'reconstruir-filtro-unicidad': {
+        'task': 'reconstruir_filtro_unicidad',
+        'schedule': UNICIDAD_FILTRO_TTL,
+        'options': {'expires': UNICIDAD_FILTRO_TTL},
+    },
+}
+
+# Purgas por lotes (usuarios/mantenimiento.py): DELETE TOP (n) en bucle
+# para no escalar a bloqueo de tabla en SQL Server
+MANTENIMIENTO_TAMANO_LOTE = config('MANTENIMIENTO_TAMANO_LOTE', default=1000, cast=int)
+MANTENIMIENTO_PAUSA_MS = config('MANTENIMIENTO_PAUSA_MS', default=100, cast=int)
+MANTENIMIENTO_RETENCION_TOKENS = timedelta(hours=24)
+MANTENIMIENTO_RETENCION_INTENTOS = timedelta(days=config('MANTENIMIENTO_DIAS_INTENTOS', default=30, cast=int))
+MANTENIMIENTO_RETENCION_EMAILS = timedelta(days=14)
+
+# Archivo de periodos cerrados (usuarios/archivo.py): meses en que empieza
+# cada periodo académico; [3] = año escolar, [3, 8] = semestres
+ARCHIVO_MESES_INICIO_PERIODO = [
+    int(mes) for mes in config('ARCHIVO_MESES_INICIO_PERIODO', default='3').split(',')
+]
+ARCHIVO_MAX_LOTES = config('ARCHIVO_MAX_LOTES', default=2000, cast=int)
+
+# Filtros guardados (usuarios/filtros.py): una actualización incremental
+# por ventana, no una por intento confirmado
+FILTROS_VENTANA_SEGUNDOS = config('FILTROS_VENTANA_SEGUNDOS', default=30, cast=int)
+
+# Clasificación de riesgo (usuarios/riesgo.py)
+RIESGO_PUNTAJE_BAJO = 40  # ninguna categoría llega a este puntaje (0-100)
+RIESGO_PERFIL_PLANO = 10  # puntos entre la categoría más alta y la más baja
+RIESGO_DIAS_ABANDONO = 7  # intento sin confirmar ni actividad
+if timedelta(days=RIESGO_DIAS_ABANDONO) >= MANTENIMIENTO_RETENCION_INTENTOS:
+    # La purga borraría los intentos antes de que cuenten como abandono
+    raise ImproperlyConfigured('RIESGO_DIAS_ABANDONO debe ser menor que MANTENIMIENTO_DIAS_INTENTOS')
+
+# Analítica de cohortes (usuarios/cohortes.py): cada intento confirmado
+# invalida las cohortes de su institución; el TTL cubre el resto
+COHORTES_CACHE_TTL = 900
+
+# Generar las recomendaciones en la cola 'scoring' en lugar de dentro de
+# la petición que confirma el cuestionario. El frontend consulta
+# /api/async/estudiante/resultados/<id>/estado/ hasta que estén listas.
+RECOMENDACIONES_ASINCRONAS = config('RECOMENDACIONES_ASINCRONAS', default=False, cast=bool)
 
 # ============================================
 # EMAIL CONFIGURATION
@@ -184,9 +473,9 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Procesar una tarea a la vez
 
 # Para producción con Gmail (comentar el anterior y descomentar esto)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = 'kingalonso2305@gmail.com'
 EMAIL_HOST_PASSWORD = 'lewi welv bhvp gmzb'  # Usar App Password de Gmail
 
@@ -194,6 +483,13 @@ EMAIL_HOST_PASSWORD = 'lewi welv bhvp gmzb'  # Usar App Password de Gmail
 DEFAULT_FROM_EMAIL = 'VocaRed <noreply@vocared.com>'
 EMAIL_TIMEOUT = 10
 
+# Bandeja de salida (usuarios/correo.py): mensajes por conexión SMTP, ritmo
+# máximo aceptado por el proveedor y reintentos por mensaje antes de
+# marcarlo como fallido
+EMAIL_LOTE_TAMANO = config('EMAIL_LOTE_TAMANO', default=50, cast=int)
+EMAIL_MAX_POR_MINUTO = config('EMAIL_MAX_POR_MINUTO', default=60, cast=int)
+EMAIL_MAX_INTENTOS = config('EMAIL_MAX_INTENTOS', default=5, cast=int)
+
 # URL del frontend para links de recuperación
 FRONTEND_URL = 'http://localhost:3000'  # Cambiar en producción
 PASSWORD_RESET_TIMEOUT = 3600  # 1 hora en segundos'
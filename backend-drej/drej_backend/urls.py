@@ -1,7 +1,9 @@
 from django.urls import path, include
 from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from usuarios.admin import colas_celery
 from usuarios.api import RegisterView, MeView
+from usuarios.metricas import metricas
 from django.contrib import admin
 from usuarios.password_reset_views import ( 
 solicitar_recuperacion_password,
@@ -30,8 +32,12 @@ urlpatterns = [
     path("api/auth/password-reset/validate-token/", validar_token_reset),
     path("api/auth/password-reset/confirm/", resetear_password),
     
-    # Admin
+    # Admin (admin/colas/ antes que admin/ para que no lo capture el sitio)
+    path('admin/colas/', admin.site.admin_view(colas_celery), name='admin-colas-celery'),
     path('admin/', admin.site.urls),
+
+    # Métricas en formato Prometheus
+    path('metrics', metricas),
     
     # Rutas de usuarios (registro, validaciones)
     path('api/', include('usuarios.urls')),  # ← CAMBIAR A usuarios.urls
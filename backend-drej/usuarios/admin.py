@@ -1,3 +1,27 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+
+from .metricas_celery import ESTADOS, profundidad_colas, resumen_tareas
 
 # Register your models here.
+
+
+def colas_celery(request):
+    """
+    Backlog actual por cola (leído del broker, sin cache) y resumen por
+    tarea de Celery. Se publica como admin/colas/ (ver drej_backend/urls.py)
+    """
+    try:
+        colas, error_broker = profundidad_colas(), ''
+    except Exception as e:
+        colas, error_broker = [], str(e)
+
+    contexto = {
+        **admin.site.each_context(request),
+        'title': 'Colas de Celery',
+        'colas': colas,
+        'error_broker': error_broker,
+        'tareas': resumen_tareas(),
+        'estados': ESTADOS,
+    }
+    return TemplateResponse(request, 'admin/usuarios/colas_celery.html', contexto)
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registra las comprobaciones)
+        from .metricas import instalar_medicion_sql
+        from .metricas_celery import instalar_senales_celery
+
+        # Contar consultas y tiempo en BD de cada petición (MetricasMiddleware)
+        connection_created.connect(instalar_medicion_sql, dispatch_uid='usuarios.medicion_sql')
+
+        # Espera en cola, duración y estado de las tareas de Celery
+        instalar_senales_celery()
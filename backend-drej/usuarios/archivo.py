@@ -0,0 +1,229 @@
+# usuarios/archivo.py
+"""
+Archivo de periodos académicos cerrados (tarea archivar_periodos_cerrados)
+
+tblRespuesta crece con preguntas x autosaves por estudiante y periodo y no
+se purgaba: cada periodo el DELETE de guardar_respuestas y el filtro de
+respuestas_hoy pagan más. Particionar las tablas heredadas obligaría a
+rehacer su clave primaria agrupada, así que se separan en caliente y archivo:
+
+- Caliente: tblRespuesta / tblRecomendacion, solo el periodo en curso.
+- Archivo: tblRespuestaArchivo / tblRecomendacionArchivo, columnstore con
+  COLUMNSTORE_ARCHIVE (migración 0008) y el mes AAAAMM de cada fila.
+
+Un periodo cierra cuando empieza el siguiente (ARCHIVO_MESES_INICIO_PERIODO,
+por defecto marzo: año escolar). La tarea mueve por lotes las filas de los
+intentos confirmados sin actividad desde el inicio del periodo actual. En
+SQL Server cada lote es un único DELETE TOP (n) ... OUTPUT ... INTO: una
+fila nunca queda en ambas tablas ni en ninguna.
+
+Lectura: las vistas de resultados solo consultan el archivo para intentos
+archivables (intento_archivable) que ya no tienen filas en caliente.
+
+Los resultados de filtros guardados (tblFiltroRecomendacion) referencian a
+tblRecomendacion: los de las recomendaciones que se mueven se borran antes
+y los filtros quedan sobre el periodo en curso.
+
+Métricas (cache compartida, las expone /metrics):
+- drej_archivo_filas_movidas_total{tabla}
+- drej_archivo_duracion_segundos{tabla}
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .metricas import BUCKETS_SEGUNDOS, ContadorCompartido, HistogramaCompartido
+
+logger = logging.getLogger(__name__)
+
+CLAVE_BLOQUEO = 'archivo:periodos_cerrados'
+
+# Confirmados y sin actividad desde el corte: ni se reanudan ni se puntúan
+_INTENTOS_ARCHIVABLES = """
+    SELECT IntentID FROM tblIntento
+    WHERE Confirmado = 1 AND Creado < %s
+      AND (UltimoAutosave IS NULL OR UltimoAutosave < %s)
+"""
+
+
+@dataclass
+class Movimiento:
+    tabla: str
+    archivo: str
+    pk: str
+    columnas: tuple  # de la tabla caliente, la clave primero
+    fecha: str  # columna de la que sale el mes
+    referencias: tuple = ()  # (tabla, columna) con FK a la clave: se borran antes
+
+
+MOVIMIENTOS = [
+    Movimiento(
+        'tblRespuesta', 'tblRespuestaArchivo', 'RespID',
+        ('RespID', 'IntentID', 'RespValor', 'RespFechaHora'), 'RespFechaHora',
+    ),
+    Movimiento(
+        'tblRecomendacion', 'tblRecomendacionArchivo', 'RecomendacionID',
+        ('RecomendacionID', 'IntentID', 'Carrera', 'Descripcion', 'Score', 'Nivel', 'FechaHora'), 'FechaHora',
+        referencias=(('tblFiltroRecomendacion', 'RecomendacionID'),),
+    ),
+]
+
+FILAS_ARCHIVADAS = ContadorCompartido(
+    'drej_archivo_filas_movidas_total', 'Filas movidas de las tablas calientes al archivo',
+    lambda: [{'tabla': m.tabla} for m in MOVIMIENTOS])
+DURACION_ARCHIVO = HistogramaCompartido(
+    'drej_archivo_duracion_segundos', 'Duración del archivado de cada tabla',
+    BUCKETS_SEGUNDOS + (60.0, 300.0, 900.0, 1800.0), lambda: [{'tabla': m.tabla} for m in MOVIMIENTOS])
+
+METRICAS_ARCHIVO = [FILAS_ARCHIVADAS, DURACION_ARCHIVO]
+
+
+def inicio_periodo_actual(ahora=None):
+    """Inicio (medianoche local del día 1) del periodo académico en curso"""
+    ahora = timezone.localtime(ahora)
+    meses = getattr(settings, 'ARCHIVO_MESES_INICIO_PERIODO', [3])
+    inicios = [
+        ahora.replace(year=ahora.year - atras, month=mes, day=1, hour=0, minute=0, second=0, microsecond=0)
+        for atras in (0, 1)
+        for mes in meses
+    ]
+    return max(inicio for inicio in inicios if inicio <= ahora)
+
+
+def intento_archivable(intento, corte=None):
+    """Si las filas del intento están (o estarán tras la próxima ejecución) en el archivo"""
+    corte = corte or inicio_periodo_actual()
+    ultima_actividad = max(intento.Creado, intento.UltimoAutosave or intento.Creado)
+    return intento.Confirmado and ultima_actividad < corte
+
+
+def _mover_lote_sqlserver(movimiento, corte, tamano):
+    columnas = ', '.join(movimiento.columnas)
+    salida = ', '.join(f'deleted.{c}' for c in movimiento.columnas)
+    fecha = f'deleted.{movimiento.fecha}'
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            DELETE TOP (%s) FROM {movimiento.tabla}
+            OUTPUT {salida}, YEAR({fecha}) * 100 + MONTH({fecha})
+            INTO {movimiento.archivo} ({columnas}, Mes)
+            WHERE IntentID IN ({_INTENTOS_ARCHIVABLES})
+        """, [tamano, corte, corte])
+        return cursor.rowcount
+
+
+def _mover_lote_generico(movimiento, corte, tamano):
+    """SQLite y otros motores locales: leer, insertar y borrar en la misma transacción"""
+    columnas = ', '.join(movimiento.columnas)
+    posicion_fecha = movimiento.columnas.index(movimiento.fecha)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {columnas} FROM {movimiento.tabla}
+            WHERE IntentID IN ({_INTENTOS_ARCHIVABLES})
+            ORDER BY {movimiento.pk}
+            LIMIT %s
+        """, [corte, corte, tamano])
+        filas = cursor.fetchall()
+        if not filas:
+            return 0
+
+        archivado = connection.ops.adapt_datetimefield_value(timezone.now())
+        cursor.executemany(
+            f"INSERT INTO {movimiento.archivo} ({columnas}, Mes, Archivado) "
+            f"VALUES ({', '.join(['%s'] * (len(movimiento.columnas) + 2))})",
+            [(*fila, int(str(fila[posicion_fecha])[:7].replace('-', '')), archivado) for fila in filas]
+        )
+        ids = [fila[0] for fila in filas]
+        cursor.execute(
+            f"DELETE FROM {movimiento.tabla} WHERE {movimiento.pk} IN ({', '.join(['%s'] * len(ids))})", ids
+        )
+        return len(filas)
+
+
+def _borrar_referencias(movimiento, corte, tamano):
+    """Borrar por lotes las filas que referencian a las filas archivables. Returns: filas"""
+    total = 0
+    for tabla, columna in movimiento.referencias:
+        condicion = (
+            f"{columna} IN (SELECT {movimiento.pk} FROM {movimiento.tabla} "
+            f"WHERE IntentID IN ({_INTENTOS_ARCHIVABLES}))"
+        )
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if connection.vendor == 'microsoft':
+                    cursor.execute(f"DELETE TOP (%s) FROM {tabla} WHERE {condicion}", [tamano, corte, corte])
+                else:
+                    cursor.execute(f"DELETE FROM {tabla} WHERE {condicion}", [corte, corte])
+                filas = cursor.rowcount
+            total += filas
+            if connection.vendor != 'microsoft' or filas < tamano:
+                break
+    return total
+
+
+def _mover_lote(movimiento, corte, tamano):
+    with transaction.atomic():
+        if connection.vendor == 'microsoft':
+            return _mover_lote_sqlserver(movimiento, corte, tamano)
+        return _mover_lote_generico(movimiento, corte, tamano)
+
+
+def archivar_tabla(movimiento, corte, tamano, pausa, max_lotes):
+    """Mover por lotes las filas archivables de una tabla. Returns: filas movidas"""
+    inicio = time.perf_counter()
+    corte_bd = connection.ops.adapt_datetimefield_value(corte)
+    referencias = _borrar_referencias(movimiento, corte_bd, tamano)
+    if referencias:
+        logger.info(f"[ARCHIVO] {movimiento.tabla}: {referencias} filas que la referencian borradas")
+
+    total = 0
+    for _ in range(max_lotes):
+        filas = _mover_lote(movimiento, corte_bd, tamano)
+        total += filas
+        if filas < tamano:
+            break
+        time.sleep(pausa)
+    else:
+        logger.warning(
+            f"[ARCHIVO] {movimiento.tabla} alcanzó {max_lotes} lotes, el resto queda para la próxima ejecución"
+        )
+
+    if total:
+        FILAS_ARCHIVADAS.incrementar(total, tabla=movimiento.tabla)
+    DURACION_ARCHIVO.observar(time.perf_counter() - inicio, tabla=movimiento.tabla)
+    logger.info(f"[ARCHIVO] {movimiento.tabla}: {total} filas a {movimiento.archivo} en {time.perf_counter() - inicio:.1f} s")
+    return total
+
+
+def archivar_periodos_cerrados(tamano=None, pausa=None, max_lotes=None, corte=None):
+    """
+    Mover al archivo las respuestas y recomendaciones de los periodos cerrados
+
+    Returns:
+        dict: {'corte': iso, tabla: filas movidas o {'error': mensaje}},
+        o {'omitida': motivo} si ya corre en otro worker
+    """
+    tamano = tamano or getattr(settings, 'MANTENIMIENTO_TAMANO_LOTE', 1000)
+    pausa = getattr(settings, 'MANTENIMIENTO_PAUSA_MS', 100) / 1000 if pausa is None else pausa
+    max_lotes = max_lotes or getattr(settings, 'ARCHIVO_MAX_LOTES', 2000)
+    # El corte se fija al empezar, igual para ambas tablas
+    corte = corte or inicio_periodo_actual()
+
+    if not cache.add(CLAVE_BLOQUEO, True, getattr(settings, 'MANTENIMIENTO_BLOQUEO_SEGUNDOS', 3600)):
+        return {'omitida': 'en ejecución en otro worker'}
+
+    resultados = {'corte': corte.isoformat()}
+    try:
+        for movimiento in MOVIMIENTOS:
+            try:
+                resultados[movimiento.tabla] = archivar_tabla(movimiento, corte, tamano, pausa, max_lotes)
+            except Exception as e:
+                logger.error(f"[ARCHIVO] Error archivando {movimiento.tabla}: {e}")
+                resultados[movimiento.tabla] = {'error': str(e)}
+    finally:
+        cache.delete(CLAVE_BLOQUEO)
+    return resultados
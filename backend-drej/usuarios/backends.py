@@ -1,15 +1,49 @@
 # usuarios/backends.py
+import hashlib
+import re
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+
+from .hashers import hashear_password, verificar_password
 
 User = get_user_model()
 
+DNI_REGEX = re.compile(r'^\d{8}$')
+
+
+def clave_login_desconocido(identificador):
+    """Clave de cache para identificadores (DNI/email) que no existen"""
+    digest = hashlib.sha256(identificador.strip().lower().encode('utf-8')).hexdigest()
+    return f'login:desconocido:{digest}'
+
+
 class EmailOrDNIBackend(ModelBackend):
     """
     Backend de autenticación personalizado que permite login con:
     - DNI (username)
     - Email
+
+    Cada tipo de identificador va a una búsqueda indexada distinta:
+    - 8 dígitos -> igualdad exacta sobre auth_user.username
+    - resto     -> email normalizado; en SQL Server sobre la columna
+                   calculada e indexada auth_user.email_normalizado
+                   (migración 0003), evitando el OR de dos UPPER() que
+                   obliga a recorrer toda la tabla
+
+    Los identificadores inexistentes se recuerdan unos segundos en cache
+    para absorber ráfagas de credential stuffing sin ir a la BD. Igual se
+    calcula un hash de relleno: un identificador inexistente tarda lo mismo
+    que uno con contraseña incorrecta.
+
+    Un DNI o email es siempre de este backend: si no autentica se lanza
+    PermissionDenied y django.contrib.auth.authenticate no prueba
+    ModelBackend, que repetiría la búsqueda y el hash en cada intento. ModelBackend queda solo para
+    usernames que no son DNI ni email (cuentas de administración).
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         """
@@ -18,30 +52,64 @@ class EmailOrDNIBackend(ModelBackend):
             username: Puede ser el DNI o el email del usuario
             password: Contraseña del usuario
         Returns:
-            User object si la autenticación es exitosa, None en caso contrario
+            User object si la autenticación es exitosa; None si el
+            identificador no es DNI ni email (lo resuelve ModelBackend)
+        Raises:
+            PermissionDenied: DNI o email que no autentica
         """
         if username is None or password is None:
             return None
-        
-        try:
-            # Buscar usuario por username (DNI) o email
-            user = User.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-            
-            # Verificar la contraseña
-            if user.check_password(password):
-                return user
-                
-        except User.DoesNotExist:
-            # Si no encuentra el usuario, retornar None
-            return None
-        except User.MultipleObjectsReturned:
-            # Si hay múltiples usuarios (no debería pasar), retornar None
+
+        identificador = username.strip()
+        if not self._es_propio(identificador):
             return None
-            
-        return None
-    
+
+        # La cache negativa ahorra la consulta, no el hash
+        user = None
+        clave_cache = clave_login_desconocido(identificador)
+        if not cache.get(clave_cache):
+            try:
+                user = self._buscar_usuario(identificador)
+            except User.MultipleObjectsReturned:
+                # Si hay múltiples usuarios (no debería pasar), no autenticar
+                user = None
+            else:
+                if user is None:
+                    cache.set(clave_cache, True, getattr(settings, 'LOGIN_CACHE_NEGATIVO_TTL', 60))
+
+        if user is None:
+            # Hash de relleno con el hasher configurado, como ModelBackend:
+            # sin él el tiempo de respuesta delata qué DNI/email existe
+            hashear_password(password)
+            raise PermissionDenied
+
+        # Verificar la contraseña (rehash al hasher preferido si hace falta)
+        if verificar_password(user, password) and self.user_can_authenticate(user):
+            return user
+
+        raise PermissionDenied
+
+    @staticmethod
+    def _es_propio(identificador):
+        return bool(DNI_REGEX.match(identificador)) or '@' in identificador
+
+    def _buscar_usuario(self, identificador):
+        if DNI_REGEX.match(identificador):
+            return User.objects.filter(username=identificador).first()
+
+        email = identificador.lower()
+
+        if connection.vendor == 'microsoft':
+            usuarios = list(User.objects.raw(
+                "SELECT * FROM auth_user WHERE email_normalizado = %s", [email]
+            ))
+        else:
+            usuarios = list(User.objects.filter(email__iexact=email)[:2])
+
+        if len(usuarios) > 1:
+            raise User.MultipleObjectsReturned()
+        return usuarios[0] if usuarios else None
+
     def get_user(self, user_id):
         """
         Obtener usuario por ID
@@ -49,4 +117,4 @@ class EmailOrDNIBackend(ModelBackend):
         try:
             return User.objects.get(pk=user_id)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,66 @@
+# usuarios/catalogos.py
+"""
+Cache en proceso de tablas de catálogo fijas (tblRol, tblEstadoVerificacion,
+tblNivelRiesgo)
+
+Estas tablas solo cambian con scripts SQL, así que se leen una vez por
+proceso en lugar de consultarlas en cada registro.
+"""
+import threading
+
+from .models import Rol, EstadoVerificacion, NivelRiesgo
+
+# IDs fijos de catálogo (ver scripts SQL de tblRol / tblEstadoVerificacion)
+ROL_ADMIN = 1
+ROL_ESTUDIANTE = 2
+ROL_ORIENTADOR = 3
+
+ESTADO_VERIF_PENDIENTE = 1
+ESTADO_VERIF_APROBADO = 2
+
+# tblEstadoIntento (las vistas asumen 1 = En Progreso y 2 = Completado)
+ESTADO_INTENTO_EN_PROGRESO = 1
+
+# tblNivelRiesgo (la migración 0010 los inserta si faltan)
+NIVEL_RIESGO_BAJO = 1
+NIVEL_RIESGO_MEDIO = 2
+NIVEL_RIESGO_ALTO = 3
+
+_catalogos = {}
+_lock = threading.Lock()
+
+
+def _obtener(modelo, pk):
+    filas = _catalogos.get(modelo)
+    if filas is None:
+        with _lock:
+            filas = _catalogos.get(modelo)
+            if filas is None:
+                filas = {obj.pk: obj for obj in modelo.objects.all()}
+                _catalogos[modelo] = filas
+
+    try:
+        return filas[pk]
+    except KeyError:
+        raise modelo.DoesNotExist(f"{modelo.__name__} con ID {pk} no existe")
+
+
+def obtener_rol(rol_id):
+    """Rol por ID (lanza Rol.DoesNotExist si no existe)"""
+    return _obtener(Rol, rol_id)
+
+
+def obtener_estado_verificacion(estado_id):
+    """EstadoVerificacion por ID (lanza EstadoVerificacion.DoesNotExist si no existe)"""
+    return _obtener(EstadoVerificacion, estado_id)
+
+
+def obtener_nivel_riesgo(nivel_id):
+    """NivelRiesgo por ID (lanza NivelRiesgo.DoesNotExist si no existe)"""
+    return _obtener(NivelRiesgo, nivel_id)
+
+
+def limpiar_catalogos():
+    """Descartar la cache (p. ej. después de modificar catálogos por SQL)"""
+    with _lock:
+        _catalogos.clear()
@@ -0,0 +1,31 @@
+# usuarios/checks.py
+"""
+Comprobaciones de configuración (manage.py check)
+
+usuarios.E001: cache por proceso (LocMemCache) sin DEBUG. Varios workers
+con caches separadas rompen todo lo que se coordina por la cache.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Lo que deja de funcionar entre procesos con una cache local
+DEPENDIENTES = [
+    'fijación a la primaria tras escribir (replicas.py)',
+    'invalidación del payload de cuestionarios (cuestionarios.py)',
+    'versiones de cohortes (cohortes.py)',
+    'bloqueos de purgas, archivo, filtros y riesgo',
+    'métricas compartidas de Celery (metricas_celery.py)',
+]
+
+
+@register(Tags.caches)
+def cache_compartida(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in getattr(settings, 'CACHES_POR_PROCESO', ()):
+        return []
+    return [Error(
+        f'La cache por defecto ({backend}) no se comparte entre procesos',
+        hint='Configure CACHE_BACKEND/CACHE_LOCATION con Redis o Memcached. Dependen de ella: '
+             + '; '.join(DEPENDIENTES),
+        id='usuarios.E001',
+    )]
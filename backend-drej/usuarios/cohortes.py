@@ -0,0 +1,311 @@
+# usuarios/cohortes.py
+"""
+Analítica de cohortes para orientadores (vista analitica_cohorte)
+
+Una cohorte son los estudiantes de una institución, distrito, provincia o
+región (InstiDistrito / InstiProvincia / InstiRegion), opcionalmente
+acotados por edad. Los nombres se repiten entre regiones (hay distritos y
+provincias homónimos), así que un distrito se identifica con su provincia y
+región y una provincia con su región: el valor de la cohorte es una tupla
+(ver NIVELES y valor_de_institucion). No hay columna de grado: la edad ('15', '15-17', '16+',
+la misma sintaxis que los filtros guardados) hace de aproximación, y la
+respuesta trae el desglose por edad.
+
+Para cada cohorte, sobre el último intento confirmado de cada estudiante:
+- distribución de puntajes por categoría: media, percentiles e histograma
+- carreras más recomendadas
+- curva de completitud: % de estudiantes con un intento confirmado, semana
+  a semana desde el inicio del periodo
+- desglose por edad: estudiantes, completados y media por categoría
+
+Consultas: estudiantes (con su primer y último intento confirmado), matriz
+de puntajes (puntajes.matriz_puntajes_consulta, una fila por intento) y
+carreras en caliente y en archivo. Todo lo demás es NumPy sobre arrays,
+sin bucles por estudiante.
+
+El resultado se cachea por cohorte durante COHORTES_CACHE_TTL. Cada
+intento confirmado cambia la versión de las cohortes de su institución
+(invalidar_intento) y la siguiente petición recalcula.
+"""
+import hashlib
+import logging
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Avg, Count, Max, Min, Q
+from django.utils import timezone
+
+from .archivo import inicio_periodo_actual
+from .filtros import FiltroError, condicion_edad
+from .models import Estudiante, InstitucionEducativa, Intento, Recomendacion, RecomendacionArchivo
+from .puntajes import CATEGORIAS, matriz_puntajes_consulta
+
+logger = logging.getLogger(__name__)
+
+# Nivel de la cohorte -> campos de Estudiante que la identifican, del más
+# específico al más general
+NIVELES = {
+    'institucion': ('Insti_id',),
+    'distrito': ('Insti__InstiDistrito', 'Insti__InstiProvincia', 'Insti__InstiRegion'),
+    'provincia': ('Insti__InstiProvincia', 'Insti__InstiRegion'),
+    'region': ('Insti__InstiRegion',),
+}
+
+# Campo -> atributo de InstitucionEducativa
+_ATRIBUTOS = {
+    'Insti_id': 'InstiID',
+    'Insti__InstiDistrito': 'InstiDistrito',
+    'Insti__InstiProvincia': 'InstiProvincia',
+    'Insti__InstiRegion': 'InstiRegion',
+}
+
+# Nombre (parámetro y respuesta) de los campos que califican al primero
+CALIFICADORES = {'Insti__InstiProvincia': 'provincia', 'Insti__InstiRegion': 'region'}
+
+PERCENTILES = [10, 25, 50, 75, 90]
+BORDES_HISTOGRAMA = np.linspace(0, 100, 11)
+TOP_CARRERAS = 10
+
+
+class CohorteError(Exception):
+    """Parámetros de cohorte no válidos"""
+
+
+def _hash(*partes):
+    return hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+
+def _normalizar(valor):
+    """Valor como tupla con un elemento por campo de NIVELES[nivel]"""
+    return tuple(valor) if isinstance(valor, (tuple, list)) else (valor,)
+
+
+def _clave_version(nivel, valor):
+    return f'cohortes:version:{_hash(nivel, *_normalizar(valor))}'
+
+
+def _clave(nivel, valor, edad, version):
+    return f'cohortes:resultado:{_hash(nivel, *_normalizar(valor), edad or "", version)}'
+
+
+def valor_de_institucion(nivel, institucion):
+    """Valor de la cohorte de `nivel` a la que pertenece una InstitucionEducativa"""
+    return tuple(getattr(institucion, _ATRIBUTOS[campo]) for campo in NIVELES[nivel])
+
+
+def invalidar(nivel, valor):
+    """Nueva versión de la cohorte: las entradas cacheadas dejan de usarse"""
+    cache.set(_clave_version(nivel, valor), time.time_ns(), None)
+
+
+def invalidar_intento(intento_id):
+    """Invalidar las cohortes de la institución del estudiante de un intento confirmado"""
+    try:
+        institucion = InstitucionEducativa.objects.filter(estudiante__intento__IntentID=intento_id).first()
+        if institucion is None:
+            return
+        for nivel in NIVELES:
+            invalidar(nivel, valor_de_institucion(nivel, institucion))
+    except Exception as e:
+        # Sin invalidar, la cohorte se actualiza al vencer el TTL
+        logger.warning(f"[COHORTES] No se pudo invalidar la cohorte del intento {intento_id}: {e}")
+
+
+def _edades(nacimientos, hoy):
+    """Edad en años cumplidos de un array datetime64[D]"""
+    anios = nacimientos.astype('datetime64[Y]')
+    meses = nacimientos.astype('datetime64[M]')
+    clave = (
+        (anios.astype(int) + 1970) * 10000
+        + ((meses - anios).astype(int) + 1) * 100
+        + (nacimientos - meses).astype(int) + 1
+    )
+    return (hoy.year * 10000 + hoy.month * 100 + hoy.day - clave) // 10000
+
+
+def _distribucion(matriz):
+    """Media, percentiles e histograma de cada columna, ignorando NaN"""
+    validos = ~np.isnan(matriz)
+    cuantos = validos.sum(axis=0)
+    llenos = np.where(validos, matriz, 0.0)
+    medias = np.divide(llenos.sum(axis=0), cuantos, out=np.full(matriz.shape[1], np.nan), where=cuantos > 0)
+
+    # Histograma de todas las columnas a la vez: columna * bins + bin
+    bins = len(BORDES_HISTOGRAMA) - 1
+    indice = np.clip(np.searchsorted(BORDES_HISTOGRAMA, matriz, side='right') - 1, 0, bins - 1)
+    columna = np.broadcast_to(np.arange(matriz.shape[1]), matriz.shape)
+    histogramas = np.bincount(
+        (columna * bins + indice)[validos], minlength=matriz.shape[1] * bins
+    ).reshape(matriz.shape[1], bins)
+
+    percentiles = np.full((len(PERCENTILES), matriz.shape[1]), np.nan)
+    con_datos = cuantos > 0
+    if con_datos.any():
+        percentiles[:, con_datos] = np.nanpercentile(matriz[:, con_datos], PERCENTILES, axis=0)
+
+    return {
+        categoria: {
+            'estudiantes': int(cuantos[i]),
+            'media': _redondear(medias[i]),
+            'percentiles': {f'p{p}': _redondear(percentiles[j, i]) for j, p in enumerate(PERCENTILES)},
+            'histograma': histogramas[i].tolist(),
+        }
+        for i, categoria in enumerate(CATEGORIAS)
+    }
+
+
+def _redondear(valor):
+    return None if np.isnan(valor) else round(float(valor), 2)
+
+
+def _carreras(ultimos, alias):
+    """Carreras más recomendadas en los últimos intentos (caliente y archivo)"""
+    totales = {}
+    for modelo in (Recomendacion, RecomendacionArchivo):
+        for carrera, veces, score in (
+            modelo.objects.using(alias).filter(Intent_id__in=ultimos)
+            .values('Carrera').annotate(veces=Count('Carrera'), score=Avg('Score'))
+            .order_by().values_list('Carrera', 'veces', 'score')
+        ):
+            previas, suma = totales.get(carrera, (0, 0.0))
+            totales[carrera] = (previas + veces, suma + (score or 0.0) * veces)
+
+    mejores = sorted(totales.items(), key=lambda item: (-item[1][0], item[0]))[:TOP_CARRERAS]
+    return [
+        {'carrera': carrera, 'recomendaciones': veces, 'score_promedio': round(suma / veces, 2)}
+        for carrera, (veces, suma) in mejores
+    ]
+
+
+def _curva_completitud(primeras, total, ahora):
+    """% acumulado de estudiantes con un intento confirmado al final de cada semana del periodo"""
+    inicio = inicio_periodo_actual(ahora)
+    semanas = [inicio + timedelta(weeks=n) for n in range(1, (ahora - inicio).days // 7 + 1)] + [ahora]
+    cortes = np.array([corte.timestamp() for corte in semanas])
+    completados = np.searchsorted(np.sort(primeras[~np.isnan(primeras)]), cortes, side='right')
+    return [
+        {'fecha': timezone.localtime(corte).date(), 'porcentaje': round(float(n) / total * 100, 2) if total else 0}
+        for corte, n in zip(semanas, completados)
+    ]
+
+
+def _por_edad(edades, completos, matriz):
+    """Estudiantes, completados y media por categoría de cada edad"""
+    valores, grupo = np.unique(edades, return_inverse=True)
+    validos = ~np.isnan(matriz)
+
+    sumas = np.zeros((len(valores), matriz.shape[1]))
+    cuantos = np.zeros_like(sumas)
+    filas, columnas = np.nonzero(validos)
+    np.add.at(sumas, (grupo[filas], columnas), matriz[filas, columnas])
+    np.add.at(cuantos, (grupo[filas], columnas), 1)
+    medias = np.divide(sumas, cuantos, out=np.full_like(sumas, np.nan), where=cuantos > 0)
+
+    estudiantes = np.bincount(grupo, minlength=len(valores))
+    completados = np.bincount(grupo[completos], minlength=len(valores))
+    return [
+        {
+            'edad': int(edad),
+            'estudiantes': int(estudiantes[i]),
+            'completados': int(completados[i]),
+            'medias': {categoria: _redondear(medias[i, j]) for j, categoria in enumerate(CATEGORIAS)},
+        }
+        for i, edad in enumerate(valores)
+    ]
+
+
+def calcular(nivel, valor, edad=None, alias=DEFAULT_DB_ALIAS, ahora=None):
+    """Estadísticas de la cohorte, sin cache"""
+    ahora = ahora or timezone.now()
+    valor = _normalizar(valor)
+    condicion = Q(**dict(zip(NIVELES[nivel], valor)))
+    if edad:
+        condicion &= condicion_edad(edad, hoy=timezone.localdate(ahora))
+
+    confirmado = Q(intento__Confirmado=True)
+    filas = list(
+        Estudiante.objects.using(alias).filter(condicion)
+        .annotate(primera=Min('intento__Creado', filter=confirmado), ultimo=Max('intento__IntentID', filter=confirmado))
+        .order_by().values_list('EstudFechaNac', 'primera', 'ultimo')
+    )
+    total = len(filas)
+
+    nacimientos = np.array([fila[0] for fila in filas], dtype='datetime64[D]')
+    primeras = np.fromiter((fila[1].timestamp() if fila[1] else np.nan for fila in filas), float, count=total)
+    ultimos = np.fromiter((fila[2] or 0 for fila in filas), np.int64, count=total)
+
+    # Último intento confirmado de cada estudiante de la cohorte
+    ultimos_consulta = (
+        Intento.objects.using(alias)
+        .filter(Confirmado=True, Estud__in=Estudiante.objects.using(alias).filter(condicion).values('EstudID'))
+        .values('Estud_id').annotate(ultimo=Max('IntentID')).values('ultimo')
+    )
+    intento_ids, puntajes = matriz_puntajes_consulta(ultimos_consulta, alias)
+
+    # Filas de la matriz en el orden de los estudiantes (NaN sin puntajes)
+    matriz = np.full((total, len(CATEGORIAS)), np.nan)
+    if len(intento_ids):
+        orden = np.argsort(intento_ids)
+        posicion = np.clip(np.searchsorted(intento_ids[orden], ultimos), 0, len(intento_ids) - 1)
+        encontrado = intento_ids[orden][posicion] == ultimos
+        matriz[encontrado] = puntajes[orden][posicion[encontrado]]
+
+    completos = ultimos > 0
+    completados = int(completos.sum())
+    return {
+        'cohorte': {
+            'nivel': nivel,
+            'valor': valor[0],
+            **{CALIFICADORES[campo]: parte for campo, parte in zip(NIVELES[nivel][1:], valor[1:])},
+            'edad': edad,
+        },
+        'estudiantes': total,
+        'completados': completados,
+        'completitud': round(completados / total * 100, 2) if total else 0,
+        'histograma_bordes': BORDES_HISTOGRAMA.tolist(),
+        'categorias': _distribucion(matriz),
+        'carreras': _carreras(ultimos_consulta, alias) if completados else [],
+        'curva_completitud': _curva_completitud(primeras, total, ahora),
+        'por_edad': _por_edad(_edades(nacimientos, timezone.localdate(ahora)), completos, matriz) if total else [],
+        'generado': ahora,
+    }
+
+
+def analitica(nivel, valor, edad=None, alias=DEFAULT_DB_ALIAS):
+    """
+    Estadísticas de la cohorte desde la cache si están
+
+    Args:
+        valor: tupla con un elemento por campo de NIVELES[nivel] (ver
+            valor_de_institucion); un escalar en institucion y region
+
+    Raises:
+        CohorteError: nivel, valor o edad no válidos
+    """
+    if nivel not in NIVELES:
+        raise CohorteError(f"nivel debe ser uno de: {', '.join(NIVELES)}")
+    valor = _normalizar(valor)
+    if len(valor) != len(NIVELES[nivel]) or any(parte in (None, '') for parte in valor):
+        raise CohorteError('La institución no registra ese nivel completo (distrito, provincia y región)')
+    if edad:
+        try:
+            condicion_edad(edad)
+        except FiltroError as e:
+            raise CohorteError(str(e))
+
+    version = cache.get(_clave_version(nivel, valor), 0)
+    clave = _clave(nivel, valor, edad, version)
+    resultado = cache.get(clave)
+    if resultado is None:
+        inicio = time.perf_counter()
+        resultado = calcular(nivel, valor, edad, alias)
+        cache.set(clave, resultado, getattr(settings, 'COHORTES_CACHE_TTL', 900))
+        logger.info(
+            f"[COHORTES] {nivel}={'/'.join(map(str, valor))} edad={edad or '-'}: {resultado['estudiantes']} estudiantes "
+            f"en {time.perf_counter() - inicio:.2f}s"
+        )
+    return resultado
@@ -0,0 +1,233 @@
+# usuarios/correo.py
+"""
+Bandeja de salida de emails con envío por lotes
+
+- encolar_email: guarda el mensaje en tblEmailPendiente y, al confirmar la
+  transacción, programa la tarea drenar_emails (cola 'email')
+- drenar_lote: reclama hasta EMAIL_LOTE_TAMANO mensajes, abre UNA conexión
+  SMTP (get_connection) y los envía uno a uno por esa conexión, a ritmo de
+  EMAIL_MAX_POR_MINUTO. Cada mensaje que falla se reintenta por su cuenta
+  con espera exponencial, sin arrastrar al resto del lote.
+
+Los workers reclaman mensajes con un UPDATE condicionado al estado y un
+UUID de lote, así varios workers pueden drenar a la vez sin enviar dos
+veces el mismo email. Un lote reclamado por un worker que murió vuelve a
+pendiente tras EMAIL_RECLAMO_VENCE_SEGUNDOS.
+
+Para pruebas locales: `python manage.py servidor_smtp_local` y
+EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False.
+"""
+import logging
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPendiente
+
+logger = logging.getLogger(__name__)
+
+CLAVE_DRENADO_PROGRAMADO = 'correo:drenado_programado'
+
+
+def _codigos_smtp(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return [codigo for codigo, _ in error.recipients.values()]
+    return [getattr(error, 'smtp_code', None)]
+
+
+def _es_permanente(error):
+    """5xx del servidor (buzón inexistente, remitente rechazado): reintentar no sirve"""
+    codigos = _codigos_smtp(error)
+    return all(isinstance(codigo, int) and 500 <= codigo < 600 for codigo in codigos)
+
+
+def _conexion_perdida(error):
+    """El servidor cerró la conexión reutilizada (421 = límite de mensajes por conexión)"""
+    return isinstance(error, smtplib.SMTPServerDisconnected) or 421 in _codigos_smtp(error)
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def encolar_email(destinatario, asunto, texto, html=None):
+    """
+    Encolar un email para el próximo lote
+
+    Returns:
+        EmailPendiente
+    """
+    email = EmailPendiente.objects.create(
+        Destinatario=destinatario,
+        Asunto=asunto,
+        CuerpoTexto=texto,
+        CuerpoHtml=html,
+    )
+    transaction.on_commit(programar_drenado)
+    return email
+
+
+def programar_drenado(countdown=None):
+    """
+    Encolar drenar_emails salvo que ya haya uno programado hace poco: mil
+    emails encolados seguidos disparan un solo drenado, no mil tareas.
+    drenar_emails también se vuelve a encolar por aquí.
+    """
+    from .tasks import drenar_emails
+
+    if cache.add(CLAVE_DRENADO_PROGRAMADO, True, _config('EMAIL_DRENADO_VENTANA_SEGUNDOS', 5)):
+        drenar_emails.apply_async(countdown=countdown)
+
+
+def drenado_iniciado():
+    """
+    El drenado programado ya está corriendo: lo que se encole desde ahora
+    (o su propio reencolado) necesita otro
+    """
+    cache.delete(CLAVE_DRENADO_PROGRAMADO)
+
+
+def _reclamar(tamano):
+    """Marcar hasta `tamano` mensajes como 'enviando' para este worker"""
+    ahora = timezone.now()
+
+    # Reclamos vencidos: el worker que los tomó no terminó
+    vencimiento = ahora - timedelta(seconds=_config('EMAIL_RECLAMO_VENCE_SEGUNDOS', 600))
+    EmailPendiente.objects.filter(
+        Estado=EmailPendiente.ESTADO_ENVIANDO, Reclamado__lt=vencimiento
+    ).update(Estado=EmailPendiente.ESTADO_PENDIENTE, Lote=None)
+
+    candidatos = list(
+        EmailPendiente.objects
+        .filter(Estado=EmailPendiente.ESTADO_PENDIENTE, ProximoIntento__lte=ahora)
+        .order_by('ProximoIntento', 'EmailID')
+        .values_list('EmailID', flat=True)[:tamano]
+    )
+    if not candidatos:
+        return []
+
+    lote = uuid.uuid4()
+    # Condicionado al estado: si otro worker ganó una fila, no se pisa
+    EmailPendiente.objects.filter(
+        EmailID__in=candidatos, Estado=EmailPendiente.ESTADO_PENDIENTE
+    ).update(Estado=EmailPendiente.ESTADO_ENVIANDO, Lote=lote, Reclamado=ahora)
+
+    return list(EmailPendiente.objects.filter(Lote=lote).order_by('EmailID'))
+
+
+def _mensaje(email, conexion):
+    mensaje = EmailMultiAlternatives(
+        subject=email.Asunto,
+        body=email.CuerpoTexto,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.Destinatario],
+        connection=conexion,
+    )
+    if email.CuerpoHtml:
+        mensaje.attach_alternative(email.CuerpoHtml, 'text/html')
+    return mensaje
+
+
+def _registrar_fallo(email, error):
+    email.Intentos += 1
+    email.UltimoError = str(error)[:500]
+    email.Lote = None
+
+    if _es_permanente(error) or email.Intentos >= _config('EMAIL_MAX_INTENTOS', 5):
+        email.Estado = EmailPendiente.ESTADO_FALLIDO
+        logger.error(f"[CORREO] Email {email.EmailID} a {email.Destinatario} descartado: {error}")
+    else:
+        # Espera exponencial: 1, 2, 4, 8... minutos
+        email.Estado = EmailPendiente.ESTADO_PENDIENTE
+        email.ProximoIntento = timezone.now() + timedelta(minutes=2 ** (email.Intentos - 1))
+        logger.warning(f"[CORREO] Email {email.EmailID} reintento {email.Intentos}: {error}")
+
+    email.save(update_fields=['Intentos', 'UltimoError', 'Lote', 'Estado', 'ProximoIntento'])
+
+
+def drenar_lote(tamano=None, por_minuto=None):
+    """
+    Enviar un lote de la bandeja de salida por una sola conexión SMTP
+
+    Returns:
+        dict: {'enviados', 'fallidos', 'restantes', 'proximo_en'}: restantes son
+        los pendientes listos para enviar; si no hay, proximo_en son los
+        segundos hasta el siguiente reintento programado (o None)
+    """
+    tamano = tamano or _config('EMAIL_LOTE_TAMANO', 50)
+    por_minuto = por_minuto or _config('EMAIL_MAX_POR_MINUTO', 60)
+    intervalo = 60 / por_minuto if por_minuto else 0
+
+    emails = _reclamar(tamano)
+    enviados = fallidos = 0
+
+    if emails:
+        conexion = get_connection(fail_silently=False)
+        try:
+            conexion.open()
+            ultimo = 0.0
+            for email in emails:
+                # Ritmo máximo del proveedor (Gmail corta las ráfagas)
+                espera = ultimo + intervalo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                ultimo = time.monotonic()
+
+                try:
+                    try:
+                        conexion.send_messages([_mensaje(email, conexion)])
+                    except smtplib.SMTPException as e:
+                        if not _conexion_perdida(e):
+                            raise
+                        # Reabrir una vez y reenviar solo este mensaje
+                        conexion.close()
+                        conexion.open()
+                        conexion.send_messages([_mensaje(email, conexion)])
+                except smtplib.SMTPException as e:
+                    _registrar_fallo(email, e)
+                    fallidos += 1
+                    continue
+                except OSError:
+                    # Caída de la red: la maneja el except externo para todo el lote
+                    raise
+                except Exception as e:
+                    # Mensaje mal formado (cabeceras, codificación): solo este
+                    _registrar_fallo(email, e)
+                    fallidos += 1
+                    continue
+
+                EmailPendiente.objects.filter(EmailID=email.EmailID).update(
+                    Estado=EmailPendiente.ESTADO_ENVIADO, Enviado=timezone.now(), Lote=None
+                )
+                enviados += 1
+        except Exception as e:
+            # Sin conexión al servidor: todo lo no enviado del lote vuelve a la cola
+            logger.error(f"[CORREO] Error de conexión SMTP: {e}")
+            for email in emails:
+                if EmailPendiente.objects.filter(
+                    EmailID=email.EmailID, Estado=EmailPendiente.ESTADO_ENVIANDO
+                ).exists():
+                    _registrar_fallo(email, e)
+                    fallidos += 1
+        finally:
+            conexion.close()
+
+    ahora = timezone.now()
+    pendientes = EmailPendiente.objects.filter(Estado=EmailPendiente.ESTADO_PENDIENTE)
+    restantes = pendientes.filter(ProximoIntento__lte=ahora).count()
+    proximo = None
+    if not restantes:
+        siguiente = pendientes.order_by('ProximoIntento').values_list('ProximoIntento', flat=True).first()
+        if siguiente:
+            proximo = max(0, int((siguiente - ahora).total_seconds()) + 1)
+
+    if emails:
+        logger.info(f"[CORREO] Lote: {enviados} enviados, {fallidos} fallidos, {restantes} pendientes")
+    return {'enviados': enviados, 'fallidos': fallidos, 'restantes': restantes, 'proximo_en': proximo}
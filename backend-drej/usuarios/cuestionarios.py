@@ -0,0 +1,79 @@
+# usuarios/cuestionarios.py
+"""
+Payload cacheado de cuestionarios (preguntas y opciones)
+
+Un cuestionario de 100 preguntas son ~600 filas y casi nunca cambia, pero
+cada estudiante lo pide al abrirlo y al retomarlo. El JSON ya armado se
+guarda en la cache de Django por CUESTIONARIO_CACHE_TTL segundos.
+
+Solo se cachean cuestionarios activos. actualizar_cuestionario y
+eliminar_cuestionario invalidan la entrada; los cambios hechos por SQL o
+desde el admin se ven al vencer el TTL.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Cuestionario, Pregunta
+
+
+def _clave(cuestionario_id):
+    return f'cuestionario:payload:{cuestionario_id}'
+
+
+def _armar_payload(cuestionario_id):
+    try:
+        cuestionario = Cuestionario.objects.get(CuestID=cuestionario_id, CuestActivo=True)
+    except Cuestionario.DoesNotExist:
+        return None
+
+    # Opcion ya se ordena por OpcionOrden: usar lo precargado
+    preguntas = Pregunta.objects.filter(
+        Cuest=cuestionario,
+        PregActiva=True
+    ).prefetch_related('opciones').order_by('PregOrden')
+
+    return {
+        'id': cuestionario.CuestID,
+        'nombre': cuestionario.CuestNombre,
+        'version': cuestionario.CuestVersion,
+        'preguntas': [
+            {
+                'id': pregunta.PregID,
+                'texto': pregunta.PregTexto,
+                'orden': pregunta.PregOrden,
+                'tipo': pregunta.PregTipo,
+                'categoria': pregunta.PregCategoria,
+                'opciones': [
+                    {
+                        'id': opcion.OpcionID,
+                        'texto': opcion.OpcionTexto,
+                        'valor': opcion.OpcionValor,
+                        'orden': opcion.OpcionOrden
+                    }
+                    for opcion in pregunta.opciones.all()
+                ]
+            }
+            for pregunta in preguntas
+        ]
+    }
+
+
+def payload_cuestionario(cuestionario_id):
+    """
+    Cuestionario activo con preguntas y opciones, desde la cache si está
+
+    Returns:
+        dict o None si no existe o está inactivo
+    """
+    clave = _clave(cuestionario_id)
+    payload = cache.get(clave)
+    if payload is None:
+        payload = _armar_payload(cuestionario_id)
+        if payload is not None:
+            cache.set(clave, payload, getattr(settings, 'CUESTIONARIO_CACHE_TTL', 600))
+    return payload
+
+
+def invalidar_cuestionario(cuestionario_id):
+    """Descartar el payload cacheado tras modificar el cuestionario"""
+    cache.delete(_clave(cuestionario_id))
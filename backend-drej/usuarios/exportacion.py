@@ -0,0 +1,206 @@
+# usuarios/exportacion.py
+"""
+Exportación de resultados de una institución (CSV/XLSX) para orientadores
+
+Una fila por intento confirmado: estudiante, cuestionario, puntaje por
+categoría y las recomendaciones con su score. Pensado para instituciones
+con cientos de miles de intentos acumulados:
+
+- Paginación por clave (IntentID > último) en lotes de EXPORTACION_LOTE
+  intentos: cada lote son consultas cortas por conjuntos (IN), sin un
+  cursor abierto mientras el cliente descarga. En SQL Server sin MARS un
+  cursor pendiente bloquea cualquier otra consulta de la conexión, y un
+  recorrido largo retendría la conexión y su snapshot todo ese tiempo.
+- Las filas de cada consulta se leen con .iterator() (fetchmany), nunca
+  con la lista completa del lote en memoria.
+- El CSV se genera a medida que se recorren los lotes: la cabecera sale
+  antes de la primera consulta y la memoria no crece con el número de filas.
+
+Los puntajes no se guardan: se recalculan con la regla del motor
+(usuarios/puntajes.py). Los intentos de periodos cerrados
+leen sus filas del archivo (usuarios/archivo.py).
+
+Lo usa la vista exportar_resultados (views_orientador).
+"""
+import csv
+import io
+import tempfile
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .archivo import inicio_periodo_actual, intento_archivable
+from .models import Intento, Recomendacion, RecomendacionArchivo, Respuesta, RespuestaArchivo
+from .puntajes import CATEGORIAS, puntajes_por_categoria, valores_opciones
+
+# Igual que el top de obtener_resultados
+MAX_RECOMENDACIONES = 5
+
+CAMPOS = (
+    ['intento_id', 'dni', 'apellido_paterno', 'apellido_materno', 'nombres', 'cuestionario', 'fecha']
+    + CATEGORIAS
+    + [campo for n in range(1, MAX_RECOMENDACIONES + 1) for campo in (f'recomendacion_{n}', f'score_{n}')]
+)
+
+
+class ExportacionError(Exception):
+    """La exportación no se puede generar (formato o dependencia faltante)"""
+
+
+def _respuestas_lote(alias, ids, modelo=Respuesta):
+    """IntentID -> RespValor de sus respuestas en orden de guardado"""
+    respuestas = defaultdict(list)
+    for intento_id, valor in (
+        modelo.objects.using(alias).filter(Intent_id__in=ids)
+        .order_by('Intent_id', 'RespID').values_list('Intent_id', 'RespValor').iterator()
+    ):
+        respuestas[intento_id].append(valor)
+    return respuestas
+
+
+def _recomendaciones_lote(alias, ids, modelo=Recomendacion):
+    """IntentID -> [(Carrera, Score)] de mayor a menor score, hasta MAX_RECOMENDACIONES"""
+    recomendaciones = defaultdict(list)
+    for intento_id, carrera, score in (
+        modelo.objects.using(alias).filter(Intent_id__in=ids)
+        .order_by('Intent_id', '-Score').values_list('Intent_id', 'Carrera', 'Score').iterator()
+    ):
+        if len(recomendaciones[intento_id]) < MAX_RECOMENDACIONES:
+            recomendaciones[intento_id].append((carrera, score))
+    return recomendaciones
+
+
+def _fila(intento, valores_respuestas, recomendaciones, opciones):
+    estudiante = intento.Estud
+    fila = {
+        'intento_id': intento.IntentID,
+        'dni': estudiante.EstudDNI,
+        'apellido_paterno': estudiante.EstudApellidoPaterno,
+        'apellido_materno': estudiante.EstudApellidoMaterno,
+        'nombres': estudiante.EstudNombres,
+        'cuestionario': intento.Cuest.CuestNombre,
+        'fecha': intento.Creado.isoformat() if intento.Creado else '',
+    }
+
+    valores = []
+    for valor in valores_respuestas:
+        try:
+            valores.append(opciones.get(int(valor)))
+        except (TypeError, ValueError):
+            valores.append(None)
+    fila.update(puntajes_por_categoria(valores))
+
+    for n, (carrera, score) in enumerate(recomendaciones, 1):
+        fila[f'recomendacion_{n}'] = carrera
+        fila[f'score_{n}'] = round(score, 2) if score is not None else ''
+    return fila
+
+
+def filas_resultados(insti_id, alias=DEFAULT_DB_ALIAS, tamano_lote=None):
+    """
+    Generar una fila (dict con CAMPOS) por intento confirmado de la institución
+
+    alias: base de la que leer; el generador corre después de que la vista
+    retorna, así que la vista la fija con alias_lectura() (réplica).
+    """
+    # SQL Server: máximo 2100 parámetros; el IN del lote usa uno por intento
+    tamano_lote = min(tamano_lote or getattr(settings, 'EXPORTACION_LOTE', 500), 2000)
+    opciones = valores_opciones(alias)
+    corte = inicio_periodo_actual()
+
+    ultimo = 0
+    while True:
+        lote = list(
+            Intento.objects.using(alias)
+            .filter(Estud__Insti_id=insti_id, Confirmado=True, IntentID__gt=ultimo)
+            .select_related('Estud', 'Cuest')
+            .only(
+                'IntentID', 'Creado', 'UltimoAutosave', 'Confirmado',
+                'Estud__EstudDNI', 'Estud__EstudNombres', 'Estud__EstudApellidoPaterno',
+                'Estud__EstudApellidoMaterno', 'Cuest__CuestNombre',
+            )
+            .order_by('IntentID')[:tamano_lote]
+        )
+        if not lote:
+            return
+
+        ids = [intento.IntentID for intento in lote]
+        respuestas = _respuestas_lote(alias, ids)
+        recomendaciones = _recomendaciones_lote(alias, ids)
+
+        # Periodos cerrados: solo los archivables sin filas en caliente
+        archivados = [
+            intento.IntentID for intento in lote
+            if intento.IntentID not in respuestas and intento_archivable(intento, corte)
+        ]
+        if archivados:
+            respuestas.update(_respuestas_lote(alias, archivados, RespuestaArchivo))
+            recomendaciones.update(_recomendaciones_lote(alias, archivados, RecomendacionArchivo))
+
+        for intento in lote:
+            yield _fila(
+                intento, respuestas.get(intento.IntentID, []),
+                recomendaciones.get(intento.IntentID, []), opciones,
+            )
+
+        if len(lote) < tamano_lote:
+            return
+        ultimo = ids[-1]
+
+
+def exportar_csv(filas):
+    """
+    Convertir las filas en bloques CSV para streaming
+
+    Empieza con BOM para que Excel abra el UTF-8 con tildes y eñes. Agrupa
+    EXPORTACION_FILAS_POR_BLOQUE filas por bloque: un yield por fila
+    multiplica las escrituras al socket en exportaciones grandes.
+    """
+    filas_por_bloque = getattr(settings, 'EXPORTACION_FILAS_POR_BLOQUE', 200)
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=CAMPOS)
+
+    buffer.write('\ufeff')
+    escritor.writeheader()
+    yield buffer.getvalue()
+
+    pendientes = 0
+    buffer.seek(0)
+    buffer.truncate(0)
+    for fila in filas:
+        escritor.writerow(fila)
+        pendientes += 1
+        if pendientes >= filas_por_bloque:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pendientes = 0
+
+    if pendientes:
+        yield buffer.getvalue()
+
+
+def exportar_xlsx(filas):
+    """
+    Escribir las filas en un XLSX y devolverlo como archivo temporal (posición 0)
+
+    openpyxl en modo write_only vuelca cada fila a disco y no guarda la hoja
+    en memoria, pero un XLSX es un ZIP que solo es válido completo: el
+    primer byte sale cuando termina. Para exportaciones grandes, CSV.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportacionError("Para exportar XLSX instale openpyxl (pip install openpyxl)")
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Resultados')
+    hoja.append(CAMPOS)
+    for fila in filas:
+        hoja.append([fila.get(campo, '') for campo in CAMPOS])
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
@@ -0,0 +1,363 @@
+# usuarios/filtros.py
+"""
+Filtros guardados del orientador (tblFiltro) sobre las recomendaciones
+
+Un Filtro se compila a una sola consulta sobre tblRecomendacion (intentos
+confirmados de estudiantes de la institución del orientador, igual que el
+dashboard y la exportación) y los RecomendacionID que cumplen se guardan
+en tblFiltroRecomendacion. Reabrir un filtro es una lectura por el índice
+(FiltroID, RecomendacionID), paginada por clave, sin volver a evaluarlo.
+
+Criterios (columnas de tblFiltro):
+- Edad: 'N', 'N-M' o 'N+' años; se traduce a un rango sobre EstudFechaNac
+- NivelRiesgo: nivel actual del estudiante (usuarios/riesgo.py)
+
+Criterios que se rechazan (FiltroError):
+- Genero: los estudiantes no registran género
+- Institucion / Ubicacion: el filtro ya está acotado a la institución del
+  orientador, así que solo podrían devolver todo o nada. Para comparar
+  distritos, provincias o regiones está la analítica de cohortes
+  (usuarios/cohortes.py).
+
+Mantenimiento de los resultados:
+- Al crear o editar un filtro: reconstruir (DELETE + INSERT ... SELECT).
+- Al guardar recomendaciones nuevas, programar_actualizacion encola
+  actualizar_filtros tras una ventana (FILTROS_VENTANA_SEGUNDOS): cada
+  filtro evalúa solo RecomendacionID > UltimaRecomendacionID, un rango
+  sobre la clave agrupada.
+- De madrugada (reconstruir_filtros): todos desde cero. Corrige filtros
+  por edad (los estudiantes cumplen años) o por nivel de riesgo (corre
+  después de clasificar_riesgo) y recomendaciones con IDs que se
+  confirmaron después de una actualización con un ID mayor.
+
+tblFiltroRecomendacion referencia a tblRecomendacion: antes de borrar
+recomendaciones hay que borrar sus filas aquí (olvidar_recomendaciones;
+lo hacen el motor al regenerar, la purga y el archivo de periodos
+cerrados, así que los filtros cubren el periodo en curso).
+"""
+import logging
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .catalogos import NIVEL_RIESGO_ALTO, NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO
+from .models import Filtro, FiltroRecomendacion, Recomendacion
+
+logger = logging.getLogger(__name__)
+
+CLAVE_PROGRAMADA = 'filtros:actualizacion_programada'
+CLAVE_BLOQUEO = 'filtros:actualizando'
+
+RESULTADOS_POR_PAGINA = 50
+MAX_RESULTADOS_POR_PAGINA = 200
+
+NIVELES_RIESGO = (NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO, NIVEL_RIESGO_ALTO)
+
+_EDAD = re.compile(r'^\s*(\d{1,2})\s*(?:(-)\s*(\d{1,2})|(\+))?\s*$')
+
+
+class FiltroError(Exception):
+    """El filtro tiene un criterio que no se puede evaluar"""
+
+
+def _restar_anios(fecha, anios):
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:  # 29 de febrero
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def rango_edad(texto):
+    """'15' / '15-17' / '16+' -> (mínima, máxima o None)"""
+    coincidencia = _EDAD.match(texto or '')
+    if not coincidencia:
+        raise FiltroError(f"Edad '{texto}' no válida: use 15, 15-17 o 16+")
+    minima = int(coincidencia.group(1))
+    if coincidencia.group(4):
+        return minima, None
+    maxima = int(coincidencia.group(3)) if coincidencia.group(2) else minima
+    if maxima < minima:
+        raise FiltroError(f"Edad '{texto}' no válida: el rango está invertido")
+    return minima, maxima
+
+
+def condicion_edad(texto, campo='EstudFechaNac', hoy=None):
+    """Q con el rango de edad como rango sobre la fecha de nacimiento (`campo`)"""
+    hoy = hoy or timezone.localdate()
+    minima, maxima = rango_edad(texto)
+    # Edad >= mínima: nació hace al menos `mínima` años
+    condicion = Q(**{f'{campo}__lte': _restar_anios(hoy, minima)})
+    if maxima is not None:
+        # Edad <= máxima: aún no cumple máxima + 1
+        condicion &= Q(**{f'{campo}__gt': _restar_anios(hoy, maxima + 1)})
+    return condicion
+
+
+def validar(filtro):
+    """Lanzar FiltroError si el filtro no se puede compilar"""
+    if filtro.Genero:
+        raise FiltroError('Los estudiantes no registran género: no se puede filtrar por Genero')
+    if filtro.Institucion or filtro.Ubicacion:
+        raise FiltroError(
+            'Los filtros se evalúan dentro de la institución del orientador: Institucion y Ubicacion '
+            'no acotan los resultados. Quítelos; para comparar distritos, provincias o regiones use '
+            'la analítica de cohortes'
+        )
+    if filtro.NivelRiesgo_id:
+        nivel = str(filtro.NivelRiesgo_id)
+        if not nivel.isdigit() or int(nivel) not in NIVELES_RIESGO:
+            raise FiltroError(f"Nivel de riesgo '{nivel}' no válido: use 1 (bajo), 2 (medio) o 3 (alto)")
+        filtro.NivelRiesgo_id = int(nivel)
+    if filtro.Edad:
+        rango_edad(filtro.Edad)
+
+
+def compilar(filtro, insti_id, hoy=None):
+    """
+    QuerySet de Recomendacion que cumple el filtro, dentro de la institución
+
+    Todos los criterios son comparaciones sobre columnas (sin funciones), para
+    que el optimizador pueda usar los índices de tblEstudiante e institución.
+    """
+    validar(filtro)
+    consulta = Recomendacion.objects.filter(Intent__Confirmado=True, Intent__Estud__Insti_id=insti_id)
+
+    if filtro.Edad:
+        consulta = consulta.filter(condicion_edad(filtro.Edad, 'Intent__Estud__EstudFechaNac', hoy))
+
+    if filtro.NivelRiesgo_id:
+        consulta = consulta.filter(Intent__Estud__NivelRiesgo_id=filtro.NivelRiesgo_id)
+
+    return consulta
+
+
+def _insertar_coincidencias(filtro, insti_id, desde, hasta):
+    """INSERT ... SELECT de las recomendaciones (desde, hasta] que cumplen. Returns: filas"""
+    consulta = compilar(filtro, insti_id).filter(RecomendacionID__lte=hasta)
+    if desde:
+        consulta = consulta.filter(RecomendacionID__gt=desde)
+    sql, parametros = consulta.values('RecomendacionID').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO tblFiltroRecomendacion (FiltroID, RecomendacionID) "
+            f"SELECT %s, coincidencias.RecomendacionID FROM ({sql}) coincidencias",
+            [filtro.FiltroID, *parametros]
+        )
+        return cursor.rowcount
+
+
+def _tope():
+    return Recomendacion.objects.aggregate(tope=Max('RecomendacionID'))['tope'] or 0
+
+
+def reconstruir(filtro, insti_id=None):
+    """Evaluar el filtro desde cero. Returns: recomendaciones que cumplen"""
+    insti_id = insti_id or filtro.Orien.Insti_id
+    # Sin savepoint propio: desde una vista se une a la transacción que guarda el filtro
+    with transaction.atomic(savepoint=False):
+        tope = _tope()
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM tblFiltroRecomendacion WHERE FiltroID = %s", [filtro.FiltroID])
+        total = _insertar_coincidencias(filtro, insti_id, None, tope)
+        ahora = timezone.now()
+        Filtro.objects.filter(FiltroID=filtro.FiltroID).update(UltimaRecomendacionID=tope, Actualizado=ahora)
+    filtro.UltimaRecomendacionID, filtro.Actualizado = tope, ahora
+    return total
+
+
+def actualizar(filtro, insti_id=None, tope=None):
+    """Añadir las recomendaciones posteriores a la última evaluación. Returns: filas nuevas"""
+    if filtro.UltimaRecomendacionID is None:
+        return reconstruir(filtro, insti_id)
+
+    tope = _tope() if tope is None else tope
+    if tope <= filtro.UltimaRecomendacionID:
+        return 0
+
+    insti_id = insti_id or filtro.Orien.Insti_id
+    with transaction.atomic():
+        nuevas = _insertar_coincidencias(filtro, insti_id, filtro.UltimaRecomendacionID, tope)
+        ahora = timezone.now()
+        Filtro.objects.filter(FiltroID=filtro.FiltroID).update(UltimaRecomendacionID=tope, Actualizado=ahora)
+    filtro.UltimaRecomendacionID, filtro.Actualizado = tope, ahora
+    return nuevas
+
+
+def _filtros_evaluables():
+    return Filtro.objects.select_related('Orien').only(
+        'FiltroID', 'Edad', 'Genero', 'Institucion', 'Ubicacion', 'NivelRiesgo',
+        'UltimaRecomendacionID', 'Orien__Insti',
+    ).order_by('FiltroID')
+
+
+def actualizar_filtros(reconstruir_todos=False):
+    """
+    Actualizar (o reconstruir) todos los filtros guardados
+
+    Returns:
+        dict: {'filtros', 'filas', 'errores'} o {'omitida': motivo}
+    """
+    if not cache.add(CLAVE_BLOQUEO, True, getattr(settings, 'FILTROS_BLOQUEO_SEGUNDOS', 600)):
+        return {'omitida': 'en ejecución en otro worker'}
+
+    resultado = {'filtros': 0, 'filas': 0, 'errores': 0}
+    try:
+        # Mismo tope para todos: una recomendación que llega durante la
+        # ejecución queda para la próxima en todos los filtros
+        tope = _tope()
+        for filtro in _filtros_evaluables():
+            try:
+                if reconstruir_todos:
+                    resultado['filas'] += reconstruir(filtro, filtro.Orien.Insti_id)
+                else:
+                    resultado['filas'] += actualizar(filtro, filtro.Orien.Insti_id, tope)
+                resultado['filtros'] += 1
+            except FiltroError as e:
+                logger.warning(f"[FILTROS] Filtro {filtro.FiltroID} no evaluable: {e}")
+                resultado['errores'] += 1
+            except Exception as e:
+                logger.error(f"[FILTROS] Error actualizando el filtro {filtro.FiltroID}: {e}")
+                resultado['errores'] += 1
+    finally:
+        cache.delete(CLAVE_BLOQUEO)
+
+    logger.info(f"[FILTROS] {resultado['filtros']} filtros, {resultado['filas']} filas añadidas")
+    return resultado
+
+
+def programar_actualizacion():
+    """
+    Encolar actualizar_filtros al final de la ventana salvo que ya haya una
+    programada: las confirmaciones de un examen disparan una actualización
+    cada FILTROS_VENTANA_SEGUNDOS, no una por intento
+    """
+    from .tasks import actualizar_filtros_tarea
+
+    ventana = getattr(settings, 'FILTROS_VENTANA_SEGUNDOS', 30)
+    # La tarea corre después de que vence la clave: lo confirmado dentro de
+    # la ventana lo ve esta ejecución y lo posterior programa la siguiente
+    if not cache.add(CLAVE_PROGRAMADA, True, ventana):
+        return
+    try:
+        actualizar_filtros_tarea.apply_async(countdown=ventana + 1)
+    except Exception as e:
+        # Sin broker las recomendaciones se guardan igual; la reconstrucción
+        # nocturna pone los filtros al día
+        cache.delete(CLAVE_PROGRAMADA)
+        logger.warning(f"[FILTROS] No se pudo encolar la actualización: {e}")
+
+
+def olvidar_recomendaciones(cursor, condicion, parametros):
+    """
+    Borrar de tblFiltroRecomendacion las filas de las recomendaciones que se
+    van a borrar (condicion: WHERE sobre tblRecomendacion)
+    """
+    cursor.execute(
+        f"DELETE FROM tblFiltroRecomendacion WHERE RecomendacionID IN "
+        f"(SELECT RecomendacionID FROM tblRecomendacion WHERE {condicion})",
+        parametros
+    )
+
+
+def pagina_resultados(filtro_id, antes_de=None, limite=RESULTADOS_POR_PAGINA):
+    """
+    Una página de resultados del filtro, de la recomendación más reciente a
+    la más antigua (paginación por clave: antes_de = último id de la página)
+
+    Returns:
+        (list[dict], siguiente antes_de o None)
+    """
+    limite = max(1, min(int(limite), MAX_RESULTADOS_POR_PAGINA))
+    consulta = FiltroRecomendacion.objects.filter(Filtro_id=filtro_id)
+    if antes_de:
+        consulta = consulta.filter(Recomendacion_id__lt=antes_de)
+
+    filas = list(
+        consulta.order_by('-Recomendacion_id').values(
+            'Recomendacion_id',
+            'Recomendacion__Carrera',
+            'Recomendacion__Score',
+            'Recomendacion__Nivel',
+            'Recomendacion__FechaHora',
+            'Recomendacion__Intent_id',
+            'Recomendacion__Intent__Cuest__CuestNombre',
+            'Recomendacion__Intent__Estud__EstudDNI',
+            'Recomendacion__Intent__Estud__EstudNombres',
+            'Recomendacion__Intent__Estud__EstudApellidoPaterno',
+            'Recomendacion__Intent__Estud__EstudFechaNac',
+        )[:limite + 1]
+    )
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    hoy = timezone.localdate()
+    resultados = []
+    for fila in filas:
+        nacimiento = fila['Recomendacion__Intent__Estud__EstudFechaNac']
+        resultados.append({
+            'recomendacion_id': fila['Recomendacion_id'],
+            'carrera': fila['Recomendacion__Carrera'],
+            'score': fila['Recomendacion__Score'],
+            'nivel': fila['Recomendacion__Nivel'],
+            'fecha': fila['Recomendacion__FechaHora'],
+            'intento_id': fila['Recomendacion__Intent_id'],
+            'cuestionario': fila['Recomendacion__Intent__Cuest__CuestNombre'],
+            'dni': fila['Recomendacion__Intent__Estud__EstudDNI'],
+            'estudiante': (
+                f"{fila['Recomendacion__Intent__Estud__EstudNombres']} "
+                f"{fila['Recomendacion__Intent__Estud__EstudApellidoPaterno']}"
+            ),
+            'edad': _edad(nacimiento, hoy) if isinstance(nacimiento, date) else None,
+        })
+
+    return resultados, (filas[-1]['Recomendacion_id'] if hay_mas else None)
+
+
+def _edad(nacimiento, hoy):
+    return hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
+
+
+# Campo del cuerpo de la petición -> atributo de Filtro
+CRITERIOS = {
+    'nombre': 'Nombre',
+    'edad': 'Edad',
+    'genero': 'Genero',
+    'institucion': 'Institucion',
+    'ubicacion': 'Ubicacion',
+    'nivel_riesgo': 'NivelRiesgo_id',
+}
+
+
+def asignar_criterios(filtro, datos):
+    """Copiar al filtro los criterios presentes en `datos` ('' o None los quita)"""
+    for campo, atributo in CRITERIOS.items():
+        if campo in datos:
+            valor = datos[campo]
+            setattr(filtro, atributo, str(valor).strip() if valor not in (None, '') else None)
+    validar(filtro)
+
+
+def eliminar(filtro_id):
+    """Borrar el filtro y sus resultados"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM tblFiltroRecomendacion WHERE FiltroID = %s", [filtro_id])
+        cursor.execute("DELETE FROM tblFiltro WHERE FiltroID = %s", [filtro_id])
+
+
+def filtro_a_dict(filtro):
+    return {
+        'id': filtro.FiltroID,
+        'nombre': filtro.Nombre,
+        'edad': filtro.Edad,
+        'genero': filtro.Genero,
+        'institucion': filtro.Institucion,
+        'ubicacion': filtro.Ubicacion,
+        'nivel_riesgo': filtro.NivelRiesgo_id,
+        'actualizado': filtro.Actualizado,
+    }
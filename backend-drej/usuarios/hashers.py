@@ -0,0 +1,115 @@
+# usuarios/hashers.py
+"""
+Política de hashing de contraseñas
+
+- Hashers de Django con los parámetros de coste tomados de settings
+  (PASSWORD_HASH_*). El algoritmo preferido lo elige PASSWORD_HASH_ALGORITMO
+  y se coloca primero en PASSWORD_HASHERS; el resto solo verifica hashes
+  antiguos.
+- Rehash al login: check_password de Django llama al setter cuando el hash
+  no usa el hasher preferido o sus parámetros cambiaron (must_update), así
+  que cada login correcto migra el hash al coste configurado.
+- Offload opcional: con PASSWORD_HASH_POOL_SIZE > 0 el cálculo del hash se
+  hace en un pool de hilos acotado. argon2-cffi, hashlib.scrypt y
+  hashlib.pbkdf2_hmac liberan el GIL, así que el pool limita cuántos hashes
+  corren a la vez (CPU y memoria) sin bloquear el resto de hilos del worker.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2HasherConfigurable(hashers.Argon2PasswordHasher):
+    """Argon2id con time_cost / memory_cost (KiB) / parallelism de settings"""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_HASH_ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_HASH_ARGON2_MEMORY_COST', 19456)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_HASH_ARGON2_PARALLELISM', 1)
+
+
+class ScryptHasherConfigurable(hashers.ScryptPasswordHasher):
+    """scrypt con work_factor (N) / block_size (r) / parallelism (p) de settings"""
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'PASSWORD_HASH_SCRYPT_WORK_FACTOR', 2**14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, 'PASSWORD_HASH_SCRYPT_BLOCK_SIZE', 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_HASH_SCRYPT_PARALLELISM', 1)
+
+    @property
+    def maxmem(self):
+        # OpenSSL limita a 32 MiB por defecto; scrypt necesita 128 * r * N bytes
+        return 2 * 128 * self.block_size * self.work_factor
+
+
+class PBKDF2HasherConfigurable(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 con el número de iteraciones de settings"""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_PBKDF2_ITERACIONES', 1_000_000)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_POOL_SIZE,
+                    thread_name_prefix='hash-password',
+                )
+    return _pool
+
+
+def _ejecutar(func, *args):
+    """Ejecutar func en el pool de hashing si está activo, si no en este hilo"""
+    if getattr(settings, 'PASSWORD_HASH_POOL_SIZE', 0) <= 0:
+        return func(*args)
+    return _obtener_pool().submit(func, *args).result()
+
+
+def hashear_password(password):
+    """make_password con el hasher preferido (en el pool si está activo)"""
+    return _ejecutar(hashers.make_password, password)
+
+
+def verificar_password(user, password):
+    """
+    Equivalente a user.check_password(password) con el hash en el pool.
+
+    Solo el cálculo va al pool; si hace falta rehash, el UPDATE de
+    auth_user.password se hace en el hilo que atiende la petición (su
+    conexión y su transacción).
+    """
+    necesita_rehash = []
+    valido = _ejecutar(
+        hashers.check_password, password, user.password,
+        lambda raw_password: necesita_rehash.append(True),
+    )
+
+    if valido and necesita_rehash:
+        user.password = hashear_password(password)
+        user.save(update_fields=['password'])
+
+    return valido
@@ -0,0 +1,53 @@
+# usuarios/http_cliente.py
+"""
+Cliente HTTP asíncrono compartido para llamadas a servicios externos
+(Factiliza/RENIEC, etc.)
+
+Se mantiene un único httpx.AsyncClient por event loop para reutilizar
+conexiones keep-alive: pocos workers ASGI pueden atender cientos de
+llamadas externas en vuelo sin abrir un socket TLS por petición.
+"""
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+
+# Un cliente por event loop (httpx no permite compartir el pool entre loops)
+_clientes = weakref.WeakKeyDictionary()
+
+
+def _crear_cliente():
+    limites = httpx.Limits(
+        max_connections=getattr(settings, 'HTTP_CLIENTE_MAX_CONEXIONES', 200),
+        max_keepalive_connections=getattr(settings, 'HTTP_CLIENTE_MAX_KEEPALIVE', 50),
+        keepalive_expiry=getattr(settings, 'HTTP_CLIENTE_KEEPALIVE_SEGUNDOS', 30),
+    )
+    timeout = httpx.Timeout(
+        getattr(settings, 'HTTP_CLIENTE_TIMEOUT', 10),
+        connect=getattr(settings, 'HTTP_CLIENTE_TIMEOUT_CONEXION', 5),
+    )
+    return httpx.AsyncClient(limits=limites, timeout=timeout)
+
+
+def obtener_cliente_async() -> httpx.AsyncClient:
+    """
+    Obtener el cliente HTTP asíncrono del event loop actual.
+    Debe llamarse desde código async (vista async, tarea asyncio).
+    """
+    loop = asyncio.get_running_loop()
+    cliente = _clientes.get(loop)
+
+    if cliente is None or cliente.is_closed:
+        cliente = _crear_cliente()
+        _clientes[loop] = cliente
+
+    return cliente
+
+
+async def cerrar_cliente_async():
+    """Cerrar el cliente del loop actual (útil en shutdown o scripts)"""
+    loop = asyncio.get_running_loop()
+    cliente = _clientes.pop(loop, None)
+    if cliente is not None:
+        await cliente.aclose()
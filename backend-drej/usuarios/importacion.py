@@ -0,0 +1,479 @@
+# usuarios/importacion.py
+"""
+Importación masiva de estudiantes desde CSV/XLSX
+
+Pensado para matricular un grado completo de una vez:
+- Validación de todas las filas con consultas por conjuntos (IN por lotes),
+  no una consulta por estudiante
+- Hash de contraseñas en un pool de procesos compartido por las importaciones
+  del proceso (PBKDF2/Argon2 son CPU-bound)
+- INSERT de auth_user y tblEstudiante con bulk_create por lotes
+- Reporte por fila generado a medida que se procesa cada lote
+
+Lo usan la vista importar_estudiantes (views_orientador) y el comando
+`python manage.py importar_estudiantes`.
+"""
+import csv
+import io
+import logging
+import os
+import re
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction, IntegrityError
+
+from .catalogos import ROL_ESTUDIANTE, obtener_rol
+from .models import Estudiante
+from .registro import to_title_case
+from .unicidad import normalizar_email, registrar_en_filtro
+
+logger = logging.getLogger(__name__)
+
+# SQL Server admite como máximo 2100 parámetros por consulta
+LOTE_VALIDACION = 400
+
+# Alias aceptados en la cabecera del archivo -> campo interno
+COLUMNAS = {
+    'dni': 'dni',
+    'nombres': 'nombres',
+    'apellidopaterno': 'apellido_paterno',
+    'apellido_paterno': 'apellido_paterno',
+    'apellidomaterno': 'apellido_materno',
+    'apellido_materno': 'apellido_materno',
+    'fechanacimiento': 'fecha_nacimiento',
+    'fecha_nacimiento': 'fecha_nacimiento',
+    'telefono': 'telefono',
+    'email': 'email',
+    'correo': 'email',
+    'password': 'password',
+}
+
+CAMPOS_REPORTE = ['fila', 'dni', 'estado', 'mensaje', 'password_inicial']
+
+
+class ImportacionError(Exception):
+    """El archivo no se puede procesar (formato, cabecera, dependencia faltante)"""
+
+
+# ====================================================
+# LECTURA DEL ARCHIVO
+# ====================================================
+
+def _normalizar_cabecera(cabecera):
+    campos = []
+    for col in cabecera:
+        clave = re.sub(r'\s+', '', str(col or '')).lower()
+        campos.append(COLUMNAS.get(clave))
+
+    faltantes = {'dni', 'nombres', 'apellido_paterno', 'apellido_materno', 'fecha_nacimiento'} - set(campos)
+    if faltantes:
+        raise ImportacionError(f"Faltan columnas obligatorias: {', '.join(sorted(faltantes))}")
+    return campos
+
+
+def _leer_csv(contenido):
+    texto = contenido.decode('utf-8-sig')
+    try:
+        dialecto = csv.Sniffer().sniff(texto[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+
+    lector = csv.reader(io.StringIO(texto), dialecto)
+    try:
+        campos = _normalizar_cabecera(next(lector))
+    except StopIteration:
+        raise ImportacionError("El archivo está vacío")
+
+    for fila in lector:
+        if any(str(v).strip() for v in fila):
+            yield {c: v for c, v in zip(campos, fila) if c}
+
+
+def _leer_xlsx(contenido):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportacionError("Para importar XLSX instale openpyxl (pip install openpyxl)")
+
+    libro = load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    filas = libro.active.iter_rows(values_only=True)
+    try:
+        campos = _normalizar_cabecera(next(filas))
+    except StopIteration:
+        raise ImportacionError("El archivo está vacío")
+
+    for fila in filas:
+        if any(v not in (None, '') for v in fila):
+            yield {c: v for c, v in zip(campos, fila) if c}
+    libro.close()
+
+
+def leer_archivo(contenido, nombre_archivo):
+    """
+    Leer un CSV o XLSX con una fila por estudiante
+
+    Returns:
+        list[dict]: filas con claves internas (dni, nombres, ...)
+    """
+    if nombre_archivo.lower().endswith(('.xlsx', '.xlsm')):
+        return list(_leer_xlsx(contenido))
+    return list(_leer_csv(contenido))
+
+
+# ====================================================
+# VALIDACIÓN
+# ====================================================
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _parsear_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _validar_formato(fila):
+    """Normalizar una fila; devuelve (datos, error)"""
+    dni = _texto(fila.get('dni'))
+    if isinstance(fila.get('dni'), (int, float)):
+        # Excel guarda el DNI como número y pierde los ceros a la izquierda
+        dni = dni.zfill(8)
+    if not re.match(r'^\d{8}$', dni):
+        return None, "El DNI debe tener exactamente 8 dígitos"
+
+    nombres = to_title_case(_texto(fila.get('nombres')))
+    paterno = to_title_case(_texto(fila.get('apellido_paterno')))
+    materno = to_title_case(_texto(fila.get('apellido_materno')))
+    if not nombres or not paterno or not materno:
+        return None, "Nombres y apellidos son obligatorios"
+
+    fecha_nac = _parsear_fecha(fila.get('fecha_nacimiento'))
+    if fecha_nac is None:
+        return None, "Fecha de nacimiento inválida (use AAAA-MM-DD o DD/MM/AAAA)"
+
+    telefono = _texto(fila.get('telefono'))
+    if telefono and not re.match(r'^9\d{8}$', telefono):
+        return None, "El teléfono debe tener 9 dígitos y comenzar con 9"
+
+    email = normalizar_email(_texto(fila.get('email')))
+    if email and not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', email):
+        return None, "Email inválido"
+
+    password = _texto(fila.get('password'))
+    if password and len(password) < 8:
+        return None, "La contraseña debe tener al menos 8 caracteres"
+
+    return {
+        'dni': dni,
+        'nombres': nombres,
+        'apellido_paterno': paterno,
+        'apellido_materno': materno,
+        'fecha_nacimiento': fecha_nac,
+        'telefono': telefono or None,
+        'email': email,
+        'password': password,
+        'password_generado': not password,
+    }, None
+
+
+def _en_lotes(valores, tamano):
+    valores = list(valores)
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+
+def _buscar_existentes(dnis, emails):
+    """
+    DNIs y emails ya registrados, con una consulta por lote de valores
+    (auth_user, tblEstudiante y tblOrientador a la vez)
+    """
+    dnis_usados, emails_usados = set(), set()
+
+    for lote in _en_lotes(dnis, LOTE_VALIDACION):
+        marcadores = ', '.join(['%s'] * len(lote))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT username FROM auth_user WHERE username IN ({marcadores})
+                UNION SELECT EstudDNI FROM tblEstudiante WHERE EstudDNI IN ({marcadores})
+                UNION SELECT OrienDNI FROM tblOrientador WHERE OrienDNI IN ({marcadores})
+            """, lote * 3)
+            dnis_usados.update(row[0].strip() for row in cursor.fetchall())
+
+    # SQL Server: columna calculada e indexada email_normalizado (migración
+    # 0003), como el login; LOWER(email) obligaría a recorrer auth_user en
+    # cada lote. tblOrientador compara por la intercalación CI de la columna
+    if connection.vendor == 'microsoft':
+        consulta = """
+            SELECT email_normalizado FROM auth_user WHERE email_normalizado IN ({marcadores})
+            UNION SELECT OrienEmailInstitucional FROM tblOrientador
+            WHERE OrienEmailInstitucional IN ({marcadores})
+        """
+    else:
+        consulta = """
+            SELECT LOWER(email) FROM auth_user WHERE LOWER(email) IN ({marcadores})
+            UNION SELECT LOWER(OrienEmailInstitucional) FROM tblOrientador
+            WHERE LOWER(OrienEmailInstitucional) IN ({marcadores})
+        """
+
+    for lote in _en_lotes(emails, LOTE_VALIDACION):
+        marcadores = ', '.join(['%s'] * len(lote))
+        with connection.cursor() as cursor:
+            cursor.execute(consulta.format(marcadores=marcadores), lote * 2)
+            emails_usados.update(normalizar_email(row[0]) for row in cursor.fetchall())
+
+    return dnis_usados, emails_usados
+
+
+def validar_filas(filas):
+    """
+    Validar todas las filas (formato + duplicados en archivo + duplicados en BD)
+
+    Returns:
+        (validas, errores): listas de (num_fila, datos) y (num_fila, dni, mensaje)
+    """
+    validas, errores = [], []
+    dnis_archivo, emails_archivo = set(), set()
+
+    # La fila 1 es la cabecera
+    for num, fila in enumerate(filas, start=2):
+        datos, error = _validar_formato(fila)
+        if error:
+            errores.append((num, _texto(fila.get('dni')), error))
+            continue
+        if datos['dni'] in dnis_archivo:
+            errores.append((num, datos['dni'], "DNI repetido en el archivo"))
+            continue
+        if datos['email'] and datos['email'] in emails_archivo:
+            errores.append((num, datos['dni'], "Email repetido en el archivo"))
+            continue
+        dnis_archivo.add(datos['dni'])
+        if datos['email']:
+            emails_archivo.add(datos['email'])
+        validas.append((num, datos))
+
+    dnis_usados, emails_usados = _buscar_existentes(dnis_archivo, emails_archivo)
+
+    filtradas = []
+    for num, datos in validas:
+        if datos['dni'] in dnis_usados:
+            errores.append((num, datos['dni'], "Este DNI ya está registrado"))
+        elif datos['email'] and datos['email'] in emails_usados:
+            errores.append((num, datos['dni'], "Este correo ya está registrado"))
+        else:
+            filtradas.append((num, datos))
+
+    return filtradas, errores
+
+
+# ====================================================
+# HASH EN POOL DE PROCESOS
+# ====================================================
+
+def _inicializar_worker():
+    """Asegurar Django configurado en procesos creados con 'spawn' (Windows)"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drej_backend.settings')
+        django.setup()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool():
+    """
+    Pool de procesos del proceso web, creado en la primera importación y
+    compartido por las siguientes: arrancar los workers (y django.setup()
+    con 'spawn') cuesta más que hashear un grado entero
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                procesos = getattr(settings, 'IMPORTACION_PROCESOS_HASH', None) or os.cpu_count() or 1
+                _pool = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_worker)
+    return _pool
+
+
+def _descartar_pool(roto):
+    global _pool
+    with _pool_lock:
+        if _pool is roto:
+            _pool = None
+    roto.shutdown(wait=False, cancel_futures=True)
+
+
+def hashear_passwords(passwords):
+    """make_password de cada contraseña en el pool, en el mismo orden"""
+    pool = _obtener_pool()
+    try:
+        return list(pool.map(make_password, passwords))
+    except BrokenProcessPool:
+        # Un worker murió (p. ej. por memoria): el pool ya no sirve, se crea otro
+        logger.warning("[IMPORTACION] Pool de hash roto, se crea uno nuevo")
+        _descartar_pool(pool)
+        return list(_obtener_pool().map(make_password, passwords))
+
+
+# ====================================================
+# INSERCIÓN
+# ====================================================
+
+def _insertar_lote(lote, hashes, insti_id, rol_id):
+    """bulk_create de auth_user + tblEstudiante para un lote (una transacción)"""
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(
+                username=datos['dni'],
+                email=datos['email'],
+                password=hash_,
+                first_name=datos['nombres'],
+                last_name=f"{datos['apellido_paterno']} {datos['apellido_materno']}",
+            )
+            for (_, datos), hash_ in zip(lote, hashes)
+        ])
+
+        # bulk_create no devuelve IDs en mssql: se leen en una consulta
+        ids = dict(User.objects.filter(
+            username__in=[datos['dni'] for _, datos in lote]
+        ).values_list('username', 'id'))
+
+        Estudiante.objects.bulk_create([
+            Estudiante(
+                EstudDNI=datos['dni'],
+                EstudNombres=datos['nombres'],
+                EstudApellidoPaterno=datos['apellido_paterno'],
+                EstudApellidoMaterno=datos['apellido_materno'],
+                EstudFechaNac=datos['fecha_nacimiento'],
+                EstudTelefono=datos['telefono'],
+                User_id=ids[datos['dni']],
+                Insti_id=insti_id,
+                Rol_id=rol_id,
+            )
+            for _, datos in lote
+        ])
+
+
+def _insertar_fila(datos, hash_, insti_id, rol_id):
+    with transaction.atomic():
+        user = User.objects.create(
+            username=datos['dni'],
+            email=datos['email'],
+            password=hash_,
+            first_name=datos['nombres'],
+            last_name=f"{datos['apellido_paterno']} {datos['apellido_materno']}",
+        )
+        Estudiante.objects.create(
+            EstudDNI=datos['dni'],
+            EstudNombres=datos['nombres'],
+            EstudApellidoPaterno=datos['apellido_paterno'],
+            EstudApellidoMaterno=datos['apellido_materno'],
+            EstudFechaNac=datos['fecha_nacimiento'],
+            EstudTelefono=datos['telefono'],
+            User_id=user.id,
+            Insti_id=insti_id,
+            Rol_id=rol_id,
+        )
+
+
+def _fila_creada(num, datos):
+    return {
+        'fila': num,
+        'dni': datos['dni'],
+        'estado': 'creado',
+        'mensaje': '',
+        'password_inicial': datos['password'] if datos['password_generado'] else '',
+    }
+
+
+def importar_estudiantes(filas, insti_id):
+    """
+    Importar estudiantes a una institución.
+
+    Es un generador: produce un dict por fila (ver CAMPOS_REPORTE) a medida
+    que se valida y se inserta cada lote, para poder enviar el reporte en
+    streaming.
+    """
+    rol_id = obtener_rol(ROL_ESTUDIANTE).RolID
+    tamano_lote = getattr(settings, 'IMPORTACION_LOTE', 200)
+
+    validas, errores = validar_filas(filas)
+    logger.info(f"[IMPORTACION] {len(validas)} filas válidas, {len(errores)} con errores")
+
+    for num, dni, mensaje in errores:
+        yield {'fila': num, 'dni': dni, 'estado': 'error', 'mensaje': mensaje, 'password_inicial': ''}
+
+    if not validas:
+        return
+
+    for _, datos in validas:
+        if datos['password_generado']:
+            datos['password'] = secrets.token_urlsafe(8)
+
+    creados = 0
+    for lote in _en_lotes(validas, tamano_lote):
+        hashes = hashear_passwords([datos['password'] for _, datos in lote])
+
+        try:
+            _insertar_lote(lote, hashes, insti_id, rol_id)
+            resultados = [_fila_creada(num, datos) for num, datos in lote]
+        except IntegrityError as e:
+            # Alguien registró uno de estos DNIs/emails entre la validación
+            # y el INSERT: reintentar fila por fila para aislar el conflicto
+            logger.warning(f"[IMPORTACION] Conflicto en lote, reintentando por fila: {str(e)}")
+            resultados = []
+            for (num, datos), hash_ in zip(lote, hashes):
+                try:
+                    _insertar_fila(datos, hash_, insti_id, rol_id)
+                    resultados.append(_fila_creada(num, datos))
+                except IntegrityError:
+                    resultados.append({
+                        'fila': num, 'dni': datos['dni'], 'estado': 'error',
+                        'mensaje': 'DNI o correo ya registrado', 'password_inicial': '',
+                    })
+
+        for resultado, (_, datos) in zip(resultados, lote):
+            if resultado['estado'] == 'creado':
+                creados += 1
+                registrar_en_filtro(dni=datos['dni'], email=datos['email'])
+            yield resultado
+
+    logger.info(f"[IMPORTACION] {creados} estudiantes creados en institución {insti_id}")
+
+
+def reporte_csv(resultados):
+    """Convertir los resultados en líneas CSV (cabecera incluida) para streaming"""
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=CAMPOS_REPORTE)
+
+    escritor.writeheader()
+    yield buffer.getvalue()
+
+    for resultado in resultados:
+        buffer.seek(0)
+        buffer.truncate(0)
+        escritor.writerow(resultado)
+        yield buffer.getvalue()
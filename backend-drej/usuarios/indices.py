@@ -0,0 +1,174 @@
+# usuarios/indices.py
+"""
+Catálogo de los índices que el backend espera en SQL Server
+
+Las tablas son managed=False y sus scripts viven fuera del repo: los
+índices de las rutas calientes se crean con migraciones RunPython (0002,
+0003, 0005-0010) y este catálogo las resume, con las consultas de la app
+que dependen de cada uno. `manage.py verificar_indices` compara el esquema
+real contra él y muestra el plan de esas consultas cuando falta alguno.
+
+Al añadir un índice en una migración, declararlo también aquí.
+"""
+import re
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Indice:
+    nombre: str
+    tabla: str
+    columnas: tuple  # clave en orden; 'Col DESC' para descendente
+    incluidas: tuple = ()
+    filtro: str = ''
+    unico: bool = False
+    migracion: str = ''
+    consultas: tuple = ()  # (ruta o uso, SQL de ejemplo con literales)
+
+    @property
+    def claves(self):
+        """Nombres de las columnas clave, sin dirección"""
+        return tuple(columna.split()[0] for columna in self.columnas)
+
+    def ddl(self):
+        sentencia = (
+            f"CREATE {'UNIQUE ' if self.unico else ''}NONCLUSTERED INDEX {self.nombre}\n"
+            f"    ON {self.tabla} ({', '.join(self.columnas)})"
+        )
+        if self.incluidas:
+            sentencia += f"\n    INCLUDE ({', '.join(self.incluidas)})"
+        if self.filtro:
+            sentencia += f"\n    WHERE {self.filtro}"
+        return sentencia
+
+
+def normalizar_filtro(filtro):
+    """'([Confirmado]=(0))' (sys.indexes) y 'Confirmado = 0' comparan igual"""
+    return re.sub(r'[\[\]()\s]', '', filtro or '').lower()
+
+
+CATALOGO = [
+    Indice(
+        'UX_auth_user_email', 'auth_user', ('email',), filtro="email <> ''", unico=True,
+        migracion='0002_indice_unico_email',
+        consultas=(('registro / check-email', "SELECT id FROM auth_user WHERE email = 'a@b.pe'"),),
+    ),
+    Indice(
+        # Sobre la columna calculada LOWER(LTRIM(RTRIM(email))) PERSISTED
+        'IX_auth_user_email_normalizado', 'auth_user', ('email_normalizado',),
+        migracion='0003_email_normalizado',
+        consultas=(
+            ('login por email (EmailOrDNIBackend)',
+             "SELECT * FROM auth_user WHERE email_normalizado = 'a@b.pe'"),
+            ('importación masiva (emails ya registrados)',
+             "SELECT email_normalizado FROM auth_user WHERE email_normalizado IN ('a@b.pe', 'c@d.pe')"),
+        ),
+    ),
+    Indice(
+        'IX_PasswordResetToken_created_at', 'tblPasswordResetToken', ('created_at',),
+        migracion='0005_indices_mantenimiento',
+        consultas=(('purga tokens_expirados',
+                    "SELECT id FROM tblPasswordResetToken WHERE created_at < '2000-01-01'"),),
+    ),
+    Indice(
+        'IX_Intento_pendiente_creado', 'tblIntento', ('Creado',), ('EstadoID', 'UltimoAutosave'),
+        filtro='Confirmado = 0', migracion='0005_indices_mantenimiento',
+        consultas=(('purga intentos_abandonados',
+                    "SELECT IntentID FROM tblIntento WHERE Confirmado = 0 AND EstadoID = 1 "
+                    "AND Creado < '2000-01-01'"),),
+    ),
+    Indice(
+        'UX_Intento_en_progreso', 'tblIntento', ('EstudID', 'CuestID'), filtro='Confirmado = 0',
+        unico=True, migracion='0006_intento_en_progreso_unico',
+        consultas=(('iniciar / retomar cuestionario (MERGE)',
+                    "SELECT IntentID FROM tblIntento WHERE EstudID = 1 AND CuestID = 1 AND Confirmado = 0"),),
+    ),
+    Indice(
+        'IX_Intento_Estud_Cuest_Confirmado', 'tblIntento', ('EstudID', 'CuestID', 'Confirmado'),
+        ('EstadoID', 'Creado'), migracion='0007_indices_rutas_calientes',
+        consultas=(
+            ('obtener_resultados / dashboard estudiante',
+             "SELECT IntentID, CuestID, Creado FROM tblIntento WHERE EstudID = 1 AND Confirmado = 1 "
+             "AND EstadoID = 2"),
+            ('verificar-retomar / reiniciar',
+             "SELECT IntentID FROM tblIntento WHERE EstudID = 1 AND CuestID = 1 AND Confirmado = 1"),
+        ),
+    ),
+    Indice(
+        'IX_Respuesta_IntentID', 'tblRespuesta', ('IntentID',), ('RespValor',),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('guardar_respuestas / resultado detalle / motor IA',
+                    "SELECT RespID, RespValor FROM tblRespuesta WHERE IntentID = 1"),),
+    ),
+    Indice(
+        'IX_Recomendacion_IntentID_Score', 'tblRecomendacion', ('IntentID', 'Score DESC'),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('obtener_resultados (top 5 por intento)',
+                    "SELECT RecomendacionID, Score FROM tblRecomendacion WHERE IntentID = 1 "
+                    "ORDER BY Score DESC"),),
+    ),
+    Indice(
+        'IX_Pregunta_Cuest_Activa_Orden', 'tblPregunta', ('CuestID', 'PregActiva', 'PregOrden'),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('payload de cuestionario / listado orientador',
+                    "SELECT PregID FROM tblPregunta WHERE CuestID = 1 AND PregActiva = 1 ORDER BY PregOrden"),),
+    ),
+    Indice(
+        'IX_Opcion_Preg_Orden', 'tblOpcion', ('PregID', 'OpcionOrden'),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('prefetch de opciones del cuestionario',
+                    "SELECT OpcionID, PregID FROM tblOpcion WHERE PregID IN (1, 2, 3) ORDER BY OpcionOrden"),),
+    ),
+    Indice(
+        'IX_Estudiante_UserID', 'tblEstudiante', ('UserID',),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('toda vista de estudiante (Estudiante por request.user)',
+                    "SELECT EstudID FROM tblEstudiante WHERE UserID = 1"),),
+    ),
+    Indice(
+        'IX_PasswordResetToken_User_used', 'tblPasswordResetToken', ('UserID', 'used'),
+        migracion='0007_indices_rutas_calientes',
+        consultas=(('solicitar recuperación (invalidar tokens previos)',
+                    "SELECT id FROM tblPasswordResetToken WHERE UserID = 1 AND used = 0"),),
+    ),
+    Indice(
+        'IX_Respuesta_RespFechaHora', 'tblRespuesta', ('RespFechaHora',),
+        migracion='0008_tablas_archivo',
+        consultas=(('dashboard orientador (respuestas_hoy)',
+                    "SELECT COUNT(*) FROM tblRespuesta WHERE RespFechaHora >= '2025-03-01' "
+                    "AND RespFechaHora < '2025-03-02'"),),
+    ),
+    Indice(
+        'IX_RespuestaArchivo_IntentID', 'tblRespuestaArchivo', ('IntentID',),
+        migracion='0008_tablas_archivo',
+        consultas=(('resultado detalle de un periodo cerrado',
+                    "SELECT RespID FROM tblRespuestaArchivo WHERE IntentID = 1"),),
+    ),
+    Indice(
+        'IX_RecomendacionArchivo_IntentID', 'tblRecomendacionArchivo', ('IntentID',),
+        migracion='0008_tablas_archivo',
+        consultas=(('obtener_resultados de periodos cerrados',
+                    "SELECT RecomendacionID, Score FROM tblRecomendacionArchivo WHERE IntentID IN (1, 2)"),),
+    ),
+    Indice(
+        'UX_FiltroRecomendacion_Filtro_Recomendacion', 'tblFiltroRecomendacion',
+        ('FiltroID', 'RecomendacionID'), unico=True, migracion='0009_filtros_guardados',
+        consultas=(('resultados de un filtro guardado (página por clave)',
+                    "SELECT RecomendacionID FROM tblFiltroRecomendacion WHERE FiltroID = 1 "
+                    "AND RecomendacionID < 1000 ORDER BY RecomendacionID DESC"),),
+    ),
+    Indice(
+        'IX_Estudiante_Insti_FechaNac', 'tblEstudiante', ('InstiID', 'EstudFechaNac'),
+        migracion='0009_filtros_guardados',
+        consultas=(('filtro guardado con criterio de edad / exportación',
+                    "SELECT EstudID FROM tblEstudiante WHERE InstiID = 1 "
+                    "AND EstudFechaNac > '2008-01-01' AND EstudFechaNac <= '2010-01-01'"),),
+    ),
+    Indice(
+        'IX_Estudiante_Insti_NivelRiesgo', 'tblEstudiante', ('InstiID', 'NivelRiesgoID'),
+        migracion='0010_nivel_riesgo_estudiante',
+        consultas=(('dashboard orientador (estudiantes por nivel de riesgo) / filtros por riesgo',
+                    "SELECT NivelRiesgoID, COUNT(*) FROM tblEstudiante WHERE InstiID = 1 "
+                    "GROUP BY NivelRiesgoID"),),
+    ),
+]
@@ -0,0 +1,126 @@
+# usuarios/management/commands/benchmark_auth.py
+import json
+import os
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from usuarios.rendimiento.clientes import ClienteHTTP, ClienteProceso
+from usuarios.rendimiento.datos import (
+    PASSWORD_PRUEBA, email_prueba, datos_registro, limpiar_datos_prueba,
+    sembrar_catalogos, sembrar_estudiantes, siguiente_dni_registro
+)
+from usuarios.rendimiento.estadisticas import Medicion, formatear_tabla
+
+ESCENARIOS = ('token', 'refresh', 'me', 'registro')
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de los endpoints de autenticación (token, refresh, me, "
+        "registro). Reporta req/s, p50/p95/p99, consultas SQL y CPU por petición. "
+        "Sin --url se ejecuta en proceso contra la BD configurada (SQLite con "
+        "DB_ENGINE=sqlite o un SQL Server local)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenarios', default=','.join(ESCENARIOS), help=f"Subconjunto de: {', '.join(ESCENARIOS)}")
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones medidas por escenario')
+        parser.add_argument('--concurrencia', type=int, default=10, help='Hilos (proceso) o conexiones (HTTP) simultáneas')
+        parser.add_argument('--usuarios', type=int, default=50, help='Estudiantes sintéticos entre los que se reparten las peticiones')
+        parser.add_argument('--calentamiento', type=int, default=5, help='Peticiones no medidas antes de cada escenario')
+        parser.add_argument('--url', help='URL base de un servidor levantado (p. ej. http://127.0.0.1:8000); sin ella, en proceso')
+        parser.add_argument('--json', dest='salida_json', help='Guardar los resultados en un archivo JSON para comparar')
+        parser.add_argument('--conservar-registros', action='store_true', help='No borrar los usuarios creados por el escenario registro')
+
+    def handle(self, *args, **options):
+        escenarios = [e.strip() for e in options['escenarios'].split(',') if e.strip()]
+        invalidos = set(escenarios) - set(ESCENARIOS)
+        if invalidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(invalidos))}")
+
+        concurrencia = max(1, options['concurrencia'])
+        cliente = ClienteHTTP(options['url']) if options['url'] else ClienteProceso()
+
+        insti_id = sembrar_catalogos()
+        dnis = sembrar_estudiantes(max(1, options['usuarios']), insti_id)
+
+        tokens = []
+        if {'refresh', 'me'} & set(escenarios):
+            tokens = self._obtener_tokens(cliente, dnis)
+
+        resumenes = []
+        try:
+            for escenario in escenarios:
+                total = options['peticiones'] + options['calentamiento']
+                peticiones = self._peticiones(escenario, total, dnis, tokens, insti_id)
+
+                if options['calentamiento']:
+                    cliente.ejecutar(peticiones[:options['calentamiento']], 1, Medicion('calentamiento'))
+
+                medicion = Medicion(escenario)
+                cliente.ejecutar(peticiones[options['calentamiento']:], concurrencia, medicion)
+                resumenes.append(medicion.resumen())
+        finally:
+            if 'registro' in escenarios and not options['conservar_registros']:
+                limpiar_datos_prueba(solo_registro=True)
+
+        contexto = {
+            'fecha': timezone.now().isoformat(),
+            'modo': cliente.modo,
+            'url': options['url'],
+            'motor': connection.vendor,
+            'hasher': get_hasher('default').algorithm,
+            'hash_pool': getattr(settings, 'PASSWORD_HASH_POOL_SIZE', 0),
+            'concurrencia': concurrencia,
+            'cpus': os.cpu_count(),
+        }
+        self.stdout.write(
+            f"Modo {contexto['modo']} | BD {contexto['motor']} | hasher {contexto['hasher']} | "
+            f"concurrencia {concurrencia} | CPUs {contexto['cpus']}\n"
+        )
+        for linea in formatear_tabla(resumenes):
+            self.stdout.write(linea)
+
+        if options['salida_json']:
+            with open(options['salida_json'], 'w', encoding='utf-8') as f:
+                json.dump({'contexto': contexto, 'resultados': resumenes}, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"\nResultados guardados en {options['salida_json']}")
+
+    def _obtener_tokens(self, cliente, dnis):
+        """Un par access/refresh por usuario sintético (fuera de la medición)"""
+        tokens = []
+        for dni in dnis:
+            r = cliente.peticion('POST', '/api/auth/token/', {'username': dni, 'password': PASSWORD_PRUEBA})
+            if r.status != 200 or not r.cuerpo:
+                raise CommandError(f"No se pudo obtener token para {dni} (HTTP {r.status}): {r.cuerpo}")
+            tokens.append((r.cuerpo['access'], r.cuerpo['refresh']))
+        return tokens
+
+    def _peticiones(self, escenario, total, dnis, tokens, insti_id):
+        if escenario == 'token':
+            # Mitad por DNI y mitad por email: las dos ramas de EmailOrDNIBackend
+            identificadores = [dni if i % 2 == 0 else email_prueba(dni) for i, dni in enumerate(dnis)]
+            return [
+                ('POST', '/api/auth/token/', {'username': identificador, 'password': PASSWORD_PRUEBA}, None)
+                for identificador in islice(cycle(identificadores), total)
+            ]
+
+        if escenario == 'refresh':
+            return [
+                ('POST', '/api/auth/token/refresh/', {'refresh': refresh}, None)
+                for _, refresh in islice(cycle(tokens), total)
+            ]
+
+        if escenario == 'me':
+            return [('GET', '/api/auth/me/', None, access) for access, _ in islice(cycle(tokens), total)]
+
+        primer_dni = siguiente_dni_registro()
+        return [
+            ('POST', '/api/auth/register/', datos_registro(primer_dni + i, insti_id), None)
+            for i in range(total)
+        ]
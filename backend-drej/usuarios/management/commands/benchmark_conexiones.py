@@ -0,0 +1,138 @@
+# usuarios/management/commands/benchmark_conexiones.py
+import time
+from itertools import cycle, islice
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from usuarios.rendimiento.clientes import _host_permitido
+from usuarios.rendimiento.datos import sembrar_catalogos, sembrar_estudiantes, sembrar_orientador
+from usuarios.rendimiento.estadisticas import Medicion
+
+ESCENARIOS = ('check-dni', 'me', 'dashboard-estudiante', 'dashboard-orientador')
+
+# modo -> (CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+MODOS = {
+    'por_peticion': (0, False),
+    'persistente': (600, False),
+    'persistente_salud': (600, True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la latencia por petición abriendo una conexión a la BD en cada "
+        "petición (CONN_MAX_AGE=0) frente a conexiones persistentes, con y sin "
+        "CONN_HEALTH_CHECKS. En proceso y secuencial, para aislar el coste del "
+        "login/TLS contra SQL Server (con SQLite la diferencia es mínima)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenarios', default=','.join(ESCENARIOS), help=f"Subconjunto de: {', '.join(ESCENARIOS)}")
+        parser.add_argument('--modos', default=','.join(MODOS), help=f"Subconjunto de: {', '.join(MODOS)}")
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones medidas por escenario y modo')
+        parser.add_argument('--usuarios', type=int, default=200, help='Estudiantes sintéticos (DNIs distintos para check-dni)')
+        parser.add_argument('--calentamiento', type=int, default=5, help='Peticiones no medidas antes de cada medición')
+
+    def handle(self, *args, **options):
+        escenarios = [e.strip() for e in options['escenarios'].split(',') if e.strip()]
+        modos = [m.strip() for m in options['modos'].split(',') if m.strip()]
+        invalidos = (set(escenarios) - set(ESCENARIOS)) | (set(modos) - set(MODOS))
+        if invalidos:
+            raise CommandError(f"Escenarios o modos desconocidos: {', '.join(sorted(invalidos))}")
+
+        insti_id = sembrar_catalogos()
+        dnis = sembrar_estudiantes(max(1, options['usuarios']), insti_id)
+        dni_orientador = sembrar_orientador(insti_id)
+        tokens = {
+            'estudiante': str(RefreshToken.for_user(User.objects.get(username=dnis[0])).access_token),
+            'orientador': str(RefreshToken.for_user(User.objects.get(username=dni_orientador)).access_token),
+        }
+
+        conexiones = [0]
+
+        def contar(sender, **kwargs):
+            conexiones[0] += 1
+
+        connection_created.connect(contar, weak=False)
+        original = (connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS'])
+        cliente = Client(raise_request_exception=False)
+        filas = []
+        try:
+            for escenario in escenarios:
+                for modo in modos:
+                    connection.close()
+                    # settings_dict es compartido por las conexiones de todos los hilos
+                    connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS'] = MODOS[modo]
+                    # Sin cache de unicidad: check-dni debe llegar a la BD
+                    cache.clear()
+
+                    peticiones = self._peticiones(escenario, options['peticiones'] + options['calentamiento'], dnis, tokens)
+                    for peticion in peticiones[:options['calentamiento']]:
+                        self._enviar(cliente, *peticion)
+
+                    medicion = Medicion(escenario)
+                    conexiones[0] = 0
+                    medicion.iniciar()
+                    for peticion in peticiones[options['calentamiento']:]:
+                        inicio = time.perf_counter()
+                        estado = self._enviar(cliente, *peticion)
+                        medicion.registrar(time.perf_counter() - inicio, estado < 400)
+                    medicion.finalizar()
+
+                    resumen = medicion.resumen()
+                    resumen['modo'] = modo
+                    resumen['conexiones_por_peticion'] = conexiones[0] / max(1, resumen['peticiones'])
+                    filas.append(resumen)
+        finally:
+            connection_created.disconnect(contar)
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS'] = original
+
+        self._reportar(filas)
+
+    def _peticiones(self, escenario, total, dnis, tokens):
+        if escenario == 'check-dni':
+            return [
+                (reverse('check-dni', kwargs={'dni': dni}), None)
+                for dni in islice(cycle(dnis), total)
+            ]
+        if escenario == 'me':
+            return [('/api/auth/me/', tokens['estudiante'])] * total
+        rol = 'orientador' if escenario == 'dashboard-orientador' else 'estudiante'
+        return [(reverse(escenario), tokens[rol])] * total
+
+    def _enviar(self, cliente, ruta, token):
+        extra = {'HTTP_HOST': _host_permitido()}
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        # El Client de pruebas desconecta close_old_connections de
+        # request_started/request_finished; se llama a mano para reproducir
+        # el ciclo de vida de la conexión bajo WSGI
+        close_old_connections()
+        try:
+            return cliente.get(ruta, **extra).status_code
+        finally:
+            close_old_connections()
+
+    def _reportar(self, filas):
+        self.stdout.write(f"BD {connection.vendor} | secuencial, en proceso\n")
+        self.stdout.write(
+            f"{'escenario':<22}{'modo':<19}{'n':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'conex/req':>11}{'ahorro p50':>12}"
+        )
+        base = {f['escenario']: f['p50_ms'] for f in filas if f['modo'] == 'por_peticion'}
+        for f in filas:
+            ahorro = ''
+            if f['modo'] != 'por_peticion' and f['escenario'] in base:
+                ahorro = f"{base[f['escenario']] - f['p50_ms']:.2f} ms"
+            self.stdout.write(
+                f"{f['escenario']:<22}{f['modo']:<19}{f['peticiones']:>6}{f['errores']:>5}"
+                f"{f['p50_ms']:>9.2f}{f['p95_ms']:>9.2f}{f['conexiones_por_peticion']:>11.2f}{ahorro:>12}"
+            )
@@ -0,0 +1,79 @@
+# usuarios/management/commands/benchmark_emails.py
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+from usuarios.plantillas_email import ASUNTOS, obtener_plantilla
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el coste de renderizar cada email en un envío masivo: plantilla "
+        "compilada una vez por proceso (usuarios/plantillas_email.py) frente a "
+        "leer, compilar y pasar strip_tags en cada mensaje."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensajes', type=int, default=2000, help='Mensajes renderizados por estrategia')
+        parser.add_argument(
+            '--plantillas',
+            help=f"Lista separada por comas. Por defecto todas: {','.join(ASUNTOS)}",
+        )
+
+    def handle(self, *args, **options):
+        nombres = (
+            [n.strip() for n in options['plantillas'].split(',') if n.strip()]
+            if options['plantillas'] else list(ASUNTOS)
+        )
+        for nombre in nombres:
+            if nombre not in ASUNTOS:
+                raise CommandError(f"Plantilla desconocida: {nombre}")
+
+        mensajes = max(1, options['mensajes'])
+        contextos = [
+            {
+                'user_name': f'Estudiante {i}',
+                'reset_url': f'{settings.FRONTEND_URL}/reset-password/{uuid.uuid4()}',
+                'expiration_hours': 1,
+            }
+            for i in range(mensajes)
+        ]
+
+        self.stdout.write(f"{mensajes} mensajes por estrategia\n")
+        self.stdout.write(f"{'plantilla':<32}{'estrategia':<16}{'µs/mensaje':>12}{'mensajes/s':>12}")
+
+        for nombre in nombres:
+            obtener_plantilla.cache_clear()
+            inicio = time.perf_counter()
+            obtener_plantilla(nombre)
+            compilacion = time.perf_counter() - inicio
+
+            por_envio = self._medir(lambda ctx: self._renderizar_por_envio(nombre, ctx), contextos)
+            compilada = self._medir(lambda ctx: obtener_plantilla(nombre).renderizar(ctx), contextos)
+
+            for estrategia, segundos in (('por envío', por_envio), ('compilada', compilada)):
+                self.stdout.write(
+                    f"{nombre:<32}{estrategia:<16}{1e6 * segundos / mensajes:>12.1f}{mensajes / segundos:>12.0f}"
+                )
+            self.stdout.write(
+                f"{'':<32}compilación única: {compilacion * 1000:.1f} ms | "
+                f"{por_envio / compilada:.1f}x más rápido compilada\n"
+            )
+
+    def _medir(self, renderizar, contextos):
+        inicio = time.perf_counter()
+        for contexto in contextos:
+            renderizar(contexto)
+        return time.perf_counter() - inicio
+
+    def _renderizar_por_envio(self, nombre, contexto):
+        """Lo que cuesta sin cache: leer el archivo, compilar y derivar el texto del HTML renderizado"""
+        plantilla = get_template(f'emails/{nombre}.html').template
+        with open(plantilla.origin.name, encoding='utf-8') as archivo:
+            html = Template(archivo.read()).render(Context(contexto))
+        return ASUNTOS[nombre], strip_tags(html), html
@@ -0,0 +1,78 @@
+# usuarios/management/commands/benchmark_hashing.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cuántos logins por segundo y por núcleo soporta cada hasher "
+        "configurado en PASSWORD_HASHERS (verificación de contraseña, que es "
+        "el coste dominante del login)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algoritmos',
+            help='Lista separada por comas (p. ej. argon2,scrypt,pbkdf2_sha256). Por defecto todos los configurados',
+        )
+        parser.add_argument('--segundos', type=float, default=3.0, help='Duración de cada medición')
+        parser.add_argument(
+            '--hilos', type=int, default=1,
+            help='Verificaciones concurrentes (simula PASSWORD_HASH_POOL_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        if options['algoritmos']:
+            algoritmos = [a.strip() for a in options['algoritmos'].split(',') if a.strip()]
+        else:
+            algoritmos = [hasher.algorithm for hasher in get_hashers()]
+
+        hilos = max(1, options['hilos'])
+        nucleos = min(hilos, os.cpu_count() or 1)
+
+        self.stdout.write(
+            f"Preferido: {get_hasher('default').algorithm} | hilos: {hilos} | "
+            f"CPUs: {os.cpu_count()} | {options['segundos']:.1f} s por algoritmo\n"
+        )
+        self.stdout.write(f"{'algoritmo':<16}{'ms/login':>10}{'logins/s':>12}{'logins/s/núcleo':>18}  parámetros")
+
+        for algoritmo in algoritmos:
+            try:
+                hasher = get_hasher(algoritmo)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            encoded = hasher.encode('ContraseñaDePrueba123', hasher.salt())
+            total, cpu, transcurrido = self._medir(hasher, encoded, options['segundos'], hilos)
+
+            por_segundo = total / transcurrido
+            self.stdout.write(
+                f"{algoritmo:<16}{1000 * cpu / total:>10.1f}{por_segundo:>12.1f}"
+                f"{por_segundo / nucleos:>18.1f}  {self._parametros(hasher, encoded)}"
+            )
+
+    def _medir(self, hasher, encoded, segundos, hilos):
+        fin = time.perf_counter() + segundos
+
+        def verificar_hasta_fin():
+            n = 0
+            while time.perf_counter() < fin:
+                hasher.verify('ContraseñaDePrueba123', encoded)
+                n += 1
+            return n
+
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            total = sum(pool.map(lambda _: verificar_hasta_fin(), range(hilos)))
+        return total, time.process_time() - inicio_cpu, time.perf_counter() - inicio
+
+    def _parametros(self, hasher, encoded):
+        detalle = hasher.decode(encoded)
+        return ', '.join(
+            f'{k}={v}' for k, v in detalle.items()
+            if k not in ('algorithm', 'hash', 'salt', 'variety', 'version', 'params')
+        )
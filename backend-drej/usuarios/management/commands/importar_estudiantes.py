@@ -0,0 +1,54 @@
+# usuarios/management/commands/importar_estudiantes.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.importacion import (
+    ImportacionError, leer_archivo, importar_estudiantes, reporte_csv
+)
+from usuarios.models import InstitucionEducativa
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa estudiantes desde un CSV/XLSX a una institución. "
+        "Columnas: dni, nombres, apellidoPaterno, apellidoMaterno, "
+        "fechaNacimiento y opcionalmente telefono, email, password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o XLSX')
+        parser.add_argument('--insti-id', type=int, required=True, help='ID de la institución educativa')
+        parser.add_argument('--reporte', help='Archivo donde escribir el reporte CSV (por defecto stdout)')
+
+    def handle(self, *args, **options):
+        if not InstitucionEducativa.objects.filter(InstiID=options['insti_id']).exists():
+            raise CommandError(f"La institución {options['insti_id']} no existe")
+
+        try:
+            with open(options['archivo'], 'rb') as f:
+                filas = leer_archivo(f.read(), options['archivo'])
+        except (OSError, ImportacionError, UnicodeDecodeError) as e:
+            raise CommandError(f"No se pudo leer el archivo: {e}")
+
+        salida = open(options['reporte'], 'w', encoding='utf-8', newline='') if options['reporte'] else sys.stdout
+        contador = {'creado': 0, 'error': 0}
+
+        def contar(resultados):
+            for resultado in resultados:
+                contador[resultado['estado']] += 1
+                yield resultado
+
+        inicio = time.perf_counter()
+        try:
+            for linea in reporte_csv(contar(importar_estudiantes(filas, options['insti_id']))):
+                salida.write(linea)
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"{contador['creado']} estudiantes creados, {contador['error']} filas con error "
+            f"({time.perf_counter() - inicio:.1f} s)"
+        ))
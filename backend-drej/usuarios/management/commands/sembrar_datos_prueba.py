@@ -0,0 +1,42 @@
+# usuarios/management/commands/sembrar_datos_prueba.py
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.rendimiento.datos import (
+    DOMINIO_PRUEBA, PASSWORD_PRUEBA,
+    crear_tablas_no_gestionadas, sembrar_catalogos, sembrar_estudiantes, limpiar_datos_prueba
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra estudiantes sintéticos para benchmarks y pruebas de carga "
+        f"(emails @{DOMINIO_PRUEBA}, contraseña {PASSWORD_PRUEBA})."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=100, help='Cantidad de estudiantes a asegurar')
+        parser.add_argument(
+            '--crear-tablas', action='store_true',
+            help='Crear las tablas managed=False que falten (solo SQLite/BD local, no SQL Server)',
+        )
+        parser.add_argument('--limpiar', action='store_true', help='Borrar todos los datos sintéticos y salir')
+
+    def handle(self, *args, **options):
+        if options['limpiar']:
+            borrados = limpiar_datos_prueba()
+            self.stdout.write(self.style.SUCCESS(f"{borrados} usuarios de prueba borrados"))
+            return
+
+        if options['crear_tablas']:
+            try:
+                creadas = crear_tablas_no_gestionadas()
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Tablas creadas: {', '.join(creadas) or 'ninguna'}")
+
+        insti_id = sembrar_catalogos()
+        dnis = sembrar_estudiantes(options['usuarios'], insti_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(dnis)} estudiantes de prueba listos ({dnis[0]}..{dnis[-1]}) en la institución {insti_id}"
+            if dnis else "Sin estudiantes que sembrar"
+        ))
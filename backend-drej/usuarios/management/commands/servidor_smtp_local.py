@@ -0,0 +1,47 @@
+# usuarios/management/commands/servidor_smtp_local.py
+import asyncio
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+from django.core.management.base import BaseCommand
+
+from usuarios.rendimiento.smtp_local import ServidorSMTPLocal
+
+
+class Command(BaseCommand):
+    help = (
+        "Levanta un servidor SMTP local que acepta y muestra los emails sin "
+        "enviarlos. Para probar la bandeja de salida: EMAIL_HOST=localhost "
+        "EMAIL_PORT=1025 EMAIL_USE_TLS=False y un worker de la cola 'email'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--puerto', type=int, default=1025)
+        parser.add_argument('--latencia-ms', type=float, default=0, help='Espera antes de aceptar cada mensaje')
+        parser.add_argument('--rechazar', help='Responder 550 a los destinatarios que contengan este texto')
+        parser.add_argument(
+            '--max-por-conexion', type=int,
+            help='Cerrar la conexión tras N mensajes (simula el límite del proveedor)',
+        )
+
+    def handle(self, *args, **options):
+        servidor = ServidorSMTPLocal(
+            host=options['host'],
+            puerto=options['puerto'],
+            latencia_ms=options['latencia_ms'],
+            rechazar=options['rechazar'],
+            max_por_conexion=options['max_por_conexion'],
+            al_recibir=self._mostrar,
+        )
+        self.stdout.write(self.style.SUCCESS(f"SMTP local en {options['host']}:{options['puerto']} (Ctrl+C para salir)"))
+        try:
+            asyncio.run(servidor.servir())
+        except KeyboardInterrupt:
+            self.stdout.write(f"\n{len(servidor.mensajes)} mensajes en {servidor.conexiones} conexiones")
+
+    def _mostrar(self, mensaje):
+        asunto = str(make_header(decode_header(message_from_bytes(mensaje.datos).get('Subject', ''))))
+        self.stdout.write(
+            f"[conexión {mensaje.conexion}] {mensaje.remitente} -> {', '.join(mensaje.destinatarios)}: {asunto}"
+        )
@@ -0,0 +1,96 @@
+# usuarios/management/commands/simular_examen.py
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from usuarios.rendimiento.datos import (
+    limpiar_intentos_prueba, sembrar_catalogos, sembrar_cuestionario, sembrar_estudiantes
+)
+from usuarios.rendimiento.estadisticas import formatear_tabla
+from usuarios.rendimiento.examen import SimulacionExamen
+from usuarios.rendimiento.groq_simulado import groq_simulado
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula una jornada de examen: N estudiantes concurrentes hacen login, "
+        "abren el cuestionario, lo inician, autoguardan, confirman (motor de "
+        "recomendaciones con Groq simulado) y consultan resultados. Reporta por "
+        "etapa throughput, p50/p95/p99, consultas SQL, CPU y esperas por bloqueo. "
+        "Requiere SQL Server (p. ej. un contenedor local): las vistas usan T-SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=30, help='Estudiantes concurrentes (un hilo cada uno)')
+        parser.add_argument('--autosaves', type=int, default=3, help='Autoguardados por estudiante antes de confirmar')
+        parser.add_argument('--sondeos', type=int, default=5, help='Consultas a resultados tras confirmar')
+        parser.add_argument('--intervalo-sondeo', type=float, default=1.0, help='Segundos entre consultas a resultados')
+        parser.add_argument('--latencia-groq', type=float, default=800, help='Latencia simulada por llamada a Groq (ms)')
+        parser.add_argument('--jitter-groq', type=float, default=200, help='Variación aleatoria de la latencia de Groq (ms)')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla de las respuestas aleatorias')
+        parser.add_argument('--json', dest='salida_json', help='Guardar los resultados en un archivo JSON para comparar')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'microsoft':
+            raise CommandError(
+                "El flujo de examen usa T-SQL (GETDATE, SCOPE_IDENTITY): ejecutar contra SQL Server"
+            )
+        if options['estudiantes'] < 1:
+            raise CommandError("--estudiantes debe ser al menos 1")
+
+        insti_id = sembrar_catalogos()
+        dnis = sembrar_estudiantes(options['estudiantes'], insti_id)
+        cuestionario_id, opciones = sembrar_cuestionario()
+
+        # Cada corrida empieza sin intentos previos de los estudiantes sintéticos
+        limpiar_intentos_prueba(dnis)
+
+        simulacion = SimulacionExamen(
+            dnis, cuestionario_id, opciones,
+            autosaves=max(0, options['autosaves']),
+            sondeos=max(0, options['sondeos']),
+            intervalo_sondeo=options['intervalo_sondeo'],
+            semilla=options['semilla'],
+        )
+
+        with groq_simulado(options['latencia_groq'], options['jitter_groq']) as groq:
+            resumenes = simulacion.ejecutar()
+            llamadas_groq = groq.llamadas
+
+        contexto = {
+            'fecha': timezone.now().isoformat(),
+            'estudiantes': len(dnis),
+            'completados': simulacion.completados,
+            'duracion_s': round(simulacion.duracion, 2),
+            'examenes_por_minuto': round(60 * simulacion.completados / simulacion.duracion, 1) if simulacion.duracion else 0,
+            'latencia_groq_ms': options['latencia_groq'],
+            'llamadas_groq': llamadas_groq,
+            'cpus': os.cpu_count(),
+        }
+
+        self.stdout.write(
+            f"{contexto['completados']}/{contexto['estudiantes']} estudiantes completaron el flujo en "
+            f"{contexto['duracion_s']} s ({contexto['examenes_por_minuto']} exámenes/min) | "
+            f"Groq simulado: {llamadas_groq} llamadas de {options['latencia_groq']:.0f} ms\n"
+        )
+        for linea in formatear_tabla(resumenes):
+            self.stdout.write(linea)
+
+        if simulacion.fallos:
+            self.stderr.write(self.style.ERROR(f"\n{len(simulacion.fallos)} estudiantes fallaron:"))
+            for fallo in simulacion.fallos[:10]:
+                self.stderr.write(f"  {fallo}")
+
+        if options['salida_json']:
+            with open(options['salida_json'], 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'contexto': contexto, 'resultados': resumenes, 'fallos': simulacion.fallos},
+                    f, indent=2, ensure_ascii=False
+                )
+            self.stdout.write(f"\nResultados guardados en {options['salida_json']}")
+
+        if simulacion.fallos:
+            raise CommandError("La simulación no completó el flujo para todos los estudiantes")
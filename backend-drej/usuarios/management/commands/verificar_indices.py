@@ -0,0 +1,184 @@
+# usuarios/management/commands/verificar_indices.py
+import xml.etree.ElementTree as ET
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from usuarios.indices import CATALOGO, normalizar_filtro
+
+SHOWPLAN = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+
+# Estados del índice frente al esquema real
+PRESENTE, EQUIVALENTE, PARCIAL, FALTA = 'presente', 'equivalente', 'parcial', 'falta'
+
+INDICES_SQLSERVER = """
+    SELECT i.name, i.is_unique, i.filter_definition, c.name, ic.is_included_column
+    FROM sys.indexes i
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE i.object_id = OBJECT_ID(%s) AND i.type > 0
+    ORDER BY i.index_id, ic.is_included_column, ic.key_ordinal, ic.index_column_id
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los índices del catálogo (usuarios/indices.py) con el esquema "
+        "real y, para los que faltan, muestra el plan de las consultas que los "
+        "necesitan (SHOWPLAN_XML en SQL Server, EXPLAIN QUERY PLAN en SQLite)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--planes', action='store_true', help='Mostrar planes también de los índices presentes')
+        parser.add_argument('--sql', action='store_true', help='Imprimir el CREATE INDEX de los que faltan')
+        parser.add_argument('--estricto', action='store_true', help='Terminar con error si falta alguno')
+
+    def handle(self, *args, **options):
+        tablas_existentes = set(connection.introspection.table_names())
+        faltantes = []
+
+        self.stdout.write(f"BD {connection.vendor} | {len(CATALOGO)} índices en el catálogo\n")
+        for indice in CATALOGO:
+            if indice.tabla not in tablas_existentes:
+                self.stdout.write(self.style.WARNING(f"{'sin tabla':<12}{indice.tabla}.{indice.nombre}"))
+                continue
+
+            estado, detalle = self._comparar(indice, self._indices_tabla(indice.tabla))
+            estilo = {
+                PRESENTE: self.style.SUCCESS, EQUIVALENTE: self.style.SUCCESS,
+                PARCIAL: self.style.WARNING, FALTA: self.style.ERROR,
+            }[estado]
+            self.stdout.write(
+                estilo(f"{estado:<12}") + f"{indice.nombre} ON {indice.tabla} ({', '.join(indice.columnas)})"
+                + (f" — {detalle}" if detalle else '')
+            )
+
+            if estado in (PARCIAL, FALTA):
+                faltantes.append(indice)
+            if estado in (PARCIAL, FALTA) or options['planes']:
+                for uso, sql in indice.consultas:
+                    self.stdout.write(f"    {uso}: {self._plan(sql, indice.tabla)}")
+
+        if options['sql'] and faltantes:
+            self.stdout.write('\n-- Índices faltantes (las migraciones los crean con IF NOT EXISTS)')
+            for indice in faltantes:
+                self.stdout.write(f"{indice.ddl()};\n")
+
+        self.stdout.write(f"\n{len(faltantes)} índices faltantes o incompletos")
+        if faltantes and options['estricto']:
+            raise CommandError(f"Faltan índices: {', '.join(i.nombre for i in faltantes)}")
+
+    def _indices_tabla(self, tabla):
+        """
+        Índices de la tabla: {nombre: {'claves', 'incluidas', 'unico', 'filtro'}}
+        (columnas en minúsculas; columnas incluidas solo en SQL Server)
+        """
+        indices = {}
+        with connection.cursor() as cursor:
+            if connection.vendor == 'microsoft':
+                cursor.execute(INDICES_SQLSERVER, [tabla])
+                for nombre, unico, filtro, columna, incluida in cursor.fetchall():
+                    datos = indices.setdefault(nombre, {
+                        'claves': [], 'incluidas': [], 'unico': bool(unico), 'filtro': filtro or '',
+                    })
+                    datos['incluidas' if incluida else 'claves'].append(columna.lower())
+                return indices
+
+            filtros = {}
+            if connection.vendor == 'sqlite':
+                # Índices parciales: get_constraints no devuelve el WHERE
+                cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [tabla]
+                )
+                filtros = {
+                    nombre: sql.split(' WHERE ', 1)[1]
+                    for nombre, sql in cursor.fetchall() if sql and ' WHERE ' in sql
+                }
+
+            for nombre, restriccion in connection.introspection.get_constraints(cursor, tabla).items():
+                if restriccion.get('columns') and (restriccion.get('index') or restriccion.get('unique')):
+                    indices[nombre] = {
+                        'claves': [c.lower() for c in restriccion['columns']],
+                        'incluidas': [],
+                        'unico': bool(restriccion.get('unique')),
+                        'filtro': filtros.get(nombre, ''),
+                    }
+        return indices
+
+    def _comparar(self, indice, existentes):
+        """Estado del índice esperado y, si aplica, qué índice lo cubre o qué le falta"""
+        claves = [c.lower() for c in indice.claves]
+        necesarias = {c.lower() for c in indice.incluidas}
+        filtro = normalizar_filtro(indice.filtro)
+        admite_incluidas = connection.vendor == 'microsoft'
+
+        mejor, mejor_prefijo = None, 0
+        for nombre, existente in existentes.items():
+            # Un índice filtrado solo sirve para consultas con ese mismo filtro
+            filtro_existente = normalizar_filtro(existente['filtro'])
+            if filtro_existente and filtro_existente != filtro:
+                continue
+            if indice.unico and (not existente['unico'] or filtro_existente != filtro):
+                continue
+
+            if existente['claves'][:len(claves)] == claves:
+                columnas = set(existente['claves']) | set(existente['incluidas'])
+                sin_incluir = sorted(necesarias - columnas) if admite_incluidas else []
+                if sin_incluir:
+                    return PARCIAL, f"{nombre} no incluye {', '.join(sin_incluir)} (lookup por fila)"
+                if nombre == indice.nombre:
+                    return PRESENTE, ''
+                return EQUIVALENTE, f"cubierto por {nombre}"
+
+            prefijo = 0
+            for esperada, actual in zip(claves, existente['claves']):
+                if esperada != actual:
+                    break
+                prefijo += 1
+            if prefijo > mejor_prefijo:
+                mejor, mejor_prefijo = nombre, prefijo
+
+        if mejor:
+            return PARCIAL, f"{mejor} solo cubre ({', '.join(indice.claves[:mejor_prefijo])})"
+        return FALTA, ''
+
+    def _plan(self, sql, tabla):
+        try:
+            if connection.vendor == 'microsoft':
+                return self._plan_sqlserver(sql, tabla)
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    return '; '.join(fila[-1] for fila in cursor.fetchall())
+        except Exception as e:
+            return f'sin plan ({e})'
+        return f'sin plan ({connection.vendor})'
+
+    def _plan_sqlserver(self, sql, tabla):
+        """Plan estimado (no ejecuta la consulta): operadores sobre la tabla, coste y sugerencias"""
+        with connection.cursor() as cursor:
+            cursor.execute('SET SHOWPLAN_XML ON')
+            try:
+                cursor.execute(sql)
+                plan = ET.fromstring(cursor.fetchone()[0])
+            finally:
+                cursor.execute('SET SHOWPLAN_XML OFF')
+
+        operadores = []
+        for relop in plan.iter(f'{SHOWPLAN}RelOp'):
+            objeto = next(
+                (o for o in relop.iter(f'{SHOWPLAN}Object') if o.get('Table', '').strip('[]') == tabla),
+                None
+            )
+            # Solo el operador que accede a la tabla, no sus ancestros
+            if objeto is not None and relop.find(f'.//{SHOWPLAN}RelOp') is None:
+                indice = objeto.get('Index', '').strip('[]')
+                operadores.append(f"{relop.get('PhysicalOp')}{f' ({indice})' if indice else ''}")
+
+        partes = [', '.join(operadores) or 'sin acceso a la tabla']
+        sentencia = plan.find(f'.//{SHOWPLAN}StmtSimple')
+        if sentencia is not None and sentencia.get('StatementSubTreeCost'):
+            partes.append(f"coste {float(sentencia.get('StatementSubTreeCost')):.4f}")
+        for grupo in plan.iter(f'{SHOWPLAN}MissingIndexGroup'):
+            partes.append(f"el optimizador sugiere un índice (impacto {float(grupo.get('Impact', 0)):.0f}%)")
+        return ' | '.join(partes)
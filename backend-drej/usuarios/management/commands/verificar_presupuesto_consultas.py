@@ -0,0 +1,103 @@
+# usuarios/management/commands/verificar_presupuesto_consultas.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from usuarios.rendimiento.datos import (
+    crear_tablas_no_gestionadas, sembrar_catalogos, sembrar_estudiantes,
+    sembrar_orientador, sembrar_volumen
+)
+from usuarios.rendimiento.presupuestos import (
+    EXCLUIDAS, Escenario, VerificadorPresupuestos, rutas_sin_presupuesto
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica el presupuesto de consultas SQL y de tiempo de cada ruta de "
+        "usuarios/urls.py contra un volumen realista (cientos de preguntas, miles "
+        "de intentos). Todo corre en una transacción que se revierte. Sale con "
+        "error si alguna ruta se pasa del presupuesto o no lo declara: pensado "
+        "para CI contra una BD local (SQLite con --crear-tablas, o SQL Server)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=1000, help='Estudiantes sembrados')
+        parser.add_argument('--intentos', type=int, default=3, help='Intentos completados por estudiante')
+        parser.add_argument('--cuestionarios', type=int, default=5, help='Cuestionarios sembrados')
+        parser.add_argument('--preguntas', type=int, default=300, help='Preguntas en total (5 opciones cada una)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Peticiones medidas por ruta (mediana)')
+        parser.add_argument(
+            '--factor-tiempo', type=float, default=1.0,
+            help='Multiplicador de los presupuestos de tiempo (máquinas de CI lentas)',
+        )
+        parser.add_argument('--solo-consultas', action='store_true', help='No verificar los tiempos')
+        parser.add_argument(
+            '--crear-tablas', action='store_true',
+            help='Crear las tablas managed=False que falten (solo SQLite/BD local, no SQL Server)',
+        )
+
+    def handle(self, *args, **options):
+        faltantes = rutas_sin_presupuesto()
+        if faltantes:
+            raise CommandError(
+                "Rutas sin presupuesto en usuarios/rendimiento/presupuestos.py: " + ', '.join(faltantes)
+            )
+        if options['cuestionarios'] < 2 or options['intentos'] < 1:
+            raise CommandError("Se necesitan al menos 2 cuestionarios y 1 intento por estudiante")
+
+        if options['crear_tablas']:
+            try:
+                crear_tablas_no_gestionadas()
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        factor = float('inf') if options['solo_consultas'] else options['factor_tiempo']
+
+        with transaction.atomic():
+            insti_id = sembrar_catalogos()
+            dnis = sembrar_estudiantes(max(1, options['estudiantes']), insti_id)
+            dni_orientador = sembrar_orientador(insti_id)
+            cuest_ids = sembrar_volumen(
+                dnis,
+                cuestionarios=options['cuestionarios'],
+                preguntas=options['preguntas'],
+                intentos_por_estudiante=options['intentos'],
+            )
+            escenario = Escenario.preparar(dnis[0], dni_orientador, cuest_ids)
+
+            verificador = VerificadorPresupuestos(escenario, options['repeticiones'], factor)
+            resultados = verificador.verificar()
+
+            transaction.set_rollback(True)
+
+        fallidas = self._reportar(resultados)
+        for nombre, motivo in EXCLUIDAS.items():
+            self.stdout.write(f"  excluida  {nombre}: {motivo}")
+
+        if fallidas:
+            raise CommandError(f"{len(fallidas)} rutas fuera de presupuesto: {', '.join(fallidas)}")
+        self.stdout.write(self.style.SUCCESS("\nTodas las rutas dentro de presupuesto"))
+
+    def _reportar(self, resultados):
+        self.stdout.write(f"{'ruta':<36} {'estado':>6} {'consultas':>12} {'ms (p50)':>18}")
+        fallidas = []
+        for r in resultados:
+            p = r.presupuesto
+            if r.omitida:
+                self.stdout.write(f"{p.nombre:<36} {'-':>6} omitida: {r.omitida}")
+                continue
+
+            limite = '-' if r.limite_ms == float('inf') else f'{r.limite_ms:.0f}'
+            linea = (
+                f"{p.nombre:<36} {r.estado:>6} {f'{r.consultas}/{p.consultas}':>12} "
+                f"{f'{r.ms:.1f}/{limite}':>18}"
+            )
+            if r.ok:
+                self.stdout.write(linea)
+                continue
+
+            fallidas.append(p.nombre)
+            self.stdout.write(self.style.ERROR(linea))
+            for sql, veces in r.repetidas:
+                self.stdout.write(f"    x{veces} (posible N+1): {sql[:200]}")
+        return fallidas
@@ -0,0 +1,136 @@
+# usuarios/management/commands/verificar_replica.py
+import sqlite3
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from usuarios.models import Cuestionario, Opcion, Pregunta
+from usuarios.rendimiento.clientes import _host_permitido
+from usuarios.rendimiento.datos import sembrar_catalogos, sembrar_estudiantes, sembrar_orientador
+from usuarios.replicas import ALIAS_REPLICA, liberar_fijacion, replica_configurada
+
+PREFIJO = 'Replica prueba'
+
+
+class Command(BaseCommand):
+    help = (
+        "Comprueba el enrutado a la réplica con dos SQLite locales (DB_NAME como "
+        "primaria, DB_REPLICA_NAME como réplica): las vistas analíticas leen de la "
+        "réplica, ven datos atrasados hasta replicar y el usuario que escribe lee "
+        "de la primaria durante REPLICA_FIJACION_SEGUNDOS."
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configurada() or connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Requiere DB_ENGINE=sqlite y DB_REPLICA_NAME (segundo archivo SQLite)')
+
+        insti_id = sembrar_catalogos()
+        dni_estudiante = sembrar_estudiantes(1, insti_id)[0]
+        orientador = User.objects.get(username=sembrar_orientador(insti_id))
+        estudiante = User.objects.get(username=dni_estudiante)
+        self._limpiar()
+        liberar_fijacion(orientador.pk)
+
+        self.cliente = Client(raise_request_exception=False)
+        self.tokens = {
+            orientador.pk: str(RefreshToken.for_user(orientador).access_token),
+            estudiante.pk: str(RefreshToken.for_user(estudiante).access_token),
+        }
+        self.fallos = []
+
+        try:
+            self._replicar()
+
+            # Escritura de otro (p. ej. otro orientador): la réplica aún no la tiene
+            ajeno = Cuestionario.objects.create(CuestNombre=f'{PREFIJO} ajeno', CuestVersion='1.0')
+            titulos, por_alias = self._listar(orientador)
+            self._comprobar('listado del orientador se lee de la réplica', por_alias[ALIAS_REPLICA] > 0, por_alias)
+            self._comprobar('la réplica atrasada no ve el cambio ajeno', ajeno.CuestNombre not in titulos)
+
+            # Escritura propia: queda fijado a la primaria
+            respuesta = self._peticion('post', reverse('crear-cuestionario'), orientador, {
+                'titulo': f'{PREFIJO} propio',
+                'preguntas': [{'texto': 'Pregunta de prueba', 'orden': 1}],
+            })
+            self._comprobar('crear_cuestionario', respuesta.status_code == 201, respuesta.status_code)
+            titulos, por_alias = self._listar(orientador)
+            self._comprobar(
+                'tras escribir lee de la primaria',
+                por_alias[ALIAS_REPLICA] == 0 and f'{PREFIJO} propio' in titulos, por_alias
+            )
+
+            # Vence la fijación antes de que la réplica se ponga al día
+            liberar_fijacion(orientador.pk)
+            titulos, _ = self._listar(orientador)
+            self._comprobar('sin fijación vuelve a la réplica (atrasada)', f'{PREFIJO} propio' not in titulos)
+
+            self._replicar()
+            titulos, _ = self._listar(orientador)
+            self._comprobar(
+                'tras replicar la réplica ve ambos cambios',
+                {f'{PREFIJO} ajeno', f'{PREFIJO} propio'} <= titulos
+            )
+
+            for nombre, ruta, user in (
+                ('dashboard-orientador', reverse('dashboard-orientador'), orientador),
+                ('obtener-resultados', reverse('obtener-resultados'), estudiante),
+            ):
+                respuesta, por_alias = self._medir('get', ruta, user)
+                self._comprobar(
+                    f'{nombre} se lee de la réplica',
+                    respuesta.status_code == 200 and por_alias[ALIAS_REPLICA] > 0, por_alias
+                )
+        finally:
+            liberar_fijacion(orientador.pk)
+            self._limpiar()
+            self._replicar()
+
+        if self.fallos:
+            raise CommandError(f"Fallaron {len(self.fallos)} comprobaciones: {', '.join(self.fallos)}")
+        self.stdout.write(self.style.SUCCESS('Enrutado a la réplica correcto'))
+
+    def _replicar(self):
+        """Copiar la primaria sobre la réplica: la réplica queda al día"""
+        primaria = connections[DEFAULT_DB_ALIAS]
+        primaria.ensure_connection()
+        connections[ALIAS_REPLICA].close()
+        destino = sqlite3.connect(connections[ALIAS_REPLICA].settings_dict['NAME'])
+        try:
+            primaria.connection.backup(destino)
+        finally:
+            destino.close()
+
+    def _limpiar(self):
+        cuestionarios = Cuestionario.objects.filter(CuestNombre__startswith=PREFIJO)
+        Opcion.objects.filter(Preg__Cuest__in=cuestionarios).delete()
+        Pregunta.objects.filter(Cuest__in=cuestionarios).delete()
+        cuestionarios.delete()
+
+    def _peticion(self, metodo, ruta, user, datos=None):
+        return getattr(self.cliente, metodo)(
+            ruta, datos, content_type='application/json',
+            HTTP_HOST=_host_permitido(), HTTP_AUTHORIZATION=f'Bearer {self.tokens[user.pk]}',
+        )
+
+    def _medir(self, metodo, ruta, user, datos=None):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primaria, \
+                CaptureQueriesContext(connections[ALIAS_REPLICA]) as replica:
+            respuesta = self._peticion(metodo, ruta, user, datos)
+        return respuesta, {DEFAULT_DB_ALIAS: len(primaria), ALIAS_REPLICA: len(replica)}
+
+    def _listar(self, user):
+        respuesta, por_alias = self._medir('get', reverse('listar-cuestionarios-orientador'), user)
+        if respuesta.status_code != 200:
+            raise CommandError(f'listar-cuestionarios-orientador devolvió {respuesta.status_code}')
+        return {c['titulo'] for c in respuesta.json()}, por_alias
+
+    def _comprobar(self, descripcion, ok, detalle=''):
+        if not ok:
+            self.fallos.append(descripcion)
+        estado = self.style.SUCCESS('OK   ') if ok else self.style.ERROR('FALLO')
+        self.stdout.write(f"{estado} {descripcion} {detalle}".rstrip())
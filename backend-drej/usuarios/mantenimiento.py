@@ -0,0 +1,222 @@
+# usuarios/mantenimiento.py
+"""
+Purgas periódicas por lotes (tarea purgar_datos_vencidos, Celery beat)
+
+Un DELETE sin límite sobre una tabla grande toma miles de bloqueos de fila
+y SQL Server los escala a un bloqueo de tabla (~5000 por sentencia): en
+horario de examen eso frena los INSERT de respuestas. Cada purga borra con
+`DELETE TOP (n)` en bucle, cada lote en su propia transacción corta y con
+una pausa entre lotes para dejar pasar al resto.
+
+Una Purga son pasos en orden (hijos antes que padres, las FK son PROTECT)
+con la misma condición de corte. Para añadir otra limpieza basta con
+declararla en PURGAS.
+
+Un Paso con `antes` elige primero las claves del lote y ejecuta ese SQL
+sobre ellas en la misma transacción que el DELETE: así los intentos
+abandonados se suman a tblEstudiante.IntentosAbandonados exactamente una
+vez, aunque la purga se corte y siga en la próxima ejecución.
+
+Métricas (cache compartida, las expone /metrics):
+- drej_mantenimiento_filas_eliminadas_total{purga, tabla}
+- drej_mantenimiento_duracion_segundos{purga}
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .metricas import BUCKETS_SEGUNDOS, ContadorCompartido, HistogramaCompartido
+
+logger = logging.getLogger(__name__)
+
+CLAVE_BLOQUEO = 'mantenimiento:purga:{}'
+
+# Intento en progreso sin actividad desde el corte (EstadoID 1 = En Progreso).
+# Creado < corte primero para que use IX_Intento_pendiente_creado.
+_INTENTOS_ABANDONADOS = """
+    SELECT IntentID FROM tblIntento
+    WHERE Confirmado = 0 AND EstadoID = 1 AND Creado < %s
+      AND (UltimoAutosave IS NULL OR UltimoAutosave < %s)
+"""
+
+# Riesgo (usuarios/riesgo.py): el estudiante conserva cuántos intentos abandonó
+_SUMAR_ABANDONADOS = """
+    UPDATE tblEstudiante
+    SET IntentosAbandonados = IntentosAbandonados + lote.Intentos
+    FROM (
+        SELECT EstudID, COUNT(*) AS Intentos FROM tblIntento
+        WHERE IntentID IN ({claves}) GROUP BY EstudID
+    ) lote
+    WHERE lote.EstudID = tblEstudiante.EstudID
+"""
+
+
+@dataclass
+class Paso:
+    tabla: str
+    pk: str
+    condicion: str  # WHERE con un %s por cada uso del corte
+    usos_corte: int = 1
+    antes: str = ''  # SQL sobre las claves del lote ({claves}), antes del DELETE
+
+
+@dataclass
+class Purga:
+    nombre: str
+    retencion: str  # nombre del setting con la retención
+    retencion_defecto: timedelta
+    pasos: list
+
+    def corte(self):
+        return timezone.now() - getattr(settings, self.retencion, self.retencion_defecto)
+
+
+PURGAS = [
+    Purga(
+        'tokens_expirados', 'MANTENIMIENTO_RETENCION_TOKENS', timedelta(hours=24),
+        [Paso('tblPasswordResetToken', 'id', 'created_at < %s')],
+    ),
+    Purga(
+        'intentos_abandonados', 'MANTENIMIENTO_RETENCION_INTENTOS', timedelta(days=30),
+        [
+            Paso('tblRespuesta', 'RespID', f'IntentID IN ({_INTENTOS_ABANDONADOS})', 2),
+            # Resultados de filtros guardados: referencian a tblRecomendacion (FK)
+            Paso('tblFiltroRecomendacion', 'RecomendacionID',
+                 f'RecomendacionID IN (SELECT RecomendacionID FROM tblRecomendacion '
+                 f'WHERE IntentID IN ({_INTENTOS_ABANDONADOS}))', 2),
+            Paso('tblRecomendacion', 'RecomendacionID', f'IntentID IN ({_INTENTOS_ABANDONADOS})', 2),
+            Paso('tblIntento', 'IntentID', f'IntentID IN ({_INTENTOS_ABANDONADOS})', 2,
+                 antes=_SUMAR_ABANDONADOS),
+        ],
+    ),
+    Purga(
+        'emails_enviados', 'MANTENIMIENTO_RETENCION_EMAILS', timedelta(days=14),
+        [Paso('tblEmailPendiente', 'EmailID', "Estado IN ('enviado', 'fallido') AND Creado < %s")],
+    ),
+]
+
+
+def _series_filas():
+    return [{'purga': p.nombre, 'tabla': paso.tabla} for p in PURGAS for paso in p.pasos]
+
+
+FILAS_ELIMINADAS = ContadorCompartido(
+    'drej_mantenimiento_filas_eliminadas_total', 'Filas borradas por las purgas de mantenimiento',
+    _series_filas)
+DURACION_PURGA = HistogramaCompartido(
+    'drej_mantenimiento_duracion_segundos', 'Duración de cada ejecución de una purga',
+    BUCKETS_SEGUNDOS + (60.0, 300.0, 900.0), lambda: [{'purga': p.nombre} for p in PURGAS])
+
+METRICAS_MANTENIMIENTO = [FILAS_ELIMINADAS, DURACION_PURGA]
+
+
+def _sql_lote(paso):
+    if connection.vendor == 'microsoft':
+        return f"DELETE TOP (%s) FROM {paso.tabla} WHERE {paso.condicion}"
+    # SQLite y otros motores locales: sin DELETE TOP
+    return (
+        f"DELETE FROM {paso.tabla} WHERE {paso.pk} IN "
+        f"(SELECT {paso.pk} FROM {paso.tabla} WHERE {paso.condicion} LIMIT %s)"
+    )
+
+
+def _sql_claves(paso):
+    if connection.vendor == 'microsoft':
+        return f"SELECT TOP (%s) {paso.pk} FROM {paso.tabla} WHERE {paso.condicion} ORDER BY {paso.pk}"
+    return f"SELECT {paso.pk} FROM {paso.tabla} WHERE {paso.condicion} ORDER BY {paso.pk} LIMIT %s"
+
+
+def _borrar_lote(paso, corte, tamano):
+    parametros = [connection.ops.adapt_datetimefield_value(corte)] * paso.usos_corte
+    parametros = [tamano] + parametros if connection.vendor == 'microsoft' else parametros + [tamano]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if not paso.antes:
+                cursor.execute(_sql_lote(paso), parametros)
+                return cursor.rowcount
+
+            # Lote fijo: el SQL previo y el DELETE ven las mismas filas.
+            # SQL Server: máximo 2100 parámetros, uno por clave
+            parametros[0 if connection.vendor == 'microsoft' else -1] = min(tamano, 2000)
+            cursor.execute(_sql_claves(paso), parametros)
+            claves = [fila[0] for fila in cursor.fetchall()]
+            if not claves:
+                return 0
+            marcadores = ', '.join(['%s'] * len(claves))
+            cursor.execute(paso.antes.format(claves=marcadores), claves)
+            cursor.execute(f"DELETE FROM {paso.tabla} WHERE {paso.pk} IN ({marcadores})", claves)
+            return cursor.rowcount
+
+
+def ejecutar_purga(purga, tamano=None, pausa=None, max_lotes=None):
+    """
+    Borrar por lotes lo vencido de una purga
+
+    Returns:
+        dict: tabla -> filas borradas
+    """
+    tamano = tamano or getattr(settings, 'MANTENIMIENTO_TAMANO_LOTE', 1000)
+    pausa = getattr(settings, 'MANTENIMIENTO_PAUSA_MS', 100) / 1000 if pausa is None else pausa
+    max_lotes = max_lotes or getattr(settings, 'MANTENIMIENTO_MAX_LOTES', 500)
+
+    # El corte se fija al empezar: lo que vence durante la purga queda para la próxima
+    corte = purga.corte()
+    inicio = time.perf_counter()
+    eliminadas = {}
+
+    for paso in purga.pasos:
+        total = 0
+        for _ in range(max_lotes):
+            filas = _borrar_lote(paso, corte, tamano)
+            total += filas
+            if filas < tamano:
+                break
+            time.sleep(pausa)
+        else:
+            logger.warning(
+                f"[MANTENIMIENTO] {purga.nombre}: {paso.tabla} alcanzó {max_lotes} lotes, "
+                "el resto queda para la próxima ejecución"
+            )
+
+        eliminadas[paso.tabla] = total
+        if total:
+            FILAS_ELIMINADAS.incrementar(total, purga=purga.nombre, tabla=paso.tabla)
+
+    DURACION_PURGA.observar(time.perf_counter() - inicio, purga=purga.nombre)
+    logger.info(f"[MANTENIMIENTO] {purga.nombre}: {eliminadas} en {time.perf_counter() - inicio:.1f} s")
+    return eliminadas
+
+
+def purgar_datos_vencidos(nombres=None, **opciones):
+    """
+    Ejecutar las purgas indicadas (todas por defecto), saltando las que ya
+    corren en otro worker
+
+    Returns:
+        dict: nombre -> {tabla: filas}, {'omitida': motivo} o {'error': mensaje}
+    """
+    resultados = {}
+    for purga in PURGAS:
+        if nombres and purga.nombre not in nombres:
+            continue
+
+        clave = CLAVE_BLOQUEO.format(purga.nombre)
+        if not cache.add(clave, True, getattr(settings, 'MANTENIMIENTO_BLOQUEO_SEGUNDOS', 3600)):
+            resultados[purga.nombre] = {'omitida': 'en ejecución en otro worker'}
+            continue
+        try:
+            resultados[purga.nombre] = ejecutar_purga(purga, **opciones)
+        except Exception as e:
+            # Una purga que falla no impide las siguientes
+            logger.error(f"[MANTENIMIENTO] Error en {purga.nombre}: {e}")
+            resultados[purga.nombre] = {'error': str(e)}
+        finally:
+            cache.delete(clave)
+    return resultados
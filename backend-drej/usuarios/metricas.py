@@ -0,0 +1,346 @@
+# usuarios/metricas.py
+"""
+Métricas de rendimiento por petición
+
+- EstadisticasPeticion: contadores de la petición en curso (consultas SQL,
+  tiempo en BD, tiempo en HTTP saliente) guardados en un ContextVar, así
+  valen igual para vistas síncronas, async y hilos de sync_to_async.
+- instalar_medicion_sql: execute_wrapper que se instala en cada conexión
+  nueva (señal connection_created, ver apps.py) y suma al ContextVar.
+- medir_http: context manager para llamadas a Groq/Factiliza/etc.
+- Registro de histogramas en memoria del proceso, expuesto en formato de
+  texto de Prometheus por la vista `metricas` (/metrics).
+
+Cada proceso (worker de gunicorn/uvicorn) tiene su propio registro:
+Prometheus debe raspar cada worker o usar un único worker por contenedor.
+Las métricas que se escriben en otro proceso (workers de Celery, ver
+metricas_celery.py) usan HistogramaCompartido/ContadorCompartido, que
+guardan los conteos en la cache compartida.
+"""
+import hmac
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseForbidden
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_LITERALES_SQL = re.compile(r"'[^']*'|\b\d+\b")
+
+
+# ============================================
+# ESTADÍSTICAS DE LA PETICIÓN EN CURSO
+# ============================================
+
+class EstadisticasPeticion:
+    """Lo que consumió una petición fuera de Python puro"""
+
+    def __init__(self, max_sql=100):
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+        self.llamadas_http = 0
+        self.tiempo_http = 0.0
+        self.sql = []  # (segundos, sentencia) de las primeras max_sql consultas
+        self.max_sql = max_sql
+        self._lock = threading.Lock()
+
+    def registrar_sql(self, sentencia, segundos):
+        with self._lock:
+            self.consultas += 1
+            self.tiempo_bd += segundos
+            if len(self.sql) < self.max_sql:
+                self.sql.append((segundos, sentencia))
+
+    def registrar_http(self, segundos):
+        with self._lock:
+            self.llamadas_http += 1
+            self.tiempo_http += segundos
+
+
+_estadisticas = ContextVar('estadisticas_peticion', default=None)
+
+
+def iniciar_estadisticas():
+    """Abrir la medición de una petición. Devuelve (estadisticas, token para reset)"""
+    estadisticas = EstadisticasPeticion(getattr(settings, 'METRICAS_MAX_SQL', 100))
+    return estadisticas, _estadisticas.set(estadisticas)
+
+
+def finalizar_estadisticas(token):
+    _estadisticas.reset(token)
+
+
+def estadisticas_actuales():
+    return _estadisticas.get()
+
+
+def _medir_sql(execute, sql, params, many, context):
+    estadisticas = _estadisticas.get()
+    if estadisticas is None:
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        estadisticas.registrar_sql(sql, time.perf_counter() - inicio)
+
+
+def instalar_medicion_sql(sender, connection, **kwargs):
+    """Receptor de connection_created: medir todas las consultas de la conexión"""
+    if _medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_sql)
+
+
+def sentencias_repetidas(sentencias, limite=5):
+    """
+    Sentencias SQL que se repiten cambiando solo los literales (la firma
+    de un N+1). Devuelve [(sql normalizado, veces)] de las más repetidas.
+    """
+    repetidas = Counter(_LITERALES_SQL.sub('?', sql) for sql in sentencias)
+    return [(sql, veces) for sql, veces in repetidas.most_common(limite) if veces > 1]
+
+
+@contextmanager
+def medir_http(servicio):
+    """
+    Medir una llamada HTTP saliente (Groq, Factiliza...). Suma al tiempo
+    HTTP de la petición en curso y al histograma por servicio.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        estadisticas = _estadisticas.get()
+        if estadisticas is not None:
+            estadisticas.registrar_http(segundos)
+        HTTP_SALIENTE.observar(segundos, servicio=servicio)
+
+
+# ============================================
+# REGISTRO DE MÉTRICAS (formato Prometheus)
+# ============================================
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+class Histograma:
+
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = tuple(buckets)
+        self._series = {}  # etiquetas -> [conteos por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def _leer_series(self):
+        with self._lock:
+            return [(clave, list(serie)) for clave, serie in self._series.items()]
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for clave, serie in self._leer_series():
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ('+Inf',), serie[:-1]):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(clave + (("le", limite),))} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(clave)} {serie[-1]}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(clave)} {acumulado}')
+        return lineas
+
+
+class Contador:
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + cantidad
+
+    def _leer_series(self):
+        with self._lock:
+            return list(self._series.items())
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        lineas.extend(f'{self.nombre}{_etiquetas(clave)} {valor}' for clave, valor in self._leer_series())
+        return lineas
+
+
+class Medidor:
+    """Gauge que se calcula al exponer: `leer()` -> [(dict de etiquetas, valor)]"""
+
+    def __init__(self, nombre, ayuda, leer):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.leer = leer
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} gauge']
+        lineas.extend(
+            f'{self.nombre}{_etiquetas(tuple(sorted(etiquetas.items())))} {valor}'
+            for etiquetas, valor in self.leer()
+        )
+        return lineas
+
+
+# ============================================
+# MÉTRICAS COMPARTIDAS ENTRE PROCESOS (cache)
+# ============================================
+
+def _incrementar_cache(clave, cantidad=1):
+    """incr atómico en Redis/Memcached; crea la clave si no existe"""
+    try:
+        cache.incr(clave, cantidad)
+    except ValueError:
+        if not cache.add(clave, cantidad, timeout=None):
+            cache.incr(clave, cantidad)
+
+
+def _clave_cache(nombre, clave, sufijo):
+    return f"metricas:{nombre}:{','.join(f'{k}={v}' for k, v in clave)}:{sufijo}"
+
+
+class HistogramaCompartido(Histograma):
+    """
+    Histograma con los conteos en la cache compartida, para observar en un
+    proceso (worker de Celery) y exponer en otro (/metrics del web).
+
+    La cache no permite listar claves: `series()` debe devolver las
+    combinaciones de etiquetas posibles (p. ej. las tareas registradas).
+    Con LocMemCache solo ve lo observado en el mismo proceso.
+    """
+
+    def __init__(self, nombre, ayuda, buckets, series):
+        super().__init__(nombre, ayuda, buckets)
+        self.series = series
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        _incrementar_cache(_clave_cache(self.nombre, clave, bisect_left(self.buckets, valor)))
+        # incr solo admite enteros: la suma se guarda multiplicada por 1e6
+        _incrementar_cache(_clave_cache(self.nombre, clave, 'suma'), int(valor * 1_000_000))
+
+    def _leer_series(self):
+        claves = [tuple(sorted(etiquetas.items())) for etiquetas in self.series()]
+        sufijos = list(range(len(self.buckets) + 1)) + ['suma']
+        valores = cache.get_many([_clave_cache(self.nombre, c, s) for c in claves for s in sufijos])
+
+        series = []
+        for clave in claves:
+            serie = [valores.get(_clave_cache(self.nombre, clave, s), 0) for s in sufijos]
+            if any(serie[:-1]):
+                serie[-1] = serie[-1] / 1_000_000
+                series.append((clave, serie))
+        return series
+
+
+class ContadorCompartido(Contador):
+    """Contador en la cache compartida (ver HistogramaCompartido)"""
+
+    def __init__(self, nombre, ayuda, series):
+        super().__init__(nombre, ayuda)
+        self.series = series
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        _incrementar_cache(_clave_cache(self.nombre, tuple(sorted(etiquetas.items())), 'total'), cantidad)
+
+    def _leer_series(self):
+        claves = [tuple(sorted(etiquetas.items())) for etiquetas in self.series()]
+        valores = cache.get_many([_clave_cache(self.nombre, c, 'total') for c in claves])
+        return [
+            (clave, valores[_clave_cache(self.nombre, clave, 'total')])
+            for clave in claves
+            if _clave_cache(self.nombre, clave, 'total') in valores
+        ]
+
+
+DURACION_PETICION = Histograma(
+    'drej_peticion_duracion_segundos', 'Latencia total de la petición por ruta', BUCKETS_SEGUNDOS)
+BD_PETICION = Histograma(
+    'drej_peticion_bd_segundos', 'Tiempo en la base de datos por petición', BUCKETS_SEGUNDOS)
+CONSULTAS_PETICION = Histograma(
+    'drej_peticion_consultas', 'Consultas SQL por petición', BUCKETS_CONSULTAS)
+HTTP_PETICION = Histograma(
+    'drej_peticion_http_saliente_segundos', 'Tiempo en HTTP saliente (Groq, Factiliza) por petición', BUCKETS_SEGUNDOS)
+HTTP_SALIENTE = Histograma(
+    'drej_http_saliente_segundos', 'Duración de cada llamada HTTP saliente por servicio', BUCKETS_SEGUNDOS)
+PETICIONES = Contador('drej_peticiones_total', 'Peticiones atendidas por ruta y código de estado')
+PETICIONES_LENTAS = Contador('drej_peticiones_lentas_total', 'Peticiones por encima de METRICAS_UMBRAL_LENTO_MS')
+
+METRICAS = [
+    DURACION_PETICION, BD_PETICION, CONSULTAS_PETICION, HTTP_PETICION,
+    HTTP_SALIENTE, PETICIONES, PETICIONES_LENTAS,
+]
+
+
+def registrar_peticion(metodo, ruta, estado, duracion, estadisticas, lenta=False):
+    """Volcar una petición terminada en los histogramas"""
+    DURACION_PETICION.observar(duracion, metodo=metodo, ruta=ruta)
+    BD_PETICION.observar(estadisticas.tiempo_bd, metodo=metodo, ruta=ruta)
+    CONSULTAS_PETICION.observar(estadisticas.consultas, metodo=metodo, ruta=ruta)
+    HTTP_PETICION.observar(estadisticas.tiempo_http, metodo=metodo, ruta=ruta)
+    PETICIONES.incrementar(metodo=metodo, ruta=ruta, estado=estado)
+    if lenta:
+        PETICIONES_LENTAS.incrementar(metodo=metodo, ruta=ruta)
+
+
+def exponer_metricas():
+    """Texto en formato de exposición de Prometheus (version 0.0.4)"""
+    from .archivo import METRICAS_ARCHIVO
+    from .mantenimiento import METRICAS_MANTENIMIENTO
+    from .metricas_celery import METRICAS_CELERY
+
+    lineas = []
+    for metrica in METRICAS + METRICAS_CELERY + METRICAS_MANTENIMIENTO + METRICAS_ARCHIVO:
+        lineas.extend(metrica.exponer())
+    return '\n'.join(lineas) + '\n'
+
+
+def metricas(request):
+    """
+    GET /metrics
+
+    Exige `Authorization: Bearer <METRICAS_TOKEN>`. Sin token configurado
+    solo responde con DEBUG: las rutas, tareas y colas no son públicas.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token:
+        recibido = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(recibido, f'Bearer {token}'):
+            return HttpResponseForbidden('Token de métricas inválido')
+    elif not settings.DEBUG:
+        return HttpResponseForbidden('Configure METRICAS_TOKEN para exponer las métricas')
+
+    return HttpResponse(exponer_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
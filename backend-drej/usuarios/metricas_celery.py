@@ -0,0 +1,223 @@
+# usuarios/metricas_celery.py
+"""
+Métricas de tareas de Celery vía señales
+
+- before_task_publish (proceso que encola): marca la hora de encolado en
+  las cabeceras del mensaje
+- task_prerun / task_postrun (worker): espera en cola (encolado -> inicio,
+  o ETA -> inicio para countdown/reintentos), duración y estado final por
+  nombre de tarea
+
+Los workers son otros procesos, así que los conteos van a la cache
+compartida (HistogramaCompartido) y los expone el /metrics del web. En
+producción CACHE_BACKEND debe ser Redis/Memcached: con LocMemCache el web
+no ve lo que observan los workers.
+
+La profundidad de cada cola se pregunta al broker (queue_declare pasivo)
+en un hilo aparte, como mucho una vez cada METRICAS_CELERY_TTL_COLAS
+segundos entre todos los procesos; /metrics solo lee el último resultado
+de la cache, así un broker caído no bloquea el scrape. No es una tarea de
+Celery: con las colas atrasadas la medición esperaría en la misma cola.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from celery import current_app
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+
+from .metricas import BUCKETS_SEGUNDOS, ContadorCompartido, HistogramaCompartido, Medidor
+
+logger = logging.getLogger(__name__)
+
+CABECERA_ENCOLADO = 'drej_encolado'
+CLAVE_COLAS = 'metricas_celery:colas'
+CLAVE_SONDEO = 'metricas_celery:sondeo'
+
+# Estados de task_postrun, más ERROR para las tareas que capturan la
+# excepción y devuelven {'success': False} en lugar de fallar
+ESTADOS = ('SUCCESS', 'FAILURE', 'RETRY', 'ERROR')
+
+BUCKETS_ESPERA = BUCKETS_SEGUNDOS + (60.0, 300.0, 900.0)
+
+_inicios = {}  # task_id -> perf_counter al empezar (por proceso del worker)
+_lock = threading.Lock()
+
+
+def tareas_registradas():
+    """Nombres de las tareas del proyecto (sin las internas de Celery)"""
+    return sorted(nombre for nombre in current_app.tasks if not nombre.startswith('celery.'))
+
+
+def _series_tareas():
+    return [{'tarea': nombre} for nombre in tareas_registradas()]
+
+
+def _series_estados():
+    return [{'tarea': nombre, 'estado': estado} for nombre in tareas_registradas() for estado in ESTADOS]
+
+
+# ============================================
+# PROFUNDIDAD DE COLAS (broker)
+# ============================================
+
+def profundidad_colas():
+    """
+    Mensajes pendientes y consumidores de cada cola conocida por la app
+
+    Returns:
+        list[dict]: {'cola', 'mensajes', 'consumidores', 'error'}
+    """
+    colas = []
+    timeout = getattr(settings, 'METRICAS_CELERY_TIMEOUT_BROKER', 2)
+    with current_app.connection_for_read(connect_timeout=timeout) as conexion:
+        conexion.ensure_connection(max_retries=1)
+        canal = conexion.channel()
+        try:
+            for nombre in sorted(current_app.amqp.queues):
+                try:
+                    declarada = canal.queue_declare(queue=nombre, passive=True)
+                    colas.append({
+                        'cola': nombre,
+                        'mensajes': declarada.message_count,
+                        'consumidores': declarada.consumer_count,
+                        'error': '',
+                    })
+                except Exception as e:
+                    # Una cola que no existe cierra el canal en AMQP: abrir otro
+                    colas.append({'cola': nombre, 'mensajes': None, 'consumidores': None, 'error': str(e)})
+                    canal = conexion.channel()
+        finally:
+            canal.close()
+    return colas
+
+
+def _sondear_broker(ttl):
+    """Guardar profundidad_colas() en la cache; [] si el broker no responde"""
+    try:
+        colas = profundidad_colas()
+    except Exception as e:
+        logger.warning(f"[METRICAS_CELERY] No se pudo consultar el broker: {e}")
+        colas = []
+    # Si los sondeos dejan de llegar, las series desaparecen en vez de
+    # quedarse con el último valor
+    cache.set(CLAVE_COLAS, colas, ttl * 4)
+
+
+def profundidad_colas_cacheada():
+    """
+    Última profundidad de colas medida ([] si todavía no hay). Si venció,
+    lanza un sondeo en segundo plano y no lo espera.
+    """
+    ttl = getattr(settings, 'METRICAS_CELERY_TTL_COLAS', 15)
+    if cache.add(CLAVE_SONDEO, True, ttl):
+        threading.Thread(target=_sondear_broker, args=(ttl,), name='sondeo-colas-celery', daemon=True).start()
+    return cache.get(CLAVE_COLAS) or []
+
+
+def _leer_colas(campo):
+    return [
+        ({'cola': cola['cola']}, cola[campo])
+        for cola in profundidad_colas_cacheada()
+        if cola[campo] is not None
+    ]
+
+
+# ============================================
+# MÉTRICAS
+# ============================================
+
+ESPERA_TAREA = HistogramaCompartido(
+    'drej_celery_espera_segundos', 'Tiempo en cola desde que se encola (o su ETA) hasta que empieza',
+    BUCKETS_ESPERA, _series_tareas)
+DURACION_TAREA = HistogramaCompartido(
+    'drej_celery_duracion_segundos', 'Duración de la ejecución de cada tarea', BUCKETS_ESPERA, _series_tareas)
+TAREAS = ContadorCompartido(
+    'drej_celery_tareas_total', 'Ejecuciones de tareas por nombre y estado final', _series_estados)
+COLA_MENSAJES = Medidor(
+    'drej_celery_cola_mensajes', 'Mensajes pendientes por cola en el broker', lambda: _leer_colas('mensajes'))
+COLA_CONSUMIDORES = Medidor(
+    'drej_celery_cola_consumidores', 'Consumidores conectados por cola', lambda: _leer_colas('consumidores'))
+
+METRICAS_CELERY = [ESPERA_TAREA, DURACION_TAREA, TAREAS, COLA_MENSAJES, COLA_CONSUMIDORES]
+
+
+def resumen_tareas():
+    """Por tarea: ejecuciones por estado y promedios de espera y duración (para el admin)"""
+    conteos = {}
+    for clave, valor in TAREAS._leer_series():
+        etiquetas = dict(clave)
+        conteos.setdefault(etiquetas['tarea'], {})[etiquetas['estado']] = valor
+
+    def promedios(histograma):
+        resultado = {}
+        for clave, serie in histograma._leer_series():
+            total = sum(serie[:-1])
+            resultado[dict(clave)['tarea']] = serie[-1] / total if total else None
+        return resultado
+
+    esperas, duraciones = promedios(ESPERA_TAREA), promedios(DURACION_TAREA)
+    return [
+        {
+            'tarea': nombre,
+            'estados': {estado: conteos.get(nombre, {}).get(estado, 0) for estado in ESTADOS},
+            'espera_promedio': esperas.get(nombre),
+            'duracion_promedio': duraciones.get(nombre),
+        }
+        for nombre in tareas_registradas()
+    ]
+
+
+# ============================================
+# SEÑALES
+# ============================================
+
+def _marcar_encolado(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers[CABECERA_ENCOLADO] = time.time()
+
+
+def _inicio_esperado(request):
+    """Momento desde el que la tarea podía ejecutarse: su ETA o el encolado"""
+    encolado = getattr(request, CABECERA_ENCOLADO, None)
+    if encolado is None:
+        encolado = (getattr(request, 'headers', None) or {}).get(CABECERA_ENCOLADO)
+
+    eta = getattr(request, 'eta', None)
+    if eta:
+        try:
+            eta = datetime.fromisoformat(eta).timestamp() if isinstance(eta, str) else eta.timestamp()
+            encolado = max(encolado or 0, eta)
+        except (TypeError, ValueError):
+            pass
+    return encolado
+
+
+def _al_empezar(sender=None, task_id=None, task=None, **kwargs):
+    with _lock:
+        _inicios[task_id] = time.perf_counter()
+
+    desde = _inicio_esperado(task.request)
+    if desde:
+        ESPERA_TAREA.observar(max(0.0, time.time() - desde), tarea=task.name)
+
+
+def _al_terminar(sender=None, task_id=None, task=None, retval=None, state=None, **kwargs):
+    with _lock:
+        inicio = _inicios.pop(task_id, None)
+    if inicio is not None:
+        DURACION_TAREA.observar(time.perf_counter() - inicio, tarea=task.name)
+
+    if state == 'SUCCESS' and isinstance(retval, dict) and retval.get('success') is False:
+        state = 'ERROR'
+    TAREAS.incrementar(tarea=task.name, estado=state)
+
+
+def instalar_senales_celery():
+    """Conectar los receptores (idempotente por dispatch_uid). Ver apps.py"""
+    before_task_publish.connect(_marcar_encolado, dispatch_uid='usuarios.celery_encolado', weak=False)
+    task_prerun.connect(_al_empezar, dispatch_uid='usuarios.celery_prerun', weak=False)
+    task_postrun.connect(_al_terminar, dispatch_uid='usuarios.celery_postrun', weak=False)
@@ -0,0 +1,143 @@
+# usuarios/middleware.py
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .metricas import (
+    finalizar_estadisticas, iniciar_estadisticas, registrar_peticion, sentencias_repetidas
+)
+from .replicas import fijar_primaria, replica_configurada
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasMiddleware:
+    """
+    Mide cada petición: latencia total, consultas SQL y tiempo en BD, y
+    tiempo en HTTP saliente (ver usuarios/metricas.py).
+
+    - Cabecera Server-Timing (db, http, app, total) si METRICAS_SERVER_TIMING
+    - Histogramas por ruta para /metrics
+    - Log [PETICION_LENTA] con el SQL capturado cuando la petición supera
+      METRICAS_UMBRAL_LENTO_MS; las sentencias repetidas delatan los N+1
+
+    Debe ir primero en MIDDLEWARE para que la latencia incluya al resto.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICAS_SERVER_TIMING', True)
+        self.umbral_lento = getattr(settings, 'METRICAS_UMBRAL_LENTO_MS', 1000) / 1000
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        estadisticas, token = iniciar_estadisticas()
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        try:
+            response = self.get_response(request)
+        finally:
+            finalizar_estadisticas(token)
+        cpu = time.thread_time() - inicio_cpu
+        return self._procesar(request, response, estadisticas, time.perf_counter() - inicio, cpu)
+
+    async def __acall__(self, request):
+        estadisticas, token = iniciar_estadisticas()
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finalizar_estadisticas(token)
+        # En async el tiempo de CPU del hilo no corresponde a la petición
+        return self._procesar(request, response, estadisticas, time.perf_counter() - inicio, None)
+
+    def _procesar(self, request, response, estadisticas, duracion, cpu):
+        match = getattr(request, 'resolver_match', None)
+        ruta = '/' + match.route if match and match.route else 'sin_ruta'
+        lenta = duracion >= self.umbral_lento
+
+        registrar_peticion(request.method, ruta, response.status_code, duracion, estadisticas, lenta)
+
+        if self.server_timing:
+            app = max(0.0, duracion - estadisticas.tiempo_bd - estadisticas.tiempo_http)
+            metricas = [
+                f'db;dur={estadisticas.tiempo_bd * 1000:.1f};desc="{estadisticas.consultas} consultas"',
+                f'http;dur={estadisticas.tiempo_http * 1000:.1f};desc="{estadisticas.llamadas_http} llamadas"',
+                f'app;dur={app * 1000:.1f}',
+            ]
+            if cpu is not None:
+                metricas.append(f'cpu;dur={cpu * 1000:.1f}')
+            metricas.append(f'total;dur={duracion * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(metricas)
+
+        if lenta:
+            self._log_lenta(request, ruta, response.status_code, duracion, estadisticas)
+
+        return response
+
+    def _log_lenta(self, request, ruta, estado, duracion, estadisticas):
+        lineas = [
+            f"[PETICION_LENTA] {request.method} {ruta} -> {estado} en {duracion * 1000:.0f} ms | "
+            f"{estadisticas.consultas} consultas ({estadisticas.tiempo_bd * 1000:.0f} ms BD) | "
+            f"{estadisticas.llamadas_http} llamadas HTTP ({estadisticas.tiempo_http * 1000:.0f} ms)"
+        ]
+        for sql, veces in sentencias_repetidas(sql for _, sql in estadisticas.sql):
+            lineas.append(f"  x{veces} (posible N+1): {sql[:300]}")
+        for segundos, sql in sorted(estadisticas.sql, key=lambda item: item[0], reverse=True)[:10]:
+            lineas.append(f"  {segundos * 1000:8.1f} ms  {sql[:300]}")
+        if estadisticas.consultas > len(estadisticas.sql):
+            lineas.append(f"  ... {estadisticas.consultas - len(estadisticas.sql)} consultas más no capturadas")
+
+        logger.warning('\n'.join(lineas))
+
+
+class FijacionPrimariaMiddleware:
+    """
+    Tras una escritura con éxito del usuario, fijar sus lecturas a la
+    primaria (ver usuarios/replicas.py) para que lea lo que acaba de escribir.
+
+    El usuario de JWT lo resuelve DRF dentro de la vista y lo copia al
+    HttpRequest, por eso se consulta después de get_response.
+    """
+    sync_capable = True
+    async_capable = True
+
+    METODOS_ESCRITURA = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.activo = replica_configurada()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        self._fijar(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._es_escritura(request, response):
+            # request.user puede necesitar la BD: fuera del event loop
+            await sync_to_async(self._fijar)(request, response)
+        return response
+
+    def _es_escritura(self, request, response):
+        return self.activo and request.method in self.METODOS_ESCRITURA and response.status_code < 400
+
+    def _fijar(self, request, response):
+        if not self._es_escritura(request, response):
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            fijar_primaria(user.pk)
@@ -0,0 +1,77 @@
+# Índice único de email en auth_user para el pipeline de registro
+# (usuarios/registro.py confía en la restricción en lugar de pre-checks)
+#
+# Solo aplica en SQL Server (vendor 'microsoft'); en otros motores no hace nada.
+# La collation por defecto de SQL Server no distingue mayúsculas, así que el
+# índice también impide "Ana@x.com" y "ana@x.com" a la vez.
+#
+# Si ya hay emails repetidos la migración falla y los lista: qué cuenta
+# conserva el email es una decisión de datos, no se toma aquí.
+
+from django.db import migrations
+
+# La collation de la columna decide qué cuenta como repetido, igual que el índice
+DUPLICADOS = """
+    SELECT email, COUNT(*) FROM auth_user
+    WHERE email <> ''
+    GROUP BY email
+    HAVING COUNT(*) > 1
+    ORDER BY COUNT(*) DESC, email
+"""
+
+MAX_EJEMPLOS = 20
+
+
+def crear_indice_email(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(DUPLICADOS)
+        duplicados = cursor.fetchall()
+
+        if duplicados:
+            ejemplos = ', '.join(f"{email} ({veces})" for email, veces in duplicados[:MAX_EJEMPLOS])
+            # Sin el índice el registro aceptaría emails repetidos en silencio
+            raise RuntimeError(
+                f"auth_user tiene {len(duplicados)} emails repetidos (sin distinguir mayúsculas): {ejemplos}. "
+                "No se puede crear UX_auth_user_email. Para cada email, elegir la cuenta que se conserva y "
+                "cambiar o vaciar (email = '') el de las demás; la consulta de esta migración (DUPLICADOS) "
+                "los lista. Después volver a ejecutar `python manage.py migrate usuarios`."
+            )
+
+        cursor.execute("""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'UX_auth_user_email' AND object_id = OBJECT_ID('auth_user')
+            )
+            CREATE UNIQUE NONCLUSTERED INDEX UX_auth_user_email
+                ON auth_user (email)
+                WHERE email <> ''
+        """)
+
+
+def eliminar_indice_email(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'UX_auth_user_email' AND object_id = OBJECT_ID('auth_user')
+            )
+            DROP INDEX UX_auth_user_email ON auth_user
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_email, eliminar_indice_email),
+    ]
@@ -0,0 +1,59 @@
+# Columna calculada e indexada auth_user.email_normalizado para el login
+# por email (usuarios/backends.py -> EmailOrDNIBackend)
+#
+# email_normalizado = LOWER(LTRIM(RTRIM(email))), PERSISTED, de modo que la
+# búsqueda es un seek de igualdad en lugar de UPPER(email) = UPPER(%s) sobre
+# toda la tabla. El backend normaliza el identificador igual que la columna.
+#
+# Solo aplica en SQL Server (vendor 'microsoft'); en otros motores no hace nada.
+
+from django.db import migrations
+
+
+def crear_email_normalizado(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF COL_LENGTH('auth_user', 'email_normalizado') IS NULL
+            ALTER TABLE auth_user
+                ADD email_normalizado AS LOWER(LTRIM(RTRIM(email))) PERSISTED
+        """)
+        cursor.execute("""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_auth_user_email_normalizado' AND object_id = OBJECT_ID('auth_user')
+            )
+            CREATE NONCLUSTERED INDEX IX_auth_user_email_normalizado
+                ON auth_user (email_normalizado)
+        """)
+
+
+def eliminar_email_normalizado(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_auth_user_email_normalizado' AND object_id = OBJECT_ID('auth_user')
+            )
+            DROP INDEX IX_auth_user_email_normalizado ON auth_user
+        """)
+        cursor.execute("""
+            IF COL_LENGTH('auth_user', 'email_normalizado') IS NOT NULL
+            ALTER TABLE auth_user DROP COLUMN email_normalizado
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_indice_unico_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_email_normalizado, eliminar_email_normalizado),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_email_normalizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendiente',
+            fields=[
+                ('EmailID', models.AutoField(primary_key=True, serialize=False)),
+                ('Destinatario', models.CharField(max_length=254)),
+                ('Asunto', models.CharField(max_length=255)),
+                ('CuerpoTexto', models.TextField()),
+                ('CuerpoHtml', models.TextField(blank=True, null=True)),
+                ('Estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=10)),
+                ('Intentos', models.IntegerField(default=0)),
+                ('UltimoError', models.CharField(blank=True, max_length=500, null=True)),
+                ('Lote', models.UUIDField(blank=True, null=True)),
+                ('Creado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ProximoIntento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('Reclamado', models.DateTimeField(blank=True, null=True)),
+                ('Enviado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tblEmailPendiente',
+                'indexes': [models.Index(fields=['Estado', 'ProximoIntento'], name='IX_EmailPendiente_estado'), models.Index(fields=['Lote'], name='IX_EmailPendiente_lote')],
+            },
+        ),
+    ]
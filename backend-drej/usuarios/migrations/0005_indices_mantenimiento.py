@@ -0,0 +1,60 @@
+# Índices para las purgas por lotes de usuarios/mantenimiento.py
+#
+# Sin ellos cada DELETE TOP (n) recorre la tabla entera buscando filas
+# vencidas, y el escaneo toma bloqueos sobre filas que no va a borrar.
+# - tblPasswordResetToken (created_at)
+# - tblIntento (Creado) filtrado a intentos sin confirmar: solo indexa los
+#   pocos intentos en progreso, no los miles ya completados
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+from django.db import migrations
+
+INDICES = [
+    ('IX_PasswordResetToken_created_at', 'tblPasswordResetToken', '(created_at)', ''),
+    ('IX_Intento_pendiente_creado', 'tblIntento', '(Creado) INCLUDE (EstadoID, UltimoAutosave)',
+     'WHERE Confirmado = 0'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, tabla, columnas, filtro in INDICES:
+            cursor.execute(f"""
+                IF NOT EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                CREATE NONCLUSTERED INDEX {nombre}
+                    ON {tabla} {columnas}
+                    {filtro}
+            """)
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, tabla, _, _ in INDICES:
+            cursor.execute(f"""
+                IF EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                DROP INDEX {nombre} ON {tabla}
+            """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0004_email_pendiente'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
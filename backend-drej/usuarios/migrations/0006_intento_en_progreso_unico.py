@@ -0,0 +1,148 @@
+# Un solo intento en progreso por estudiante y cuestionario
+#
+# iniciar_cuestionario hacía SELECT + INSERT sin bloqueo y los dobles clics
+# dejaban varios intentos sin confirmar; guardar_respuestas y el motor de
+# recomendaciones terminaban usando uno cualquiera. Ahora la vista usa
+# MERGE ... WITH (HOLDLOCK) y este índice único filtrado lo garantiza en la BD.
+#
+# Antes de crear el índice se retiran los duplicados existentes: se conserva
+# el intento con actividad más reciente (UltimoAutosave o Creado). Los demás,
+# con sus respuestas y recomendaciones, se copian a tablas de respaldo y
+# después se borran, todo en la transacción de la migración:
+#
+# - tblIntentoDuplicado: el intento retirado y ConservadoID, el intento en
+#   progreso que quedó para ese estudiante y cuestionario
+# - tblRespuestaDuplicado / tblRecomendacionDuplicado: sus filas tal cual
+#
+# Para recuperar respuestas de un intento retirado, copiarlas a ConservadoID
+# desde el respaldo. Revertir la migración quita el índice y deja el respaldo.
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# Intentos en progreso repetidos y el que se conserva de su grupo
+DUPLICADOS = """
+    SELECT IntentID, ConservadoID FROM (
+        SELECT IntentID,
+               FIRST_VALUE(IntentID) OVER (
+                   PARTITION BY EstudID, CuestID
+                   ORDER BY COALESCE(UltimoAutosave, Creado) DESC, IntentID DESC
+               ) AS ConservadoID,
+               ROW_NUMBER() OVER (
+                   PARTITION BY EstudID, CuestID
+                   ORDER BY COALESCE(UltimoAutosave, Creado) DESC, IntentID DESC
+               ) AS orden
+        FROM tblIntento
+        WHERE Confirmado = 0
+    ) t
+    WHERE orden > 1
+"""
+
+RESPALDOS = """
+    IF OBJECT_ID('tblIntentoDuplicado') IS NULL
+        CREATE TABLE tblIntentoDuplicado (
+            IntentID INT NOT NULL PRIMARY KEY,
+            EstudID INT NOT NULL,
+            CuestID INT NOT NULL,
+            EstadoID INT NOT NULL,
+            Creado DATETIME2 NULL,
+            UltimoAutosave DATETIME2 NULL,
+            ConservadoID INT NOT NULL,
+            Retirado DATETIME2 NOT NULL CONSTRAINT DF_IntentoDuplicado_Retirado DEFAULT SYSUTCDATETIME()
+        );
+    IF OBJECT_ID('tblRespuestaDuplicado') IS NULL
+        CREATE TABLE tblRespuestaDuplicado (
+            RespID INT NOT NULL PRIMARY KEY,
+            IntentID INT NOT NULL,
+            RespValor NVARCHAR(255) NULL,
+            RespFechaHora DATETIME2 NULL
+        );
+    IF OBJECT_ID('tblRecomendacionDuplicado') IS NULL
+        CREATE TABLE tblRecomendacionDuplicado (
+            RecomendacionID INT NOT NULL PRIMARY KEY,
+            IntentID INT NOT NULL,
+            Carrera NVARCHAR(100) NOT NULL,
+            Descripcion NVARCHAR(200) NULL,
+            Score FLOAT NULL,
+            Nivel NVARCHAR(50) NULL,
+            FechaHora DATETIME2 NULL
+        );
+"""
+
+RETIRAR = f"""
+    SELECT IntentID, ConservadoID INTO #duplicados FROM ({DUPLICADOS}) d;
+
+    INSERT INTO tblIntentoDuplicado (IntentID, EstudID, CuestID, EstadoID, Creado, UltimoAutosave, ConservadoID)
+    SELECT i.IntentID, i.EstudID, i.CuestID, i.EstadoID, i.Creado, i.UltimoAutosave, d.ConservadoID
+    FROM tblIntento i JOIN #duplicados d ON d.IntentID = i.IntentID;
+
+    INSERT INTO tblRespuestaDuplicado (RespID, IntentID, RespValor, RespFechaHora)
+    SELECT RespID, IntentID, RespValor, RespFechaHora
+    FROM tblRespuesta WHERE IntentID IN (SELECT IntentID FROM #duplicados);
+
+    INSERT INTO tblRecomendacionDuplicado (RecomendacionID, IntentID, Carrera, Descripcion, Score, Nivel, FechaHora)
+    SELECT RecomendacionID, IntentID, Carrera, Descripcion, Score, Nivel, FechaHora
+    FROM tblRecomendacion WHERE IntentID IN (SELECT IntentID FROM #duplicados);
+
+    DELETE FROM tblRespuesta WHERE IntentID IN (SELECT IntentID FROM #duplicados);
+    DELETE FROM tblRecomendacion WHERE IntentID IN (SELECT IntentID FROM #duplicados);
+    DELETE FROM tblIntento WHERE IntentID IN (SELECT IntentID FROM #duplicados);
+    DROP TABLE #duplicados;
+"""
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM ({DUPLICADOS}) d")
+        duplicados = cursor.fetchone()[0]
+
+        if duplicados:
+            cursor.execute(RESPALDOS)
+            cursor.execute(RETIRAR)
+            logger.warning(
+                f"[MIGRACION] {duplicados} intentos en progreso duplicados retirados; "
+                "sus filas quedan en tblIntentoDuplicado, tblRespuestaDuplicado y tblRecomendacionDuplicado"
+            )
+
+        cursor.execute("""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'UX_Intento_en_progreso' AND object_id = OBJECT_ID('tblIntento')
+            )
+            CREATE UNIQUE NONCLUSTERED INDEX UX_Intento_en_progreso
+                ON tblIntento (EstudID, CuestID)
+                WHERE Confirmado = 0
+        """)
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'UX_Intento_en_progreso' AND object_id = OBJECT_ID('tblIntento')
+            )
+            DROP INDEX UX_Intento_en_progreso ON tblIntento
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0005_indices_mantenimiento'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
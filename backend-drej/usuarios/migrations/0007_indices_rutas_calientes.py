@@ -0,0 +1,100 @@
+# Índices para las rutas calientes (ver usuarios/indices.py)
+#
+# Los scripts de las tablas viven fuera del repo y nada garantizaba índices
+# sobre los predicados que usan las vistas en cada petición:
+# - tblIntento (EstudID, CuestID, Confirmado): resultados, dashboard, retomar
+# - tblRespuesta (IntentID): guardar respuestas, detalle, motor de IA
+# - tblRecomendacion (IntentID, Score DESC): top 5 por intento
+# - tblPregunta (CuestID, PregActiva, PregOrden) y tblOpcion (PregID,
+#   OpcionOrden): armar el cuestionario
+# - tblEstudiante (UserID): Estudiante de request.user en toda vista
+# - tblPasswordResetToken (UserID, used): invalidar tokens previos
+#
+# Idempotente: no crea el índice si ya existe con ese nombre ni si la tabla
+# ya tiene otro con las mismas columnas clave (creado por los scripts
+# externos con otro nombre), para no duplicar el coste de cada escritura.
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+from django.db import migrations
+
+INDICES = [
+    ('IX_Intento_Estud_Cuest_Confirmado', 'tblIntento',
+     ['EstudID', 'CuestID', 'Confirmado'], 'INCLUDE (EstadoID, Creado)'),
+    ('IX_Respuesta_IntentID', 'tblRespuesta', ['IntentID'], 'INCLUDE (RespValor)'),
+    ('IX_Recomendacion_IntentID_Score', 'tblRecomendacion', ['IntentID', 'Score DESC'], ''),
+    ('IX_Pregunta_Cuest_Activa_Orden', 'tblPregunta', ['CuestID', 'PregActiva', 'PregOrden'], ''),
+    ('IX_Opcion_Preg_Orden', 'tblOpcion', ['PregID', 'OpcionOrden'], ''),
+    ('IX_Estudiante_UserID', 'tblEstudiante', ['UserID'], ''),
+    ('IX_PasswordResetToken_User_used', 'tblPasswordResetToken', ['UserID', 'used'], ''),
+]
+
+CLAVES_POR_INDICE = """
+    SELECT i.name, c.name
+    FROM sys.indexes i
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE i.object_id = OBJECT_ID(%s) AND i.has_filter = 0 AND ic.is_included_column = 0
+    ORDER BY i.index_id, ic.key_ordinal
+"""
+
+
+def _indice_equivalente(cursor, tabla, claves):
+    """Nombre de un índice sin filtro de la tabla con las mismas columnas clave, o None"""
+    cursor.execute(CLAVES_POR_INDICE, [tabla])
+    existentes = {}
+    for nombre, columna in cursor.fetchall():
+        existentes.setdefault(nombre, []).append(columna.lower())
+    for nombre, columnas in existentes.items():
+        if columnas == claves:
+            return nombre
+    return None
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, tabla, columnas, incluidas in INDICES:
+            claves = [columna.split()[0].lower() for columna in columnas]
+            equivalente = _indice_equivalente(cursor, tabla, claves)
+            if equivalente and equivalente != nombre:
+                print(f"\n  [AVISO] {tabla} ya tiene {equivalente} sobre ({', '.join(columnas)}): no se crea {nombre}")
+                continue
+
+            cursor.execute(f"""
+                IF NOT EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                CREATE NONCLUSTERED INDEX {nombre}
+                    ON {tabla} ({', '.join(columnas)})
+                    {incluidas}
+            """)
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, tabla, _, _ in INDICES:
+            cursor.execute(f"""
+                IF EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                DROP INDEX {nombre} ON {tabla}
+            """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0006_intento_en_progreso_unico'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
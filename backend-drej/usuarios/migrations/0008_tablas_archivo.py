@@ -0,0 +1,128 @@
+# Tablas de archivo para respuestas y recomendaciones de periodos cerrados
+# (ver usuarios/archivo.py)
+#
+# - tblRespuestaArchivo / tblRecomendacionArchivo: columnstore agrupado con
+#   COLUMNSTORE_ARCHIVE (máxima compresión, lectura poco frecuente) y un
+#   índice por IntentID para el historial de resultados. Sin FK: el
+#   archivado usa DELETE ... OUTPUT INTO, que no admite tablas destino con
+#   restricciones de clave externa.
+# - IX_Respuesta_RespFechaHora: respuestas_hoy del dashboard del orientador
+#   filtra por rango de fecha sobre la tabla caliente.
+#
+# Requiere SQL Server 2016 o posterior. Solo aplica en SQL Server (tablas
+# managed=False); en otros motores no hace nada.
+
+from django.db import migrations, models
+
+TABLAS = [
+    ('tblRespuestaArchivo', 'RespuestaArchivo', """
+        RespID INT NOT NULL,
+        IntentID INT NOT NULL,
+        RespValor NVARCHAR(255) NULL,
+        RespFechaHora DATETIME2 NOT NULL,
+    """),
+    ('tblRecomendacionArchivo', 'RecomendacionArchivo', """
+        RecomendacionID INT NOT NULL,
+        IntentID INT NOT NULL,
+        Carrera NVARCHAR(100) NOT NULL,
+        Descripcion NVARCHAR(200) NULL,
+        Score FLOAT NULL,
+        Nivel NVARCHAR(50) NULL,
+        FechaHora DATETIME2 NOT NULL,
+    """),
+]
+
+
+def crear_tablas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for tabla, sufijo, columnas in TABLAS:
+            cursor.execute(f"""
+                IF OBJECT_ID('{tabla}') IS NULL
+                BEGIN
+                    CREATE TABLE {tabla} (
+                        {columnas}
+                        Mes INT NOT NULL,
+                        Archivado DATETIME2 NOT NULL
+                            CONSTRAINT DF_{sufijo}_Archivado DEFAULT SYSUTCDATETIME()
+                    );
+                    CREATE CLUSTERED COLUMNSTORE INDEX CCI_{sufijo}
+                        ON {tabla}
+                        WITH (DATA_COMPRESSION = COLUMNSTORE_ARCHIVE);
+                    CREATE NONCLUSTERED INDEX IX_{sufijo}_IntentID
+                        ON {tabla} (IntentID);
+                END
+            """)
+
+        cursor.execute("""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_Respuesta_RespFechaHora' AND object_id = OBJECT_ID('tblRespuesta')
+            )
+            CREATE NONCLUSTERED INDEX IX_Respuesta_RespFechaHora
+                ON tblRespuesta (RespFechaHora)
+        """)
+
+
+def eliminar_tablas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_Respuesta_RespFechaHora' AND object_id = OBJECT_ID('tblRespuesta')
+            )
+            DROP INDEX IX_Respuesta_RespFechaHora ON tblRespuesta
+        """)
+        # Solo si están vacías: revertir no debe perder el archivo
+        for tabla, _, _ in TABLAS:
+            cursor.execute(f"""
+                IF OBJECT_ID('{tabla}') IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {tabla})
+                    DROP TABLE {tabla}
+            """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0007_indices_rutas_calientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomendacionArchivo',
+            fields=[
+                ('RecomendacionID', models.IntegerField(primary_key=True, serialize=False)),
+                ('Carrera', models.CharField(max_length=100)),
+                ('Descripcion', models.CharField(blank=True, max_length=200, null=True)),
+                ('Score', models.FloatField(blank=True, null=True)),
+                ('Nivel', models.CharField(blank=True, max_length=50, null=True)),
+                ('FechaHora', models.DateTimeField()),
+                ('Mes', models.IntegerField()),
+                ('Archivado', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tblRecomendacionArchivo',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RespuestaArchivo',
+            fields=[
+                ('RespID', models.IntegerField(primary_key=True, serialize=False)),
+                ('RespValor', models.CharField(blank=True, max_length=255, null=True)),
+                ('RespFechaHora', models.DateTimeField()),
+                ('Mes', models.IntegerField()),
+                ('Archivado', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tblRespuestaArchivo',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(crear_tablas, eliminar_tablas),
+    ]
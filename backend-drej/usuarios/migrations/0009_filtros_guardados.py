@@ -0,0 +1,101 @@
+# Filtros guardados del orientador (ver usuarios/filtros.py)
+#
+# - tblFiltro: nombre del filtro, RecomendacionID hasta el que se evaluó
+#   (actualización incremental) y fecha de la última evaluación.
+# - UX_FiltroRecomendacion_Filtro_Recomendacion: páginas de resultados de
+#   un filtro por rango sobre (FiltroID, RecomendacionID); no se crea si
+#   los scripts externos ya declararon esa clave con otro nombre.
+# - IX_Estudiante_Insti_FechaNac: estudiantes de la institución con
+#   criterio de edad como rango sobre la fecha de nacimiento.
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+from django.db import migrations
+
+COLUMNAS = [
+    ('Nombre', 'NVARCHAR(100) NULL'),
+    ('UltimaRecomendacionID', 'INT NULL'),
+    ('Actualizado', 'DATETIME2 NULL'),
+]
+
+INDICES = [
+    ('UX_FiltroRecomendacion_Filtro_Recomendacion', 'tblFiltroRecomendacion',
+     ['FiltroID', 'RecomendacionID'], 'UNIQUE '),
+    ('IX_Estudiante_Insti_FechaNac', 'tblEstudiante', ['InstiID', 'EstudFechaNac'], ''),
+]
+
+CLAVES_POR_INDICE = """
+    SELECT i.name, c.name
+    FROM sys.indexes i
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE i.object_id = OBJECT_ID(%s) AND i.has_filter = 0 AND ic.is_included_column = 0
+    ORDER BY i.index_id, ic.key_ordinal
+"""
+
+
+def _indice_equivalente(cursor, tabla, claves):
+    """Nombre de un índice sin filtro de la tabla con las mismas columnas clave, o None"""
+    cursor.execute(CLAVES_POR_INDICE, [tabla])
+    existentes = {}
+    for nombre, columna in cursor.fetchall():
+        existentes.setdefault(nombre, []).append(columna.lower())
+    for nombre, columnas in existentes.items():
+        if columnas == claves:
+            return nombre
+    return None
+
+
+def crear(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for columna, tipo in COLUMNAS:
+            cursor.execute(f"""
+                IF COL_LENGTH('tblFiltro', '{columna}') IS NULL
+                    ALTER TABLE tblFiltro ADD {columna} {tipo}
+            """)
+
+        for nombre, tabla, columnas, unico in INDICES:
+            equivalente = _indice_equivalente(cursor, tabla, [c.lower() for c in columnas])
+            if equivalente and equivalente != nombre:
+                print(f"\n  [AVISO] {tabla} ya tiene {equivalente} sobre ({', '.join(columnas)}): no se crea {nombre}")
+                continue
+
+            cursor.execute(f"""
+                IF NOT EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                CREATE {unico}NONCLUSTERED INDEX {nombre}
+                    ON {tabla} ({', '.join(columnas)})
+            """)
+
+
+def eliminar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    # Las columnas de tblFiltro quedan: revertir no debe perder los nombres
+    # de los filtros guardados
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, tabla, _, _ in INDICES:
+            cursor.execute(f"""
+                IF EXISTS (
+                    SELECT 1 FROM sys.indexes
+                    WHERE name = '{nombre}' AND object_id = OBJECT_ID('{tabla}')
+                )
+                DROP INDEX {nombre} ON {tabla}
+            """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0008_tablas_archivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
@@ -0,0 +1,82 @@
+# Nivel de riesgo de cada estudiante (ver usuarios/riesgo.py)
+#
+# - tblNivelRiesgo: Bajo / Medio / Alto con los IDs de usuarios.catalogos,
+#   si faltan.
+# - tblEstudiante: NivelRiesgoID (FK a tblNivelRiesgo), motivos y fecha
+#   del último cambio, escritos por la clasificación.
+# - IX_Estudiante_Insti_NivelRiesgo: dashboard y filtros guardados por
+#   nivel de riesgo dentro de la institución.
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+from django.db import migrations
+
+NIVELES = [(1, 'Bajo'), (2, 'Medio'), (3, 'Alto')]
+
+COLUMNAS = [
+    ('NivelRiesgoID', 'INT NULL CONSTRAINT FK_Estudiante_NivelRiesgo '
+                      'REFERENCES tblNivelRiesgo (NivelRiesgoID)'),
+    ('RiesgoMotivos', 'NVARCHAR(100) NULL'),
+    ('RiesgoActualizado', 'DATETIME2 NULL'),
+]
+
+
+def crear(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for nivel_id, descripcion in NIVELES:
+            cursor.execute(f"""
+                IF NOT EXISTS (SELECT 1 FROM tblNivelRiesgo WHERE NivelRiesgoID = {nivel_id})
+                BEGIN
+                    IF OBJECTPROPERTY(OBJECT_ID('tblNivelRiesgo'), 'TableHasIdentity') = 1
+                        SET IDENTITY_INSERT tblNivelRiesgo ON;
+                    INSERT INTO tblNivelRiesgo (NivelRiesgoID, NivelRiesgoDescripcion)
+                    VALUES ({nivel_id}, '{descripcion}');
+                    IF OBJECTPROPERTY(OBJECT_ID('tblNivelRiesgo'), 'TableHasIdentity') = 1
+                        SET IDENTITY_INSERT tblNivelRiesgo OFF;
+                END
+            """)
+
+        for columna, tipo in COLUMNAS:
+            cursor.execute(f"""
+                IF COL_LENGTH('tblEstudiante', '{columna}') IS NULL
+                    ALTER TABLE tblEstudiante ADD {columna} {tipo}
+            """)
+
+        cursor.execute("""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_Estudiante_Insti_NivelRiesgo' AND object_id = OBJECT_ID('tblEstudiante')
+            )
+            CREATE NONCLUSTERED INDEX IX_Estudiante_Insti_NivelRiesgo
+                ON tblEstudiante (InstiID, NivelRiesgoID)
+        """)
+
+
+def eliminar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    # Columnas y niveles quedan: la clasificación se recalcula, pero otras
+    # tablas (tblFiltro) ya pueden referenciar los niveles
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_Estudiante_Insti_NivelRiesgo' AND object_id = OBJECT_ID('tblEstudiante')
+            )
+            DROP INDEX IX_Estudiante_Insti_NivelRiesgo ON tblEstudiante
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_filtros_guardados'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
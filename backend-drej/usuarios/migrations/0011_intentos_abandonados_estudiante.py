@@ -0,0 +1,39 @@
+# Conteo de intentos abandonados ya purgados por estudiante
+#
+# La purga intentos_abandonados (usuarios/mantenimiento.py) borra los
+# intentos en progreso sin actividad en MANTENIMIENTO_RETENCION_INTENTOS.
+# Antes de borrar cada lote suma a tblEstudiante.IntentosAbandonados los
+# intentos de cada estudiante: la clasificación de riesgo conserva la señal
+# de un estudiante que nunca confirmó aunque sus intentos ya no existan.
+#
+# Solo aplica en SQL Server (tablas managed=False); en otros motores no hace nada.
+
+from django.db import migrations
+
+
+def crear(apps, schema_editor):
+    if schema_editor.connection.vendor != 'microsoft':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            IF COL_LENGTH('tblEstudiante', 'IntentosAbandonados') IS NULL
+                ALTER TABLE tblEstudiante ADD IntentosAbandonados INT NOT NULL
+                    CONSTRAINT DF_Estudiante_IntentosAbandonados DEFAULT 0
+        """)
+
+
+def eliminar(apps, schema_editor):
+    # La columna queda: es historial que no se puede reconstruir
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0010_nivel_riesgo_estudiante'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
@@ -127,6 +127,19 @@ class Estudiante(models.Model):
         default=2  # Default: Estudiante
     )
 
+    # Clasificación de riesgo (usuarios/riesgo.py, migración 0010)
+    NivelRiesgo = models.ForeignKey(
+        NivelRiesgo,
+        on_delete=models.PROTECT,
+        db_column='NivelRiesgoID',
+        null=True,
+        blank=True
+    )
+    RiesgoMotivos = models.CharField(max_length=100, null=True, blank=True)
+    RiesgoActualizado = models.DateTimeField(null=True, blank=True)  # último cambio de nivel o motivos
+    # Intentos abandonados ya purgados (mantenimiento, migración 0011)
+    IntentosAbandonados = models.IntegerField(default=0)
+
     class Meta:
         db_table = 'tblEstudiante'
         managed = False
@@ -301,6 +314,54 @@ class Recomendacion(models.Model):
         managed = False
 
 
+# ====================================================
+# ARCHIVO DE PERIODOS CERRADOS (usuarios/archivo.py)
+# ====================================================
+# Mismas columnas que la tabla caliente más el mes (AAAAMM) y la fecha de
+# archivado. Columnstore con COLUMNSTORE_ARCHIVE y sin FK (migración 0008);
+# solo lectura para la app.
+
+class RespuestaArchivo(models.Model):
+    RespID = models.IntegerField(primary_key=True)
+    Intent = models.ForeignKey(
+        Intento,
+        on_delete=models.DO_NOTHING,
+        db_column='IntentID',
+        db_constraint=False,
+        related_name='+'
+    )
+    RespValor = models.CharField(max_length=255, null=True, blank=True)
+    RespFechaHora = models.DateTimeField()
+    Mes = models.IntegerField()
+    Archivado = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tblRespuestaArchivo'
+        managed = False
+
+
+class RecomendacionArchivo(models.Model):
+    RecomendacionID = models.IntegerField(primary_key=True)
+    Intent = models.ForeignKey(
+        Intento,
+        on_delete=models.DO_NOTHING,
+        db_column='IntentID',
+        db_constraint=False,
+        related_name='+'
+    )
+    Carrera = models.CharField(max_length=100)
+    Descripcion = models.CharField(max_length=200, null=True, blank=True)
+    Score = models.FloatField(null=True, blank=True)
+    Nivel = models.CharField(max_length=50, null=True, blank=True)
+    FechaHora = models.DateTimeField()
+    Mes = models.IntegerField()
+    Archivado = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tblRecomendacionArchivo'
+        managed = False
+
+
 class Filtro(models.Model):
     FiltroID = models.AutoField(primary_key=True)
     Orien = models.ForeignKey(
@@ -320,6 +381,11 @@ class Filtro(models.Model):
         blank=True
     )
 
+    # Filtros guardados (usuarios/filtros.py, migración 0009)
+    Nombre = models.CharField(max_length=100, null=True, blank=True)
+    UltimaRecomendacionID = models.IntegerField(null=True, blank=True)  # evaluado hasta aquí
+    Actualizado = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = 'tblFiltro'
         managed = False
@@ -518,4 +584,48 @@ class Opcion(models.Model):
         ordering = ['OpcionOrden']
 
     def __str__(self):
-        return f"{self.OpcionTexto} (Valor: {self.OpcionValor})"
\ No newline at end of file
+        return f"{self.OpcionTexto} (Valor: {self.OpcionValor})"
+
+# ====================================================
+# BANDEJA DE SALIDA DE EMAILS (usuarios/correo.py)
+# ====================================================
+
+class EmailPendiente(models.Model):
+    """
+    Email encolado para envío por lotes. La tabla la crea Django
+    (managed=True, migración 0004): no existe en los scripts SQL.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIANDO = 'enviando'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIANDO, 'Enviando'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    EmailID = models.AutoField(primary_key=True)
+    Destinatario = models.CharField(max_length=254)
+    Asunto = models.CharField(max_length=255)
+    CuerpoTexto = models.TextField()
+    CuerpoHtml = models.TextField(null=True, blank=True)
+    Estado = models.CharField(max_length=10, choices=ESTADOS, default=ESTADO_PENDIENTE)
+    Intentos = models.IntegerField(default=0)
+    UltimoError = models.CharField(max_length=500, null=True, blank=True)
+    Lote = models.UUIDField(null=True, blank=True)  # worker que lo reclamó
+    Creado = models.DateTimeField(default=timezone.now)
+    ProximoIntento = models.DateTimeField(default=timezone.now)
+    Reclamado = models.DateTimeField(null=True, blank=True)
+    Enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tblEmailPendiente'
+        indexes = [
+            models.Index(fields=['Estado', 'ProximoIntento'], name='IX_EmailPendiente_estado'),
+            models.Index(fields=['Lote'], name='IX_EmailPendiente_lote'),
+        ]
+
+    def __str__(self):
+        return f"{self.Destinatario} - {self.Asunto} ({self.Estado})"
@@ -3,10 +3,14 @@ import os
 import json
 from collections import defaultdict
 from typing import List, Dict
-from django.db import connection
+from django.db import connection, transaction
 from datetime import datetime
 
 from groq import Groq
+
+from .filtros import olvidar_recomendaciones, programar_actualizacion
+from .metricas import medir_http
+
 GROQ_AVAILABLE = True
 
 logger = logging.getLogger(__name__)
@@ -220,22 +224,23 @@ Genera una descripción motivadora y personalizada de 2-3 oraciones que:
 Responde SOLO con la descripción, sin introducción."""
 
             # Llamar a Groq
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # Modelo rápido y bueno
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un orientador vocacional experto que escribe descripciones personalizadas, motivadoras y concisas."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.9,
-                max_tokens=150,
-                top_p=1.0
-            )
+            with medir_http('groq'):
+                response = self.groq_client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",  # Modelo rápido y bueno
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Eres un orientador vocacional experto que escribe descripciones personalizadas, motivadoras y concisas."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.9,
+                    max_tokens=150,
+                    top_p=1.0
+                )
             
             descripcion = response.choices[0].message.content.strip()
             descripcion = limpiar_texto_unicode(descripcion)
@@ -315,6 +320,8 @@ Responde SOLO con la descripción, sin introducción."""
         """Guardar recomendaciones en la BD"""
         try:
             with connection.cursor() as cursor:
+                # Las previas pueden estar en resultados de filtros guardados (FK)
+                olvidar_recomendaciones(cursor, 'IntentID = %s', [self.intento_id])
                 cursor.execute("""
                     DELETE FROM tblRecomendacion WHERE IntentID = %s
                 """, [self.intento_id])
@@ -334,7 +341,15 @@ Responde SOLO con la descripción, sin introducción."""
                 
                 ia_count = sum(1 for r in recomendaciones if r.get('generada_con_ia'))
                 logger.info(f"[MOTOR_IA_GROQ] ✅ {len(recomendaciones)} recomendaciones guardadas ({ia_count} con IA)")
-                return True
+            
+            # riesgo y cohortes -> puntajes importan este módulo (MAPEO_PREGUNTAS_CATEGORIAS)
+            from .cohortes import invalidar_intento
+            from .riesgo import programar_clasificacion
+            
+            transaction.on_commit(programar_actualizacion)
+            transaction.on_commit(lambda: programar_clasificacion(self.intento_id))
+            transaction.on_commit(lambda: invalidar_intento(self.intento_id))
+            return True
                 
         except Exception as e:
             logger.error(f"[MOTOR_IA_GROQ] Error al guardar: {str(e)}")
@@ -0,0 +1,94 @@
+# usuarios/plantillas_email.py
+"""
+Plantillas de email compiladas una vez por proceso
+
+Los cuerpos viven en usuarios/templates/emails/<nombre>.html. La primera
+vez que un worker usa una plantilla:
+
+- compila el HTML (Template de Django, ya parseado)
+- genera la versión de texto plano a partir de ese HTML (enlaces como
+  "texto: url", párrafos en líneas) y también la compila
+
+Cada envío solo sustituye variables en los dos árboles ya compilados; no
+vuelve a leer el archivo, parsear la plantilla ni pasar strip_tags.
+
+    asunto, texto, html = renderizar_email('recuperacion_password', {...})
+
+Medición: `python manage.py benchmark_emails`.
+"""
+import html
+import re
+from functools import lru_cache
+
+from django.template import Context, Template
+from django.template.loader import get_template
+
+# nombre -> asunto
+ASUNTOS = {
+    'recuperacion_password': 'Recuperación de Contraseña - VocaRed',
+    'confirmacion_cambio_password': 'Contraseña Actualizada - VocaRed',
+}
+
+PIE_TEXTO = '\n---\nVocaRed - Sistema de Orientación Vocacional\n'
+
+_CUERPO = re.compile(r'<body[^>]*>(.*)</body>', re.S | re.I)
+_ENLACE = re.compile(r'<a\s[^>]*href="([^"]*)"[^>]*>(.*?)</a>', re.S | re.I)
+_FIN_BLOQUE = re.compile(r'<br\s*/?>|</(p|div|h[1-6]|li|tr)>|<hr[^>]*>', re.I)
+_ETIQUETA = re.compile(r'<[^>]+>')
+
+
+def texto_desde_html(fuente):
+    """
+    Fuente de plantilla HTML -> fuente de plantilla de texto plano.
+    Trabaja sobre la fuente (no sobre el HTML renderizado), así que las
+    variables {{ ... }} se conservan y se sustituyen en cada envío.
+    """
+    cuerpo = _CUERPO.search(fuente)
+    texto = cuerpo.group(1) if cuerpo else fuente
+    texto = _ENLACE.sub(lambda m: f'{_ETIQUETA.sub("", m.group(2)).strip()}: {m.group(1)}', texto)
+    texto = _FIN_BLOQUE.sub('\n', texto)
+    texto = html.unescape(_ETIQUETA.sub('', texto))
+
+    lineas = [' '.join(linea.split()) for linea in texto.splitlines()]
+    resultado = []
+    for linea in lineas:
+        # Como mucho una línea en blanco seguida
+        if linea or (resultado and resultado[-1]):
+            resultado.append(linea)
+    return '\n'.join(resultado).strip() + '\n' + PIE_TEXTO
+
+
+class PlantillaEmail:
+    """Par HTML / texto plano compilado de una plantilla de usuarios/templates/emails"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.asunto = ASUNTOS[nombre]
+        # get_template devuelve el envoltorio del backend: .template es el
+        # árbol de nodos ya compilado
+        self.html = get_template(f'emails/{nombre}.html').template
+        self.texto = Template(texto_desde_html(self.html.source))
+
+    def renderizar(self, contexto):
+        """
+        Returns:
+            tuple: (asunto, texto, html)
+        """
+        html_renderizado = self.html.render(Context(contexto))
+        # Texto plano sin autoescape: los enlaces no deben llevar &amp;
+        texto_renderizado = self.texto.render(Context(contexto, autoescape=False))
+        return self.asunto, texto_renderizado, html_renderizado
+
+
+@lru_cache(maxsize=None)
+def obtener_plantilla(nombre):
+    """PlantillaEmail compilada, una por proceso y nombre"""
+    return PlantillaEmail(nombre)
+
+
+def renderizar_email(nombre, contexto):
+    """
+    Returns:
+        tuple: (asunto, texto, html)
+    """
+    return obtener_plantilla(nombre).renderizar(contexto)
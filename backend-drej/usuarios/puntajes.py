@@ -0,0 +1,192 @@
+# usuarios/puntajes.py
+"""
+Puntajes por categoría de intentos ya confirmados, sin pasar por el motor
+
+tblRespuesta guarda el OpcionID elegido y los puntajes no se persisten: el
+motor (MotorRecomendacionesGroq.calcular_scores) asigna la i-ésima
+respuesta del intento a MAPEO_PREGUNTAS_CATEGORIAS[i] y normaliza la suma
+de OpcionValor a 0-100. Aquí se aplica la misma regla:
+
+- puntajes_por_categoria: un intento (exportación fila a fila)
+- matriz_puntajes: muchos intentos a la vez con NumPy (clasificación de
+  riesgo); las respuestas se leen por lotes con IN y se agregan con
+  np.add.at, sin bucles por intento
+- matriz_puntajes_consulta: los intentos de una subconsulta (analítica de
+  cohortes, decenas de miles): la base numera y suma las respuestas y
+  devuelve una fila por intento, en una sola consulta
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Opcion, Respuesta, RespuestaArchivo
+from .motor_ia_groq import MAPEO_PREGUNTAS_CATEGORIAS
+
+CATEGORIAS = list(dict.fromkeys(MAPEO_PREGUNTAS_CATEGORIAS[i] for i in sorted(MAPEO_PREGUNTAS_CATEGORIAS)))
+
+# Normalización del motor: 4 preguntas x 5 puntos
+PUNTAJE_MAXIMO_CATEGORIA = 4 * 5
+
+# SQL Server: máximo 2100 parámetros por consulta
+LOTE_INTENTOS = 2000
+
+# Posición de la respuesta (1..n) -> índice en CATEGORIAS; -1 si no puntúa.
+# La última celda cubre las posiciones fuera del mapeo.
+_CATEGORIA_POR_POSICION = np.array(
+    [-1]
+    + [CATEGORIAS.index(MAPEO_PREGUNTAS_CATEGORIAS[i]) if i in MAPEO_PREGUNTAS_CATEGORIAS else -1
+       for i in range(1, max(MAPEO_PREGUNTAS_CATEGORIAS) + 1)]
+    + [-1]
+)
+
+
+def puntajes_por_categoria(valores):
+    """
+    Puntaje (0-100) por categoría a partir del OpcionValor de cada respuesta,
+    en el orden en que se guardaron (None si la opción ya no existe)
+    """
+    sumas = defaultdict(float)
+    for i, valor in enumerate(valores, 1):
+        categoria = MAPEO_PREGUNTAS_CATEGORIAS.get(i)
+        if valor is not None and categoria:
+            sumas[categoria] += valor
+    return {categoria: round(suma / PUNTAJE_MAXIMO_CATEGORIA * 100, 2) for categoria, suma in sumas.items()}
+
+
+def valores_opciones(alias=DEFAULT_DB_ALIAS):
+    """OpcionID -> OpcionValor de todas las opciones (catálogo pequeño, una consulta)"""
+    return dict(Opcion.objects.using(alias).values_list('OpcionID', 'OpcionValor').iterator())
+
+
+def _opcion_id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _respuestas(modelo, ids, alias):
+    """(IntentID, OpcionID) de las respuestas, por intento y en orden de guardado"""
+    return list(
+        modelo.objects.using(alias).filter(Intent_id__in=ids)
+        .order_by('Intent_id', 'RespID').values_list('Intent_id', 'RespValor').iterator()
+    )
+
+
+def matriz_puntajes(intento_ids, alias=DEFAULT_DB_ALIAS, opciones=None):
+    """
+    Puntajes de muchos intentos: matriz (len(intento_ids), len(CATEGORIAS))
+    en el orden de intento_ids, con NaN en las filas de intentos sin respuestas
+    y en las categorías sin respuestas válidas
+
+    Los intentos sin filas en tblRespuesta se buscan en el archivo de
+    periodos cerrados.
+    """
+    ids = np.asarray(list(intento_ids), dtype=np.int64)
+    matriz = np.full((len(ids), len(CATEGORIAS)), np.nan)
+    if not len(ids):
+        return matriz
+
+    opciones = valores_opciones(alias) if opciones is None else opciones
+    opcion_ids = np.fromiter(opciones.keys(), dtype=np.int64, count=len(opciones))
+    orden_opciones = np.argsort(opcion_ids)
+    opcion_ids = opcion_ids[orden_opciones]
+    opcion_valores = np.fromiter(opciones.values(), dtype=float, count=len(opciones))[orden_opciones]
+
+    orden_ids = np.argsort(ids)
+    ids_ordenados = ids[orden_ids]
+
+    filas = []
+    for inicio in range(0, len(ids), LOTE_INTENTOS):
+        lote = ids[inicio:inicio + LOTE_INTENTOS].tolist()
+        respuestas = _respuestas(Respuesta, lote, alias)
+        con_respuestas = {intento_id for intento_id, _ in respuestas}
+        faltantes = [intento_id for intento_id in lote if intento_id not in con_respuestas]
+        if faltantes:
+            respuestas += _respuestas(RespuestaArchivo, faltantes, alias)
+            respuestas.sort(key=lambda fila: fila[0])  # sort estable: conserva el orden por RespID
+        filas += respuestas
+
+    if not filas:
+        return matriz
+
+    intentos = np.fromiter((intento_id for intento_id, _ in filas), dtype=np.int64, count=len(filas))
+    elegidas = np.fromiter((_opcion_id(valor) for _, valor in filas), dtype=np.int64, count=len(filas))
+
+    # Posición 1..n de cada respuesta dentro de su intento (filas agrupadas por intento)
+    inicio_grupo = np.r_[True, intentos[1:] != intentos[:-1]]
+    grupo = np.cumsum(inicio_grupo) - 1
+    posicion = np.arange(len(intentos)) - np.flatnonzero(inicio_grupo)[grupo] + 1
+    categoria = _CATEGORIA_POR_POSICION[np.minimum(posicion, len(_CATEGORIA_POR_POSICION) - 1)]
+
+    # OpcionValor de cada respuesta (las opciones borradas no puntúan)
+    indice_opcion = np.clip(np.searchsorted(opcion_ids, elegidas), 0, max(len(opcion_ids) - 1, 0))
+    encontrada = (opcion_ids[indice_opcion] == elegidas) if len(opcion_ids) else np.zeros(len(elegidas), bool)
+    valor = opcion_valores[indice_opcion] if len(opcion_ids) else np.zeros(len(elegidas))
+
+    fila = orden_ids[np.searchsorted(ids_ordenados, intentos)]
+    sumas = np.zeros_like(matriz)
+    cuantas = np.zeros_like(matriz)
+    validas = encontrada & (categoria >= 0)
+    np.add.at(sumas, (fila[validas], categoria[validas]), valor[validas])
+    np.add.at(cuantas, (fila[validas], categoria[validas]), 1)
+
+    # Como puntajes_por_categoria y matriz_puntajes_consulta: una categoría
+    # sin respuestas válidas no tiene puntaje (NaN), no 0
+    return np.divide(sumas, PUNTAJE_MAXIMO_CATEGORIA / 100, out=matriz, where=cuantas > 0)
+
+
+def _suma_categoria(indice):
+    posiciones = ', '.join(
+        str(posicion) for posicion, categoria in sorted(MAPEO_PREGUNTAS_CATEGORIAS.items())
+        if categoria == CATEGORIAS[indice]
+    )
+    return f"SUM(CASE WHEN r.Posicion IN ({posiciones}) THEN o.OpcionValor END)"
+
+
+def matriz_puntajes_consulta(intentos, alias=DEFAULT_DB_ALIAS):
+    """
+    Puntajes de los intentos de un QuerySet de un solo campo (IntentID)
+
+    La posición de cada respuesta sale de ROW_NUMBER() por intento y la suma
+    por categoría de un CASE, así que por la red viaja una fila por intento
+    y no una por respuesta. Respuestas en caliente y en archivo van en un
+    UNION ALL: el archivo mueve las filas, un intento está en una sola tabla.
+
+    Returns:
+        (intento_ids, matriz): arrays (n,) y (n, len(CATEGORIAS)); solo los
+        intentos con respuestas, con NaN en categorías sin opciones válidas
+    """
+    sql, parametros = intentos.order_by().query.sql_with_params()
+    columnas = ', '.join(f"{_suma_categoria(i)} AS c{i}" for i in range(len(CATEGORIAS)))
+    numeradas = """
+        SELECT IntentID, RespValor,
+               ROW_NUMBER() OVER (PARTITION BY IntentID ORDER BY RespID) AS Posicion
+        FROM {tabla} WHERE IntentID IN ({sql})
+    """
+    conexion = connections[alias]
+    # RespValor guarda el OpcionID como texto: comparar enteros permite buscar
+    # por la clave de tblOpcion (CAST de OpcionID a texto obliga a recorrerla
+    # por cada respuesta). TRY_CAST deja en NULL los valores no numéricos.
+    cast = 'TRY_CAST' if conexion.vendor == 'microsoft' else 'CAST'
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT r.IntentID, {columnas}
+            FROM (
+                {numeradas.format(tabla='tblRespuesta', sql=sql)}
+                UNION ALL
+                {numeradas.format(tabla='tblRespuestaArchivo', sql=sql)}
+            ) r
+            LEFT JOIN tblOpcion o ON o.OpcionID = {cast}(r.RespValor AS INT)
+            GROUP BY r.IntentID
+            """,
+            [*parametros, *parametros]
+        )
+        filas = cursor.fetchall()
+
+    if not filas:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(CATEGORIAS)))
+    datos = np.array(filas, dtype=float)
+    return datos[:, 0].astype(np.int64), datos[:, 1:] / PUNTAJE_MAXIMO_CATEGORIA * 100
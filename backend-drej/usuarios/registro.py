@@ -0,0 +1,228 @@
+# usuarios/registro.py
+"""
+Pipeline único de registro de usuarios (Estudiante u Orientador)
+
+Coste por registro:
+1. Validación de formato en Python (sin BD)
+2. Una sola consulta combinada: DNI libre, email libre e institución existente
+3. El hash de la contraseña (usuarios/hashers.py), fuera de la transacción
+4. Los INSERT de auth_user y tblEstudiante/tblOrientador en una transacción
+
+Roles y estados de verificación salen de la cache de catálogos. Las
+carreras entre dos registros simultáneos las resuelven las restricciones
+únicas de la BD: el IntegrityError se traduce al mismo error de campo.
+DNI o email ya registrados responden siempre 409 con {"dni"} o {"email"}.
+"""
+import logging
+import re
+
+from django.contrib.auth.models import User
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from .catalogos import (
+    ROL_ESTUDIANTE, ROL_ORIENTADOR, ESTADO_VERIF_PENDIENTE,
+    obtener_rol, obtener_estado_verificacion
+)
+from .hashers import hashear_password
+from .models import Estudiante, Orientador, Rol, EstadoVerificacion
+from .unicidad import consultar_unicidad, registrar_en_filtro
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_OBLIGATORIOS = [
+    "email", "password", "passwordConfirm", "nombres", "apellidoPaterno",
+    "apellidoMaterno", "dni", "telefono", "fechaNacimiento", "insti_id"
+]
+
+
+class RegistroError(Exception):
+    """Error de registro con el cuerpo y el código HTTP a devolver"""
+
+    def __init__(self, errores, status_code=400):
+        super().__init__(str(errores))
+        self.errores = errores
+        self.status_code = status_code
+
+
+def to_title_case(text):
+    """Convertir texto a Title Case (Primera letra mayúscula)"""
+    if not text:
+        return ""
+    return text.strip().title()
+
+
+def validar_datos(data):
+    """
+    Validaciones de formato (sin acceso a BD)
+
+    Returns:
+        dict con los datos normalizados
+    Raises:
+        RegistroError
+    """
+    missing = [k for k in CAMPOS_OBLIGATORIOS if not data.get(k) or not str(data.get(k)).strip()]
+    rol = (data.get("rol") or "Estudiante").strip()
+
+    if rol == "Orientador":
+        if not data.get("cargo") or not str(data.get("cargo")).strip():
+            missing.append("cargo")
+        if not data.get("areaEspecializacion") or not str(data.get("areaEspecializacion")).strip():
+            missing.append("areaEspecializacion")
+
+    if missing:
+        raise RegistroError({"detail": f"Faltan campos obligatorios: {', '.join(missing)}"})
+
+    if rol not in ("Estudiante", "Orientador"):
+        raise RegistroError({"rol": [f"Rol '{rol}' no válido"]})
+
+    if data["password"] != data["passwordConfirm"]:
+        raise RegistroError({"passwordConfirm": ["Las contraseñas no coinciden"]})
+
+    if len(data["password"]) < 8:
+        raise RegistroError({"password": ["La contraseña debe tener al menos 8 caracteres"]})
+
+    dni = str(data.get("dni", "")).strip()
+    if not re.match(r'^\d{8}$', dni):
+        raise RegistroError({"dni": ["El DNI debe tener exactamente 8 dígitos"]})
+
+    telefono = str(data.get("telefono", "")).strip()
+    if not re.match(r'^9\d{8}$', telefono):
+        raise RegistroError({"telefono": ["El teléfono debe tener 9 dígitos y comenzar con 9"]})
+
+    try:
+        insti_id = int(data.get("insti_id"))
+    except (TypeError, ValueError):
+        raise RegistroError({"institucion": ["La institución seleccionada no existe"]})
+
+    return {
+        "rol": rol,
+        "dni": dni,
+        "email": str(data["email"]).strip(),
+        "password": data["password"],
+        "nombres": to_title_case(data.get("nombres")),
+        "apellido_paterno": to_title_case(data.get("apellidoPaterno")),
+        "apellido_materno": to_title_case(data.get("apellidoMaterno")),
+        "fecha_nacimiento": data.get("fechaNacimiento"),
+        "telefono": telefono,
+        "insti_id": insti_id,
+        "institucion": data.get("institucion"),
+        "cargo": str(data.get("cargo") or "").strip(),
+        "area_especializacion": str(data.get("areaEspecializacion") or "").strip(),
+        "perfil_profesional": str(data.get("perfilProfesional") or "").strip(),
+    }
+
+
+def _email_registrado():
+    return RegistroError({"email": ["Este correo ya está registrado"]}, status_code=409)
+
+
+def _dni_registrado():
+    return RegistroError({"dni": ["Este DNI ya está registrado"]}, status_code=409)
+
+
+def _error_integridad(e):
+    """Traducir un IntegrityError de las restricciones únicas al mismo error que la validación previa"""
+    error_msg = str(e)
+    logger.error("IntegrityError: %s", error_msg)
+
+    if "email" in error_msg.lower():
+        return _email_registrado()
+    if ("EstudDNI" in error_msg or "OrienDNI" in error_msg or "username" in error_msg
+            or "tblEstudiante" in error_msg or "tblOrientador" in error_msg):
+        return _dni_registrado()
+    return RegistroError(
+        {"detail": f"Error de integridad en la base de datos: {error_msg}"},
+        status_code=409
+    )
+
+
+def registrar_usuario(data):
+    """
+    Registrar un usuario a partir de los datos del formulario (camelCase)
+
+    Returns:
+        dict: {'user': User, 'rol': str, 'perfil': Estudiante | Orientador}
+    Raises:
+        RegistroError
+    """
+    datos = validar_datos(data)
+    dni = datos["dni"]
+
+    # Una sola consulta de validación contra la BD
+    disponibilidad = consultar_unicidad(dni=dni, email=datos["email"], insti_id=datos["insti_id"])
+
+    # Mismo cuerpo y código (409) que si lo detecta la restricción única
+    if disponibilidad["email"]:
+        raise _email_registrado()
+    if disponibilidad["dni"]:
+        raise _dni_registrado()
+    if disponibilidad["institucion"] is None:
+        raise RegistroError({"institucion": ["La institución seleccionada no existe"]})
+
+    try:
+        if datos["rol"] == "Estudiante":
+            rol = obtener_rol(ROL_ESTUDIANTE)
+        else:
+            rol = obtener_rol(ROL_ORIENTADOR)
+            estado_pendiente = obtener_estado_verificacion(ESTADO_VERIF_PENDIENTE)
+    except Rol.DoesNotExist:
+        raise RegistroError({"detail": f"Rol '{datos['rol']}' no encontrado en el sistema"}, status_code=500)
+    except EstadoVerificacion.DoesNotExist:
+        raise RegistroError({"detail": "Estado de verificación no encontrado"})
+
+    # El hash se calcula antes de abrir la transacción para no alargarla
+    password_hash = hashear_password(datos["password"])
+
+    try:
+        with transaction.atomic():
+            # SimpleJWT usa 'username' por defecto: el DNI es el username
+            user = User.objects.create(
+                username=dni,
+                email=User.objects.normalize_email(datos["email"]),
+                password=password_hash,
+                first_name=datos["nombres"],
+                last_name=f"{datos['apellido_paterno']} {datos['apellido_materno']}".strip(),
+            )
+
+            if datos["rol"] == "Estudiante":
+                perfil = Estudiante.objects.create(
+                    EstudDNI=dni,
+                    EstudNombres=datos["nombres"],
+                    EstudApellidoPaterno=datos["apellido_paterno"],
+                    EstudApellidoMaterno=datos["apellido_materno"],
+                    EstudFechaNac=datos["fecha_nacimiento"],
+                    EstudTelefono=datos["telefono"],
+                    User_id=user.id,
+                    Insti_id=datos["insti_id"],
+                    Rol_id=rol.RolID
+                )
+                logger.info("Estudiante creado exitosamente: %s", dni)
+
+            else:
+                perfil = Orientador.objects.create(
+                    OrienDNI=dni,
+                    OrienNombres=datos["nombres"],
+                    OrienApellidoPaterno=datos["apellido_paterno"],
+                    OrienApellidoMaterno=datos["apellido_materno"],
+                    OrienFechaNacimiento=datos["fecha_nacimiento"],
+                    OrienInstitucion=to_title_case(datos["institucion"] or disponibilidad["institucion"]),
+                    OrienCargo=to_title_case(datos["cargo"]),
+                    OrienAreaEspecializacion=to_title_case(datos["area_especializacion"]),
+                    OrienEmailInstitucional=datos["email"],
+                    OrienTelefono=datos["telefono"],
+                    OrienPerfilProfesional=datos["perfil_profesional"] or None,
+                    FechaRegistro=timezone.now(),
+                    EstadoVerif_id=estado_pendiente.EstadoVerifID,
+                    User_id=user.id,
+                    Insti_id=datos["insti_id"],
+                    Rol_id=rol.RolID
+                )
+                logger.info("Orientador creado exitosamente con ID: %s", perfil.OrienID)
+
+            transaction.on_commit(lambda: registrar_en_filtro(dni=dni, email=datos["email"]))
+
+    except IntegrityError as e:
+        raise _error_integridad(e)
+
+    return {'user': user, 'rol': datos["rol"], 'perfil': perfil}
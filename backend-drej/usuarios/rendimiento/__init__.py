@@ -0,0 +1,14 @@
+"""
+Herramientas de benchmark y pruebas de carga (solo para uso local)
+
+- estadisticas: agregación de latencias, consultas y CPU por escenario
+- datos: tablas y datos sintéticos (usuarios, catálogos, cuestionario)
+- clientes: ejecución de peticiones en proceso (django.test.Client) o por
+  HTTP contra un servidor levantado (httpx + asyncio)
+- examen: simulación de un aula rindiendo el cuestionario
+- groq_simulado / bloqueos: Groq con latencia fija y esperas LCK_M_*
+- smtp_local: servidor SMTP en memoria para la bandeja de salida
+
+Se usan desde los comandos sembrar_datos_prueba, benchmark_auth,
+simular_examen, servidor_smtp_local y benchmark_conexiones.
+"""
@@ -0,0 +1,30 @@
+# usuarios/rendimiento/bloqueos.py
+"""
+Esperas por bloqueos (LCK_M_*) de la sesión de BD del hilo actual
+
+sys.dm_exec_session_wait_stats acumula por sesión, así que la diferencia
+entre dos lecturas en el mismo hilo es lo que esperó esa conexión entre
+medias. Solo SQL Server; en otros motores devuelve None.
+"""
+from django.db import DatabaseError, connection
+
+
+def esperas_bloqueo_sesion():
+    """
+    Returns:
+        (int, int) | None: (esperas, milisegundos) acumulados por la sesión
+    """
+    if connection.vendor != 'microsoft':
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT ISNULL(SUM(waiting_tasks_count), 0), ISNULL(SUM(wait_time_ms), 0)
+                FROM sys.dm_exec_session_wait_stats
+                WHERE session_id = @@SPID AND wait_type LIKE 'LCK[_]M[_]%'
+            """)
+            esperas, ms = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(esperas), int(ms)
@@ -0,0 +1,172 @@
+# usuarios/rendimiento/clientes.py
+"""
+Ejecutores de peticiones para las pruebas de carga
+
+- ClienteProceso: django.test.Client en el mismo proceso, un cliente por
+  hilo. Mide consultas SQL (CaptureQueriesContext) y CPU del hilo
+  (time.thread_time) de cada petición.
+- ClienteHTTP: peticiones reales contra un servidor levantado
+  (runserver/gunicorn/uvicorn) con httpx + asyncio. Consultas SQL y CPU
+  salen de la cabecera Server-Timing de MetricasMiddleware, si está.
+
+Ambos reciben las peticiones como tuplas (metodo, ruta, datos, token).
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+ResultadoPeticion = namedtuple('ResultadoPeticion', 'status cuerpo latencia consultas cpu')
+
+_CONSULTAS_SERVER_TIMING = re.compile(r'\bdb;dur=[\d.]+;desc="(\d+)')
+_CPU_SERVER_TIMING = re.compile(r'\bcpu;dur=([\d.]+)')
+
+
+def leer_server_timing(cabecera):
+    """(consultas, cpu en segundos) de la cabecera Server-Timing, o None si faltan"""
+    consultas = _CONSULTAS_SERVER_TIMING.search(cabecera or '')
+    cpu = _CPU_SERVER_TIMING.search(cabecera or '')
+    return (
+        int(consultas.group(1)) if consultas else None,
+        float(cpu.group(1)) / 1000 if cpu else None,
+    )
+
+
+def _host_permitido():
+    """Host que acepta ALLOWED_HOSTS ('localhost' cuando está vacío y DEBUG)"""
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def _repartir(peticiones, concurrencia):
+    """Repartir round-robin entre `concurrencia` trabajadores"""
+    return [peticiones[i::concurrencia] for i in range(concurrencia) if peticiones[i::concurrencia]]
+
+
+class ClienteProceso:
+    """Peticiones en proceso, sin red ni servidor"""
+
+    modo = 'proceso'
+
+    def __init__(self):
+        self._local = threading.local()
+        self._host = _host_permitido()
+
+    def _cliente(self):
+        if not hasattr(self._local, 'cliente'):
+            self._local.cliente = Client(raise_request_exception=False)
+        return self._local.cliente
+
+    def peticion(self, metodo, ruta, datos=None, token=None):
+        extra = {'HTTP_HOST': self._host}
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+        cliente = self._cliente()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+            if metodo == 'GET':
+                respuesta = cliente.get(ruta, datos, **extra)
+            else:
+                respuesta = cliente.generic(
+                    metodo, ruta, json.dumps(datos or {}),
+                    content_type='application/json', **extra
+                )
+            cpu = time.thread_time() - inicio_cpu
+            latencia = time.perf_counter() - inicio
+
+        try:
+            cuerpo = json.loads(respuesta.content) if respuesta.content else None
+        except ValueError:
+            cuerpo = None
+        return ResultadoPeticion(respuesta.status_code, cuerpo, latencia, len(consultas), cpu)
+
+    def ejecutar(self, peticiones, concurrencia, medicion, estado_ok=None):
+        """Ejecutar todas las peticiones con `concurrencia` hilos y registrar en medicion"""
+        estado_ok = estado_ok or (lambda status: status < 400)
+
+        def trabajar(bloque):
+            try:
+                for peticion in bloque:
+                    r = self.peticion(*peticion)
+                    medicion.registrar(r.latencia, estado_ok(r.status), r.consultas, r.cpu)
+            finally:
+                connection.close()
+
+        medicion.iniciar()
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            list(pool.map(trabajar, _repartir(peticiones, concurrencia)))
+        medicion.finalizar()
+
+
+class ClienteHTTP:
+    """Peticiones HTTP contra un servidor externo"""
+
+    modo = 'http'
+
+    def __init__(self, url_base, timeout=30):
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+
+    @staticmethod
+    def _cabeceras(token):
+        return {'Authorization': f'Bearer {token}'} if token else {}
+
+    @staticmethod
+    def _cuerpo(respuesta):
+        try:
+            return respuesta.json()
+        except ValueError:
+            return None
+
+    def peticion(self, metodo, ruta, datos=None, token=None):
+        inicio = time.perf_counter()
+        if metodo == 'GET':
+            respuesta = httpx.get(self.url_base + ruta, params=datos, headers=self._cabeceras(token), timeout=self.timeout)
+        else:
+            respuesta = httpx.request(
+                metodo, self.url_base + ruta, json=datos or {},
+                headers=self._cabeceras(token), timeout=self.timeout
+            )
+        latencia = time.perf_counter() - inicio
+        consultas, cpu = leer_server_timing(respuesta.headers.get('Server-Timing'))
+        return ResultadoPeticion(respuesta.status_code, self._cuerpo(respuesta), latencia, consultas, cpu)
+
+    def ejecutar(self, peticiones, concurrencia, medicion, estado_ok=None):
+        estado_ok = estado_ok or (lambda status: status < 400)
+        medicion.iniciar()
+        asyncio.run(self._ejecutar_async(peticiones, concurrencia, medicion, estado_ok))
+        medicion.finalizar()
+
+    async def _ejecutar_async(self, peticiones, concurrencia, medicion, estado_ok):
+        limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+        async with httpx.AsyncClient(base_url=self.url_base, limits=limites, timeout=self.timeout) as cliente:
+
+            async def trabajar(bloque):
+                for metodo, ruta, datos, token in bloque:
+                    inicio = time.perf_counter()
+                    try:
+                        if metodo == 'GET':
+                            respuesta = await cliente.get(ruta, params=datos, headers=self._cabeceras(token))
+                        else:
+                            respuesta = await cliente.request(
+                                metodo, ruta, json=datos or {}, headers=self._cabeceras(token)
+                            )
+                        ok = estado_ok(respuesta.status_code)
+                        consultas, cpu = leer_server_timing(respuesta.headers.get('Server-Timing'))
+                    except httpx.HTTPError:
+                        ok, consultas, cpu = False, None, None
+                    medicion.registrar(time.perf_counter() - inicio, ok, consultas, cpu)
+
+            await asyncio.gather(*(trabajar(bloque) for bloque in _repartir(peticiones, concurrencia)))
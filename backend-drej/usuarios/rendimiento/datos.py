@@ -0,0 +1,416 @@
+# usuarios/rendimiento/datos.py
+"""
+Datos sintéticos para benchmarks y pruebas de carga
+
+Todos los usuarios de prueba tienen email en DOMINIO_PRUEBA, así que se
+pueden borrar sin tocar datos reales:
+- DNIs 9xxxxxxx: estudiantes sembrados (sembrar_estudiantes)
+- DNIs 8xxxxxxx: estudiantes creados por el escenario de registro
+- DNIs 7xxxxxxx: orientadores sembrados (sembrar_orientador)
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..catalogos import (
+    ROL_ADMIN, ROL_ESTUDIANTE, ROL_ORIENTADOR, ESTADO_VERIF_APROBADO, ESTADO_VERIF_PENDIENTE,
+    NIVEL_RIESGO_ALTO, NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO, limpiar_catalogos,
+)
+from ..models import (
+    Cuestionario, Estudiante, EstadoIntento, EstadoVerificacion, InstitucionEducativa,
+    Intento, NivelRiesgo, Opcion, Orientador, Pregunta, Recomendacion, Respuesta, Rol
+)
+from ..filtros import olvidar_recomendaciones
+from ..motor_ia_groq import MAPEO_PREGUNTAS_CATEGORIAS
+
+logger = logging.getLogger(__name__)
+
+DOMINIO_PRUEBA = 'carga.vocared.test'
+DNI_BASE_SEMILLA = 90000000
+DNI_BASE_REGISTRO = 80000000
+DNI_BASE_ORIENTADOR = 70000000
+PASSWORD_PRUEBA = 'CargaVocared2025'
+NOMBRE_INSTITUCION_PRUEBA = 'I.E. Prueba de Carga'
+NOMBRE_CUESTIONARIO_PRUEBA = 'Cuestionario de Carga'
+PREFIJO_CUESTIONARIO_VOLUMEN = 'Cuestionario de Volumen'
+
+LOTE = 150  # filas por bulk_create (límite de 2100 parámetros de SQL Server)
+
+
+def _en_lotes(valores, tamano=1000):
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+
+def email_prueba(dni):
+    return f'estudiante{dni}@{DOMINIO_PRUEBA}'
+
+
+def crear_tablas_no_gestionadas():
+    """
+    Crear en la BD actual las tablas managed=False que falten.
+    Solo para SQLite/PostgreSQL locales: en SQL Server las tablas ya existen.
+
+    Returns:
+        list[str]: nombres de las tablas creadas
+    """
+    if connection.vendor == 'microsoft':
+        raise ValueError('En SQL Server las tablas se crean con los scripts del proyecto')
+
+    existentes = set(connection.introspection.table_names())
+    creadas = []
+    with connection.schema_editor() as schema_editor:
+        for modelo in apps.get_app_config('usuarios').get_models():
+            tabla = modelo._meta.db_table
+            if not modelo._meta.managed and tabla not in existentes:
+                schema_editor.create_model(modelo)
+                creadas.append(tabla)
+    return creadas
+
+
+def sembrar_catalogos():
+    """
+    Asegurar roles, estados de verificación e institución de prueba
+
+    Returns:
+        int: InstiID de la institución de prueba
+    """
+    for rol_id, nombre in ((ROL_ADMIN, 'Admin'), (ROL_ESTUDIANTE, 'Estudiante'), (ROL_ORIENTADOR, 'Orientador')):
+        Rol.objects.get_or_create(RolID=rol_id, defaults={'RolNombre': nombre})
+
+    for estado_id, descripcion in ((ESTADO_VERIF_PENDIENTE, 'Pendiente'), (ESTADO_VERIF_APROBADO, 'Aprobado')):
+        if not EstadoVerificacion.objects.filter(EstadoVerifID=estado_id).exists():
+            EstadoVerificacion.objects.create(EstadoVerifID=estado_id, EstadoDescripcion=descripcion)
+
+    for nivel_id, descripcion in ((NIVEL_RIESGO_BAJO, 'Bajo'), (NIVEL_RIESGO_MEDIO, 'Medio'),
+                                  (NIVEL_RIESGO_ALTO, 'Alto')):
+        if not NivelRiesgo.objects.filter(NivelRiesgoID=nivel_id).exists():
+            NivelRiesgo.objects.create(NivelRiesgoID=nivel_id, NivelRiesgoDescripcion=descripcion)
+
+    # Las vistas asumen 1 = En Progreso y 2 = Completado
+    for estado_id, descripcion in ((1, 'En Progreso'), (2, 'Completado')):
+        if not EstadoIntento.objects.filter(EstadoID=estado_id).exists():
+            EstadoIntento.objects.create(EstadoID=estado_id, EstadoDescripcion=descripcion)
+
+    limpiar_catalogos()
+
+    institucion, _ = InstitucionEducativa.objects.get_or_create(
+        InstiNombre=NOMBRE_INSTITUCION_PRUEBA,
+        defaults={
+            'InstiDireccion': 'Av. Benchmark 123',
+            'InstiDistrito': 'Lima',
+            'InstiProvincia': 'Lima',
+            'InstiRegion': 'Lima',
+        }
+    )
+    return institucion.InstiID
+
+
+def sembrar_estudiantes(cantidad, insti_id):
+    """
+    Asegurar `cantidad` estudiantes sintéticos (DNI DNI_BASE_SEMILLA + i)
+    con contraseña PASSWORD_PRUEBA. Es idempotente.
+
+    Returns:
+        list[str]: DNIs de los estudiantes, existentes o recién creados
+    """
+    dnis = [str(DNI_BASE_SEMILLA + i) for i in range(cantidad)]
+
+    existentes = set()
+    for lote in _en_lotes(dnis):
+        existentes.update(User.objects.filter(username__in=lote).values_list('username', flat=True))
+    nuevos = [dni for dni in dnis if dni not in existentes]
+    if not nuevos:
+        return dnis
+
+    # Un solo hash para todos: el coste de sembrar no depende del hasher
+    password_hash = make_password(PASSWORD_PRUEBA)
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(
+                username=dni,
+                email=email_prueba(dni),
+                password=password_hash,
+                first_name='Carga',
+                last_name=f'Prueba {dni}',
+            )
+            for dni in nuevos
+        ], batch_size=LOTE)
+
+        ids = {}
+        for lote in _en_lotes(nuevos):
+            ids.update(User.objects.filter(username__in=lote).values_list('username', 'id'))
+
+        Estudiante.objects.bulk_create([
+            Estudiante(
+                EstudDNI=dni,
+                EstudNombres='Carga',
+                EstudApellidoPaterno='Prueba',
+                EstudApellidoMaterno=dni,
+                EstudFechaNac='2008-01-01',
+                EstudTelefono='900000000',
+                User_id=ids[dni],
+                Insti_id=insti_id,
+                Rol_id=ROL_ESTUDIANTE,
+            )
+            for dni in nuevos
+        ], batch_size=LOTE)
+
+    logger.info("[RENDIMIENTO] %s estudiantes de prueba creados", len(nuevos))
+    return dnis
+
+
+def sembrar_cuestionario():
+    """
+    Asegurar un cuestionario activo de 20 preguntas x 5 opciones (valores
+    1..5), con las categorías que usa el motor de recomendaciones
+
+    Returns:
+        (int, dict): CuestID y {PregID: [OpcionID, ...]} en orden de pregunta
+    """
+    cuestionario, _ = Cuestionario.objects.get_or_create(
+        CuestNombre=NOMBRE_CUESTIONARIO_PRUEBA,
+        defaults={'CuestVersion': 'carga', 'CuestActivo': True},
+    )
+
+    if not Pregunta.objects.filter(Cuest=cuestionario).exists():
+        with transaction.atomic():
+            for orden, categoria in sorted(MAPEO_PREGUNTAS_CATEGORIAS.items()):
+                pregunta = Pregunta.objects.create(
+                    Cuest=cuestionario,
+                    PregTexto=f'Pregunta de carga {orden}',
+                    PregOrden=orden,
+                    PregCategoria=categoria,
+                )
+                Opcion.objects.bulk_create([
+                    Opcion(Preg=pregunta, OpcionTexto=f'Opción {valor}', OpcionValor=valor, OpcionOrden=valor)
+                    for valor in range(1, 6)
+                ])
+
+    opciones = {}
+    for preg_id, opcion_id in (
+        Opcion.objects
+        .filter(Preg__Cuest=cuestionario, Preg__PregActiva=True)
+        .order_by('Preg__PregOrden', 'OpcionOrden')
+        .values_list('Preg_id', 'OpcionID')
+    ):
+        opciones.setdefault(preg_id, []).append(opcion_id)
+
+    return cuestionario.CuestID, opciones
+
+
+def sembrar_orientador(insti_id):
+    """
+    Asegurar un orientador sintético (verificado) en la institución de prueba
+
+    Returns:
+        str: DNI del orientador (contraseña PASSWORD_PRUEBA)
+    """
+    dni = str(DNI_BASE_ORIENTADOR)
+    user, creado = User.objects.get_or_create(
+        username=dni,
+        defaults={
+            'email': f'orientador{dni}@{DOMINIO_PRUEBA}',
+            'password': make_password(PASSWORD_PRUEBA),
+            'first_name': 'Orientador',
+            'last_name': 'Prueba',
+        }
+    )
+    if creado or not Orientador.objects.filter(User=user).exists():
+        Orientador.objects.create(
+            OrienDNI=dni,
+            OrienNombres='Orientador',
+            OrienApellidoPaterno='Prueba',
+            OrienApellidoMaterno='Carga',
+            OrienFechaNacimiento='1985-01-01',
+            OrienInstitucion=NOMBRE_INSTITUCION_PRUEBA,
+            OrienCargo='Psicólogo',
+            OrienAreaEspecializacion='Orientación vocacional',
+            OrienEmailInstitucional=user.email,
+            OrienTelefono='900000000',
+            FechaRegistro=timezone.now(),
+            EstadoVerif_id=ESTADO_VERIF_APROBADO,
+            User=user,
+            Insti_id=insti_id,
+            Rol_id=ROL_ORIENTADOR,
+        )
+    return dni
+
+
+def sembrar_volumen(dnis, cuestionarios=5, preguntas=300, intentos_por_estudiante=3,
+                    respuestas_por_intento=20, semilla=1):
+    """
+    Sembrar un volumen realista para medir consultas por ruta: `cuestionarios`
+    cuestionarios que suman `preguntas` preguntas (5 opciones cada una) y,
+    por cada estudiante de `dnis`, `intentos_por_estudiante` intentos
+    completados con sus respuestas y 5 recomendaciones.
+
+    No es idempotente: pensado para correr dentro de una transacción que
+    se revierte (ver verificar_presupuesto_consultas).
+
+    Returns:
+        list[int]: CuestID de los cuestionarios creados
+    """
+    rng = random.Random(semilla)
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        Cuestionario.objects.bulk_create([
+            Cuestionario(CuestNombre=f'{PREFIJO_CUESTIONARIO_VOLUMEN} {i + 1}', CuestVersion='volumen')
+            for i in range(cuestionarios)
+        ], batch_size=LOTE)
+        cuest_ids = list(
+            Cuestionario.objects
+            .filter(CuestNombre__startswith=PREFIJO_CUESTIONARIO_VOLUMEN, CuestVersion='volumen')
+            .order_by('-CuestID')
+            .values_list('CuestID', flat=True)[:cuestionarios]
+        )
+
+        categorias = sorted(set(MAPEO_PREGUNTAS_CATEGORIAS.values()))
+        Pregunta.objects.bulk_create([
+            Pregunta(
+                Cuest_id=cuest_ids[i % len(cuest_ids)],
+                PregTexto=f'Pregunta de volumen {i + 1}',
+                PregOrden=i // len(cuest_ids) + 1,
+                PregCategoria=categorias[i % len(categorias)],
+            )
+            for i in range(preguntas)
+        ], batch_size=LOTE)
+
+        preg_ids = []
+        for lote in _en_lotes(cuest_ids):
+            preg_ids.extend(Pregunta.objects.filter(Cuest_id__in=lote).values_list('PregID', flat=True))
+        Opcion.objects.bulk_create([
+            Opcion(Preg_id=preg_id, OpcionTexto=f'Opción {valor}', OpcionValor=valor, OpcionOrden=valor)
+            for preg_id in preg_ids
+            for valor in range(1, 6)
+        ], batch_size=LOTE)
+
+        estud_ids = []
+        for lote in _en_lotes(list(dnis)):
+            estud_ids.extend(Estudiante.objects.filter(EstudDNI__in=lote).values_list('EstudID', flat=True))
+
+        Intento.objects.bulk_create([
+            Intento(
+                Estud_id=estud_id,
+                Cuest_id=cuest_ids[k % len(cuest_ids)],
+                Estado_id=2,
+                Confirmado=True,
+                Creado=ahora - timedelta(days=k, minutes=i),
+                UltimoAutosave=ahora - timedelta(days=k, minutes=i),
+            )
+            for i, estud_id in enumerate(estud_ids)
+            for k in range(intentos_por_estudiante)
+        ], batch_size=LOTE)
+
+        intento_ids = []
+        for lote in _en_lotes(estud_ids):
+            intento_ids.extend(
+                Intento.objects.filter(Estud_id__in=lote, Cuest_id__in=cuest_ids).values_list('IntentID', flat=True)
+            )
+
+        for lote in _en_lotes(intento_ids, 100):
+            Respuesta.objects.bulk_create([
+                Respuesta(Intent_id=intento_id, RespValor=str(rng.randint(1, 5)), RespFechaHora=ahora)
+                for intento_id in lote
+                for _ in range(respuestas_por_intento)
+            ], batch_size=LOTE)
+            Recomendacion.objects.bulk_create([
+                Recomendacion(
+                    Intent_id=intento_id,
+                    Carrera=f'Carrera {n}',
+                    Descripcion='Recomendación de volumen',
+                    Score=round(rng.uniform(40, 95), 1),
+                    Nivel='Alto',
+                    FechaHora=ahora,
+                )
+                for intento_id in lote
+                for n in range(1, 6)
+            ], batch_size=LOTE)
+
+    logger.info(
+        "[RENDIMIENTO] Volumen sembrado: %s cuestionarios, %s preguntas, %s intentos",
+        len(cuest_ids), len(preg_ids), len(intento_ids)
+    )
+    return cuest_ids
+
+
+def limpiar_intentos_prueba(dnis=None):
+    """
+    Borrar intentos, respuestas y recomendaciones de los estudiantes
+    sintéticos (o solo de `dnis`)
+
+    Returns:
+        int: intentos borrados
+    """
+    estudiantes = Estudiante.objects.filter(User__email__endswith=f'@{DOMINIO_PRUEBA}')
+    if dnis is not None:
+        estudiantes = estudiantes.filter(EstudDNI__in=list(dnis))
+
+    intentos = list(Intento.objects.filter(Estud__in=estudiantes).values_list('IntentID', flat=True))
+    with transaction.atomic():
+        for lote in _en_lotes(intentos):
+            with connection.cursor() as cursor:
+                olvidar_recomendaciones(cursor, f"IntentID IN ({', '.join(['%s'] * len(lote))})", lote)
+            Recomendacion.objects.filter(Intent_id__in=lote).delete()
+            Respuesta.objects.filter(Intent_id__in=lote).delete()
+            Intento.objects.filter(IntentID__in=lote).delete()
+    return len(intentos)
+
+
+def siguiente_dni_registro():
+    """Primer DNI libre del rango del escenario de registro"""
+    ultimo = (
+        User.objects
+        .filter(username__startswith='8', email__endswith=f'@{DOMINIO_PRUEBA}')
+        .order_by('-username')
+        .values_list('username', flat=True)
+        .first()
+    )
+    return int(ultimo) + 1 if ultimo else DNI_BASE_REGISTRO
+
+
+def datos_registro(dni, insti_id):
+    """Cuerpo de /api/auth/register/ para un estudiante sintético"""
+    return {
+        'rol': 'Estudiante',
+        'dni': str(dni),
+        'email': email_prueba(dni),
+        'password': PASSWORD_PRUEBA,
+        'passwordConfirm': PASSWORD_PRUEBA,
+        'nombres': 'Registro',
+        'apellidoPaterno': 'Prueba',
+        'apellidoMaterno': 'Carga',
+        'telefono': '900000000',
+        'fechaNacimiento': '2008-01-01',
+        'insti_id': insti_id,
+    }
+
+
+def limpiar_datos_prueba(solo_registro=False):
+    """
+    Borrar los usuarios sintéticos (con sus perfiles de estudiante u orientador e intentos)
+
+    Returns:
+        int: usuarios borrados
+    """
+    usuarios = User.objects.filter(email__endswith=f'@{DOMINIO_PRUEBA}')
+    if solo_registro:
+        usuarios = usuarios.filter(username__startswith='8')
+
+    ids = list(usuarios.values_list('id', flat=True))
+    if not solo_registro:
+        limpiar_intentos_prueba()
+    with transaction.atomic():
+        for lote in _en_lotes(ids):
+            Estudiante.objects.filter(User_id__in=lote).delete()
+            Orientador.objects.filter(User_id__in=lote).delete()
+            User.objects.filter(id__in=lote).delete()
+    return len(ids)
@@ -0,0 +1,111 @@
+# usuarios/rendimiento/estadisticas.py
+"""
+Agregación de mediciones por escenario: latencia (p50/p95/p99), peticiones
+por segundo, consultas SQL, tiempo de CPU por petición y, si se miden,
+esperas por bloqueos de la BD.
+"""
+import math
+import threading
+import time
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)"""
+    if not valores:
+        return 0.0
+    rango = max(1, math.ceil(p / 100 * len(valores)))
+    return valores[rango - 1]
+
+
+def _media(valores):
+    return sum(valores) / len(valores) if valores else None
+
+
+class Medicion:
+    """Acumula las peticiones de un escenario (seguro entre hilos)"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.latencias = []
+        self.consultas = []
+        self.cpu = []
+        self.errores = 0
+        self.esperas_bloqueo = None
+        self.bloqueo_ms = None
+        self._lock = threading.Lock()
+        self._inicio = None
+        self._fin = None
+        self._ultimo = None
+
+    def iniciar(self):
+        if self._inicio is None:
+            self._inicio = time.perf_counter()
+
+    def finalizar(self):
+        self._fin = time.perf_counter()
+
+    def registrar(self, latencia, ok=True, consultas=None, cpu=None):
+        """latencia y cpu en segundos; consultas/cpu None si no se pueden medir"""
+        with self._lock:
+            self._ultimo = time.perf_counter()
+            self.latencias.append(latencia)
+            if consultas is not None:
+                self.consultas.append(consultas)
+            if cpu is not None:
+                self.cpu.append(cpu)
+            if not ok:
+                self.errores += 1
+
+    def registrar_bloqueos(self, esperas, ms):
+        """Sumar esperas por bloqueo (LCK_M_*) observadas durante el escenario"""
+        with self._lock:
+            self.esperas_bloqueo = (self.esperas_bloqueo or 0) + esperas
+            self.bloqueo_ms = (self.bloqueo_ms or 0) + ms
+
+    def resumen(self):
+        latencias = sorted(self.latencias)
+        # Sin finalizar() explícito, la duración llega hasta la última petición
+        fin = self._fin or self._ultimo or time.perf_counter()
+        duracion = fin - (self._inicio or fin)
+        consultas = _media(self.consultas)
+        cpu = _media(self.cpu)
+        return {
+            'escenario': self.nombre,
+            'peticiones': len(latencias),
+            'errores': self.errores,
+            'rps': len(latencias) / duracion if duracion > 0 else 0.0,
+            'p50_ms': percentil(latencias, 50) * 1000,
+            'p95_ms': percentil(latencias, 95) * 1000,
+            'p99_ms': percentil(latencias, 99) * 1000,
+            'consultas_por_peticion': consultas,
+            'cpu_ms_por_peticion': cpu * 1000 if cpu is not None else None,
+            'esperas_bloqueo': self.esperas_bloqueo,
+            'bloqueo_ms': self.bloqueo_ms,
+        }
+
+
+def _celda(valor, formato='.1f'):
+    return 'n/d' if valor is None else format(valor, formato)
+
+
+def formatear_tabla(resumenes):
+    """Líneas de texto con una fila por escenario"""
+    con_bloqueos = any(r.get('esperas_bloqueo') is not None for r in resumenes)
+    cabecera = (
+        f"{'escenario':<14}{'n':>7}{'err':>6}{'req/s':>9}{'p50 ms':>9}"
+        f"{'p95 ms':>9}{'p99 ms':>9}{'SQL/req':>9}{'CPU ms':>9}"
+    )
+    if con_bloqueos:
+        cabecera += f"{'LCK':>7}{'LCK ms':>9}"
+
+    lineas = [cabecera]
+    for r in resumenes:
+        linea = (
+            f"{r['escenario']:<14}{r['peticiones']:>7}{r['errores']:>6}{r['rps']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            f"{_celda(r['consultas_por_peticion']):>9}{_celda(r['cpu_ms_por_peticion']):>9}"
+        )
+        if con_bloqueos:
+            linea += f"{_celda(r.get('esperas_bloqueo'), 'd'):>7}{_celda(r.get('bloqueo_ms'), 'd'):>9}"
+        lineas.append(linea)
+    return lineas
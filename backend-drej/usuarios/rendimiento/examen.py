@@ -0,0 +1,159 @@
+# usuarios/rendimiento/examen.py
+"""
+Simulación de una jornada de examen: N estudiantes concurrentes recorren
+
+    login -> cuestionario -> iniciar -> autosave x K -> confirmar -> resultados x P
+
+Cada etapa arranca a la vez para todos (threading.Barrier), como un aula
+que sigue las indicaciones del profesor. La etapa 'resultados' no tiene
+barrera: cada estudiante empieza a consultar en cuanto confirma, así que
+los sondeos conviven con las confirmaciones (y las llamadas a Groq) de los
+demás.
+
+Por etapa se mide latencia, consultas SQL, CPU y esperas por bloqueo de la
+sesión de BD de cada estudiante (usuarios/rendimiento/bloqueos.py).
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .bloqueos import esperas_bloqueo_sesion
+from .clientes import ClienteProceso
+from .datos import PASSWORD_PRUEBA
+from .estadisticas import Medicion
+
+logger = logging.getLogger(__name__)
+
+ETAPAS = ('login', 'cuestionario', 'iniciar', 'autosave', 'confirmar', 'resultados')
+
+TIMEOUT_BARRERA = 600  # segundos
+
+
+class EtapaFallida(Exception):
+    """Una petición imprescindible para seguir el flujo falló"""
+
+
+class SimulacionExamen:
+
+    def __init__(self, dnis, cuestionario_id, opciones, autosaves=3, sondeos=5,
+                 intervalo_sondeo=1.0, semilla=1):
+        """
+        Args:
+            dnis: DNIs de estudiantes sintéticos (contraseña PASSWORD_PRUEBA)
+            cuestionario_id: cuestionario activo a rendir
+            opciones: {PregID: [OpcionID, ...]} del cuestionario
+        """
+        self.dnis = list(dnis)
+        self.cuestionario_id = cuestionario_id
+        self.opciones = opciones
+        self.autosaves = autosaves
+        self.sondeos = sondeos
+        self.intervalo_sondeo = intervalo_sondeo
+        self.semilla = semilla
+
+        self.cliente = ClienteProceso()
+        self.mediciones = {etapa: Medicion(etapa) for etapa in ETAPAS}
+        self.fallos = []
+        self.completados = 0
+        self.duracion = None
+
+        # Orden de las barreras: la acción de cada una abre la(s) etapa(s) siguiente(s)
+        self._aperturas = (
+            [('login',), ('cuestionario',), ('iniciar',)]
+            + [('autosave',)] * autosaves
+            + [('confirmar', 'resultados')]
+        )
+        self._siguiente_apertura = 0
+        self._barrera = threading.Barrier(len(self.dnis), action=self._abrir_etapa)
+        self._lock = threading.Lock()
+
+    def _abrir_etapa(self):
+        for etapa in self._aperturas[self._siguiente_apertura]:
+            self.mediciones[etapa].iniciar()
+        self._siguiente_apertura += 1
+
+    def _esperar_aula(self):
+        self._barrera.wait(timeout=TIMEOUT_BARRERA)
+
+    def _medir(self, etapa, metodo, ruta, datos=None, token=None, obligatoria=False):
+        antes = esperas_bloqueo_sesion()
+        r = self.cliente.peticion(metodo, ruta, datos, token)
+        despues = esperas_bloqueo_sesion()
+
+        medicion = self.mediciones[etapa]
+        medicion.registrar(r.latencia, r.status < 400, r.consultas, r.cpu)
+        if antes is not None and despues is not None:
+            medicion.registrar_bloqueos(despues[0] - antes[0], despues[1] - antes[1])
+
+        if obligatoria and (r.status >= 400 or not r.cuerpo):
+            raise EtapaFallida(f"{etapa}: HTTP {r.status} {r.cuerpo}")
+        return r
+
+    def _estudiante(self, indice, dni):
+        rng = random.Random(self.semilla + indice)
+        respuestas = [
+            {'pregunta_id': preg_id, 'opcion_id': rng.choice(opciones)}
+            for preg_id, opciones in self.opciones.items()
+        ]
+
+        self._esperar_aula()
+        r = self._medir('login', 'POST', '/api/auth/token/',
+                        {'username': dni, 'password': PASSWORD_PRUEBA}, obligatoria=True)
+        token = r.cuerpo['access']
+
+        self._esperar_aula()
+        self._medir('cuestionario', 'GET', f'/api/estudiante/cuestionarios/{self.cuestionario_id}/', token=token)
+
+        self._esperar_aula()
+        r = self._medir('iniciar', 'POST', '/api/estudiante/cuestionarios/iniciar/',
+                        {'cuestionario_id': self.cuestionario_id}, token, obligatoria=True)
+        intento_id = r.cuerpo['intento_id']
+
+        # Autosaves con cada vez más respuestas, como el frontend al avanzar
+        for k in range(1, self.autosaves + 1):
+            self._esperar_aula()
+            parciales = respuestas[:max(1, len(respuestas) * k // (self.autosaves + 1))]
+            self._medir('autosave', 'POST', '/api/estudiante/cuestionarios/guardar/',
+                        {'intento_id': intento_id, 'respuestas': parciales, 'confirmar': False}, token)
+
+        self._esperar_aula()
+        self._medir('confirmar', 'POST', '/api/estudiante/cuestionarios/guardar/',
+                    {'intento_id': intento_id, 'respuestas': respuestas, 'confirmar': True}, token,
+                    obligatoria=True)
+
+        for _ in range(self.sondeos):
+            self._medir('resultados', 'GET', '/api/estudiante/resultados/', token=token)
+            time.sleep(self.intervalo_sondeo)
+
+        with self._lock:
+            self.completados += 1
+
+    def _ejecutar_estudiante(self, args):
+        indice, dni = args
+        try:
+            self._estudiante(indice, dni)
+        except threading.BrokenBarrierError:
+            pass  # otro estudiante falló y rompió la barrera
+        except Exception as e:
+            logger.error("[SIMULACION] Estudiante %s: %s", dni, e)
+            with self._lock:
+                self.fallos.append(f"{dni}: {e}")
+            self._barrera.abort()
+        finally:
+            connection.close()
+
+    def ejecutar(self):
+        """
+        Returns:
+            list[dict]: resumen por etapa (ver Medicion.resumen)
+        """
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self.dnis), thread_name_prefix='estudiante') as pool:
+            list(pool.map(self._ejecutar_estudiante, enumerate(self.dnis)))
+        self.duracion = time.perf_counter() - inicio
+
+        return [m.resumen() for m in self.mediciones.values() if m.latencias]
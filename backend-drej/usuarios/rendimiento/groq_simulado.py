@@ -0,0 +1,58 @@
+# usuarios/rendimiento/groq_simulado.py
+"""
+Cliente Groq simulado para benchmarks: responde tras una latencia fija
+(más jitter opcional) sin salir a la red.
+
+    with groq_simulado(latencia_ms=800):
+        ...  # MotorRecomendacionesGroq usa GroqSimulado
+
+El contador `llamadas` permite reportar cuántas descripciones se pidieron.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from .. import motor_ia_groq
+
+
+class GroqSimulado:
+    """Misma interfaz que groq.Groq para chat.completions.create"""
+
+    latencia = 0.0
+    jitter = 0.0
+    llamadas = 0
+    _lock = threading.Lock()
+
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._crear))
+
+    def _crear(self, **kwargs):
+        with GroqSimulado._lock:
+            GroqSimulado.llamadas += 1
+        time.sleep(max(0.0, self.latencia + random.uniform(-self.jitter, self.jitter)))
+        contenido = 'Descripción simulada para el benchmark de la jornada de examen.'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=contenido))])
+
+
+@contextmanager
+def groq_simulado(latencia_ms, jitter_ms=0):
+    """Sustituir el cliente Groq del motor mientras dure el bloque"""
+    GroqSimulado.latencia = latencia_ms / 1000
+    GroqSimulado.jitter = jitter_ms / 1000
+    GroqSimulado.llamadas = 0
+
+    original = motor_ia_groq.Groq
+    api_key_original = os.environ.get('GROQ_API_KEY')
+    motor_ia_groq.Groq = GroqSimulado
+    # El motor solo crea el cliente si hay GROQ_API_KEY en el entorno
+    os.environ['GROQ_API_KEY'] = api_key_original or 'simulado'
+    try:
+        yield GroqSimulado
+    finally:
+        motor_ia_groq.Groq = original
+        if api_key_original is None:
+            os.environ.pop('GROQ_API_KEY', None)
+
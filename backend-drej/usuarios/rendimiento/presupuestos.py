@@ -0,0 +1,259 @@
+# usuarios/rendimiento/presupuestos.py
+"""
+Presupuestos de consultas SQL y de tiempo por ruta de usuarios/urls.py
+
+Cada ruta declara cuántas consultas puede hacer como máximo (contando la
+del usuario del JWT) y cuántos milisegundos puede tardar (mediana de
+varias repeticiones), medidas contra un volumen realista sembrado con
+datos.sembrar_volumen. Un N+1 que vuelva a aparecer multiplica las
+consultas por el número de filas y rompe el presupuesto.
+
+Toda ruta nueva debe declarar su presupuesto en PRESUPUESTOS o justificar
+en EXCLUIDAS por qué no se mide; si no, la verificación falla.
+
+Lo usa el comando `python manage.py verificar_presupuesto_consultas`.
+"""
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..metricas import sentencias_repetidas
+from .. import filtros
+from ..models import Estudiante, Filtro, Intento, Opcion, Orientador
+from .clientes import _host_permitido
+
+ESTUDIANTE = 'estudiante'
+ORIENTADOR = 'orientador'
+
+PREGUNTAS_CREAR = 20  # preguntas del cuerpo de crear-cuestionario
+
+
+@dataclass
+class Presupuesto:
+    nombre: str  # name= de la ruta en usuarios/urls.py
+    consultas: int
+    ms: float
+    metodo: str = 'GET'
+    rol: str = None  # ESTUDIANTE, ORIENTADOR o None (anónimo)
+    kwargs: object = None  # escenario -> kwargs de reverse()
+    datos: object = None  # escenario -> query string (GET) o cuerpo JSON
+    solo_sqlserver: bool = False  # la vista usa T-SQL (GETDATE, SCOPE_IDENTITY)
+
+
+PRESUPUESTOS = [
+    Presupuesto('check-dni', 1, 100, kwargs=lambda e: {'dni': e.dni_estudiante}),
+    Presupuesto('check-email', 1, 100, kwargs=lambda e: {'email': e.email_estudiante}),
+    Presupuesto('validate-domain', 1, 100, datos=lambda e: {'email': 'docente@colegio.edu.pe'}),
+    Presupuesto('listar_instituciones', 1, 150),
+    Presupuesto('dashboard-estudiante', 6, 150, rol=ESTUDIANTE),
+    Presupuesto('listar-cuestionarios', 4, 150, rol=ESTUDIANTE),
+    Presupuesto('obtener-cuestionario', 1, 100, rol=ESTUDIANTE,
+                kwargs=lambda e: {'cuestionario_id': e.cuestionario_id}),
+    Presupuesto('iniciar-cuestionario', 2, 150, metodo='POST', rol=ESTUDIANTE, solo_sqlserver=True,
+                datos=lambda e: {'cuestionario_id': e.cuestionario_libre_id}),
+    Presupuesto('retomar-cuestionario', 2, 150, metodo='POST', rol=ESTUDIANTE, solo_sqlserver=True,
+                kwargs=lambda e: {'cuestionario_id': e.cuestionario_id}),
+    Presupuesto('guardar-respuestas', 8, 300, metodo='POST', rol=ESTUDIANTE, solo_sqlserver=True,
+                datos=lambda e: {'intento_id': e.intento_en_progreso_id, 'respuestas': e.respuestas,
+                                 'confirmar': False}),
+    Presupuesto('obtener-resultados', 4, 200, rol=ESTUDIANTE),
+    Presupuesto('obtener-resultado-detalle', 5, 150, rol=ESTUDIANTE,
+                kwargs=lambda e: {'intento_id': e.intento_completado_id}),
+    Presupuesto('dashboard-orientador', 8, 400, rol=ORIENTADOR),
+    Presupuesto('listar-cuestionarios-orientador', 6, 400, rol=ORIENTADOR),
+    Presupuesto('crear-cuestionario', PREGUNTAS_CREAR + 5, 500, metodo='POST', rol=ORIENTADOR,
+                datos=lambda e: e.cuerpo_crear),
+    Presupuesto('verificar-puede-retomar', 6, 150, rol=ESTUDIANTE,
+                kwargs=lambda e: {'cuestionario_id': e.cuestionario_id}),
+    Presupuesto('reiniciar-cuestionario', 7, 150, metodo='POST', rol=ESTUDIANTE,
+                kwargs=lambda e: {'cuestionario_id': e.cuestionario_id}),
+    Presupuesto('obtener-resultados-async', 4, 200, rol=ESTUDIANTE),
+    Presupuesto('estado-recomendaciones-async', 3, 150, rol=ESTUDIANTE,
+                kwargs=lambda e: {'intento_id': e.intento_completado_id}),
+    Presupuesto('filtros-orientador', 3, 150, rol=ORIENTADOR),
+    Presupuesto('filtro-orientador', 9, 400, metodo='PUT', rol=ORIENTADOR,
+                kwargs=lambda e: {'filtro_id': e.filtro_id}, datos=lambda e: {'edad': '10+'}),
+    Presupuesto('resultados-filtro', 3, 150, rol=ORIENTADOR, kwargs=lambda e: {'filtro_id': e.filtro_id}),
+    Presupuesto('analitica-cohorte', 6, 400, rol=ORIENTADOR, datos=lambda e: {'nivel': 'region'}),
+]
+
+EXCLUIDAS = {
+    'consultar-reniec': 'Llama a Factiliza: su latencia es externa y no consulta la BD',
+    'consultar-reniec-async': 'Llama a Factiliza: su latencia es externa y no consulta la BD',
+    'actualizar-cuestionario': 'La ruta declara <uuid:> pero CuestID es entero: no resuelve con IDs reales',
+    'eliminar-cuestionario': 'La ruta declara <uuid:> pero CuestID es entero: no resuelve con IDs reales',
+    'importar-estudiantes': 'Respuesta en streaming y hash en pool de procesos; valida por lotes (importacion.py)',
+    'exportar-resultados': 'Respuesta en streaming: consulta al consumir el cuerpo, 3 consultas por lote (exportacion.py)',
+}
+
+
+@dataclass
+class Escenario:
+    """IDs y tokens sobre los que se resuelven las rutas"""
+    dni_estudiante: str
+    email_estudiante: str
+    token_estudiante: str
+    token_orientador: str
+    cuestionario_id: int  # con intentos completados del estudiante
+    cuestionario_libre_id: int  # sin intentos del estudiante
+    intento_completado_id: int
+    intento_en_progreso_id: int
+    filtro_id: int  # filtro guardado del orientador, ya evaluado
+    respuestas: list = field(default_factory=list)
+    cuerpo_crear: dict = field(default_factory=dict)
+
+    @classmethod
+    def preparar(cls, dni_estudiante, dni_orientador, cuest_ids):
+        usuario = User.objects.get(username=dni_estudiante)
+        orientador = User.objects.get(username=dni_orientador)
+
+        # cuest_ids[0] tiene intentos completados (sembrar_volumen reparte
+        # los intentos de cada estudiante desde el primer cuestionario)
+        cuestionario_id = cuest_ids[0]
+        completado = Intento.objects.filter(
+            Estud__User=usuario, Cuest_id=cuestionario_id, Confirmado=True
+        ).values_list('IntentID', flat=True).first()
+
+        en_progreso = Intento.objects.create(
+            Estud=Estudiante.objects.get(User=usuario), Cuest_id=cuestionario_id,
+            Estado_id=1, Confirmado=False, Creado=timezone.now(),
+        )
+
+        filtro = Filtro.objects.create(Orien=Orientador.objects.get(User=orientador), Nombre='Presupuesto')
+        filtros.reconstruir(filtro)
+
+        opciones = {}
+        for preg_id, opcion_id in (
+            Opcion.objects.filter(Preg__Cuest_id=cuestionario_id, OpcionOrden=3)
+            .values_list('Preg_id', 'OpcionID')
+        ):
+            opciones[preg_id] = opcion_id
+
+        return cls(
+            dni_estudiante=dni_estudiante,
+            email_estudiante=usuario.email,
+            token_estudiante=str(RefreshToken.for_user(usuario).access_token),
+            token_orientador=str(RefreshToken.for_user(orientador).access_token),
+            cuestionario_id=cuestionario_id,
+            cuestionario_libre_id=cuest_ids[-1],
+            intento_completado_id=completado,
+            intento_en_progreso_id=en_progreso.IntentID,
+            filtro_id=filtro.FiltroID,
+            respuestas=[{'pregunta_id': p, 'opcion_id': o} for p, o in opciones.items()],
+            cuerpo_crear={
+                'titulo': 'Cuestionario de presupuesto',
+                'preguntas': [
+                    {'texto': f'Pregunta {i}', 'orden': i, 'categoria': 'General'}
+                    for i in range(1, PREGUNTAS_CREAR + 1)
+                ],
+            },
+        )
+
+
+@dataclass
+class ResultadoPresupuesto:
+    presupuesto: Presupuesto
+    ruta: str
+    estado: int = None
+    consultas: int = None
+    ms: float = None
+    limite_ms: float = None
+    omitida: str = ''
+    repetidas: list = field(default_factory=list)
+
+    @property
+    def excede_consultas(self):
+        return self.consultas is not None and self.consultas > self.presupuesto.consultas
+
+    @property
+    def excede_tiempo(self):
+        return self.ms is not None and self.ms > self.limite_ms
+
+    @property
+    def error(self):
+        # Un 4xx también invalida la medición: la vista cortó antes de hacer su trabajo
+        return self.estado is not None and self.estado >= 400
+
+    @property
+    def ok(self):
+        return bool(self.omitida) or not (self.excede_consultas or self.excede_tiempo or self.error)
+
+
+def rutas_sin_presupuesto():
+    """Nombres de rutas de usuarios/urls.py sin presupuesto ni exclusión"""
+    from .. import urls
+
+    declaradas = {p.nombre for p in PRESUPUESTOS} | set(EXCLUIDAS)
+    return sorted(
+        patron.name for patron in urls.urlpatterns
+        if patron.name and patron.name not in declaradas
+    )
+
+
+class VerificadorPresupuestos:
+
+    def __init__(self, escenario, repeticiones=5, factor_tiempo=1.0):
+        self.escenario = escenario
+        self.repeticiones = max(1, repeticiones)
+        self.factor_tiempo = factor_tiempo
+        self.cliente = Client(raise_request_exception=False)
+        self.host = _host_permitido()
+
+    def _peticion(self, presupuesto):
+        e = self.escenario
+        ruta = reverse(presupuesto.nombre, kwargs=presupuesto.kwargs(e) if presupuesto.kwargs else None)
+        datos = presupuesto.datos(e) if presupuesto.datos else None
+
+        extra = {'HTTP_HOST': self.host}
+        token = {ESTUDIANTE: e.token_estudiante, ORIENTADOR: e.token_orientador}.get(presupuesto.rol)
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+        if presupuesto.metodo == 'GET':
+            return ruta, lambda: self.cliente.get(ruta, datos, **extra)
+        return ruta, lambda: self.cliente.generic(
+            presupuesto.metodo, ruta, json.dumps(datos or {}), content_type='application/json', **extra
+        )
+
+    def medir(self, presupuesto):
+        ruta, enviar = self._peticion(presupuesto)
+        resultado = ResultadoPresupuesto(presupuesto, ruta, limite_ms=presupuesto.ms * self.factor_tiempo)
+
+        if presupuesto.solo_sqlserver and connection.vendor != 'microsoft':
+            resultado.omitida = 'usa T-SQL: solo se mide contra SQL Server'
+            return resultado
+
+        # Una petición de calentamiento (cachés de catálogos, JWT, planes de
+        # consulta) y luego las repeticiones. Cada petición corre en un
+        # savepoint que se revierte: las que escriben ven siempre el mismo estado.
+        tiempos = []
+        for i in range(self.repeticiones + 1):
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    respuesta = enviar()
+                    duracion = time.perf_counter() - inicio
+                transaction.set_rollback(True)
+
+            if i == 0:
+                continue
+            tiempos.append(duracion * 1000)
+            resultado.estado = respuesta.status_code
+            resultado.consultas = max(resultado.consultas or 0, len(consultas))
+            if len(consultas) > presupuesto.consultas:
+                resultado.repetidas = sentencias_repetidas(q['sql'] for q in consultas.captured_queries)
+
+        resultado.ms = statistics.median(tiempos)
+        return resultado
+
+    def verificar(self, presupuestos=PRESUPUESTOS):
+        return [self.medir(presupuesto) for presupuesto in presupuestos]
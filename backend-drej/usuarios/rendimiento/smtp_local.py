@@ -0,0 +1,155 @@
+# usuarios/rendimiento/smtp_local.py
+"""
+Servidor SMTP local para probar la bandeja de salida sin salir a la red.
+
+Habla lo justo de SMTP para smtplib/EmailBackend (EHLO/HELO, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT, sin STARTTLS) y guarda los mensajes recibidos en
+memoria. Permite simular lo que hace un proveedor real:
+
+- latencia_ms: espera antes de aceptar cada mensaje
+- rechazar: destinatarios que contienen ese texto reciben 550
+- max_por_conexion: cierra la conexión tras N mensajes (como Gmail)
+
+    with smtp_local(latencia_ms=50) as servidor:
+        # EMAIL_HOST='127.0.0.1', EMAIL_PORT=servidor.puerto, EMAIL_USE_TLS=False
+        ...
+        servidor.mensajes, servidor.conexiones
+
+También como comando: `python manage.py servidor_smtp_local`.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class MensajeRecibido:
+    remitente: str
+    destinatarios: list
+    datos: bytes
+    conexion: int
+
+
+@dataclass
+class ServidorSMTPLocal:
+    host: str = '127.0.0.1'
+    puerto: int = 0  # 0 = puerto libre elegido por el sistema
+    latencia_ms: float = 0
+    rechazar: str = None
+    max_por_conexion: int = None
+    mensajes: list = field(default_factory=list)
+    conexiones: int = 0
+    al_recibir: object = None  # callback(MensajeRecibido) opcional
+
+    async def _atender(self, lector, escritor):
+        self.conexiones += 1
+        conexion = self.conexiones
+        enviados = 0
+        remitente, destinatarios = None, []
+
+        async def responder(linea):
+            escritor.write(f'{linea}\r\n'.encode())
+            await escritor.drain()
+
+        try:
+            await responder('220 smtp-local DREJ listo')
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                comando = linea.decode('utf-8', 'replace').strip()
+                verbo = comando[:4].upper()
+
+                if verbo == 'EHLO':
+                    await responder('250-smtp-local')
+                    await responder('250-8BITMIME')
+                    await responder('250 SMTPUTF8')
+                elif verbo == 'HELO':
+                    await responder('250 smtp-local')
+                elif verbo == 'MAIL':
+                    remitente, destinatarios = comando[10:].strip(' <>'), []
+                    await responder('250 OK')
+                elif verbo == 'RCPT':
+                    destinatario = comando[8:].strip(' <>')
+                    if self.rechazar and self.rechazar in destinatario:
+                        await responder('550 Buzón no disponible')
+                    else:
+                        destinatarios.append(destinatario)
+                        await responder('250 OK')
+                elif verbo == 'DATA':
+                    if not destinatarios:
+                        await responder('503 Sin destinatarios válidos')
+                        continue
+                    await responder('354 Terminar con <CRLF>.<CRLF>')
+                    datos = []
+                    while True:
+                        fila = await lector.readline()
+                        if fila in (b'.\r\n', b'.\n', b''):
+                            break
+                        datos.append(fila[1:] if fila.startswith(b'..') else fila)
+                    if self.latencia_ms:
+                        await asyncio.sleep(self.latencia_ms / 1000)
+
+                    mensaje = MensajeRecibido(remitente, destinatarios, b''.join(datos), conexion)
+                    self.mensajes.append(mensaje)
+                    if self.al_recibir:
+                        self.al_recibir(mensaje)
+                    enviados += 1
+                    await responder('250 OK encolado')
+                    remitente, destinatarios = None, []
+
+                    if self.max_por_conexion and enviados >= self.max_por_conexion:
+                        await responder('421 Demasiados mensajes en esta conexión')
+                        break
+                elif verbo == 'RSET':
+                    remitente, destinatarios = None, []
+                    await responder('250 OK')
+                elif verbo == 'NOOP':
+                    await responder('250 OK')
+                elif verbo == 'QUIT':
+                    await responder('221 Adiós')
+                    break
+                else:
+                    await responder('502 Comando no implementado')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return self._servidor
+
+    async def servir(self):
+        servidor = await self.iniciar()
+        async with servidor:
+            await servidor.serve_forever()
+
+
+@contextmanager
+def smtp_local(**opciones):
+    """Levantar ServidorSMTPLocal en un hilo mientras dure el bloque"""
+    servidor = ServidorSMTPLocal(**opciones)
+    bucle = asyncio.new_event_loop()
+    listo = threading.Event()
+
+    def correr():
+        asyncio.set_event_loop(bucle)
+        bucle.run_until_complete(servidor.iniciar())
+        listo.set()
+        bucle.run_forever()
+
+    hilo = threading.Thread(target=correr, daemon=True)
+    hilo.start()
+    listo.wait(timeout=5)
+    try:
+        yield servidor
+    finally:
+        bucle.call_soon_threadsafe(servidor._servidor.close)
+        bucle.call_soon_threadsafe(bucle.stop)
+        hilo.join(timeout=5)
+        # Dar tiempo a cerrar los sockets antes de reutilizar el puerto
+        time.sleep(0.05)
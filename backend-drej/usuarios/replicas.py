@@ -0,0 +1,116 @@
+# usuarios/replicas.py
+"""
+Lecturas analíticas contra la réplica de solo lectura (alias 'replica')
+
+Los dashboards y listados del orientador y el historial de resultados no
+necesitan el último autosave, pero compiten con él en la primaria durante
+los exámenes. Las vistas marcadas con @lectura_replica leen de la réplica:
+
+- ReplicaRouter (DATABASE_ROUTERS) manda a la réplica las lecturas del ORM
+  hechas dentro de una vista marcada; las escrituras siempre van a 'default'.
+- El SQL crudo de esas vistas debe usar conexion_lectura() en lugar de
+  django.db.connection.
+- Respuestas en streaming: el generador corre cuando la vista ya retornó y
+  el contexto se restableció; resolver alias_lectura() dentro de la vista
+  y leer con .using(alias) (ver exportar_resultados).
+- Lectura de lo propio escrito: FijacionPrimariaMiddleware fija a la
+  primaria durante REPLICA_FIJACION_SEGUNDOS al usuario que acaba de
+  escribir (POST/PUT/PATCH/DELETE con éxito), para que no vea datos
+  anteriores a su propio cambio mientras la réplica se pone al día.
+
+Sin el alias 'replica' en DATABASES (DB_REPLICA_HOST vacío) todo lee de la
+primaria y nada de esto tiene efecto.
+
+Requisito: la fijación vive en la cache, así que debe ser compartida entre
+workers (Redis/Memcached). settings rechaza DB_REPLICA_HOST con
+LocMemCache: la siguiente petición del usuario caería en otro proceso, sin
+fijar, y leería de la réplica lo que aún no llegó.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS_REPLICA = 'replica'
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def _clave_fijacion(user_id):
+    return f'replica:fijado:{user_id}'
+
+
+def fijar_primaria(user_id):
+    """Leer de la primaria durante REPLICA_FIJACION_SEGUNDOS tras una escritura del usuario"""
+    cache.set(_clave_fijacion(user_id), True, getattr(settings, 'REPLICA_FIJACION_SEGUNDOS', 30))
+
+
+def fijado_a_primaria(user_id):
+    return bool(cache.get(_clave_fijacion(user_id)))
+
+
+def liberar_fijacion(user_id):
+    cache.delete(_clave_fijacion(user_id))
+
+
+def alias_lectura():
+    """Alias del que leer en el contexto actual"""
+    return ALIAS_REPLICA if _leer_de_replica.get() else DEFAULT_DB_ALIAS
+
+
+def conexion_lectura():
+    """Conexión para el SQL crudo de solo lectura del contexto actual"""
+    return connections[alias_lectura()]
+
+
+@contextmanager
+def leer_de_replica(user=None):
+    """
+    Enviar a la réplica las lecturas del bloque, salvo que no haya réplica
+    o que el usuario esté fijado a la primaria
+    """
+    usar = replica_configurada() and not (
+        user is not None and user.is_authenticated and fijado_a_primaria(user.pk)
+    )
+    token = _leer_de_replica.set(usar)
+    try:
+        yield usar
+    finally:
+        _leer_de_replica.reset(token)
+
+
+def lectura_replica(vista):
+    """
+    Decorador para vistas DRF de solo lectura; va debajo de @api_view y
+    @permission_classes para recibir la Request ya autenticada
+    """
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        with leer_de_replica(request.user):
+            return vista(request, *args, **kwargs)
+    return envuelta
+
+
+class ReplicaRouter:
+    """Lecturas a la réplica solo dentro de leer_de_replica; el resto a 'default'"""
+
+    def db_for_read(self, model, **hints):
+        return ALIAS_REPLICA if _leer_de_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mismos datos en ambos alias
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        return db != ALIAS_REPLICA
@@ -0,0 +1,228 @@
+# usuarios/riesgo.py
+"""
+Clasificación de riesgo de los estudiantes (tblEstudiante.NivelRiesgoID)
+
+Señala a los estudiantes que el orientador debería revisar, a partir del
+último intento confirmado y del historial de intentos:
+
+- puntajes_bajos: ninguna categoría llega a RIESGO_PUNTAJE_BAJO
+- perfil_plano: entre la categoría más alta y la más baja hay menos de
+  RIESGO_PERFIL_PLANO puntos (sin una preferencia clara)
+- abandono: intentos en progreso (EstadoID 1) sin confirmar y sin
+  actividad en RIESGO_DIAS_ABANDONO días. Un intento reabierto con
+  reiniciar_cuestionario conserva EstadoID 2 y sus fechas: no cuenta.
+- sin_confirmar: abandonó y nunca confirmó un cuestionario
+
+La purga intentos_abandonados borra esos intentos tras
+MANTENIMIENTO_RETENCION_INTENTOS y antes suma cuántos eran en
+tblEstudiante.IntentosAbandonados. Mientras el estudiante no confirme
+ninguno, ese conteo sigue contando como abandonos: quien nunca confirmó no
+pasa a sin clasificar cuando se purgan sus intentos. RIESGO_DIAS_ABANDONO
+debe ser menor que la retención (settings lo comprueba).
+
+puntajes_bajos suma 2 y el resto 1 (dos o más abandonos, 1 más); 3 o
+más es Alto, 1 o 2 Medio y 0 Bajo. sin_confirmar es siempre Alto.
+Un estudiante sin intentos queda sin clasificar (NULL).
+
+Toda una institución se clasifica con tres tipos de consulta (estudiantes
+con sus conteos de intentos, respuestas de los últimos intentos por lotes y
+UPDATE por grupo de resultado) y NumPy sobre la matriz de puntajes, sin
+bucles por estudiante. Solo se escriben los estudiantes que cambian.
+
+- Cada intento confirmado reclasifica a su estudiante (programar_clasificacion).
+- De madrugada, clasificar_riesgo reclasifica todas las instituciones:
+  los abandonos aparecen con el paso del tiempo, sin ninguna escritura.
+
+El nivel queda en tblEstudiante con el índice (InstiID, NivelRiesgoID):
+el dashboard y los filtros guardados filtran por él con un seek.
+"""
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .catalogos import ESTADO_INTENTO_EN_PROGRESO, NIVEL_RIESGO_ALTO, NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO
+from .models import Estudiante, Intento
+from .puntajes import LOTE_INTENTOS, matriz_puntajes
+
+logger = logging.getLogger(__name__)
+
+CLAVE_BLOQUEO = 'riesgo:clasificacion'
+
+# Orden de los bits de la máscara de motivos
+MOTIVOS = ['puntajes_bajos', 'perfil_plano', 'abandono', 'sin_confirmar']
+
+SIN_CLASIFICAR = 0
+
+
+def _parametro(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def clasificar(puntajes, confirmados, abandonados):
+    """
+    Nivel y motivos de cada estudiante, vectorizado
+
+    Args:
+        puntajes: (n, categorías) del último intento confirmado, NaN sin datos
+        confirmados, abandonados: (n,) intentos de cada estudiante
+
+    Returns:
+        (niveles, mascaras): arrays (n,) con el NIVEL_RIESGO_* (0 = sin
+        clasificar) y los motivos como bits en el orden de MOTIVOS
+    """
+    puntajes = np.asarray(puntajes, dtype=float).reshape(len(confirmados), -1)
+    confirmados = np.asarray(confirmados)
+    abandonados = np.asarray(abandonados)
+
+    # Las categorías sin datos (NaN) no cuentan ni para el máximo ni para el mínimo
+    sin_datos = np.isnan(puntajes)
+    con_puntajes = ~sin_datos.all(axis=1)
+    maximo = np.where(sin_datos, -np.inf, puntajes).max(axis=1, initial=-np.inf)
+    minimo = np.where(sin_datos, np.inf, puntajes).min(axis=1, initial=np.inf)
+    maximo, rango = np.where(con_puntajes, maximo, 0.0), np.where(con_puntajes, maximo - minimo, 0.0)
+
+    bajos = con_puntajes & (maximo < _parametro('RIESGO_PUNTAJE_BAJO', 40))
+    planos = con_puntajes & (rango < _parametro('RIESGO_PERFIL_PLANO', 10))
+    abandono = abandonados > 0
+    sin_confirmar = abandono & (confirmados == 0)
+
+    puntos = 2 * bajos + planos + abandono + (abandonados >= 2)
+    niveles = np.select(
+        [sin_confirmar | (puntos >= 3), puntos >= 1, con_puntajes | (confirmados > 0)],
+        [NIVEL_RIESGO_ALTO, NIVEL_RIESGO_MEDIO, NIVEL_RIESGO_BAJO],
+        default=SIN_CLASIFICAR,
+    )
+    mascaras = bajos * 1 | planos * 2 | abandono * 4 | sin_confirmar * 8
+    return niveles, mascaras
+
+
+def motivos_texto(mascara):
+    return ','.join(motivo for bit, motivo in enumerate(MOTIVOS) if mascara & (1 << bit)) or None
+
+
+def _clasificar_estudiantes(condicion, ahora=None):
+    """
+    Clasificar a los estudiantes que cumplen `condicion` (Q sobre Estudiante)
+
+    Returns:
+        dict: {'estudiantes', 'cambios', 'por_nivel'}
+    """
+    ahora = ahora or timezone.now()
+    limite = ahora - timedelta(days=_parametro('RIESGO_DIAS_ABANDONO', 7))
+    # Misma condición que la purga (mantenimiento._INTENTOS_ABANDONADOS)
+    inactivo = Q(intento__Estado_id=ESTADO_INTENTO_EN_PROGRESO, intento__Creado__lt=limite) & (
+        Q(intento__UltimoAutosave__isnull=True) | Q(intento__UltimoAutosave__lt=limite)
+    )
+
+    filas = list(
+        Estudiante.objects.filter(condicion)
+        .annotate(
+            confirmados=Count('intento', filter=Q(intento__Confirmado=True)),
+            abandonados=Count('intento', filter=Q(intento__Confirmado=False) & inactivo),
+            ultimo=Max('intento__IntentID', filter=Q(intento__Confirmado=True)),
+        )
+        .values_list(
+            'EstudID', 'NivelRiesgo_id', 'RiesgoMotivos', 'confirmados', 'abandonados', 'ultimo',
+            'IntentosAbandonados',
+        )
+    )
+    if not filas:
+        return {'estudiantes': 0, 'cambios': 0, 'por_nivel': {}}
+
+    estud_ids, niveles_actuales, motivos_actuales, confirmados, abandonados, ultimos, purgados = zip(*filas)
+    ultimos = np.array([intento_id or 0 for intento_id in ultimos], dtype=np.int64)
+    confirmados = np.array(confirmados)
+    # Los abandonos ya purgados cuentan mientras no haya ningún confirmado
+    abandonados = np.array(abandonados) + np.where(confirmados == 0, np.array(purgados), 0)
+
+    puntajes = np.full((len(filas), 1), np.nan)
+    con_intento = ultimos > 0
+    if con_intento.any():
+        matriz = matriz_puntajes(ultimos[con_intento])
+        puntajes = np.full((len(filas), matriz.shape[1]), np.nan)
+        puntajes[con_intento] = matriz
+
+    niveles, mascaras = clasificar(puntajes, confirmados, abandonados)
+
+    # Agrupar los cambios por resultado: un UPDATE por (nivel, motivos)
+    cambios = {}
+    for estud_id, nivel_actual, motivos_actual, nivel, mascara in zip(
+        estud_ids, niveles_actuales, motivos_actuales, niveles.tolist(), mascaras.tolist()
+    ):
+        nuevo = (nivel or None, motivos_texto(mascara))
+        if (nivel_actual, motivos_actual) != nuevo:
+            cambios.setdefault(nuevo, []).append(estud_id)
+
+    for (nivel, motivos), ids in cambios.items():
+        for inicio in range(0, len(ids), LOTE_INTENTOS):
+            Estudiante.objects.filter(EstudID__in=ids[inicio:inicio + LOTE_INTENTOS]).update(
+                NivelRiesgo_id=nivel, RiesgoMotivos=motivos, RiesgoActualizado=ahora
+            )
+
+    valores, conteos = np.unique(niveles, return_counts=True)
+    return {
+        'estudiantes': len(filas),
+        'cambios': sum(len(ids) for ids in cambios.values()),
+        'por_nivel': dict(zip(valores.tolist(), conteos.tolist())),
+    }
+
+
+def clasificar_institucion(insti_id, ahora=None):
+    return _clasificar_estudiantes(Q(Insti_id=insti_id), ahora)
+
+
+def clasificar_estudiante(estud_id, ahora=None):
+    return _clasificar_estudiantes(Q(EstudID=estud_id), ahora)
+
+
+def clasificar_todas():
+    """
+    Reclasificar a los estudiantes de todas las instituciones
+
+    Returns:
+        dict: InstiID -> resultado o {'error': mensaje}, o {'omitida': motivo}
+    """
+    if not cache.add(CLAVE_BLOQUEO, True, _parametro('RIESGO_BLOQUEO_SEGUNDOS', 3600)):
+        return {'omitida': 'en ejecución en otro worker'}
+
+    resultados = {}
+    try:
+        ahora = timezone.now()
+        instituciones = (
+            Estudiante.objects.filter(Insti__isnull=False)
+            .values_list('Insti_id', flat=True).distinct().order_by('Insti_id')
+        )
+        for insti_id in list(instituciones):
+            try:
+                resultados[insti_id] = clasificar_institucion(insti_id, ahora)
+            except Exception as e:
+                logger.error(f"[RIESGO] Error clasificando la institución {insti_id}: {e}")
+                resultados[insti_id] = {'error': str(e)}
+    finally:
+        cache.delete(CLAVE_BLOQUEO)
+
+    logger.info(
+        f"[RIESGO] {len(resultados)} instituciones, "
+        f"{sum(r.get('cambios', 0) for r in resultados.values())} estudiantes con cambios"
+    )
+    return resultados
+
+
+def programar_clasificacion(intento_id):
+    """Encolar la reclasificación del estudiante de un intento recién confirmado"""
+    from .tasks import clasificar_riesgo_intento
+
+    try:
+        clasificar_riesgo_intento.delay(intento_id)
+    except Exception as e:
+        # La clasificación nocturna lo recoge
+        logger.warning(f"[RIESGO] No se pudo encolar la clasificación del intento {intento_id}: {e}")
+
+
+def estudiante_de_intento(intento_id):
+    return Intento.objects.filter(IntentID=intento_id).values_list('Estud_id', flat=True).first()
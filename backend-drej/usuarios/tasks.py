@@ -2,10 +2,16 @@
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 import logging
 
+from .archivo import archivar_periodos_cerrados
+from .correo import drenado_iniciado, drenar_lote, encolar_email, programar_drenado
+from .filtros import actualizar_filtros
+from .mantenimiento import purgar_datos_vencidos
+from .plantillas_email import renderizar_email
+from .riesgo import clasificar_estudiante, clasificar_todas, estudiante_de_intento
+from .unicidad import reconstruir_filtro
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,90 +32,16 @@ def enviar_email_recuperacion_password(self, user_email, user_name, reset_token)
         # Construir URL de recuperación
         reset_url = f"{settings.FRONTEND_URL}/reset-password/{reset_token}"
         
-        # Contexto para el template
-        context = {
+        # Plantilla compilada una vez por worker (usuarios/plantillas_email.py)
+        asunto, text_message, html_message = renderizar_email('recuperacion_password', {
             'user_name': user_name,
             'reset_url': reset_url,
             'expiration_hours': settings.PASSWORD_RESET_TIMEOUT // 3600,
-        }
-        
-        # Mensaje HTML (opcional - puedes crear un template HTML más bonito)
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Recuperación de Contraseña - VocaRed</title>
-        </head>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <h1 style="color: #2563eb;">VocaRed</h1>
-                </div>
-                
-                <h2 style="color: #333;">Recuperación de Contraseña</h2>
-                
-                <p>Hola <strong>{user_name}</strong>,</p>
-                
-                <p>Hemos recibido una solicitud para restablecer la contraseña de tu cuenta en VocaRed.</p>
-                
-                <p>Para crear una nueva contraseña, haz clic en el siguiente botón:</p>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{reset_url}" 
-                       style="background-color: #2563eb; 
-                              color: white; 
-                              padding: 12px 30px; 
-                              text-decoration: none; 
-                              border-radius: 5px; 
-                              display: inline-block;">
-                        Restablecer Contraseña
-                    </a>
-                </div>
-                
-                <p>O copia y pega este enlace en tu navegador:</p>
-                <p style="word-break: break-all; background-color: #f3f4f6; padding: 10px; border-radius: 3px;">
-                    {reset_url}
-                </p>
-                
-                <p><strong>Este enlace expirará en {context['expiration_hours']} hora(s).</strong></p>
-                
-                <hr style="border: none; border-top: 1px solid #ddd; margin: 30px 0;">
-                
-                <p style="color: #666; font-size: 14px;">
-                    <strong>¿No solicitaste este cambio?</strong><br>
-                    Si no solicitaste restablecer tu contraseña, puedes ignorar este correo de forma segura.
-                </p>
-                
-                <p style="color: #999; font-size: 12px; margin-top: 30px;">
-                    Este es un correo automático, por favor no respondas a este mensaje.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Mensaje de texto plano (fallback)
-        text_message = f"""
-        Hola {user_name},
-
-        Hemos recibido una solicitud para restablecer la contraseña de tu cuenta en VocaRed.
-
-        Para crear una nueva contraseña, copia y pega el siguiente enlace en tu navegador:
-        {reset_url}
-
-        Este enlace expirará en {context['expiration_hours']} hora(s).
-
-        ¿No solicitaste este cambio?
-        Si no solicitaste restablecer tu contraseña, puedes ignorar este correo de forma segura.
-
-        ---
-        VocaRed - Sistema de Orientación Vocacional
-        """
+        })
         
         # Enviar email
-        result = send_mail(
-            subject='Recuperación de Contraseña - VocaRed',
+        send_mail(
+            subject=asunto,
             message=text_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user_email],
@@ -135,65 +67,27 @@ def enviar_email_recuperacion_password(self, user_email, user_name, reset_token)
 @shared_task(name='enviar_confirmacion_cambio_password')
 def enviar_confirmacion_cambio_password(user_email, user_name):
     """
-    Envía email de confirmación después de cambiar la contraseña
+    Encola el email de confirmación después de cambiar la contraseña
     
     Args:
         user_email (str): Email del usuario
         user_name (str): Nombre del usuario
     """
     try:
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Contraseña Actualizada - VocaRed</title>
-        </head>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <h1 style="color: #2563eb;">VocaRed</h1>
-                </div>
-                
-                <h2 style="color: #10b981;">✓ Contraseña Actualizada</h2>
-                
-                <p>Hola <strong>{user_name}</strong>,</p>
-                
-                <p>Tu contraseña ha sido actualizada exitosamente.</p>
-                
-                <p>Si no realizaste este cambio, por favor contacta inmediatamente a nuestro equipo de soporte.</p>
-                
-                <hr style="border: none; border-top: 1px solid #ddd; margin: 30px 0;">
-                
-                <p style="color: #999; font-size: 12px;">
-                    Este es un correo automático, por favor no respondas a este mensaje.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text_message = f"""
-        Hola {user_name},
-
-        Tu contraseña ha sido actualizada exitosamente.
-
-        Si no realizaste este cambio, por favor contacta inmediatamente a nuestro equipo de soporte.
-
-        ---
-        VocaRed - Sistema de Orientación Vocacional
-        """
+        asunto, text_message, html_message = renderizar_email(
+            'confirmacion_cambio_password', {'user_name': user_name}
+        )
         
-        send_mail(
-            subject='Contraseña Actualizada - VocaRed',
-            message=text_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            html_message=html_message,
-            fail_silently=False,
+        # No es urgente: va a la bandeja de salida y sale en el próximo lote
+        # (la recuperación sigue enviándose directo, el estudiante la espera)
+        encolar_email(
+            destinatario=user_email,
+            asunto=asunto,
+            texto=text_message,
+            html=html_message,
         )
         
-        logger.info(f"[CELERY] Email de confirmación enviado a {user_email}")
+        logger.info(f"[CELERY] Email de confirmación encolado para {user_email}")
         
         return {'success': True, 'email': user_email}
     
@@ -207,33 +101,168 @@ def enviar_confirmacion_cambio_password(user_email, user_name):
 @shared_task(name='limpiar_tokens_expirados')
 def limpiar_tokens_expirados():
     """
-    Tarea periódica para limpiar tokens de recuperación expirados
-    Puede ejecutarse con Celery Beat (programador)
+    Elimina los tokens de recuperación creados hace más de 24 horas, por
+    lotes (ver usuarios/mantenimiento.py). Se mantiene por compatibilidad:
+    Celery beat ya lo hace dentro de purgar_datos_vencidos.
     
     Para ejecutar manualmente:
     from usuarios.tasks import limpiar_tokens_expirados
     limpiar_tokens_expirados.delay()
     """
-    from datetime import timedelta
-    from django.utils import timezone
-    from .models import PasswordResetToken
+    resultado = purgar_datos_vencidos(['tokens_expirados'])['tokens_expirados']
     
-    try:
-        # Eliminar tokens creados hace más de 24 horas
-        fecha_limite = timezone.now() - timedelta(hours=24)
-        
-        tokens_eliminados = PasswordResetToken.objects.filter(
-            created_at__lt=fecha_limite
-        ).delete()
-        
-        logger.info(f"[CELERY] Tokens expirados eliminados: {tokens_eliminados[0]}")
-        
-        return {
-            'success': True,
-            'tokens_eliminados': tokens_eliminados[0],
-            'message': f'Se eliminaron {tokens_eliminados[0]} tokens expirados'
-        }
+    if 'error' in resultado or 'omitida' in resultado:
+        return {'success': False, 'error': resultado.get('error') or resultado.get('omitida')}
     
-    except Exception as e:
-        logger.error(f"[CELERY] Error al limpiar tokens: {str(e)}")
-        return {'success': False, 'error': str(e)}
\ No newline at end of file
+    eliminados = resultado['tblPasswordResetToken']
+    return {
+        'success': True,
+        'tokens_eliminados': eliminados,
+        'message': f'Se eliminaron {eliminados} tokens expirados'
+    }
+
+
+@shared_task(name='purgar_datos_vencidos', soft_time_limit=25 * 60)
+def purgar_datos_vencidos_tarea(purgas=None):
+    """
+    Purgas de mantenimiento por lotes: tokens expirados, intentos
+    abandonados y emails ya enviados. Programada en CELERY_BEAT_SCHEDULE,
+    cola 'mantenimiento'.
+    
+    Args:
+        purgas (list): Nombres de usuarios.mantenimiento.PURGAS (todas por defecto)
+    """
+    resultados = purgar_datos_vencidos(purgas)
+    return {
+        'success': not any('error' in r for r in resultados.values()),
+        'purgas': resultados,
+    }
+
+
+@shared_task(name='archivar_periodos_cerrados', soft_time_limit=55 * 60)
+def archivar_periodos_cerrados_tarea():
+    """
+    Mueve por lotes las respuestas y recomendaciones de los periodos
+    académicos cerrados a las tablas de archivo (ver usuarios/archivo.py).
+    Programada en CELERY_BEAT_SCHEDULE, cola 'mantenimiento'.
+    """
+    resultados = archivar_periodos_cerrados()
+    return {
+        'success': not any(isinstance(r, dict) for r in resultados.values()) and 'omitida' not in resultados,
+        'archivo': resultados,
+    }
+
+
+@shared_task(name='actualizar_filtros', bind=True, max_retries=5, soft_time_limit=10 * 60)
+def actualizar_filtros_tarea(self):
+    """
+    Añade a los filtros guardados las recomendaciones nuevas (ver
+    usuarios/filtros.py). Se encola tras guardar recomendaciones, una vez
+    por ventana FILTROS_VENTANA_SEGUNDOS; cola 'scoring'.
+    """
+    resultado = actualizar_filtros()
+    if 'omitida' in resultado:
+        # Otra ejecución ya tomó su tope: lo llegado después quedaría fuera
+        raise self.retry(countdown=getattr(settings, 'FILTROS_VENTANA_SEGUNDOS', 30))
+    return {'success': not resultado['errores'], 'filtros': resultado}
+
+
+@shared_task(name='reconstruir_filtros', soft_time_limit=55 * 60)
+def reconstruir_filtros_tarea():
+    """
+    Evalúa desde cero todos los filtros guardados: los criterios de edad
+    cambian con la fecha. Programada en CELERY_BEAT_SCHEDULE, cola
+    'mantenimiento'.
+    """
+    resultado = actualizar_filtros(reconstruir_todos=True)
+    return {'success': 'omitida' not in resultado and not resultado.get('errores'), 'filtros': resultado}
+
+
+@shared_task(name='reconstruir_filtro_unicidad', soft_time_limit=120)
+def reconstruir_filtro_unicidad():
+    """
+    Publica en la cache un filtro de Bloom nuevo con los DNIs y emails
+    registrados (ver usuarios/unicidad.py). Programada cada
+    UNICIDAD_FILTRO_TTL segundos y al arrancar beat, cola 'mantenimiento'.
+    """
+    return {'success': True, 'valores': reconstruir_filtro()}
+
+
+@shared_task(name='clasificar_riesgo_intento', soft_time_limit=60)
+def clasificar_riesgo_intento(intento_id):
+    """
+    Reclasifica el nivel de riesgo del estudiante de un intento recién
+    confirmado (ver usuarios/riesgo.py). Cola 'scoring'.
+    """
+    estud_id = estudiante_de_intento(intento_id)
+    if estud_id is None:
+        return {'success': False, 'error': f'Intento {intento_id} no encontrado'}
+    return {'success': True, 'estudiante': estud_id, 'riesgo': clasificar_estudiante(estud_id)}
+
+
+@shared_task(name='clasificar_riesgo', soft_time_limit=55 * 60)
+def clasificar_riesgo_tarea():
+    """
+    Reclasifica el nivel de riesgo de los estudiantes de todas las
+    instituciones. Programada en CELERY_BEAT_SCHEDULE, cola 'mantenimiento'.
+    """
+    resultados = clasificar_todas()
+    return {
+        'success': 'omitida' not in resultados and not any('error' in r for r in resultados.values()),
+        'instituciones': resultados,
+    }
+
+
+@shared_task(name='procesar_recomendaciones_intento', bind=True, max_retries=3, soft_time_limit=120)
+def procesar_recomendaciones_intento(self, intento_id, usar_ia=True):
+    """
+    Calcula y guarda las recomendaciones de un intento confirmado
+    Cola 'scoring' (ver CELERY_TASK_ROUTES). Se encola desde
+    guardar_respuestas cuando RECOMENDACIONES_ASINCRONAS está activo.
+
+    Es idempotente: el motor borra las recomendaciones previas del intento
+    antes de insertar, así que un reintento no duplica filas.
+
+    Args:
+        intento_id (int): ID del intento confirmado
+        usar_ia (bool): Generar descripciones con Groq
+    """
+    from .motor_ia_groq import procesar_recomendaciones_groq
+
+    resultado = procesar_recomendaciones_groq(intento_id, usar_ia=usar_ia)
+
+    if not resultado['success']:
+        logger.error(f"[CELERY] Error al generar recomendaciones del intento {intento_id}: {resultado.get('error')}")
+        raise self.retry(exc=RuntimeError(resultado.get('error')), countdown=30)
+
+    logger.info(f"[CELERY] {len(resultado['recomendaciones'])} recomendaciones generadas para el intento {intento_id}")
+
+    return {
+        'success': True,
+        'intento_id': intento_id,
+        'recomendaciones': len(resultado['recomendaciones']),
+        'generadas_con_ia': resultado['generadas_con_ia']
+    }
+
+
+@shared_task(name='drenar_emails', bind=True, soft_time_limit=300)
+def drenar_emails(self):
+    """
+    Envía un lote de la bandeja de salida (tblEmailPendiente) por una sola
+    conexión SMTP. Cola 'email' (ver CELERY_TASK_ROUTES).
+
+    Si quedan pendientes se vuelve a encolar, así un pico de emails se
+    drena en lotes sin ocupar el worker de forma indefinida. Si solo quedan
+    reintentos programados, se encola para cuando venza el primero. Ambos
+    casos pasan por la misma guarda que encolar_email: si mientras tanto
+    se programó otro drenado, no se abre una segunda cadena de tareas.
+    """
+    drenado_iniciado()
+    resultado = drenar_lote()
+
+    if resultado['restantes']:
+        programar_drenado()
+    elif resultado['proximo_en'] is not None:
+        programar_drenado(countdown=resultado['proximo_en'])
+
+    return {'success': True, **resultado}
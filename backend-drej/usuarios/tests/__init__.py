@@ -0,0 +1,11 @@
+# usuarios/tests
+"""
+Pruebas de comportamiento de la app usuarios
+
+Corren sobre SQLite (las tablas managed=False las crea el runner):
+
+    DB_ENGINE=sqlite SECRET_KEY=x GROQ_API_KEY=x python manage.py test usuarios
+
+Las sentencias propias de SQL Server (MERGE, DELETE ... OUTPUT) se prueban
+por su contrato con un cursor simulado; el resto va contra la BD de prueba.
+"""
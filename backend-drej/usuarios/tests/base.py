@@ -0,0 +1,65 @@
+# usuarios/tests/base.py
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from usuarios.catalogos import ROL_ESTUDIANTE, limpiar_catalogos
+from usuarios.models import Estudiante, InstitucionEducativa, Intento, Recomendacion, Respuesta
+from usuarios.rendimiento.datos import sembrar_catalogos
+
+# MD5 solo en pruebas: el coste del hash no es lo que se prueba
+HASHERS_RAPIDOS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(
+    PASSWORD_HASHERS=HASHERS_RAPIDOS,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class PruebaUsuarios(TestCase):
+    """Catálogos sembrados (roles, estados, niveles e institución) y cache vacía"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.insti_id = sembrar_catalogos()
+
+    def setUp(self):
+        cache.clear()
+        limpiar_catalogos()
+
+
+def crear_intento(estudiante_id, cuestionario, creado, valores=(), carreras=(), confirmado=True, estado_id=None):
+    """
+    Intento con una respuesta por valor (1..5, en orden de pregunta) y una
+    recomendación por carrera
+
+    Args:
+        cuestionario: (CuestID, {PregID: [OpcionID, ...]}) de sembrar_cuestionario
+    """
+    cuest_id, opciones = cuestionario
+    intento = Intento.objects.create(
+        Estud_id=estudiante_id, Cuest_id=cuest_id, Estado_id=estado_id or (2 if confirmado else 1),
+        Confirmado=confirmado, Creado=creado, UltimoAutosave=creado,
+    )
+    for opciones_pregunta, valor in zip(opciones.values(), valores):
+        Respuesta.objects.create(Intent=intento, RespValor=str(opciones_pregunta[valor - 1]), RespFechaHora=creado)
+    for carrera, score in carreras:
+        Recomendacion.objects.create(
+            Intent=intento, Carrera=carrera, Descripcion='', Score=score, Nivel='Alto', FechaHora=creado
+        )
+    return intento
+
+
+def crear_institucion(nombre, distrito='Miraflores', provincia='Lima', region='Lima'):
+    return InstitucionEducativa.objects.create(
+        InstiNombre=nombre, InstiDireccion='Av. Prueba 1',
+        InstiDistrito=distrito, InstiProvincia=provincia, InstiRegion=region,
+    ).InstiID
+
+
+def crear_estudiante(dni, insti_id, nacimiento='2008-01-01', nivel_riesgo=None):
+    user = User.objects.create(username=dni, email=f'{dni}@ejemplo.com')
+    return Estudiante.objects.create(
+        EstudDNI=dni, EstudNombres='Prueba', EstudApellidoPaterno='Prueba', EstudApellidoMaterno=dni,
+        EstudFechaNac=nacimiento, User=user, Insti_id=insti_id, Rol_id=ROL_ESTUDIANTE,
+        NivelRiesgo_id=nivel_riesgo,
+    )
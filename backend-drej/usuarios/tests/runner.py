@@ -0,0 +1,29 @@
+# usuarios/tests/runner.py
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class RunnerTablasNoGestionadas(DiscoverRunner):
+    """
+    DiscoverRunner que crea en la BD de prueba las tablas managed=False
+
+    Los modelos de usuarios mapean tablas heredadas que Django no crea. En
+    SQL Server las crean los scripts del proyecto; en SQLite se crean aquí
+    a partir de los modelos. La réplica, si la hay, es espejo de default.
+    """
+
+    def setup_databases(self, **kwargs):
+        configuracion = super().setup_databases(**kwargs)
+        if connection.vendor != 'microsoft':
+            from usuarios.rendimiento.datos import crear_tablas_no_gestionadas
+            crear_tablas_no_gestionadas()
+        return configuracion
+
+    def run_checks(self, databases):
+        # Las pruebas corren en un solo proceso: la cache local basta
+        # (usuarios.E001 exige una compartida cuando DEBUG es False)
+        silenciados = [*settings.SILENCED_SYSTEM_CHECKS, 'usuarios.E001']
+        with override_settings(SILENCED_SYSTEM_CHECKS=silenciados):
+            super().run_checks(databases)
@@ -0,0 +1,72 @@
+# usuarios/tests/test_archivo.py
+from datetime import datetime
+
+from django.utils import timezone
+
+from usuarios.archivo import archivar_periodos_cerrados, intento_archivable
+from usuarios.models import (
+    Estudiante, Filtro, FiltroRecomendacion, Orientador, Recomendacion, RecomendacionArchivo,
+    Respuesta, RespuestaArchivo,
+)
+from usuarios.rendimiento.datos import sembrar_cuestionario, sembrar_estudiantes, sembrar_orientador
+
+from .base import PruebaUsuarios, crear_intento
+
+CORTE = timezone.make_aware(datetime(2026, 3, 1))
+PERIODO_CERRADO = timezone.make_aware(datetime(2025, 11, 10, 9, 30))
+PERIODO_ACTUAL = timezone.make_aware(datetime(2026, 4, 2, 9, 30))
+
+
+class ArchivoTests(PruebaUsuarios):
+
+    def setUp(self):
+        super().setUp()
+        estud_id = Estudiante.objects.get(EstudDNI=sembrar_estudiantes(1, self.insti_id)[0]).EstudID
+        cuestionario = sembrar_cuestionario()
+        self.cerrado = crear_intento(estud_id, cuestionario, PERIODO_CERRADO, [3] * 20, [('Medicina', 80.0)])
+        self.en_progreso = crear_intento(estud_id, cuestionario, PERIODO_CERRADO, [2] * 5, confirmado=False)
+        self.actual = crear_intento(estud_id, cuestionario, PERIODO_ACTUAL, [4] * 20, [('Derecho', 70.0)])
+
+        orientador = Orientador.objects.get(OrienDNI=sembrar_orientador(self.insti_id))
+        self.filtro = Filtro.objects.create(Orien=orientador, Nombre='Todos')
+        FiltroRecomendacion.objects.bulk_create([
+            FiltroRecomendacion(Filtro=self.filtro, Recomendacion=recomendacion)
+            for recomendacion in Recomendacion.objects.all()
+        ])
+
+    def test_mueve_solo_intentos_confirmados_del_periodo_cerrado(self):
+        resultado = archivar_periodos_cerrados(tamano=7, pausa=0, corte=CORTE)
+
+        self.assertEqual(resultado['tblRespuesta'], 20)
+        self.assertEqual(resultado['tblRecomendacion'], 1)
+        self.assertFalse(Respuesta.objects.filter(Intent=self.cerrado).exists())
+        self.assertEqual(Respuesta.objects.filter(Intent=self.en_progreso).count(), 5)
+        self.assertEqual(Respuesta.objects.filter(Intent=self.actual).count(), 20)
+
+        archivadas = RespuestaArchivo.objects.filter(Intent_id=self.cerrado.IntentID)
+        self.assertEqual(archivadas.count(), 20)
+        self.assertEqual(set(archivadas.values_list('Mes', flat=True)), {202511})
+        self.assertEqual(
+            list(RecomendacionArchivo.objects.values_list('Intent_id', 'Carrera')),
+            [(self.cerrado.IntentID, 'Medicina')]
+        )
+
+    def test_filtros_guardados_quedan_sobre_el_periodo_actual(self):
+        archivar_periodos_cerrados(tamano=100, pausa=0, corte=CORTE)
+
+        self.assertEqual(
+            list(FiltroRecomendacion.objects.filter(Filtro=self.filtro).values_list('Recomendacion__Carrera', flat=True)),
+            ['Derecho']
+        )
+
+    def test_es_idempotente(self):
+        archivar_periodos_cerrados(tamano=100, pausa=0, corte=CORTE)
+        resultado = archivar_periodos_cerrados(tamano=100, pausa=0, corte=CORTE)
+
+        self.assertEqual((resultado['tblRespuesta'], resultado['tblRecomendacion']), (0, 0))
+        self.assertEqual(RespuestaArchivo.objects.count(), 20)
+
+    def test_intento_archivable(self):
+        self.assertTrue(intento_archivable(self.cerrado, CORTE))
+        self.assertFalse(intento_archivable(self.en_progreso, CORTE))
+        self.assertFalse(intento_archivable(self.actual, CORTE))
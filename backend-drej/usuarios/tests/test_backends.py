@@ -0,0 +1,61 @@
+# usuarios/tests/test_backends.py
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+
+from usuarios.backends import EmailOrDNIBackend
+from usuarios.rendimiento.datos import PASSWORD_PRUEBA, email_prueba, sembrar_estudiantes
+
+from .base import PruebaUsuarios
+
+
+class EmailOrDNIBackendTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dni = sembrar_estudiantes(1, cls.insti_id)[0]
+
+    def test_login_por_dni(self):
+        user = authenticate(username=self.dni, password=PASSWORD_PRUEBA)
+        self.assertEqual(user.username, self.dni)
+
+    def test_login_por_email_sin_distinguir_mayusculas(self):
+        user = authenticate(username=f'  {email_prueba(self.dni).upper()} ', password=PASSWORD_PRUEBA)
+        self.assertEqual(user.username, self.dni)
+
+    def test_password_incorrecta_no_prueba_model_backend(self):
+        with mock.patch.object(ModelBackend, 'authenticate') as model_backend:
+            self.assertIsNone(authenticate(username=self.dni, password='incorrecta'))
+        model_backend.assert_not_called()
+
+    def test_dni_desconocido_queda_en_cache_negativa(self):
+        backend = EmailOrDNIBackend()
+        with self.assertNumQueries(1), self.assertRaises(PermissionDenied):
+            backend.authenticate(None, username='12345678', password='x')
+        # Segundo intento: sin consulta
+        with self.assertNumQueries(0), self.assertRaises(PermissionDenied):
+            backend.authenticate(None, username='12345678', password='x')
+
+    def test_desconocido_paga_el_mismo_hash(self):
+        backend = EmailOrDNIBackend()
+        with mock.patch('usuarios.backends.hashear_password') as hashear:
+            for _ in range(2):
+                # El segundo sale de la cache negativa: el hash se calcula igual
+                with self.assertRaises(PermissionDenied):
+                    backend.authenticate(None, username='nadie@ejemplo.com', password='x')
+        self.assertEqual(hashear.call_args_list, [mock.call('x'), mock.call('x')])
+
+    def test_desconocido_no_cae_en_model_backend(self):
+        with mock.patch.object(ModelBackend, 'authenticate') as model_backend:
+            for _ in range(3):
+                self.assertIsNone(authenticate(username='nadie@ejemplo.com', password='x'))
+        model_backend.assert_not_called()
+
+    def test_username_de_administracion_lo_resuelve_model_backend(self):
+        User.objects.create_user(username='admin', password='AdminSeguro123')
+        self.assertIsNone(EmailOrDNIBackend().authenticate(None, username='admin', password='AdminSeguro123'))
+        self.assertEqual(authenticate(username='admin', password='AdminSeguro123').username, 'admin')
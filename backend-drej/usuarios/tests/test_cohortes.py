@@ -0,0 +1,170 @@
+# usuarios/tests/test_cohortes.py
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from usuarios import cohortes
+from usuarios.cohortes import CohorteError
+from usuarios.puntajes import CATEGORIAS
+from usuarios.rendimiento.datos import sembrar_cuestionario, sembrar_orientador
+
+from .base import PruebaUsuarios, crear_estudiante, crear_institucion, crear_intento
+
+AHORA = timezone.make_aware(datetime(2026, 4, 20, 12, 0))
+
+# Respuestas (1..5) por pregunta: cada categoría suma 4 preguntas
+ALTO_EN_LA_PRIMERA = [5] * 4 + [1] * 16
+PAREJO = [3] * 20
+
+
+class CalculosTests(SimpleTestCase):
+
+    def test_edades_en_anios_cumplidos(self):
+        nacimientos = np.array(['2010-04-20', '2010-04-21', '2011-02-28', '2008-12-31'], dtype='datetime64[D]')
+        self.assertEqual(cohortes._edades(nacimientos, date(2026, 4, 20)).tolist(), [16, 15, 15, 17])
+
+    def test_distribucion_ignora_estudiantes_sin_puntajes(self):
+        matriz = np.full((3, len(CATEGORIAS)), np.nan)
+        matriz[0], matriz[1] = 20.0, 100.0
+
+        distribucion = cohortes._distribucion(matriz)[CATEGORIAS[0]]
+
+        self.assertEqual(distribucion['estudiantes'], 2)
+        self.assertEqual(distribucion['media'], 60.0)
+        self.assertEqual(distribucion['percentiles']['p50'], 60.0)
+        # El último bin incluye el 100
+        self.assertEqual(distribucion['histograma'], [0, 0, 1, 0, 0, 0, 0, 0, 0, 1])
+
+
+class CohortesTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cuestionario = sembrar_cuestionario()
+        cls.miraflores = crear_institucion('I.E. Miraflores', distrito='Miraflores')
+        surco = crear_institucion('I.E. Surco', distrito='Santiago de Surco')
+        # Distrito homónimo en otra provincia y región
+        arequipa = crear_institucion('I.E. Arequipa', distrito='Miraflores', provincia='Arequipa', region='Arequipa')
+
+        # 15 y 17 años el día de AHORA
+        primero = crear_estudiante('54000001', cls.miraflores, '2011-01-10')
+        segundo = crear_estudiante('54000002', cls.miraflores, '2009-03-05')
+        crear_estudiante('54000003', cls.miraflores, '2010-06-01')
+        tercero = crear_estudiante('54000004', surco, '2009-03-05')
+        cls.homonimo = crear_estudiante('54000005', arequipa, '2009-03-05')
+
+        crear_intento(primero.EstudID, cuestionario, AHORA - timedelta(days=40), PAREJO, [('Arte', 50.0)])
+        cls.ultimo = crear_intento(
+            primero.EstudID, cuestionario, AHORA - timedelta(days=5), ALTO_EN_LA_PRIMERA, [('Medicina', 90.0)]
+        )
+        crear_intento(segundo.EstudID, cuestionario, AHORA - timedelta(days=20), PAREJO, [('Medicina', 70.0)])
+        crear_intento(tercero.EstudID, cuestionario, AHORA - timedelta(days=3), PAREJO, [('Derecho', 80.0)])
+        cls.intento_homonimo = crear_intento(
+            cls.homonimo.EstudID, cuestionario, AHORA - timedelta(days=3), PAREJO, [('Derecho', 80.0)]
+        )
+
+    def test_institucion_usa_el_ultimo_intento_confirmado(self):
+        resultado = cohortes.calcular('institucion', self.miraflores, ahora=AHORA)
+
+        self.assertEqual((resultado['estudiantes'], resultado['completados']), (3, 2))
+        self.assertEqual(resultado['completitud'], 66.67)
+        primera = resultado['categorias'][CATEGORIAS[0]]
+        self.assertEqual((primera['estudiantes'], primera['media']), (2, 80.0))
+        self.assertEqual(
+            resultado['carreras'], [{'carrera': 'Medicina', 'recomendaciones': 2, 'score_promedio': 80.0}]
+        )
+
+    def test_region_y_edad(self):
+        region = cohortes.calcular('region', 'Lima', ahora=AHORA)
+        mayores = cohortes.calcular('region', 'Lima', edad='16+', ahora=AHORA)
+
+        self.assertEqual(region['estudiantes'], 4)
+        self.assertEqual([(g['edad'], g['estudiantes'], g['completados']) for g in region['por_edad']],
+                         [(15, 2, 1), (17, 2, 2)])
+        self.assertEqual((mayores['estudiantes'], mayores['completados']), (2, 2))
+
+    def test_distrito_y_provincia_se_califican(self):
+        lima = cohortes.calcular('distrito', ('Miraflores', 'Lima', 'Lima'), ahora=AHORA)
+        arequipa = cohortes.calcular('distrito', ('Miraflores', 'Arequipa', 'Arequipa'), ahora=AHORA)
+
+        self.assertEqual((lima['estudiantes'], arequipa['estudiantes']), (3, 1))
+        self.assertEqual(
+            lima['cohorte'], {'nivel': 'distrito', 'valor': 'Miraflores', 'provincia': 'Lima', 'region': 'Lima',
+                              'edad': None}
+        )
+        self.assertEqual(cohortes.calcular('provincia', ('Lima', 'Lima'), ahora=AHORA)['estudiantes'], 4)
+
+    def test_invalidar_intento_solo_toca_sus_cohortes(self):
+        lima = cohortes._clave_version('distrito', ('Miraflores', 'Lima', 'Lima'))
+        arequipa = cohortes._clave_version('distrito', ('Miraflores', 'Arequipa', 'Arequipa'))
+
+        cohortes.invalidar_intento(self.intento_homonimo.IntentID)
+
+        self.assertIsNone(cache.get(lima))
+        self.assertIsNotNone(cache.get(arequipa))
+        self.assertIsNotNone(cache.get(cohortes._clave_version('region', 'Arequipa')))
+
+    def test_curva_de_completitud_semanal(self):
+        curva = cohortes.calcular('institucion', self.miraflores, ahora=AHORA)['curva_completitud']
+
+        # Periodo desde el 1 de marzo: el primer confirmado es del 11 de marzo
+        self.assertEqual(curva[0], {'fecha': date(2026, 3, 8), 'porcentaje': 0})
+        self.assertEqual(curva[-1], {'fecha': date(2026, 4, 20), 'porcentaje': 66.67})
+        porcentajes = [punto['porcentaje'] for punto in curva]
+        self.assertEqual(porcentajes, sorted(porcentajes))
+
+    def test_analitica_cacheada_hasta_que_se_confirma_un_intento(self):
+        primera = cohortes.analitica('institucion', self.miraflores)
+        with self.assertNumQueries(0):
+            self.assertEqual(cohortes.analitica('institucion', self.miraflores), primera)
+
+        cohortes.invalidar_intento(self.ultimo.IntentID)
+
+        # Estudiantes, matriz de puntajes y carreras en caliente y en archivo
+        with self.assertNumQueries(4):
+            cohortes.analitica('institucion', self.miraflores)
+
+    def test_parametros_no_validos(self):
+        for nivel, valor, edad in (
+            ('pais', 'Perú', None), ('region', '', None), ('region', 'Lima', '15-'),
+            ('distrito', 'Miraflores', None), ('provincia', ('Lima', ''), None),
+        ):
+            with self.subTest(nivel=nivel, valor=valor, edad=edad), self.assertRaises(CohorteError):
+                cohortes.analitica(nivel, valor, edad)
+
+
+class VistaCohortesTests(PruebaUsuarios):
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = APIClient()
+        self.url = reverse('analitica-cohorte')
+
+    def test_orientador_ve_el_distrito_de_su_institucion(self):
+        self.cliente.force_authenticate(User.objects.get(username=sembrar_orientador(self.insti_id)))
+
+        respuesta = self.cliente.get(self.url, {'nivel': 'distrito'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta.data['cohorte'],
+            {'nivel': 'distrito', 'valor': 'Lima', 'provincia': 'Lima', 'region': 'Lima', 'edad': None}
+        )
+
+    def test_administrador_debe_calificar_el_distrito(self):
+        self.cliente.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+        sin_region = self.cliente.get(self.url, {'nivel': 'distrito', 'valor': 'Lima', 'provincia': 'Lima'})
+        completo = self.cliente.get(
+            self.url, {'nivel': 'distrito', 'valor': 'Lima', 'provincia': 'Lima', 'region': 'Lima'}
+        )
+
+        self.assertEqual(sin_region.status_code, 400)
+        self.assertEqual(completo.status_code, 200)
@@ -0,0 +1,42 @@
+# usuarios/tests/test_correo.py
+from unittest import mock
+
+from usuarios.correo import programar_drenado
+from usuarios.tasks import drenar_emails
+
+from .base import PruebaUsuarios
+
+
+def lote(restantes=0, proximo_en=None):
+    return {'enviados': 1, 'fallidos': 0, 'restantes': restantes, 'proximo_en': proximo_en}
+
+
+@mock.patch.object(drenar_emails, 'apply_async')
+class DrenadoTests(PruebaUsuarios):
+
+    def test_muchos_emails_un_solo_drenado(self, apply_async):
+        for _ in range(5):
+            programar_drenado()
+        apply_async.assert_called_once_with(countdown=None)
+
+    def test_se_reencola_si_quedan_pendientes(self, apply_async):
+        # La guarda del drenado que está corriendo no bloquea su reencolado
+        programar_drenado()
+        apply_async.reset_mock()
+        with mock.patch('usuarios.tasks.drenar_lote', return_value=lote(restantes=3)):
+            drenar_emails()
+        apply_async.assert_called_once_with(countdown=None)
+
+    def test_se_reencola_para_el_proximo_reintento(self, apply_async):
+        with mock.patch('usuarios.tasks.drenar_lote', return_value=lote(proximo_en=120)):
+            drenar_emails()
+        apply_async.assert_called_once_with(countdown=120)
+
+    def test_no_abre_una_segunda_cadena(self, apply_async):
+        def encolar_durante_el_lote():
+            programar_drenado()
+            return lote(restantes=3)
+
+        with mock.patch('usuarios.tasks.drenar_lote', side_effect=encolar_durante_el_lote):
+            drenar_emails()
+        apply_async.assert_called_once_with(countdown=None)
@@ -0,0 +1,97 @@
+# usuarios/tests/test_exportacion.py
+import csv
+import io
+import sys
+import unittest
+from datetime import datetime
+from importlib.util import find_spec
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from usuarios.catalogos import ESTADO_VERIF_PENDIENTE
+from usuarios.exportacion import CAMPOS, ExportacionError, exportar_csv, exportar_xlsx, filas_resultados
+from usuarios.models import Estudiante, Orientador
+from usuarios.rendimiento.datos import sembrar_cuestionario, sembrar_estudiantes, sembrar_orientador
+
+from .base import PruebaUsuarios, crear_intento
+
+CREADO = timezone.make_aware(datetime(2026, 4, 2, 9, 30))
+
+
+class ExportacionTests(PruebaUsuarios):
+
+    def setUp(self):
+        super().setUp()
+        cuestionario = sembrar_cuestionario()
+        dnis = sembrar_estudiantes(3, self.insti_id)
+        self.intentos = []
+        for dni in dnis:
+            estud_id = Estudiante.objects.get(EstudDNI=dni).EstudID
+            self.intentos.append(crear_intento(
+                estud_id, cuestionario, CREADO, [5] * 20, [('Medicina', 80.0), ('Derecho', 60.0)]
+            ).IntentID)
+        # Sin confirmar: no se exporta
+        crear_intento(estud_id, cuestionario, CREADO, [1] * 5, confirmado=False)
+
+    def test_paginacion_por_clave_cruza_el_lote(self):
+        filas = list(filas_resultados(self.insti_id, tamano_lote=2))
+
+        self.assertEqual([fila['intento_id'] for fila in filas], self.intentos)
+        self.assertEqual(filas[0]['recomendacion_1'], 'Medicina')
+        self.assertEqual(filas[0]['score_2'], 60.0)
+
+    def test_csv_con_bom_y_columnas(self):
+        contenido = ''.join(exportar_csv(filas_resultados(self.insti_id)))
+
+        self.assertTrue(contenido.startswith('\ufeff'))
+        lector = csv.reader(io.StringIO(contenido[1:]))
+        self.assertEqual(next(lector), CAMPOS)
+        self.assertEqual(len(list(lector)), 3)
+
+    @unittest.skipUnless(find_spec('openpyxl'), 'openpyxl no instalado')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        hoja = load_workbook(exportar_xlsx(filas_resultados(self.insti_id)), read_only=True)['Resultados']
+        filas = list(hoja.iter_rows(values_only=True))
+
+        self.assertEqual(list(filas[0]), CAMPOS)
+        self.assertEqual([fila[0] for fila in filas[1:]], self.intentos)
+
+    def test_xlsx_sin_openpyxl(self):
+        with mock.patch.dict(sys.modules, {'openpyxl': None}), self.assertRaises(ExportacionError):
+            exportar_xlsx(iter(()))
+
+
+class VistaExportacionTests(PruebaUsuarios):
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = APIClient()
+        self.url = reverse('exportar-resultados')
+
+    def test_orientador_exporta_su_institucion(self):
+        self.cliente.force_authenticate(User.objects.get(username=sembrar_orientador(self.insti_id)))
+
+        respuesta = self.cliente.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(b''.join(respuesta.streaming_content).decode().startswith('\ufeffintento_id,'))
+
+    def test_orientador_pendiente_de_verificacion_no_exporta(self):
+        dni = sembrar_orientador(self.insti_id)
+        Orientador.objects.filter(OrienDNI=dni).update(EstadoVerif_id=ESTADO_VERIF_PENDIENTE)
+        self.cliente.force_authenticate(User.objects.get(username=dni))
+
+        self.assertEqual(self.cliente.get(self.url).status_code, 403)
+
+    def test_administrador_con_institucion_no_valida(self):
+        self.cliente.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+        for insti_id, estado in (('', 400), ('x', 400), (str(self.insti_id + 1000), 404)):
+            with self.subTest(insti_id=insti_id):
+                self.assertEqual(self.cliente.get(self.url, {'insti_id': insti_id}).status_code, estado)
@@ -0,0 +1,108 @@
+# usuarios/tests/test_filtros.py
+from datetime import date, datetime
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from usuarios import filtros
+from usuarios.filtros import FiltroError
+from usuarios.models import Filtro, Orientador
+from usuarios.rendimiento.datos import sembrar_cuestionario, sembrar_orientador
+
+from .base import PruebaUsuarios, crear_estudiante, crear_institucion, crear_intento
+
+HOY = date(2026, 6, 15)
+CREADO = timezone.make_aware(datetime(2026, 5, 4, 10, 0))
+
+
+class RangoEdadTests(SimpleTestCase):
+
+    def test_sintaxis(self):
+        self.assertEqual(filtros.rango_edad('15'), (15, 15))
+        self.assertEqual(filtros.rango_edad(' 15 - 17 '), (15, 17))
+        self.assertEqual(filtros.rango_edad('16+'), (16, None))
+
+    def test_no_valida(self):
+        for texto in ('', 'quince', '17-15', '15-'):
+            with self.subTest(texto=texto), self.assertRaises(FiltroError):
+                filtros.rango_edad(texto)
+
+    def test_condicion_es_rango_sobre_la_fecha_de_nacimiento(self):
+        condicion = filtros.condicion_edad('15-17', hoy=HOY)
+        self.assertEqual(
+            sorted(condicion.children),
+            [('EstudFechaNac__gt', date(2008, 6, 15)), ('EstudFechaNac__lte', date(2011, 6, 15))]
+        )
+
+
+class FiltrosTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cuestionario = sembrar_cuestionario()
+        cls.orientador = Orientador.objects.get(OrienDNI=sembrar_orientador(cls.insti_id))
+
+        # 15 años y riesgo alto, 17 años y riesgo bajo, y uno de otra institución
+        hoy = timezone.localdate()
+        quince, diecisiete = filtros._restar_anios(hoy, 15), filtros._restar_anios(hoy, 17)
+        cls.menor = crear_estudiante('51000001', cls.insti_id, quince, nivel_riesgo=3)
+        cls.mayor = crear_estudiante('51000002', cls.insti_id, diecisiete, nivel_riesgo=1)
+        otro = crear_estudiante('51000003', crear_institucion('I.E. Otra'), quince, nivel_riesgo=3)
+        for estudiante in (cls.menor, cls.mayor, otro):
+            crear_intento(estudiante.EstudID, cls.cuestionario, CREADO, carreras=[('Medicina', 80.0)])
+        # Las recomendaciones de intentos sin confirmar no cuentan
+        crear_intento(cls.menor.EstudID, cls.cuestionario, CREADO, carreras=[('Arte', 60.0)], confirmado=False)
+
+    def filtro(self, **criterios):
+        return Filtro.objects.create(Orien=self.orientador, Nombre='Prueba', **criterios)
+
+    def carreras(self, filtro):
+        resultados, _ = filtros.pagina_resultados(filtro.FiltroID)
+        return sorted((r['dni'], r['carrera']) for r in resultados)
+
+    def test_reconstruir_dentro_de_la_institucion(self):
+        filtro = self.filtro()
+        self.assertEqual(filtros.reconstruir(filtro), 2)
+        self.assertEqual(self.carreras(filtro), [('51000001', 'Medicina'), ('51000002', 'Medicina')])
+
+    def test_edad_y_nivel_de_riesgo(self):
+        por_edad = self.filtro(Edad='16+')
+        por_riesgo = self.filtro(NivelRiesgo_id=3)
+
+        filtros.reconstruir(por_edad)
+        filtros.reconstruir(por_riesgo)
+
+        self.assertEqual(self.carreras(por_edad), [('51000002', 'Medicina')])
+        self.assertEqual(self.carreras(por_riesgo), [('51000001', 'Medicina')])
+
+    def test_actualizar_solo_evalua_recomendaciones_nuevas(self):
+        filtro = self.filtro(NivelRiesgo_id=3)
+        filtros.reconstruir(filtro)
+        crear_intento(self.menor.EstudID, self.cuestionario, CREADO, carreras=[('Derecho', 75.0)])
+
+        self.assertEqual(filtros.actualizar(filtro), 1)
+        self.assertEqual(filtros.actualizar(filtro), 0)
+        self.assertEqual(self.carreras(filtro), [('51000001', 'Derecho'), ('51000001', 'Medicina')])
+
+    def test_paginacion_por_clave(self):
+        filtro = self.filtro()
+        filtros.reconstruir(filtro)
+
+        primera, siguiente = filtros.pagina_resultados(filtro.FiltroID, limite=1)
+        segunda, final = filtros.pagina_resultados(filtro.FiltroID, antes_de=siguiente, limite=1)
+
+        self.assertEqual(siguiente, primera[0]['recomendacion_id'])
+        self.assertLess(segunda[0]['recomendacion_id'], siguiente)
+        self.assertIsNone(final)
+
+    def test_validar_rechaza_criterios_no_evaluables(self):
+        for criterios, mensaje in (
+            ({'Genero': 'F'}, 'género'),
+            ({'Institucion': 'I.E. Otra'}, 'dentro de la institución del orientador'),
+            ({'Ubicacion': 'Lima'}, 'dentro de la institución del orientador'),
+            ({'NivelRiesgo_id': 7}, 'Nivel de riesgo'),
+            ({'Edad': 'adolescente'}, 'Edad'),
+        ):
+            with self.subTest(criterios=criterios), self.assertRaisesMessage(FiltroError, mensaje):
+                filtros.validar(Filtro(**criterios))
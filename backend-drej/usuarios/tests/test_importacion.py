@@ -0,0 +1,176 @@
+# usuarios/tests/test_importacion.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from usuarios import importacion
+from usuarios.catalogos import ESTADO_VERIF_PENDIENTE
+from usuarios.importacion import ImportacionError, importar_estudiantes, leer_archivo, validar_filas
+from usuarios.models import Estudiante, Orientador
+from usuarios.rendimiento.datos import email_prueba, sembrar_estudiantes, sembrar_orientador
+
+from .base import PruebaUsuarios
+
+CSV = (
+    'DNI;Nombres;Apellido Paterno;Apellido Materno;Fecha Nacimiento;Correo\n'
+    '41000001;luis;rojas;pérez;2008-03-01;luis@ejemplo.com\n'
+    ';;;;;\n'
+    '41000002;maría;soto;luna;15/07/2009;\n'
+).encode('utf-8-sig')
+
+
+def fila(dni, **cambios):
+    datos = {
+        'dni': dni, 'nombres': 'Ana', 'apellido_paterno': 'Ríos', 'apellido_materno': 'Vega',
+        'fecha_nacimiento': '2008-01-01', 'email': '',
+    }
+    datos.update(cambios)
+    return datos
+
+
+class LecturaTests(PruebaUsuarios):
+
+    def test_csv_con_alias_de_cabecera_y_filas_vacias(self):
+        filas = leer_archivo(CSV, 'grado.csv')
+
+        self.assertEqual([f['dni'] for f in filas], ['41000001', '41000002'])
+        self.assertEqual(filas[0]['email'], 'luis@ejemplo.com')
+        self.assertEqual(filas[1]['apellido_paterno'], 'soto')
+
+    def test_cabecera_incompleta(self):
+        with self.assertRaisesMessage(ImportacionError, 'fecha_nacimiento'):
+            leer_archivo(b'dni,nombres,apellidopaterno,apellidomaterno\n', 'grado.csv')
+
+
+class ValidacionTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dni_existente = sembrar_estudiantes(1, cls.insti_id)[0]
+
+    def test_duplicados_en_archivo_y_en_bd(self):
+        filas = [
+            fila('41000001', email='a@ejemplo.com'),
+            fila('41000001'),
+            fila('41000002', email='A@Ejemplo.com'),
+            fila(self.dni_existente),
+            fila('41000003', email=email_prueba(self.dni_existente)),
+            fila('123', email=''),
+            fila(41000004.0, fecha_nacimiento='31/12/2009'),
+        ]
+
+        validas, errores = validar_filas(filas)
+
+        self.assertEqual([datos['dni'] for _, datos in validas], ['41000001', '41000004'])
+        self.assertEqual(
+            sorted((num, mensaje) for num, _, mensaje in errores),
+            [
+                (3, 'DNI repetido en el archivo'),
+                (4, 'Email repetido en el archivo'),
+                (5, 'Este DNI ya está registrado'),
+                (6, 'Este correo ya está registrado'),
+                (7, 'El DNI debe tener exactamente 8 dígitos'),
+            ]
+        )
+
+
+    def test_sql_server_busca_emails_por_la_columna_indexada(self):
+        cursor = mock.MagicMock()
+        cursor.fetchall.return_value = [('Ana@Ejemplo.com',)]
+        conexion = mock.MagicMock(vendor='microsoft')
+        conexion.cursor.return_value.__enter__.return_value = cursor
+
+        with mock.patch('usuarios.importacion.connection', conexion):
+            _, emails = importacion._buscar_existentes([], ['ana@ejemplo.com'])
+
+        self.assertEqual(emails, {'ana@ejemplo.com'})
+        sql = cursor.execute.call_args.args[0]
+        self.assertIn('email_normalizado IN (%s)', sql)
+        self.assertNotIn('LOWER(', sql)
+
+
+@override_settings(IMPORTACION_PROCESOS_HASH=1, IMPORTACION_LOTE=2)
+class ImportacionTests(PruebaUsuarios):
+
+    def test_importa_por_lotes_y_reporta_cada_fila(self):
+        filas = [fila('41000001', password='Inicial2025'), fila('41000002'), fila('41000003'), fila('12')]
+
+        resultados = list(importar_estudiantes(filas, self.insti_id))
+
+        self.assertEqual(
+            [(r['dni'], r['estado']) for r in resultados],
+            [('12', 'error'), ('41000001', 'creado'), ('41000002', 'creado'), ('41000003', 'creado')]
+        )
+        self.assertEqual(Estudiante.objects.filter(Insti_id=self.insti_id).count(), 3)
+        # La contraseña del archivo no se devuelve; la generada sí
+        self.assertEqual(resultados[1]['password_inicial'], '')
+        generada = resultados[2]['password_inicial']
+        self.assertTrue(User.objects.get(username='41000002').check_password(generada))
+        self.assertTrue(User.objects.get(username='41000001').check_password('Inicial2025'))
+
+    def test_conflicto_en_lote_se_aisla_por_fila(self):
+        User.objects.create(username='41000002')
+        # Otro registro se adelanta entre la validación y el INSERT
+        with mock.patch('usuarios.importacion._buscar_existentes', return_value=(set(), set())):
+            resultados = list(importar_estudiantes([fila('41000001'), fila('41000002')], self.insti_id))
+
+        self.assertEqual([r['estado'] for r in resultados], ['creado', 'error'])
+        self.assertTrue(Estudiante.objects.filter(EstudDNI='41000001').exists())
+        self.assertFalse(Estudiante.objects.filter(EstudDNI='41000002').exists())
+
+    def test_el_pool_de_hash_se_comparte_entre_importaciones(self):
+        importacion.hashear_passwords(['Primera2025'])
+        pool = importacion._pool
+
+        hashes = importacion.hashear_passwords(['Segunda2025', 'Tercera2025'])
+
+        self.assertIs(importacion._pool, pool)
+        self.assertEqual(len(hashes), 2)
+
+
+@override_settings(IMPORTACION_PROCESOS_HASH=1)
+class VistaImportacionTests(PruebaUsuarios):
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = APIClient()
+        self.url = reverse('importar-estudiantes')
+
+    def archivo(self):
+        return SimpleUploadedFile('grado.csv', CSV, content_type='text/csv')
+
+    def test_orientador_importa_en_su_institucion(self):
+        self.cliente.force_authenticate(User.objects.get(username=sembrar_orientador(self.insti_id)))
+
+        respuesta = self.cliente.post(self.url, {'archivo': self.archivo()}, format='multipart')
+
+        self.assertEqual(respuesta.status_code, 200)
+        reporte = b''.join(respuesta.streaming_content).decode()
+        self.assertEqual(reporte.count(',creado,'), 2)
+        self.assertEqual(Estudiante.objects.filter(Insti_id=self.insti_id).count(), 2)
+
+    def test_orientador_pendiente_de_verificacion_no_importa(self):
+        dni = sembrar_orientador(self.insti_id)
+        Orientador.objects.filter(OrienDNI=dni).update(EstadoVerif_id=ESTADO_VERIF_PENDIENTE)
+        self.cliente.force_authenticate(User.objects.get(username=dni))
+
+        respuesta = self.cliente.post(self.url, {'archivo': self.archivo()}, format='multipart')
+
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertFalse(Estudiante.objects.exists())
+
+    def test_administrador_con_institucion_no_valida(self):
+        self.cliente.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+        for insti_id, estado in (('', 400), ('1; DROP', 400), ('-1', 400), (str(self.insti_id + 1000), 404)):
+            with self.subTest(insti_id=insti_id):
+                respuesta = self.cliente.post(
+                    self.url, {'archivo': self.archivo(), 'insti_id': insti_id}, format='multipart'
+                )
+                self.assertEqual(respuesta.status_code, estado)
+        self.assertFalse(Estudiante.objects.exists())
@@ -0,0 +1,65 @@
+# usuarios/tests/test_intentos.py
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase
+
+from usuarios.views import SQL_OBTENER_O_CREAR_INTENTO, _obtener_o_crear_intento
+
+
+def cursor_simulado(*resultados):
+    """Cursor cuyo execute lanza o prepara cada resultado por turno"""
+    cursor = mock.MagicMock()
+    pendientes = list(resultados)
+
+    def execute(sql, parametros):
+        resultado = pendientes.pop(0)
+        if isinstance(resultado, Exception):
+            raise resultado
+        cursor.fetchall.return_value = resultado
+
+    cursor.execute.side_effect = execute
+    conexion = mock.MagicMock()
+    conexion.cursor.return_value.__enter__.return_value = cursor
+    return conexion, cursor
+
+
+class ObtenerOCrearIntentoTests(SimpleTestCase):
+    """
+    El MERGE ... WITH (HOLDLOCK) es T-SQL: aquí se prueba el contrato del
+    batch (un solo viaje, reintento ante la carrera) y la lectura de filas
+    """
+
+    def obtener(self, *resultados):
+        conexion, cursor = cursor_simulado(*resultados)
+        with mock.patch('django.db.connection', conexion):
+            return _obtener_o_crear_intento(7, 3), cursor
+
+    def test_intento_nuevo_sin_respuestas(self):
+        intento, cursor = self.obtener([(501, 1, None, None)])
+
+        self.assertEqual(intento, (501, True, []))
+        cursor.execute.assert_called_once_with(SQL_OBTENER_O_CREAR_INTENTO, [7, 3])
+
+    def test_retoma_con_respuestas_guardadas(self):
+        intento, _ = self.obtener([(501, 0, 11, 52), (501, 0, 12, 58), (501, 0, None, None)])
+
+        self.assertEqual(intento, (
+            501, False, [{'pregunta_id': 11, 'opcion_id': 52}, {'pregunta_id': 12, 'opcion_id': 58}]
+        ))
+
+    def test_carrera_reutiliza_el_intento_del_otro(self):
+        intento, cursor = self.obtener(IntegrityError('UX_Intento_en_progreso'), [(777, 0, None, None)])
+
+        self.assertEqual(intento, (777, False, []))
+        self.assertEqual(cursor.execute.call_count, 2)
+
+    def test_sin_estudiante_o_cuestionario_inactivo(self):
+        intento, _ = self.obtener([])
+        self.assertIsNone(intento)
+
+    def test_batch_crea_solo_si_no_hay_intento_en_progreso(self):
+        sql = ' '.join(SQL_OBTENER_O_CREAR_INTENTO.split())
+        self.assertIn('MERGE tblIntento WITH (HOLDLOCK)', sql)
+        self.assertIn('AND destino.Confirmado = 0 WHEN NOT MATCHED THEN INSERT', sql)
+        self.assertIn('CuestActivo = 1', sql)
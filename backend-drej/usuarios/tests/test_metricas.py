@@ -0,0 +1,62 @@
+# usuarios/tests/test_metricas.py
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from usuarios import metricas_celery
+
+from .base import PruebaUsuarios
+
+COLAS = [{'cola': 'email', 'mensajes': 7, 'consumidores': 1, 'error': ''}]
+
+
+class HiloInmediato:
+    """threading.Thread que corre el objetivo al llamar start()"""
+
+    def __init__(self, target, args=(), **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@mock.patch.object(metricas_celery, 'profundidad_colas', return_value=COLAS)
+class VistaMetricasTests(PruebaUsuarios):
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_sin_token_no_responde_fuera_de_debug(self, profundidad):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICAS_TOKEN='', DEBUG=True)
+    def test_sin_token_responde_en_debug(self, profundidad):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_con_token(self, profundidad):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        respuesta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+
+
+class ProfundidadColasTests(PruebaUsuarios):
+
+    def test_el_scrape_no_espera_al_broker(self):
+        with mock.patch.object(metricas_celery.threading, 'Thread') as hilo, \
+                mock.patch.object(metricas_celery, 'profundidad_colas') as profundidad:
+            self.assertEqual(metricas_celery.profundidad_colas_cacheada(), [])
+        hilo.return_value.start.assert_called_once()
+        profundidad.assert_not_called()
+
+    def test_un_sondeo_por_ventana(self):
+        with mock.patch.object(metricas_celery.threading, 'Thread', HiloInmediato), \
+                mock.patch.object(metricas_celery, 'profundidad_colas', return_value=COLAS) as profundidad:
+            metricas_celery.profundidad_colas_cacheada()
+            self.assertEqual(metricas_celery.profundidad_colas_cacheada(), COLAS)
+        profundidad.assert_called_once()
+
+    def test_broker_caido_borra_las_series(self):
+        cache.set(metricas_celery.CLAVE_COLAS, COLAS)
+        with mock.patch.object(metricas_celery.threading, 'Thread', HiloInmediato), \
+                mock.patch.object(metricas_celery, 'profundidad_colas', side_effect=OSError('sin broker')):
+            self.assertEqual(metricas_celery.profundidad_colas_cacheada(), [])
@@ -0,0 +1,72 @@
+# usuarios/tests/test_puntajes.py
+from datetime import datetime
+
+import numpy as np
+from django.utils import timezone
+
+from usuarios.archivo import archivar_periodos_cerrados
+from usuarios.models import Intento, Respuesta
+from usuarios.puntajes import CATEGORIAS, matriz_puntajes, matriz_puntajes_consulta, puntajes_por_categoria
+from usuarios.rendimiento.datos import sembrar_cuestionario
+
+from .base import PruebaUsuarios, crear_estudiante, crear_intento
+
+CREADO = timezone.make_aware(datetime(2025, 10, 6, 8, 0))
+CORTE = timezone.make_aware(datetime(2026, 3, 1))
+
+
+class PuntajesTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cuestionario = sembrar_cuestionario()
+        estud_id = crear_estudiante('53000001', cls.insti_id).EstudID
+        cls.valores = {
+            'completo': [(i % 5) + 1 for i in range(20)],
+            'parcial': [5, 4, 3],
+            'vacio': [],
+        }
+        cls.intentos = {
+            nombre: crear_intento(estud_id, cuestionario, CREADO, valores).IntentID
+            for nombre, valores in cls.valores.items()
+        }
+
+    def esperado(self, nombre):
+        puntajes = puntajes_por_categoria(self.valores[nombre])
+        return [puntajes.get(categoria, np.nan) for categoria in CATEGORIAS]
+
+    def test_matriz_coincide_con_el_calculo_por_intento(self):
+        ids = [self.intentos['parcial'], self.intentos['vacio'], self.intentos['completo']]
+
+        matriz = matriz_puntajes(ids)
+
+        np.testing.assert_allclose(matriz[0], self.esperado('parcial'))
+        self.assertTrue(np.isnan(matriz[1]).all())
+        np.testing.assert_allclose(matriz[2], self.esperado('completo'))
+
+    def test_consulta_agregada_coincide_con_la_matriz(self):
+        ids, matriz = matriz_puntajes_consulta(Intento.objects.values('IntentID'))
+
+        # El intento sin respuestas no devuelve fila
+        self.assertEqual(sorted(ids.tolist()), sorted([self.intentos['completo'], self.intentos['parcial']]))
+        np.testing.assert_allclose(matriz, matriz_puntajes(ids))
+
+    def test_intentos_archivados_siguen_puntuando(self):
+        antes = matriz_puntajes([self.intentos['completo']])
+
+        archivar_periodos_cerrados(pausa=0, corte=CORTE)
+
+        self.assertFalse(Respuesta.objects.exists())
+        np.testing.assert_allclose(matriz_puntajes([self.intentos['completo']]), antes)
+        consulta = Intento.objects.filter(IntentID=self.intentos['completo']).values('IntentID')
+        np.testing.assert_allclose(matriz_puntajes_consulta(consulta)[1], antes)
+
+    def test_opciones_borradas_no_puntuan(self):
+        Respuesta.objects.filter(Intent_id=self.intentos['parcial']).update(RespValor='no-es-opcion')
+        consulta = Intento.objects.filter(IntentID=self.intentos['parcial']).values('IntentID')
+
+        _, matriz = matriz_puntajes_consulta(consulta)
+
+        self.assertTrue(np.isnan(matriz).all())
+        self.assertTrue(np.isnan(matriz_puntajes([self.intentos['parcial']])).all())
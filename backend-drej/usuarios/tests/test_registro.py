@@ -0,0 +1,91 @@
+# usuarios/tests/test_registro.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+
+from usuarios.models import Estudiante, Orientador
+from usuarios.registro import RegistroError, _error_integridad, registrar_usuario
+
+from .base import PruebaUsuarios
+
+EMAIL_REGISTRADO = {'email': ['Este correo ya está registrado']}
+DNI_REGISTRADO = {'dni': ['Este DNI ya está registrado']}
+
+
+def datos_registro(**cambios):
+    datos = {
+        'email': 'ana.quispe@ejemplo.com',
+        'password': 'Segura2025',
+        'passwordConfirm': 'Segura2025',
+        'nombres': 'ana lucía',
+        'apellidoPaterno': 'quispe',
+        'apellidoMaterno': 'mamani',
+        'dni': '45678912',
+        'telefono': '987654321',
+        'fechaNacimiento': '2008-05-10',
+        'insti_id': None,
+    }
+    datos.update(cambios)
+    return datos
+
+
+class RegistroTests(PruebaUsuarios):
+
+    def registrar(self, **cambios):
+        return registrar_usuario(datos_registro(**{'insti_id': self.insti_id, **cambios}))
+
+    def test_registra_estudiante(self):
+        resultado = self.registrar()
+
+        self.assertEqual(resultado['rol'], 'Estudiante')
+        user = User.objects.get(username='45678912')
+        self.assertTrue(user.check_password('Segura2025'))
+        estudiante = Estudiante.objects.get(User=user)
+        self.assertEqual(estudiante.EstudNombres, 'Ana Lucía')
+        self.assertEqual(estudiante.Insti_id, self.insti_id)
+
+    def test_registra_orientador_pendiente(self):
+        self.registrar(rol='Orientador', cargo='psicóloga', areaEspecializacion='orientación vocacional')
+
+        orientador = Orientador.objects.get(OrienDNI='45678912')
+        self.assertEqual(orientador.OrienCargo, 'Psicóloga')
+        self.assertFalse(Estudiante.objects.filter(EstudDNI='45678912').exists())
+
+    def test_dni_repetido(self):
+        self.registrar()
+        with self.assertRaises(RegistroError) as error:
+            self.registrar(email='otra@ejemplo.com')
+        self.assertEqual((error.exception.errores, error.exception.status_code), (DNI_REGISTRADO, 409))
+
+    def test_email_repetido_sin_distinguir_mayusculas(self):
+        self.registrar()
+        with self.assertRaises(RegistroError) as error:
+            self.registrar(dni='45678913', email='Ana.Quispe@Ejemplo.com')
+        self.assertEqual((error.exception.errores, error.exception.status_code), (EMAIL_REGISTRADO, 409))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_carrera_resuelta_por_la_bd_responde_igual(self):
+        self.registrar()
+        libre = {'dni': False, 'email': False, 'institucion': 'I.E. Prueba'}
+        with mock.patch('usuarios.registro.consultar_unicidad', return_value=libre), \
+                self.assertRaises(RegistroError) as error:
+            self.registrar(email='otra@ejemplo.com')
+        self.assertEqual((error.exception.errores, error.exception.status_code), (DNI_REGISTRADO, 409))
+
+    def test_restriccion_de_email_se_traduce_igual_que_la_validacion(self):
+        error = _error_integridad(IntegrityError(
+            "Cannot insert duplicate key row in object 'dbo.auth_user' with unique index 'UX_auth_user_email'"
+        ))
+        self.assertEqual((error.errores, error.status_code), (EMAIL_REGISTRADO, 409))
+
+    def test_institucion_inexistente(self):
+        with self.assertRaises(RegistroError) as error:
+            self.registrar(insti_id=self.insti_id + 1000)
+        self.assertIn('institucion', error.exception.errores)
+        self.assertFalse(User.objects.exists())
+
+    def test_formato_no_valido_no_consulta_la_bd(self):
+        with self.assertNumQueries(0), self.assertRaises(RegistroError) as error:
+            self.registrar(telefono='812345678')
+        self.assertIn('telefono', error.exception.errores)
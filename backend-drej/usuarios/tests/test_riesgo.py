@@ -0,0 +1,115 @@
+# usuarios/tests/test_riesgo.py
+from datetime import timedelta
+
+import numpy as np
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from usuarios import riesgo
+from usuarios.catalogos import NIVEL_RIESGO_ALTO, NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO
+from usuarios.mantenimiento import purgar_datos_vencidos
+from usuarios.models import Estudiante, Intento
+from usuarios.puntajes import CATEGORIAS
+from usuarios.rendimiento.datos import sembrar_cuestionario
+
+from .base import PruebaUsuarios, crear_estudiante, crear_intento
+
+# Respuestas (1..5) por pregunta: cada categoría suma 4 preguntas
+VARIADO = [5, 5, 5, 5, 1, 1, 1, 1, 3, 3, 3, 3, 4, 4, 4, 4, 2, 2, 2, 2]
+BAJO_Y_PLANO = [1] * 20
+
+
+def fila(*puntajes):
+    """Puntajes de todas las categorías (repite el último); sin argumentos, sin datos"""
+    if not puntajes:
+        return [np.nan] * len(CATEGORIAS)
+    return list(puntajes) + [puntajes[-1]] * (len(CATEGORIAS) - len(puntajes))
+
+
+class ClasificarTests(SimpleTestCase):
+
+    def test_niveles_y_motivos(self):
+        puntajes = [
+            fila(90, 20, 50),          # preferencia clara
+            fila(30, 25, 28),          # puntajes bajos y perfil plano
+            fila(60, 55, 58),          # perfil plano
+            fila(),                    # abandonó sin confirmar nunca
+            fila(),                    # sin intentos
+        ]
+        niveles, mascaras = riesgo.clasificar(puntajes, [1, 1, 2, 0, 0], [0, 0, 0, 1, 0])
+
+        self.assertEqual(niveles.tolist(), [
+            NIVEL_RIESGO_BAJO, NIVEL_RIESGO_ALTO, NIVEL_RIESGO_MEDIO, NIVEL_RIESGO_ALTO, riesgo.SIN_CLASIFICAR,
+        ])
+        self.assertEqual(
+            [riesgo.motivos_texto(m) for m in mascaras.tolist()],
+            [None, 'puntajes_bajos,perfil_plano', 'perfil_plano', 'abandono,sin_confirmar', None]
+        )
+
+    def test_dos_abandonos_suman_un_punto_mas(self):
+        niveles, _ = riesgo.clasificar([fila(90, 20), fila(90, 20)], [1, 1], [1, 2])
+        self.assertEqual(niveles.tolist(), [NIVEL_RIESGO_MEDIO, NIVEL_RIESGO_MEDIO])
+        niveles, _ = riesgo.clasificar([fila(60, 55)], [1], [2])
+        self.assertEqual(niveles.tolist(), [NIVEL_RIESGO_ALTO])
+
+
+class ClasificarEstudiantesTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cuestionario = sembrar_cuestionario()
+
+    def setUp(self):
+        super().setUp()
+        self.ahora = timezone.now()
+        self.hace_un_mes = self.ahora - timedelta(days=40)
+
+    def nivel(self, estudiante):
+        estudiante.refresh_from_db()
+        return estudiante.NivelRiesgo_id, estudiante.RiesgoMotivos
+
+    def test_clasifica_por_el_ultimo_intento_confirmado(self):
+        estudiante = crear_estudiante('52000001', self.insti_id)
+        crear_intento(estudiante.EstudID, self.cuestionario, self.hace_un_mes, BAJO_Y_PLANO)
+        crear_intento(estudiante.EstudID, self.cuestionario, self.ahora, VARIADO)
+
+        resultado = riesgo.clasificar_institucion(self.insti_id, self.ahora)
+
+        self.assertEqual(resultado['cambios'], 1)
+        self.assertEqual(self.nivel(estudiante), (NIVEL_RIESGO_BAJO, None))
+        # Sin cambios no se vuelve a escribir
+        self.assertEqual(riesgo.clasificar_institucion(self.insti_id, self.ahora)['cambios'], 0)
+
+    def test_abandono_solo_cuenta_intentos_en_progreso(self):
+        abandona = crear_estudiante('52000001', self.insti_id)
+        reabre = crear_estudiante('52000002', self.insti_id)
+        crear_intento(abandona.EstudID, self.cuestionario, self.hace_un_mes, confirmado=False)
+        # reiniciar_cuestionario deja el intento sin confirmar con EstadoID 2
+        crear_intento(reabre.EstudID, self.cuestionario, self.hace_un_mes, VARIADO, confirmado=False, estado_id=2)
+        crear_intento(reabre.EstudID, self.cuestionario, self.ahora, VARIADO)
+
+        riesgo.clasificar_institucion(self.insti_id, self.ahora)
+
+        self.assertEqual(self.nivel(abandona), (NIVEL_RIESGO_ALTO, 'abandono,sin_confirmar'))
+        self.assertEqual(self.nivel(reabre), (NIVEL_RIESGO_BAJO, None))
+
+    def test_la_purga_no_borra_la_senal_de_abandono(self):
+        estudiante = crear_estudiante('52000001', self.insti_id)
+        for dias in (40, 45):
+            crear_intento(estudiante.EstudID, self.cuestionario, self.ahora - timedelta(days=dias), [3] * 5,
+                          confirmado=False)
+        riesgo.clasificar_institucion(self.insti_id, self.ahora)
+
+        resultado = purgar_datos_vencidos(['intentos_abandonados'], pausa=0)
+
+        self.assertEqual(resultado['intentos_abandonados']['tblIntento'], 2)
+        self.assertFalse(Intento.objects.filter(Estud=estudiante).exists())
+        self.assertEqual(Estudiante.objects.get(pk=estudiante.pk).IntentosAbandonados, 2)
+        self.assertEqual(riesgo.clasificar_institucion(self.insti_id, self.ahora)['cambios'], 0)
+        self.assertEqual(self.nivel(estudiante), (NIVEL_RIESGO_ALTO, 'abandono,sin_confirmar'))
+
+        # Al confirmar un cuestionario los abandonos purgados dejan de contar
+        crear_intento(estudiante.EstudID, self.cuestionario, self.ahora, VARIADO)
+        riesgo.clasificar_estudiante(estudiante.EstudID, self.ahora)
+        self.assertEqual(self.nivel(estudiante), (NIVEL_RIESGO_BAJO, None))
@@ -0,0 +1,65 @@
+# usuarios/tests/test_unicidad.py
+from unittest import mock
+
+from django.core.cache import cache
+
+from usuarios import unicidad
+from usuarios.rendimiento.datos import email_prueba, sembrar_estudiantes
+
+from .base import PruebaUsuarios
+
+
+class UnicidadTests(PruebaUsuarios):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dni = sembrar_estudiantes(1, cls.insti_id)[0]
+
+    def setUp(self):
+        super().setUp()
+        self._olvidar_copia_local()
+
+    def _olvidar_copia_local(self):
+        # Como si la petición llegara a otro proceso
+        unicidad._filtro = unicidad._filtro_version = None
+
+    def test_sin_filtro_en_cache_consulta_la_bd_sin_construirlo(self):
+        with mock.patch.object(unicidad, '_construir_filtro') as construir, self.assertNumQueries(1):
+            self.assertTrue(unicidad.dni_registrado(self.dni))
+        construir.assert_not_called()
+
+    def test_filtro_publicado_responde_libre_sin_bd(self):
+        unicidad.reconstruir_filtro()
+        self._olvidar_copia_local()
+        with self.assertNumQueries(0):
+            self.assertFalse(unicidad.dni_registrado('99999999'))
+            self.assertFalse(unicidad.email_registrado('libre@ejemplo.com'))
+        with self.assertNumQueries(1):
+            self.assertTrue(unicidad.email_registrado(email_prueba(self.dni).upper()))
+
+    def test_registro_visible_para_otro_proceso_antes_de_reconstruir(self):
+        unicidad.reconstruir_filtro()
+        unicidad.registrar_en_filtro(dni='87654321', email='Nuevo@Ejemplo.com')
+        self._olvidar_copia_local()
+        with self.assertNumQueries(0):
+            self.assertTrue(unicidad.dni_registrado('87654321'))
+            self.assertTrue(unicidad.email_registrado('nuevo@ejemplo.com'))
+
+    def test_version_nueva_reemplaza_la_copia_local(self):
+        unicidad.reconstruir_filtro()
+        self.assertFalse(unicidad.dni_registrado('87654321'))
+        copia = unicidad._filtro
+
+        nuevo = sembrar_estudiantes(2, self.insti_id)[1]
+        unicidad.reconstruir_filtro()
+        with self.assertNumQueries(1):
+            self.assertTrue(unicidad.dni_registrado(nuevo))
+        self.assertIsNot(unicidad._filtro, copia)
+
+    def test_filtro_vencido_vuelve_a_la_bd(self):
+        unicidad.reconstruir_filtro()
+        unicidad.dni_registrado('99999999')
+        cache.delete_many([unicidad.CLAVE_FILTRO, unicidad.CLAVE_VERSION])
+        with self.assertNumQueries(1):
+            self.assertFalse(unicidad.dni_registrado('99999999'))
@@ -0,0 +1,16 @@
+# usuarios/throttles.py
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class UnicidadRateThrottle(SimpleRateThrottle):
+    """
+    Límite por IP para check-dni / check-email (se llaman en cada pulsación).
+    La tasa se configura en REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['unicidad']
+    """
+    scope = 'unicidad'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
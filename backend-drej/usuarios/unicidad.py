@@ -0,0 +1,257 @@
+# usuarios/unicidad.py
+"""
+Verificación rápida de unicidad de DNI y email (check-dni / check-email)
+
+Estos endpoints se llaman en cada pulsación del formulario de registro, así
+que la verificación se hace en tres niveles:
+
+1. Cache de respuestas (Django cache, TTL corto)
+2. Filtro de Bloom con todos los DNIs y emails registrados: si el valor NO
+   está en el filtro, está libre con certeza y no se toca la BD
+3. Una sola consulta combinada e indexada sobre auth_user, tblEstudiante y
+   tblOrientador
+
+El filtro lo reconstruye la tarea periódica reconstruir_filtro_unicidad
+(cada UNICIDAD_FILTRO_TTL segundos y al arrancar beat) y lo guarda en la
+cache compartida con un número de versión; cada proceso guarda una copia y
+solo la vuelve a leer cuando cambia la versión. Ninguna petición recorre
+las tablas: sin filtro en la cache se consulta la BD directamente.
+
+Un registro marca el DNI/email como usado en la cache de respuestas hasta
+que la siguiente reconstrucción lo incluya, así los demás procesos no lo
+dan por libre. El registro sigue protegido por las restricciones únicas
+de la BD.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class FiltroBloom:
+    """Filtro de Bloom simple sobre un bytearray (sin falsos negativos)"""
+
+    def __init__(self, capacidad, tasa_error=0.01):
+        capacidad = max(int(capacidad), 1)
+        self.num_bits = max(int(-capacidad * math.log(tasa_error) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacidad * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def estado(self):
+        """Parámetros y bits, para guardarlo en la cache"""
+        return self.num_bits, self.num_hashes, bytes(self.bits)
+
+    @classmethod
+    def desde_estado(cls, estado):
+        num_bits, num_hashes, bits = estado
+        filtro = cls.__new__(cls)
+        filtro.num_bits, filtro.num_hashes, filtro.bits = num_bits, num_hashes, bytearray(bits)
+        return filtro
+
+    def _posiciones(self, valor):
+        digest = hashlib.blake2b(valor.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        # Doble hashing (Kirsch-Mitzenmacher)
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def agregar(self, valor):
+        for pos in self._posiciones(valor):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, valor):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._posiciones(valor))
+
+
+CLAVE_FILTRO = 'unicidad:filtro'
+CLAVE_VERSION = 'unicidad:filtro:version'
+
+# Copia local del filtro de la cache y su versión
+_filtro = None
+_filtro_version = None
+_filtro_lock = threading.Lock()
+
+
+def normalizar_email(email):
+    return (email or '').strip().lower()
+
+
+def _clave_dni(dni):
+    return f'dni:{dni}'
+
+
+def _clave_email(email):
+    return f'email:{email}'
+
+
+def _construir_filtro():
+    """Cargar todos los DNIs y emails registrados en un filtro nuevo (1 consulta)"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT 'd', username FROM auth_user
+            UNION ALL SELECT 'd', EstudDNI FROM tblEstudiante
+            UNION ALL SELECT 'd', OrienDNI FROM tblOrientador
+            UNION ALL SELECT 'e', email FROM auth_user WHERE email <> ''
+            UNION ALL SELECT 'e', OrienEmailInstitucional FROM tblOrientador
+        """)
+        filas = cursor.fetchall()
+
+    filtro = FiltroBloom(
+        capacidad=max(len(filas) * 2, 10000),
+        tasa_error=getattr(settings, 'UNICIDAD_FILTRO_TASA_ERROR', 0.01)
+    )
+    for tipo, valor in filas:
+        if not valor:
+            continue
+        if tipo == 'd':
+            filtro.agregar(_clave_dni(valor.strip()))
+        else:
+            filtro.agregar(_clave_email(normalizar_email(valor)))
+
+    logger.info(f"[UNICIDAD] Filtro de Bloom construido con {len(filas)} valores")
+    return filtro, len(filas)
+
+
+def _vigencia_filtro():
+    """Segundos que vale un filtro en la cache: si la tarea deja de
+    reconstruirlo, se vuelve a consultar la BD en lugar de usar uno viejo"""
+    return getattr(settings, 'UNICIDAD_FILTRO_TTL', 300) * 3
+
+
+def reconstruir_filtro():
+    """
+    Construir el filtro y publicarlo en la cache compartida con una versión
+    nueva. Lo llama la tarea reconstruir_filtro_unicidad, nunca una petición.
+
+    Returns:
+        int: valores cargados en el filtro
+    """
+    filtro, cantidad = _construir_filtro()
+    version = time.time_ns()
+    vigencia = _vigencia_filtro()
+    # Primero los bits: quien vea la versión nueva ya los encuentra
+    cache.set(CLAVE_FILTRO, (version, filtro.estado()), vigencia)
+    cache.set(CLAVE_VERSION, version, vigencia)
+    return cantidad
+
+
+def _obtener_filtro(version):
+    """
+    Copia local del filtro de la versión publicada; None si no hay filtro
+    en la cache (todavía no se construyó o venció)
+    """
+    global _filtro, _filtro_version
+
+    if version is None:
+        return None
+    if version == _filtro_version:
+        return _filtro
+
+    with _filtro_lock:
+        if version != _filtro_version:
+            guardado = cache.get(CLAVE_FILTRO)
+            if guardado is None:
+                return None
+            # Puede ser más nuevo que `version`: se queda con el que leyó
+            _filtro_version, estado = guardado
+            _filtro = FiltroBloom.desde_estado(estado)
+    return _filtro
+
+
+def registrar_en_filtro(dni=None, email=None):
+    """
+    Marcar un DNI/email como usado tras un registro exitoso.
+
+    El filtro de la cache no se toca: la respuesta "registrado" queda en la
+    cache compartida hasta que una reconstrucción lo incluya con seguridad
+    (la que ya estaba en curso puede no verlo). También invalida la cache
+    negativa de login de EmailOrDNIBackend.
+    """
+    from .backends import clave_login_desconocido
+
+    claves = []
+    if dni:
+        claves.append(_clave_dni(dni))
+        cache.delete(clave_login_desconocido(dni))
+    if email:
+        email = normalizar_email(email)
+        claves.append(_clave_email(email))
+        cache.delete(clave_login_desconocido(email))
+
+    if claves:
+        cache.set_many(
+            {f'unicidad:{clave}': True for clave in claves},
+            getattr(settings, 'UNICIDAD_FILTRO_TTL', 300) * 2
+        )
+
+
+def consultar_unicidad(dni=None, email=None, insti_id=None):
+    """
+    Verificar DNI y/o email contra usuarios, estudiantes y orientadores
+    en una sola consulta. Si se pasa insti_id, la misma consulta devuelve
+    el nombre de la institución (lo usa el registro).
+
+    Returns:
+        dict: {'dni': bool, 'email': bool, 'institucion': str | None}
+              (True = ya registrado; institucion None = no existe)
+    """
+    email = normalizar_email(email) or None
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                CASE WHEN EXISTS (SELECT 1 FROM auth_user WHERE username = %s)
+                       OR EXISTS (SELECT 1 FROM tblEstudiante WHERE EstudDNI = %s)
+                       OR EXISTS (SELECT 1 FROM tblOrientador WHERE OrienDNI = %s)
+                     THEN 1 ELSE 0 END,
+                CASE WHEN EXISTS (SELECT 1 FROM auth_user WHERE UPPER(email) = UPPER(%s))
+                       OR EXISTS (SELECT 1 FROM tblOrientador WHERE UPPER(OrienEmailInstitucional) = UPPER(%s))
+                     THEN 1 ELSE 0 END,
+                (SELECT InstiNombre FROM tblInstitucionEducativa WHERE InstiID = %s)
+        """, [dni, dni, dni, email, email, insti_id])
+        dni_existe, email_existe, institucion = cursor.fetchone()
+
+    return {'dni': bool(dni_existe), 'email': bool(email_existe), 'institucion': institucion}
+
+
+def _verificar(clave, **kwargs):
+    clave_cache = f'unicidad:{clave}'
+    # Una sola ida a la cache para la respuesta y la versión del filtro
+    cacheado = cache.get_many([clave_cache, CLAVE_VERSION])
+    existe = cacheado.get(clave_cache)
+    if existe is not None:
+        return existe
+
+    filtro = _obtener_filtro(cacheado.get(CLAVE_VERSION))
+    if filtro is not None and clave not in filtro:
+        # Caso común: definitivamente libre, sin ir a la BD
+        return False
+
+    campo = 'dni' if 'dni' in kwargs else 'email'
+    existe = consultar_unicidad(**kwargs)[campo]
+    cache.set(clave_cache, existe, getattr(settings, 'UNICIDAD_CACHE_TTL', 30))
+    return existe
+
+
+def dni_registrado(dni):
+    """True si el DNI ya pertenece a un usuario, estudiante u orientador"""
+    dni = (dni or '').strip()
+    if len(dni) != 8 or not dni.isdigit():
+        # El registro solo acepta DNIs de 8 dígitos: no puede existir
+        return False
+    return _verificar(_clave_dni(dni), dni=dni)
+
+
+def email_registrado(email):
+    """True si el email (sin distinguir mayúsculas) ya está registrado"""
+    email = normalizar_email(email)
+    if not email or '@' not in email:
+        return False
+    return _verificar(_clave_email(email), email=email)
@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import views_orientador
+from . import views_async
 
 urlpatterns = [
     path('check-dni/<str:dni>/', views.check_dni, name='check-dni'),
@@ -12,6 +13,7 @@ urlpatterns = [
     path('estudiante/cuestionarios/', views.listar_cuestionarios, name='listar-cuestionarios'),
     path('estudiante/cuestionarios/<int:cuestionario_id>/', views.obtener_cuestionario, name='obtener-cuestionario'),
     path('estudiante/cuestionarios/iniciar/', views.iniciar_cuestionario, name='iniciar-cuestionario'),
+    path('estudiante/cuestionarios/<int:cuestionario_id>/retomar/', views.retomar_cuestionario, name='retomar-cuestionario'),
     path('estudiante/cuestionarios/guardar/', views.guardar_respuestas, name='guardar-respuestas'),
     path('estudiante/resultados/', views.obtener_resultados, name='obtener-resultados'),
     path('estudiante/resultados/<int:intento_id>/', views.obtener_resultado_detalle, name='obtener-resultado-detalle'),
@@ -20,6 +22,17 @@ urlpatterns = [
     path('api/orientador/cuestionarios/crear/', views_orientador.crear_cuestionario, name='crear-cuestionario'),
     path('api/orientador/cuestionarios/<uuid:cuestionario_id>/actualizar/', views_orientador.actualizar_cuestionario, name='actualizar-cuestionario'),
     path('api/orientador/cuestionarios/<uuid:cuestionario_id>/eliminar/', views_orientador.eliminar_cuestionario, name='eliminar-cuestionario'),
+    path('api/orientador/estudiantes/importar/', views_orientador.importar_estudiantes, name='importar-estudiantes'),
+    path('api/orientador/resultados/exportar/', views_orientador.exportar_resultados, name='exportar-resultados'),
+    path('api/orientador/filtros/', views_orientador.filtros_orientador, name='filtros-orientador'),
+    path('api/orientador/filtros/<int:filtro_id>/', views_orientador.filtro_orientador, name='filtro-orientador'),
+    path('api/orientador/filtros/<int:filtro_id>/resultados/', views_orientador.resultados_filtro, name='resultados-filtro'),
+    path('api/orientador/cohortes/', views_orientador.analitica_cohorte, name='analitica-cohorte'),
     path('estudiante/cuestionarios/<int:cuestionario_id>/verificar-retomar/', views_orientador.verificar_puede_retomar, name='verificar-puede-retomar'),
     path('estudiante/cuestionarios/<int:cuestionario_id>/reiniciar/', views_orientador.reiniciar_cuestionario, name='reiniciar-cuestionario'),
+
+    # Variantes async (servir con ASGI: ver drej_backend/asgi.py)
+    path('async/reniec/consultar/<str:dni>/', views_async.consultar_reniec_async, name='consultar-reniec-async'),
+    path('async/estudiante/resultados/', views_async.obtener_resultados_async, name='obtener-resultados-async'),
+    path('async/estudiante/resultados/<int:intento_id>/estado/', views_async.estado_recomendaciones_async, name='estado-recomendaciones-async'),
 ]
\ No newline at end of file
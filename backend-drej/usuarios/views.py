@@ -1,16 +1,28 @@
 import requests
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, Q
 from django.utils import timezone
-from .serializers import RegisterSerializer, InstitucionSerializer
+from .serializers import InstitucionSerializer
 from .models import InstitucionEducativa
+from .archivo import inicio_periodo_actual, intento_archivable
+from .cuestionarios import payload_cuestionario
+from .metricas import medir_http
 from .motor_ia_groq import procesar_recomendaciones_groq
+from .replicas import lectura_replica
+from .tasks import procesar_recomendaciones_intento
+from .throttles import UnicidadRateThrottle
+from .unicidad import dni_registrado, email_registrado
 from .models import (
-    Cuestionario, Pregunta, Opcion, Intento, Respuesta, 
-    Recomendacion, Estudiante, EstadoIntento
+    Cuestionario, Opcion, Intento, Respuesta, 
+    Recomendacion, Estudiante, EstadoIntento,
+    RespuestaArchivo, RecomendacionArchivo
 )
 
 from .serializers import (
@@ -37,85 +49,28 @@ def listar_instituciones(request):
     serializer = InstitucionSerializer(instituciones, many=True)
     return Response(serializer.data)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])  # Permitir acceso sin autenticación
-def register(request):
-    
-    try:
-        logger.info(f"[REGISTER] Nueva solicitud de registro: {request.data.get('rol', 'N/A')}")
-        
-        serializer = RegisterSerializer(data=request.data)
-        
-        if serializer.is_valid():
-            result = serializer.save()
-            
-            logger.info(f"[REGISTER] Usuario registrado exitosamente: {result['user'].username} ({result['rol']})")
-            
-            response_data = {
-                'success': True,
-                'message': result['message'],
-                'user': {
-                    'id': result['user'].id,
-                    'username': result['user'].username,
-                    'email': result['user'].email,
-                    'first_name': result['user'].first_name,
-                    'last_name': result['user'].last_name,
-                    'rol': result['rol']
-                }
-            }
-            
-            if result['rol'] == 'Orientador':
-                response_data['info'] = 'Tu cuenta está pendiente de verificación. Te notificaremos por email cuando sea aprobada.'
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
-        
-        else:
-            logger.warning(f"[REGISTER] Errores de validación: {serializer.errors}")
-            return Response({
-                'success': False,
-                'errors': serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
-    
-    except Exception as e:
-        logger.error(f"[REGISTER] Error inesperado: {str(e)}", exc_info=True)
-        return Response({
-            'success': False,
-            'error': 'Error interno del servidor. Por favor, intenta nuevamente.'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([UnicidadRateThrottle])
 def check_dni(request, dni):
     """
-    Verificar si un DNI ya está registrado
+    Verificar si un DNI ya está registrado (usuarios, estudiantes u orientadores)
     
     GET /api/check-dni/<dni>/
     """
-    from django.contrib.auth.models import User
-    from .models import Estudiante
-    
-    exists = (
-        User.objects.filter(username=dni).exists() or
-        Estudiante.objects.filter(EstudDNI=dni).exists()
-    )
-    
-    return Response({'exists': exists})
+    return Response({'exists': dni_registrado(dni)})
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([UnicidadRateThrottle])
 def check_email(request, email):
     """
-    Verificar si un email ya está registrado
+    Verificar si un email ya está registrado (sin distinguir mayúsculas)
     
     GET /api/check-email/<email>/
     """
-    from django.contrib.auth.models import User
-    
-    exists = User.objects.filter(email=email).exists()
-    
-    return Response({'exists': exists})
+    return Response({'exists': email_registrado(email)})
 
 
 @api_view(['GET'])
@@ -166,6 +121,52 @@ def validate_domain(request):
         'message': 'Dominio no permitido para orientadores'
     })
 
+FACTILIZA_DNI_URL = "https://api.factiliza.com/v1/dni/info/"
+
+
+def construir_respuesta_reniec(dni, status_code, resultado, texto=''):
+    """
+    Traducir la respuesta de Factiliza al formato que espera el frontend.
+    Compartido por la vista síncrona y la asíncrona (views_async).
+    
+    Returns:
+        (dict, int): cuerpo de la respuesta y código HTTP
+    """
+    if status_code == 200:
+        data = (resultado or {}).get('data', {})
+
+        logger.info(f"[FACTILIZA] Consulta exitosa para DNI: {dni}")
+        
+        return {
+            "success": True,
+            "dni": dni,
+            "nombres": data.get("nombres", ""),  # ✅ Ahora con guiones bajos
+            "apellidoPaterno": data.get("apellido_paterno", ""),  # ✅
+            "apellidoMaterno": data.get("apellido_materno", ""),  # ✅
+            "fechaNacimiento": data.get("fecha_nacimiento", ""),  # ✅
+        }, status.HTTP_200_OK
+    
+    elif status_code == 404:
+        logger.warning(f"[FACTILIZA] DNI no encontrado: {dni}")
+        return {
+            "success": False,
+            "message": "No se encontró información para este DNI"
+        }, status.HTTP_404_NOT_FOUND
+    
+    elif status_code == 401:
+        logger.error("[FACTILIZA] Token inválido o expirado")
+        return {
+            "success": False,
+            "message": "Error de autenticación con el servicio"
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+    
+    logger.error(f"[FACTILIZA] Error de API: {status_code} - {texto}")
+    return {
+        "success": False,
+        "message": "Error al consultar el servicio de identificación"
+    }, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def consultar_reniec(request, dni):
@@ -190,51 +191,23 @@ def consultar_reniec(request, dni):
                 "message": "Servicio de consulta no configurado"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        url = f"https://api.factiliza.com/v1/dni/info/{dni}"
+        url = f"{FACTILIZA_DNI_URL}{dni}"
         headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
         
         logger.info(f"[FACTILIZA] Consultando DNI: {dni}")
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            result = response.json()
-
-            data = result.get('data', {})
-
-            logger.info(f"[FACTILIZA] Consulta exitosa para DNI: {dni}")
-            
-            return Response({
-                "success": True,
-                "dni": dni,
-                "nombres": data.get("nombres", ""),  # ✅ Ahora con guiones bajos
-                "apellidoPaterno": data.get("apellido_paterno", ""),  # ✅
-                "apellidoMaterno": data.get("apellido_materno", ""),  # ✅
-                "fechaNacimiento": data.get("fecha_nacimiento", ""),  # ✅
-            }, status=status.HTTP_200_OK)
-        
-        elif response.status_code == 404:
-            logger.warning(f"[FACTILIZA] DNI no encontrado: {dni}")
-            return Response({
-                "success": False,
-                "message": "No se encontró información para este DNI"
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        elif response.status_code == 401:
-            logger.error("[FACTILIZA] Token inválido o expirado")
-            return Response({
-                "success": False,
-                "message": "Error de autenticación con el servicio"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        else:
-            logger.error(f"[FACTILIZA] Error de API: {response.status_code} - {response.text}")
-            return Response({
-                "success": False,
-                "message": "Error al consultar el servicio de identificación"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        with medir_http('factiliza'):
+            response = requests.get(url, headers=headers, timeout=10)
+        
+        body, codigo = construir_respuesta_reniec(
+            dni,
+            response.status_code,
+            response.json() if response.status_code == 200 else None,
+            response.text
+        )
+        return Response(body, status=codigo)
     
     except requests.exceptions.Timeout:
         logger.error(f"[FACTILIZA] Timeout al consultar DNI: {dni}")
@@ -352,8 +325,10 @@ def listar_cuestionarios(request):
     try:
         estudiante = Estudiante.objects.get(User=request.user)
         
-        # Obtener todos los cuestionarios activos
-        cuestionarios = Cuestionario.objects.filter(CuestActivo=True)
+        # Obtener todos los cuestionarios activos con su número de preguntas
+        cuestionarios = Cuestionario.objects.filter(CuestActivo=True).annotate(
+            total_preguntas=Count('pregunta', filter=Q(pregunta__PregActiva=True))
+        )
         
         # Obtener intentos del estudiante
         intentos_estudiante = Intento.objects.filter(
@@ -365,11 +340,7 @@ def listar_cuestionarios(request):
         
         resultado = []
         for cuest in cuestionarios:
-            # Contar preguntas
-            total_preguntas = Pregunta.objects.filter(
-                Cuest=cuest,
-                PregActiva=True
-            ).count()
+            total_preguntas = cuest.total_preguntas
             
             # Calcular duración estimada (30 segundos por pregunta)
             duracion_min = (total_preguntas * 30) // 60
@@ -414,43 +385,10 @@ def obtener_cuestionario(request, cuestionario_id):
         Cuestionario completo con preguntas y opciones
     """
     try:
-        cuestionario = Cuestionario.objects.get(
-            CuestID=cuestionario_id,
-            CuestActivo=True
-        )
-        
-        # Obtener preguntas con opciones
-        preguntas = Pregunta.objects.filter(
-            Cuest=cuestionario,
-            PregActiva=True
-        ).prefetch_related('opciones').order_by('PregOrden')
-        
-        resultado = {
-            'id': cuestionario.CuestID,
-            'nombre': cuestionario.CuestNombre,
-            'version': cuestionario.CuestVersion,
-            'preguntas': []
-        }
-        
-        for pregunta in preguntas:
-            opciones = Opcion.objects.filter(Preg=pregunta).order_by('OpcionOrden')
-            
-            resultado['preguntas'].append({
-                'id': pregunta.PregID,
-                'texto': pregunta.PregTexto,
-                'orden': pregunta.PregOrden,
-                'tipo': pregunta.PregTipo,
-                'categoria': pregunta.PregCategoria,
-                'opciones': [
-                    {
-                        'id': opcion.OpcionID,
-                        'texto': opcion.OpcionTexto,
-                        'valor': opcion.OpcionValor,
-                        'orden': opcion.OpcionOrden
-                    }
-                    for opcion in opciones
-                ]
-            })
+        # Armado una vez y cacheado (usuarios/cuestionarios.py)
+        resultado = payload_cuestionario(cuestionario_id)
+        if resultado is None:
+            raise Cuestionario.DoesNotExist
         
         return Response(resultado, status=status.HTTP_200_OK)
         
@@ -465,32 +403,104 @@ def obtener_cuestionario(request, cuestionario_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _a_entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+# Obtener o crear el intento en progreso en un solo viaje a la BD:
+# - MERGE con HOLDLOCK: dos peticiones simultáneas (doble clic, reintentos)
+#   no pueden insertar las dos; la segunda espera y encuentra la fila.
+#   UX_Intento_en_progreso (migración 0006) lo garantiza también en la BD.
+# - Solo inserta; si ya existía no escribe nada y se lee después.
+# - El cuestionario debe estar activo y el usuario ser estudiante: si no,
+#   USING queda vacío y no se devuelve ninguna fila.
+# - Devuelve una fila por respuesta guardada para que el frontend retome
+#   sin otra llamada (PregID/OpcionID NULL si no hay respuestas).
+SQL_OBTENER_O_CREAR_INTENTO = """
+    SET NOCOUNT ON;
+    DECLARE @nuevo TABLE (IntentID INT);
+    DECLARE @EstudID INT = (SELECT EstudID FROM tblEstudiante WHERE UserID = %s);
+    DECLARE @CuestID INT = (SELECT CuestID FROM tblCuestionario WHERE CuestID = %s AND CuestActivo = 1);
+
+    MERGE tblIntento WITH (HOLDLOCK) AS destino
+    USING (SELECT @EstudID AS EstudID, @CuestID AS CuestID
+           WHERE @EstudID IS NOT NULL AND @CuestID IS NOT NULL) AS origen
+       ON destino.EstudID = origen.EstudID
+      AND destino.CuestID = origen.CuestID
+      AND destino.Confirmado = 0
+    WHEN NOT MATCHED THEN
+        INSERT (EstudID, CuestID, EstadoID, Confirmado, Creado, UltimoAutosave)
+        VALUES (origen.EstudID, origen.CuestID, 1, 0, GETDATE(), NULL)
+    OUTPUT inserted.IntentID INTO @nuevo;
+
+    SELECT i.IntentID,
+           CASE WHEN n.IntentID IS NULL THEN 0 ELSE 1 END AS Nuevo,
+           o.PregID,
+           o.OpcionID
+    FROM tblIntento i
+    LEFT JOIN @nuevo n ON n.IntentID = i.IntentID
+    LEFT JOIN tblRespuesta r ON r.IntentID = i.IntentID
+    LEFT JOIN tblOpcion o ON o.OpcionID = TRY_CAST(r.RespValor AS INT)
+    WHERE i.EstudID = @EstudID AND i.CuestID = @CuestID AND i.Confirmado = 0;
+"""
+
+
+def _obtener_o_crear_intento(user_id, cuestionario_id):
+    """
+    Intento en progreso del usuario (creado si no había) con sus respuestas
+    
+    Returns:
+        (intento_id, nuevo, [{'pregunta_id', 'opcion_id'}]) o None si el
+        usuario no es estudiante o el cuestionario no está activo
+    """
+    from django.db import IntegrityError, connection
+
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(SQL_OBTENER_O_CREAR_INTENTO, [user_id, cuestionario_id])
+            filas = cursor.fetchall()
+        except IntegrityError:
+            # Carrera resuelta por UX_Intento_en_progreso: el otro ya insertó
+            logger.warning("[INICIAR_CUEST] Intento concurrente, se reutiliza el existente")
+            cursor.execute(SQL_OBTENER_O_CREAR_INTENTO, [user_id, cuestionario_id])
+            filas = cursor.fetchall()
+
+    if not filas:
+        return None
+
+    respuestas = [
+        {'pregunta_id': pregunta_id, 'opcion_id': opcion_id}
+        for _, _, pregunta_id, opcion_id in filas
+        if opcion_id is not None
+    ]
+    return int(filas[0][0]), bool(filas[0][1]), respuestas
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def iniciar_cuestionario(request):
     """
-    Iniciar un nuevo intento de cuestionario
+    Iniciar un intento de cuestionario, o retomar el que está en progreso
     
     POST /api/estudiante/cuestionarios/iniciar/
     Body: { "cuestionario_id": 1 }
     
     Returns:
-        { "intento_id": 123, "cuestionario": {...} }
+        {
+            "intento_id": 123,
+            "cuestionario_id": 1,
+            "respuestas": [{"pregunta_id": 1, "opcion_id": 3}, ...],  // guardadas al retomar
+            "mensaje": "..."
+        }
+    
+    Idempotente: repetir la petición devuelve el mismo intento (200) en
+    lugar de crear otro (201 solo la primera vez).
     """
     try:
-        from django.db import connection
-        from datetime import datetime
-
-        try:
-            estudiante = Estudiante.objects.get(User=request.user)
-            logger.info(f"[INICIAR_CUEST] Estudiante ID: {estudiante.EstudID}")
-        except Estudiante.DoesNotExist:
-            logger.error("[INICIAR_CUEST] Estudiante no encontrado")
-            return Response({
-                'error': 'Estudiante no encontrado'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        cuestionario_id = request.data.get('cuestionario_id')
+        cuestionario_id = _a_entero(request.data.get('cuestionario_id'))
         logger.info(f"[INICIAR_CUEST] Cuestionario ID: {cuestionario_id}")
         
         if not cuestionario_id:
@@ -498,56 +508,38 @@ def iniciar_cuestionario(request):
                 'error': 'cuestionario_id es requerido'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verificar que el cuestionario existe y está activo
-        try:
-            cuestionario = Cuestionario.objects.get(
-                CuestID=cuestionario_id,
-                CuestActivo=True
-            )
-            logger.info(f"[INICIAR_CUEST] Cuestionario encontrado: {cuestionario.CuestNombre}")
-        except Cuestionario.DoesNotExist:
+        intento = _obtener_o_crear_intento(request.user.id, cuestionario_id)
+        
+        if intento is None:
+            # Sin fila: el usuario no es estudiante o el cuestionario no está activo
+            if not Estudiante.objects.filter(User=request.user).exists():
+                logger.error("[INICIAR_CUEST] Estudiante no encontrado")
+                return Response({
+                    'error': 'Estudiante no encontrado'
+                }, status=status.HTTP_404_NOT_FOUND)
             logger.error(f"[INICIAR_CUEST] Cuestionario {cuestionario_id} no encontrado")
             return Response({
                 'error': 'Cuestionario no encontrado o inactivo'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Verificar si ya existe un intento en progreso usando SQL directo
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT IntentID 
-                FROM tblIntento 
-                WHERE EstudID = %s 
-                  AND CuestID = %s 
-                  AND Confirmado = 0
-            """, [estudiante.EstudID, cuestionario_id])
-            
-            row = cursor.fetchone()
-            
-            if row:
-                intento_id = row[0]
-                logger.info(f"[INICIAR_CUEST] Intento existente: {intento_id}")
-                return Response({
-                    'intento_id': intento_id,
-                    'cuestionario_id': cuestionario_id,
-                    'mensaje': 'Ya tienes un intento en progreso'
-                }, status=status.HTTP_200_OK)
-            
-            # Crear nuevo intento usando SQL directo
-            # EstadoID = 1 (En Progreso)
-            cursor.execute("""
-                INSERT INTO tblIntento (EstudID, CuestID, EstadoID, Confirmado, Creado, UltimoAutosave)
-                VALUES (%s, %s, 1, 0, GETDATE(), NULL);
-                SELECT SCOPE_IDENTITY();
-            """, [estudiante.EstudID, cuestionario_id])
-            
-            intento_id = cursor.fetchone()[0]
+        intento_id, nuevo, respuestas = intento
+        
+        if nuevo:
             logger.info(f"[INICIAR_CUEST] Nuevo intento creado: {intento_id}")
+            return Response({
+                'intento_id': int(intento_id),
+                'cuestionario_id': cuestionario_id,
+                'respuestas': [],
+                'mensaje': 'Intento creado exitosamente'
+            }, status=status.HTTP_201_CREATED)
         
+        logger.info(f"[INICIAR_CUEST] Intento existente: {intento_id} ({len(respuestas)} respuestas)")
         return Response({
             'intento_id': int(intento_id),
             'cuestionario_id': cuestionario_id,
-            'mensaje': 'Intento creado exitosamente'
-        }, status=status.HTTP_201_CREATED)
+            'respuestas': respuestas,
+            'mensaje': 'Ya tienes un intento en progreso'
+        }, status=status.HTTP_200_OK)
         
     except Exception as e:
         logger.error(f"[INICIAR_CUEST] Error: {str(e)}", exc_info=True)
@@ -556,6 +548,52 @@ def iniciar_cuestionario(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def retomar_cuestionario(request, cuestionario_id):
+    """
+    Abrir o retomar un cuestionario en una sola llamada
+    
+    POST /api/estudiante/cuestionarios/<id>/retomar/
+    
+    Returns:
+        {
+            "intento_id": 123,
+            "nuevo": false,
+            "cuestionario": {...},  // mismo formato que obtener_cuestionario
+            "respuestas": {"<pregunta_id>": <opcion_id>, ...}
+        }
+    
+    Reemplaza la secuencia iniciar + obtener cuestionario. El intento y las
+    respuestas salen de un solo batch (SQL_OBTENER_O_CREAR_INTENTO) y el
+    cuestionario de la cache: dos consultas en total contando la del JWT.
+    """
+    try:
+        intento = _obtener_o_crear_intento(request.user.id, cuestionario_id)
+        cuestionario = payload_cuestionario(cuestionario_id) if intento else None
+        
+        if cuestionario is None:
+            logger.error(f"[RETOMAR_CUEST] Cuestionario {cuestionario_id} no disponible para el usuario {request.user.id}")
+            return Response({
+                'error': 'Cuestionario no encontrado o inactivo'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        intento_id, nuevo, respuestas = intento
+        logger.info(f"[RETOMAR_CUEST] Intento {intento_id} ({'nuevo' if nuevo else f'{len(respuestas)} respuestas'})")
+        
+        return Response({
+            'intento_id': intento_id,
+            'nuevo': nuevo,
+            'cuestionario': cuestionario,
+            'respuestas': {str(r['pregunta_id']): r['opcion_id'] for r in respuestas}
+        }, status=status.HTTP_201_CREATED if nuevo else status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"[RETOMAR_CUEST] Error: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'Error al retomar cuestionario'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -622,6 +660,29 @@ def guardar_respuestas(request):
                 'error': 'Intento no encontrado o no pertenece al estudiante'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        # Validar todas las opciones en una sola consulta
+        pares = []
+        for resp_data in respuestas_data:
+            pregunta_id = resp_data.get('pregunta_id')
+            opcion_id = resp_data.get('opcion_id')
+            
+            if not pregunta_id or not opcion_id:
+                logger.warning(f"[GUARDAR_RESPUESTAS] Respuesta inválida: {resp_data}")
+                continue
+            pares.append((pregunta_id, opcion_id))
+        
+        pregunta_de_opcion = dict(
+            Opcion.objects.filter(
+                OpcionID__in={_a_entero(opcion_id) for _, opcion_id in pares} - {None}
+            ).values_list('OpcionID', 'Preg_id')
+        )
+        for pregunta_id, opcion_id in pares:
+            if str(pregunta_de_opcion.get(_a_entero(opcion_id))) != str(pregunta_id):
+                logger.warning(f"[GUARDAR_RESPUESTAS] Opción {opcion_id} no válida")
+                return Response({
+                    'error': f'Opción {opcion_id} no válida para pregunta {pregunta_id}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Usar SQL directo para guardar respuestas
         with transaction.atomic():
             with connection.cursor() as cursor:
@@ -629,35 +690,13 @@ def guardar_respuestas(request):
                 cursor.execute("DELETE FROM tblRespuesta WHERE IntentID = %s", [intento_id])
                 logger.info(f"[GUARDAR_RESPUESTAS] Respuestas anteriores eliminadas")
                 
-                # Insertar nuevas respuestas
-                respuestas_insertadas = 0
-                for resp_data in respuestas_data:
-                    pregunta_id = resp_data.get('pregunta_id')
-                    opcion_id = resp_data.get('opcion_id')
-                    
-                    if not pregunta_id or not opcion_id:
-                        logger.warning(f"[GUARDAR_RESPUESTAS] Respuesta inválida: {resp_data}")
-                        continue
-                    
-                    # Verificar que la opción existe
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM tblOpcion 
-                        WHERE OpcionID = %s AND PregID = %s
-                    """, [opcion_id, pregunta_id])
-                    
-                    if cursor.fetchone()[0] == 0:
-                        logger.warning(f"[GUARDAR_RESPUESTAS] Opción {opcion_id} no válida")
-                        return Response({
-                            'error': f'Opción {opcion_id} no válida para pregunta {pregunta_id}'
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    # Insertar respuesta
-                    cursor.execute("""
+                # Insertar nuevas respuestas (un solo executemany)
+                if pares:
+                    cursor.executemany("""
                         INSERT INTO tblRespuesta (IntentID, RespValor, RespFechaHora)
                         VALUES (%s, %s, GETDATE())
-                    """, [intento_id, str(opcion_id)])
-                    
-                    respuestas_insertadas += 1
+                    """, [[intento_id, str(opcion_id)] for _, opcion_id in pares])
+                respuestas_insertadas = len(pares)
                 
                 logger.info(f"[GUARDAR_RESPUESTAS] {respuestas_insertadas} respuestas insertadas")
                 
@@ -673,6 +712,20 @@ def guardar_respuestas(request):
                     """, [intento_id])
                     logger.info(f"[GUARDAR_RESPUESTAS] Intento {intento_id} confirmado")
                     
+                    if settings.RECOMENDACIONES_ASINCRONAS:
+                        # Encolar en 'scoring' solo si el intento quedó confirmado
+                        transaction.on_commit(
+                            lambda: procesar_recomendaciones_intento.delay(int(intento_id))
+                        )
+                        logger.info(f"[GUARDAR_RESPUESTAS] Recomendaciones encoladas")
+                        
+                        return Response({
+                            'mensaje': 'Cuestionario completado, generando recomendaciones',
+                            'confirmado': True,
+                            'respuestas_guardadas': respuestas_insertadas,
+                            'recomendaciones_pendientes': True
+                        }, status=status.HTTP_202_ACCEPTED)
+                    
                     # 🤖 PROCESAR RECOMENDACIONES CON IA
                     logger.info(f"[GUARDAR_RESPUESTAS] 🤖 Iniciando motor de IA...")
                     resultado_ia = procesar_recomendaciones_groq(intento_id, usar_ia=True)
@@ -719,6 +772,7 @@ def guardar_respuestas(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@lectura_replica
 def obtener_resultados(request):
     """
     Obtener todos los resultados de cuestionarios completados
@@ -738,12 +792,28 @@ def obtener_resultados(request):
             Estado__EstadoID=2
         ).select_related('Cuest').order_by('-Creado')
         
+        # Recomendaciones de todos los intentos en una sola consulta
+        recomendaciones_por_intento = defaultdict(list)
+        for rec in Recomendacion.objects.filter(
+            Intent__in=intentos
+        ).order_by('Intent_id', '-Score'):
+            recomendaciones_por_intento[rec.Intent_id].append(rec)
+        
+        # Periodos cerrados: sus recomendaciones ya están en el archivo
+        corte = inicio_periodo_actual()
+        archivados = [
+            intento.IntentID for intento in intentos
+            if intento.IntentID not in recomendaciones_por_intento and intento_archivable(intento, corte)
+        ]
+        if archivados:
+            for rec in RecomendacionArchivo.objects.filter(
+                Intent_id__in=archivados
+            ).order_by('Intent_id', '-Score'):
+                recomendaciones_por_intento[rec.Intent_id].append(rec)
+        
         resultados = []
         for intento in intentos:
-            # Obtener recomendaciones del intento
-            recomendaciones = Recomendacion.objects.filter(
-                Intent=intento
-            ).order_by('-Score')[:5]  # Top 5 recomendaciones
+            recomendaciones = recomendaciones_por_intento[intento.IntentID][:5]  # Top 5 recomendaciones
             
             # Calcular score promedio
             score_promedio = 0
@@ -783,6 +853,7 @@ def obtener_resultados(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@lectura_replica
 def obtener_resultado_detalle(request, intento_id):
     """
     Obtener detalle de un resultado específico
@@ -796,7 +867,7 @@ def obtener_resultado_detalle(request, intento_id):
         estudiante = Estudiante.objects.get(User=request.user)
         
         # Obtener el intento
-        intento = Intento.objects.get(
+        intento = Intento.objects.select_related('Cuest').get(
             IntentID=intento_id,
             Estud=estudiante,
             Confirmado=True
@@ -806,15 +877,23 @@ def obtener_resultado_detalle(request, intento_id):
         respuestas = Respuesta.objects.filter(Intent=intento)
         
         # Obtener recomendaciones
-        recomendaciones = Recomendacion.objects.filter(
+        recomendaciones = list(Recomendacion.objects.filter(
             Intent=intento
-        ).order_by('-Score')
+        ).order_by('-Score'))
+        total_respuestas = respuestas.count()
+        
+        # Periodo cerrado: leer del archivo
+        if not recomendaciones and not total_respuestas and intento_archivable(intento):
+            recomendaciones = RecomendacionArchivo.objects.filter(
+                Intent=intento
+            ).order_by('-Score')
+            total_respuestas = RespuestaArchivo.objects.filter(Intent=intento).count()
         
         resultado = {
             'intento_id': intento.IntentID,
             'cuestionario': intento.Cuest.CuestNombre,
             'fecha': intento.Creado.strftime('%Y-%m-%d %H:%M'),
-            'total_respuestas': respuestas.count(),
+            'total_respuestas': total_respuestas,
             'recomendaciones': [
                 {
                     'id': rec.RecomendacionID,
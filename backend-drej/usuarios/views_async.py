@@ -0,0 +1,240 @@
+"""
+Vistas asíncronas (ASGI) para endpoints dominados por IO externo o polling
+Archivo: backend-drej/usuarios/views_async.py
+
+Se sirven con un servidor ASGI (ver drej_backend/asgi.py). Mientras esperan
+a Factiliza o a la base de datos no bloquean un hilo de worker, por lo que
+pocos workers pueden atender cientos de peticiones en vuelo.
+
+DRF no soporta vistas async, por eso se usan vistas Django puras con
+JsonResponse y autenticación JWT manual.
+"""
+import logging
+from collections import defaultdict
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .archivo import inicio_periodo_actual, intento_archivable
+from .http_cliente import obtener_cliente_async
+from .metricas import medir_http
+from .models import Estudiante, Intento, Recomendacion, RecomendacionArchivo
+from .replicas import leer_de_replica
+from .views import FACTILIZA_DNI_URL, construir_respuesta_reniec
+
+logger = logging.getLogger(__name__)
+
+
+async def autenticar_jwt(request):
+    """
+    Autenticar la petición con el mismo JWT que usan las vistas DRF.
+
+    Returns:
+        User autenticado o None
+    """
+    try:
+        resultado = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+
+    if resultado is None:
+        return None
+
+    user, _token = resultado
+    return user
+
+
+def _no_autenticado():
+    return JsonResponse({
+        'detail': 'Las credenciales de autenticación no se proveyeron o son inválidas.'
+    }, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@require_GET
+async def consultar_reniec_async(request, dni):
+    """
+    Consultar datos de una persona por DNI usando Factiliza API (versión async)
+
+    GET /api/async/reniec/consultar/<dni>/
+    """
+    if not dni or len(dni) != 8 or not dni.isdigit():
+        return JsonResponse({
+            "success": False,
+            "message": "DNI inválido. Debe tener 8 dígitos."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    api_token = settings.FACTILIZA_API_TOKEN
+
+    if not api_token:
+        logger.error("[FACTILIZA] Token de API no configurado")
+        return JsonResponse({
+            "success": False,
+            "message": "Servicio de consulta no configurado"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    headers = {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json"
+    }
+
+    try:
+        logger.info(f"[FACTILIZA] Consultando DNI (async): {dni}")
+        cliente = obtener_cliente_async()
+        with medir_http('factiliza'):
+            response = await cliente.get(f"{FACTILIZA_DNI_URL}{dni}", headers=headers)
+
+        body, codigo = construir_respuesta_reniec(
+            dni,
+            response.status_code,
+            response.json() if response.status_code == 200 else None,
+            response.text
+        )
+        return JsonResponse(body, status=codigo)
+
+    except httpx.TimeoutException:
+        logger.error(f"[FACTILIZA] Timeout al consultar DNI: {dni}")
+        return JsonResponse({
+            "success": False,
+            "message": "El servicio tardó demasiado en responder. Intenta nuevamente."
+        }, status=status.HTTP_504_GATEWAY_TIMEOUT)
+
+    except httpx.TransportError:
+        logger.error(f"[FACTILIZA] Error de conexión al consultar DNI: {dni}")
+        return JsonResponse({
+            "success": False,
+            "message": "No se pudo conectar con el servicio de identificación"
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    except Exception as e:
+        logger.error(f"[FACTILIZA] Error inesperado: {str(e)}", exc_info=True)
+        return JsonResponse({
+            "success": False,
+            "message": "Error interno del servidor"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def estado_recomendaciones_async(request, intento_id):
+    """
+    Consultar si las recomendaciones de un intento ya están listas
+    Pensado para polling barato desde el frontend tras confirmar
+
+    GET /api/async/estudiante/resultados/<intento_id>/estado/
+
+    Returns:
+        { "intento_id", "confirmado", "recomendaciones_listas", "total_recomendaciones" }
+    """
+    user = await autenticar_jwt(request)
+    if user is None:
+        return _no_autenticado()
+
+    try:
+        intento = await Intento.objects.only(
+            'IntentID', 'Confirmado'
+        ).aget(IntentID=intento_id, Estud__User_id=user.id)
+
+        total = await Recomendacion.objects.filter(Intent_id=intento.IntentID).acount()
+
+        return JsonResponse({
+            'intento_id': intento.IntentID,
+            'confirmado': intento.Confirmado,
+            'recomendaciones_listas': total > 0,
+            'total_recomendaciones': total
+        }, status=status.HTTP_200_OK)
+
+    except Intento.DoesNotExist:
+        return JsonResponse({
+            'error': 'Intento no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error al consultar estado de recomendaciones: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': 'Error al consultar estado de recomendaciones'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def obtener_resultados_async(request):
+    """
+    Obtener todos los resultados de cuestionarios completados (versión async)
+    Mismo formato que views.obtener_resultados, con las recomendaciones de
+    todos los intentos en una sola consulta
+
+    GET /api/async/estudiante/resultados/
+    """
+    user = await autenticar_jwt(request)
+    if user is None:
+        return _no_autenticado()
+
+    try:
+        # Solo lectura: réplica, salvo que el estudiante acabe de escribir
+        with leer_de_replica(user):
+            estudiante = await Estudiante.objects.only('EstudID').aget(User_id=user.id)
+
+            intentos = [
+                intento async for intento in Intento.objects.filter(
+                    Estud=estudiante,
+                    Confirmado=True,
+                    Estado__EstadoID=2
+                ).select_related('Cuest').order_by('-Creado')
+            ]
+
+            recomendaciones_por_intento = defaultdict(list)
+            async for rec in Recomendacion.objects.filter(
+                Intent_id__in=[i.IntentID for i in intentos]
+            ).order_by('Intent_id', '-Score'):
+                recomendaciones_por_intento[rec.Intent_id].append(rec)
+
+            # Periodos cerrados: sus recomendaciones ya están en el archivo
+            corte = inicio_periodo_actual()
+            archivados = [
+                i.IntentID for i in intentos
+                if i.IntentID not in recomendaciones_por_intento and intento_archivable(i, corte)
+            ]
+            if archivados:
+                async for rec in RecomendacionArchivo.objects.filter(
+                    Intent_id__in=archivados
+                ).order_by('Intent_id', '-Score'):
+                    recomendaciones_por_intento[rec.Intent_id].append(rec)
+
+            resultados = []
+            for intento in intentos:
+                recomendaciones = recomendaciones_por_intento[intento.IntentID][:5]  # Top 5
+
+                scores = [r.Score for r in recomendaciones if r.Score]
+                score_promedio = sum(scores) / len(scores) if scores else 0
+
+                resultados.append({
+                    'id': intento.IntentID,
+                    'test': intento.Cuest.CuestNombre,
+                    'fecha': intento.Creado.strftime('%Y-%m-%d'),
+                    'score': int(score_promedio),
+                    'recomendaciones': [
+                        {
+                            'carrera': rec.Carrera,
+                            'descripcion': rec.Descripcion,
+                            'score': rec.Score,
+                            'nivel': rec.Nivel
+                        }
+                        for rec in recomendaciones
+                    ]
+                })
+
+            return JsonResponse(resultados, safe=False, status=status.HTTP_200_OK)
+
+    except Estudiante.DoesNotExist:
+        return JsonResponse({
+            'error': 'Estudiante no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error al obtener resultados: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': 'Error al obtener resultados'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -3,26 +3,41 @@ Backend Django - Views para Dashboard de Orientadores
 Archivo: backend-drej/usuarios/views_orientador.py
 """
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Count, Q
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 
 from .models import (
     Estudiante, 
     Orientador,
+    InstitucionEducativa,
     Cuestionario, 
     Pregunta, 
     Opcion,
     Intento,
     Respuesta, 
     Recomendacion,
-    EstadoIntento
+    RecomendacionArchivo,
+    EstadoIntento,
+    Filtro
 )
+from . import cohortes, exportacion, filtros, importacion
+from .archivo import intento_archivable
+from .catalogos import ESTADO_VERIF_APROBADO, NIVEL_RIESGO_ALTO, NIVEL_RIESGO_BAJO, NIVEL_RIESGO_MEDIO
+from .cuestionarios import invalidar_cuestionario
+from .replicas import alias_lectura, lectura_replica
+
+# Filas por INSERT masivo (4 columnas: bajo el límite de 2100 parámetros de SQL Server)
+LOTE_OPCIONES = 500
 
 
 # ========================================
@@ -31,6 +46,7 @@ from .models import (
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@lectura_replica
 def obtener_dashboard_orientador(request):
     """
     Obtiene estadísticas generales para el dashboard del orientador
@@ -44,7 +60,7 @@ def obtener_dashboard_orientador(request):
         
         # Obtener el registro de Orientador
         try:
-            orientador = Orientador.objects.get(User=user)
+            orientador = Orientador.objects.select_related('Insti').get(User=user)
         except Orientador.DoesNotExist:
             return Response(
                 {'error': 'Solo los orientadores pueden acceder a este dashboard'},
@@ -54,33 +70,41 @@ def obtener_dashboard_orientador(request):
         # Obtener institución del orientador
         institucion = orientador.Insti
         
-        # Contar estudiantes de la misma institución
-        total_estudiantes = Estudiante.objects.filter(
-            Insti=institucion
-        ).count()
+        # Contar estudiantes de la misma institución por nivel de riesgo
+        # (una sola consulta; el total es la suma)
+        por_nivel = dict(
+            Estudiante.objects.filter(Insti=institucion)
+            .values('NivelRiesgo_id').annotate(total=Count('EstudID'))
+            .values_list('NivelRiesgo_id', 'total')
+        )
+        total_estudiantes = sum(por_nivel.values())
+        riesgo = {
+            'bajo': por_nivel.get(NIVEL_RIESGO_BAJO, 0),
+            'medio': por_nivel.get(NIVEL_RIESGO_MEDIO, 0),
+            'alto': por_nivel.get(NIVEL_RIESGO_ALTO, 0),
+            'sin_clasificar': por_nivel.get(None, 0),
+        }
         
         # Contar cuestionarios activos
         cuestionarios_activos = Cuestionario.objects.filter(
             CuestActivo=True
         ).count()
         
-        # Respuestas de hoy
-        hoy = timezone.now().date()
+        # Respuestas de hoy: rango sobre la columna (RespFechaHora__date
+        # obliga a convertir cada fila y no aprovecha índices)
+        inicio_hoy = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
         respuestas_hoy = Respuesta.objects.filter(
-            RespFechaHora__date=hoy
+            RespFechaHora__gte=inicio_hoy,
+            RespFechaHora__lt=inicio_hoy + timedelta(days=1)
         ).count()
         
         # Promedio de completitud (intentos completados vs total estudiantes)
         # Estado 2 = Completado (ajusta según tu tabla EstadoIntento)
-        try:
-            estado_completado = EstadoIntento.objects.get(EstadoID=2)
-            intentos_completados = Intento.objects.filter(
-                Estud__Insti=institucion,
-                Estado=estado_completado,
-                Confirmado=True
-            ).values('Estud').distinct().count()
-        except:
-            intentos_completados = 0
+        intentos_completados = Intento.objects.filter(
+            Estud__Insti=institucion,
+            Estado__EstadoID=2,
+            Confirmado=True
+        ).values('Estud').distinct().count()
         
         promedio_completitud = 0
         if total_estudiantes > 0:
@@ -90,51 +114,45 @@ def obtener_dashboard_orientador(request):
             )
         
         # Cuestionarios recientes con estadísticas
-        cuestionarios = Cuestionario.objects.all().order_by('-CuestID')[:5]
+        # (intentos únicos por estudiante de la institución, en la misma consulta)
+        cuestionarios = Cuestionario.objects.annotate(
+            total_intentos=Count(
+                'intento__Estud',
+                filter=Q(intento__Estud__Insti=institucion),
+                distinct=True
+            )
+        ).order_by('-CuestID')[:5]
         cuestionarios_data = []
         
         for cuest in cuestionarios:
-            # Contar intentos únicos por estudiante
-            total_intentos = Intento.objects.filter(
-                Cuest=cuest,
-                Estud__Insti=institucion
-            ).values('Estud').distinct().count()
-            
             cuestionarios_data.append({
                 'id': cuest.CuestID,
                 'titulo': cuest.CuestNombre,
                 'version': cuest.CuestVersion,
                 'activo': cuest.CuestActivo,
-                'respuestas_totales': total_intentos
+                'respuestas_totales': cuest.total_intentos
             })
         
         # Actividad reciente (últimos 7 días)
         hace_7_dias = timezone.now() - timedelta(days=7)
         
-        # Obtener intentos completados recientes
-        try:
-            estado_completado = EstadoIntento.objects.get(EstadoID=2)
-            actividad_reciente = Intento.objects.filter(
-                Estud__Insti=institucion,
-                Estado=estado_completado,
-                Confirmado=True,
-                Creado__gte=hace_7_dias
-            ).select_related('Estud', 'Cuest').order_by('-Creado')[:10]
-        except:
-            actividad_reciente = []
+        # Obtener intentos completados recientes con su número de recomendaciones
+        actividad_reciente = Intento.objects.filter(
+            Estud__Insti=institucion,
+            Estado__EstadoID=2,
+            Confirmado=True,
+            Creado__gte=hace_7_dias
+        ).select_related('Estud', 'Cuest').annotate(
+            num_recomendaciones=Count('recomendacion')
+        ).order_by('-Creado')[:10]
         
         actividad_data = []
         for intento in actividad_reciente:
-            # Contar recomendaciones para este intento
-            num_recomendaciones = Recomendacion.objects.filter(
-                Intent=intento
-            ).count()
-            
             actividad_data.append({
                 'estudiante': f"{intento.Estud.EstudNombres} {intento.Estud.EstudApellidoPaterno}",
                 'cuestionario': intento.Cuest.CuestNombre,
                 'fecha': intento.Creado,
-                'recomendaciones': num_recomendaciones
+                'recomendaciones': intento.num_recomendaciones
             })
         
         data = {
@@ -144,6 +162,7 @@ def obtener_dashboard_orientador(request):
                 'respuestas_hoy': respuestas_hoy,
                 'promedio_completitud': promedio_completitud
             },
+            'riesgo': riesgo,
             'cuestionarios_recientes': cuestionarios_data,
             'actividad_reciente': actividad_data,
             'nombre': f"{orientador.OrienNombres} {orientador.OrienApellidoPaterno}",
@@ -168,6 +187,7 @@ def obtener_dashboard_orientador(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@lectura_replica
 def listar_cuestionarios_orientador(request):
     """
     Lista todos los cuestionarios con estadísticas detalladas
@@ -186,38 +206,39 @@ def listar_cuestionarios_orientador(request):
         
         cuestionarios = Cuestionario.objects.all().order_by('-CuestID')
         
+        # Conteos agrupados por cuestionario: una consulta por métrica,
+        # no una por cuestionario
+        intentos_unicos = dict(
+            Intento.objects.values('Cuest')
+            .annotate(total=Count('Estud', distinct=True))
+            .values_list('Cuest', 'total')
+        )
+        
+        # Estado 2 = Completado
+        completados = dict(
+            Intento.objects.filter(Estado__EstadoID=2, Confirmado=True)
+            .values('Cuest')
+            .annotate(total=Count('IntentID'))
+            .values_list('Cuest', 'total')
+        )
+        
+        preguntas_activas = dict(
+            Pregunta.objects.filter(PregActiva=True)
+            .values('Cuest')
+            .annotate(total=Count('PregID'))
+            .values_list('Cuest', 'total')
+        )
+        
         data = []
         for cuest in cuestionarios:
-            # Contar intentos únicos
-            total_intentos = Intento.objects.filter(
-                Cuest=cuest
-            ).values('Estud').distinct().count()
-            
-            # Contar intentos completados
-            try:
-                estado_completado = EstadoIntento.objects.get(EstadoID=2)
-                intentos_completados = Intento.objects.filter(
-                    Cuest=cuest,
-                    Estado=estado_completado,
-                    Confirmado=True
-                ).count()
-            except:
-                intentos_completados = 0
-            
-            # Contar número de preguntas
-            num_preguntas = Pregunta.objects.filter(
-                Cuest=cuest,
-                PregActiva=True
-            ).count()
-            
             data.append({
                 'id': cuest.CuestID,
                 'titulo': cuest.CuestNombre,
                 'version': cuest.CuestVersion,
-                'num_preguntas': num_preguntas,
+                'num_preguntas': preguntas_activas.get(cuest.CuestID, 0),
                 'activo': cuest.CuestActivo,
-                'respuestas_totales': total_intentos,
-                'resultados_completados': intentos_completados
+                'respuestas_totales': intentos_unicos.get(cuest.CuestID, 0),
+                'resultados_completados': completados.get(cuest.CuestID, 0)
             })
         
         return Response(data, status=status.HTTP_200_OK)
@@ -283,9 +304,7 @@ def crear_cuestionario(request):
         
         print(f"✅ Cuestionario creado: {cuestionario.CuestID}")
         
-        preguntas_creadas = []
-        opciones_creadas_total = 0
-        
+        preguntas = []
         for pregunta_data in data['preguntas']:
             # Crear la pregunta
             pregunta = Pregunta.objects.create(
@@ -296,26 +315,36 @@ def crear_cuestionario(request):
                 PregCategoria=pregunta_data.get('categoria', 'General'),
                 PregActiva=True
             )
+            preguntas.append(pregunta)
             
             print(f"✅ Pregunta creada: {pregunta.PregID} - {pregunta.PregTexto[:50]}")
-            
-            # ✅ CREAR LAS 5 OPCIONES FIJAS PARA CADA PREGUNTA
-            opciones_creadas = []
-            for opcion_likert in OPCIONES_LIKERT:
-                opcion = Opcion.objects.create(
-                    Preg=pregunta,
-                    OpcionTexto=opcion_likert['texto'],
-                    OpcionValor=opcion_likert['valor'],
-                    OpcionOrden=opcion_likert['orden']
-                )
-                opciones_creadas.append({
-                    'id': opcion.OpcionID,
-                    'texto': opcion.OpcionTexto,
-                    'valor': opcion.OpcionValor
-                })
-                opciones_creadas_total += 1
-            
-            print(f"   ✅ {len(opciones_creadas)} opciones creadas para pregunta {pregunta.PregID}")
+        
+        # ✅ CREAR LAS 5 OPCIONES FIJAS PARA CADA PREGUNTA (un solo INSERT por lote)
+        Opcion.objects.bulk_create([
+            Opcion(
+                Preg=pregunta,
+                OpcionTexto=opcion_likert['texto'],
+                OpcionValor=opcion_likert['valor'],
+                OpcionOrden=opcion_likert['orden']
+            )
+            for pregunta in preguntas
+            for opcion_likert in OPCIONES_LIKERT
+        ], batch_size=LOTE_OPCIONES)
+        
+        # Releer los IDs: no todos los backends los devuelven en bulk_create
+        opciones_por_pregunta = {}
+        for opcion in Opcion.objects.filter(Preg__Cuest=cuestionario).order_by('Preg_id', 'OpcionOrden'):
+            opciones_por_pregunta.setdefault(opcion.Preg_id, []).append({
+                'id': opcion.OpcionID,
+                'texto': opcion.OpcionTexto,
+                'valor': opcion.OpcionValor
+            })
+        
+        preguntas_creadas = []
+        opciones_creadas_total = 0
+        for pregunta in preguntas:
+            opciones_creadas = opciones_por_pregunta.get(pregunta.PregID, [])
+            opciones_creadas_total += len(opciones_creadas)
             
             preguntas_creadas.append({
                 'id': pregunta.PregID,
@@ -379,6 +408,7 @@ def actualizar_cuestionario(request, cuestionario_id):
             cuestionario.CuestActivo = data['activo']
         
         cuestionario.save()
+        invalidar_cuestionario(cuestionario.CuestID)
         
         return Response({
             'mensaje': 'Cuestionario actualizado exitosamente',
@@ -433,6 +463,7 @@ def eliminar_cuestionario(request, cuestionario_id):
             )
         
         cuestionario.delete()
+        invalidar_cuestionario(cuestionario_id)
         
         return Response(
             {'mensaje': 'Cuestionario eliminado exitosamente'},
@@ -498,9 +529,21 @@ def reiniciar_cuestionario(request, cuestionario_id):
         # Guardar razón si se proporciona
         razon = request.data.get('razon', '')
         
-        # Marcar intento anterior como no confirmado (mantener historial)
-        intento_anterior.Confirmado = False
-        intento_anterior.save()
+        # Si ya hay un intento en progreso (reinicio repetido o iniciado
+        # desde otra pestaña) no se toca otro: UX_Intento_en_progreso solo
+        # admite uno sin confirmar por estudiante y cuestionario
+        en_progreso = Intento.objects.filter(
+            Estud=estudiante,
+            Cuest=cuestionario,
+            Confirmado=False
+        ).exists()
+        
+        # Un intento de un periodo cerrado ya está en el archivo: se conserva
+        # confirmado y iniciar_cuestionario crea uno nuevo
+        if not en_progreso and not intento_archivable(intento_anterior):
+            # Marcar intento anterior como no confirmado (mantener historial)
+            intento_anterior.Confirmado = False
+            intento_anterior.save()
         
         # Nota: Las respuestas y recomendaciones se mantienen por el historial
         # Solo permitimos que vuelva a responder
@@ -565,10 +608,14 @@ def verificar_puede_retomar(request, cuestionario_id):
                 'mensaje': 'No has completado este cuestionario anteriormente'
             }, status=status.HTTP_200_OK)
         
-        # Contar recomendaciones
+        # Contar recomendaciones (en el archivo si es de un periodo cerrado)
         recomendaciones_count = Recomendacion.objects.filter(
             Intent=intento_anterior
         ).count()
+        if not recomendaciones_count and intento_archivable(intento_anterior):
+            recomendaciones_count = RecomendacionArchivo.objects.filter(
+                Intent=intento_anterior
+            ).count()
         
         return Response({
             'puede_retomar': True,
@@ -591,4 +638,392 @@ def verificar_puede_retomar(request, cuestionario_id):
         return Response(
             {'error': 'Error al verificar el estado del cuestionario'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+# ========================================
+# IMPORTACIÓN MASIVA DE ESTUDIANTES
+# ========================================
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def importar_estudiantes(request):
+    """
+    Importa estudiantes desde un archivo CSV/XLSX (campo 'archivo')
+    
+    - Orientador verificado: importa en su propia institución
+    - Admin (is_staff): debe indicar 'insti_id'
+    
+    Devuelve en streaming un reporte CSV con una fila por estudiante
+    (fila, dni, estado, mensaje, password_inicial)
+    """
+    try:
+        user = request.user
+        
+        if user.is_staff:
+            insti_id = request.data.get('insti_id')
+            if not insti_id or not str(insti_id).isdigit():
+                return Response(
+                    {'error': 'insti_id es obligatorio para administradores'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            try:
+                orientador = Orientador.objects.only('Insti_id', 'EstadoVerif_id').get(User=user)
+            except Orientador.DoesNotExist:
+                return Response(
+                    {'error': 'Solo orientadores o administradores pueden importar estudiantes'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            # Crea cuentas y devuelve sus contraseñas: no para un registro sin revisar
+            if orientador.EstadoVerif_id != ESTADO_VERIF_APROBADO:
+                return Response(
+                    {'error': 'Su cuenta de orientador aún no está verificada'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            insti_id = orientador.Insti_id
+        
+        # Antes de leer el archivo: sin esto cada fila fallaría por la FK de InstiID
+        if insti_id is None or not InstitucionEducativa.objects.filter(InstiID=int(insti_id)).exists():
+            return Response(
+                {'error': 'Institución no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response(
+                {'error': 'Debe adjuntar un archivo CSV o XLSX en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            filas = importacion.leer_archivo(archivo.read(), archivo.name)
+        except (importacion.ImportacionError, UnicodeDecodeError) as e:
+            return Response(
+                {'error': f'No se pudo leer el archivo: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_filas = getattr(settings, 'IMPORTACION_MAX_FILAS', 5000)
+        if len(filas) > max_filas:
+            return Response(
+                {'error': f'El archivo supera el máximo de {max_filas} filas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        respuesta = StreamingHttpResponse(
+            importacion.reporte_csv(importacion.importar_estudiantes(filas, int(insti_id))),
+            content_type='text/csv; charset=utf-8'
+        )
+        respuesta['Content-Disposition'] = 'attachment; filename="reporte_importacion.csv"'
+        return respuesta
+        
+    except Exception as e:
+        print(f"Error en importar_estudiantes: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al importar estudiantes'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ========================================
+# EXPORTACIÓN DE RESULTADOS
+# ========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@lectura_replica
+def exportar_resultados(request):
+    """
+    Exporta los resultados de la institución: una fila por intento confirmado
+    con puntajes por categoría y recomendaciones (usuarios/exportacion.py)
+    
+    - Orientador verificado: su propia institución
+    - Admin (is_staff): debe indicar 'insti_id'
+    - ?formato=csv (por defecto, en streaming) o xlsx
+    """
+    try:
+        user = request.user
+        
+        if user.is_staff:
+            insti_id = request.query_params.get('insti_id')
+            if not insti_id or not str(insti_id).isdigit():
+                return Response(
+                    {'error': 'insti_id es obligatorio para administradores'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            try:
+                orientador = Orientador.objects.only('Insti_id', 'EstadoVerif_id').get(User=user)
+            except Orientador.DoesNotExist:
+                return Response(
+                    {'error': 'Solo orientadores o administradores pueden exportar resultados'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            # DNI, nombres y fechas de nacimiento de toda la institución
+            if orientador.EstadoVerif_id != ESTADO_VERIF_APROBADO:
+                return Response(
+                    {'error': 'Su cuenta de orientador aún no está verificada'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            insti_id = orientador.Insti_id
+        
+        if insti_id is None or not InstitucionEducativa.objects.filter(InstiID=int(insti_id)).exists():
+            return Response(
+                {'error': 'Institución no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in ('csv', 'xlsx'):
+            return Response(
+                {'error': 'formato debe ser csv o xlsx'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # El generador corre después de que la vista retorna, fuera de
+        # @lectura_replica: fijar aquí la base de la que lee
+        filas = exportacion.filas_resultados(int(insti_id), alias=alias_lectura())
+        nombre = f"resultados_{insti_id}_{timezone.localdate():%Y%m%d}"
+        
+        if formato == 'xlsx':
+            try:
+                archivo = exportacion.exportar_xlsx(filas)
+            except exportacion.ExportacionError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return FileResponse(
+                archivo, as_attachment=True, filename=f"{nombre}.xlsx",
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        
+        respuesta = StreamingHttpResponse(
+            exportacion.exportar_csv(filas),
+            content_type='text/csv; charset=utf-8'
+        )
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+        return respuesta
+        
+    except Exception as e:
+        print(f"Error en exportar_resultados: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al exportar resultados'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ========================================
+# FILTROS GUARDADOS
+# ========================================
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def filtros_orientador(request):
+    """
+    GET: filtros guardados del orientador
+    POST: guardar un filtro y evaluarlo (usuarios/filtros.py)
+    
+    Body: nombre, edad ('15', '15-17', '16+'), nivel_riesgo (1, 2 o 3)
+    (genero, institucion y ubicacion se rechazan: ver usuarios/filtros.py)
+    """
+    try:
+        try:
+            orientador = Orientador.objects.only('OrienID', 'Insti_id').get(User=request.user)
+        except Orientador.DoesNotExist:
+            return Response(
+                {'error': 'Solo los orientadores pueden guardar filtros'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if request.method == 'GET':
+            guardados = Filtro.objects.filter(Orien_id=orientador.OrienID).order_by('-FiltroID')
+            return Response(
+                {'filtros': [filtros.filtro_a_dict(filtro) for filtro in guardados]},
+                status=status.HTTP_200_OK
+            )
+        
+        filtro = Filtro(Orien_id=orientador.OrienID)
+        try:
+            filtros.asignar_criterios(filtro, request.data)
+        except filtros.FiltroError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            filtro.save()
+            total = filtros.reconstruir(filtro, orientador.Insti_id)
+        
+        return Response(
+            {'filtro': filtros.filtro_a_dict(filtro), 'total_resultados': total},
+            status=status.HTTP_201_CREATED
+        )
+        
+    except Exception as e:
+        print(f"Error en filtros_orientador: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al procesar los filtros'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def filtro_orientador(request, filtro_id):
+    """
+    PUT: cambiar los criterios de un filtro propio (se reevalúa desde cero)
+    DELETE: borrar el filtro y sus resultados
+    """
+    try:
+        try:
+            filtro = Filtro.objects.select_related('Orien').get(FiltroID=filtro_id, Orien__User=request.user)
+        except Filtro.DoesNotExist:
+            return Response({'error': 'Filtro no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.method == 'DELETE':
+            filtros.eliminar(filtro.FiltroID)
+            return Response({'mensaje': 'Filtro eliminado'}, status=status.HTTP_200_OK)
+        
+        try:
+            filtros.asignar_criterios(filtro, request.data)
+        except filtros.FiltroError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            filtro.save()
+            total = filtros.reconstruir(filtro, filtro.Orien.Insti_id)
+        
+        return Response(
+            {'filtro': filtros.filtro_a_dict(filtro), 'total_resultados': total},
+            status=status.HTTP_200_OK
+        )
+        
+    except Exception as e:
+        print(f"Error en filtro_orientador: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al actualizar el filtro'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@lectura_replica
+def resultados_filtro(request, filtro_id):
+    """
+    Recomendaciones que cumplen un filtro guardado, de la más reciente a la
+    más antigua. Lee los resultados ya evaluados (tblFiltroRecomendacion).
+    
+    Query params:
+        antes_de: 'siguiente' de la página anterior
+        limite: resultados por página (máximo 200)
+    """
+    try:
+        try:
+            filtro = Filtro.objects.get(FiltroID=filtro_id, Orien__User=request.user)
+        except Filtro.DoesNotExist:
+            return Response({'error': 'Filtro no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            antes_de = int(request.query_params.get('antes_de') or 0) or None
+            limite = int(request.query_params.get('limite') or filtros.RESULTADOS_POR_PAGINA)
+        except ValueError:
+            return Response(
+                {'error': 'antes_de y limite deben ser enteros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resultados, siguiente = filtros.pagina_resultados(filtro.FiltroID, antes_de, limite)
+        return Response({
+            'filtro': filtros.filtro_a_dict(filtro),
+            'resultados': resultados,
+            'siguiente': siguiente
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Error en resultados_filtro: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al obtener los resultados del filtro'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@lectura_replica
+def analitica_cohorte(request):
+    """
+    Distribución de puntajes, carreras más recomendadas, curva de
+    completitud y desglose por edad de una cohorte (usuarios/cohortes.py)
+    
+    Query params:
+        nivel: institucion (por defecto), distrito, provincia o region
+        edad: '15', '15-17' o '16+' (opcional)
+        valor: solo administradores (is_staff); el orientador ve la cohorte
+               de su propia institución en el nivel pedido
+        provincia, region: solo administradores, para calificar el distrito
+               (provincia y region) o la provincia (region): hay nombres
+               repetidos entre regiones
+    """
+    try:
+        user = request.user
+        nivel = request.query_params.get('nivel', 'institucion').lower()
+        edad = request.query_params.get('edad') or None
+        
+        if nivel not in cohortes.NIVELES:
+            return Response(
+                {'error': f"nivel debe ser uno de: {', '.join(cohortes.NIVELES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if user.is_staff:
+            parametros = ['valor'] + [cohortes.CALIFICADORES[campo] for campo in cohortes.NIVELES[nivel][1:]]
+            valor = tuple(request.query_params.get(parametro) for parametro in parametros)
+            if not all(valor) or (nivel == 'institucion' and not str(valor[0]).isdigit()):
+                return Response(
+                    {'error': f"{', '.join(parametros)} obligatorios para administradores "
+                              "(valor es el InstiID si nivel=institucion)"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if nivel == 'institucion':
+                valor = (int(valor[0]),)
+        else:
+            try:
+                orientador = Orientador.objects.select_related('Insti').get(User=user)
+            except Orientador.DoesNotExist:
+                return Response(
+                    {'error': 'Solo orientadores o administradores pueden ver la analítica'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            if orientador.Insti is None:
+                return Response(
+                    {'error': 'El orientador no tiene institución asignada'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            valor = cohortes.valor_de_institucion(nivel, orientador.Insti)
+        
+        try:
+            # El SQL crudo de la matriz de puntajes lee del alias explícito
+            data = cohortes.analitica(nivel, valor, edad, alias=alias_lectura())
+        except cohortes.CohorteError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(data, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Error en analitica_cohorte: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return Response(
+            {'error': 'Error al calcular la analítica de la cohorte'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -50,22 +50,28 @@ const Cuestionario = () => {
         try {
             setLoading(true);
             
-            // Iniciar intento
-            const intentoData = await cuestionariosAPI.iniciarCuestionario(parseInt(id));
-            setIntentoId(intentoData.intento_id);
+            // Intento, cuestionario y respuestas guardadas en una sola llamada
+            const datos = await cuestionariosAPI.retomarCuestionario(parseInt(id));
+            setIntentoId(datos.intento_id);
+            setCuestionario(datos.cuestionario);
             
-            // Obtener cuestionario completo
-            const cuest = await cuestionariosAPI.obtenerCuestionario(parseInt(id));
-            setCuestionario(cuest);
-            
-            // Intentar recuperar progreso guardado
-            const progresoLocal = recuperarProgresoLocal(intentoData.intento_id);
-            if (progresoLocal && progresoLocal.length > 0) {
+            // Recuperar progreso: primero lo guardado en el servidor, si no
+            // lo del navegador
+            if (Object.keys(datos.respuestas).length > 0) {
                 const respuestasObj = {};
-                progresoLocal.forEach(r => {
-                    respuestasObj[r.pregunta_id] = r.opcion_id;
+                Object.entries(datos.respuestas).forEach(([pregId, opcId]) => {
+                    respuestasObj[parseInt(pregId)] = opcId;
                 });
                 setRespuestas(respuestasObj);
+            } else {
+                const progresoLocal = recuperarProgresoLocal(datos.intento_id);
+                if (progresoLocal && progresoLocal.length > 0) {
+                    const respuestasObj = {};
+                    progresoLocal.forEach(r => {
+                        respuestasObj[r.pregunta_id] = r.opcion_id;
+                    });
+                    setRespuestas(respuestasObj);
+                }
             }
             
         } catch (err) {
@@ -73,6 +73,25 @@ export const cuestionariosAPI = {
         }
     },
 
+    /**
+     * Abrir o retomar un cuestionario en una sola llamada
+     * @param {number} cuestionarioId - ID del cuestionario
+     * @returns {Promise} { intento_id, nuevo, cuestionario, respuestas: {pregunta_id: opcion_id} }
+     */
+    retomarCuestionario: async (cuestionarioId) => {
+        try {
+            const response = await axios.post(
+                `${API_BASE_URL}/estudiante/cuestionarios/${cuestionarioId}/retomar/`,
+                {},
+                getAuthHeader()
+            );
+            return response.data;
+        } catch (error) {
+            console.error('Error al retomar cuestionario:', error);
+            throw error;
+        }
+    },
+
     /**
      * Iniciar un nuevo intento de cuestionario
      * @param {number} cuestionarioId - ID del cuestionario